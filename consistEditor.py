@@ -1,4809 +1,6026 @@
-#!/usr/bin/env python3
-import argparse
-import json
-import logging
-import re
-import time
-from collections import defaultdict, Counter
-from dataclasses import dataclass, field
-from difflib import SequenceMatcher
-from enum import Enum, auto
-from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Union, Any
-import sys
-import hashlib
-import os
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
-import threading
-from abc import ABC, abstractmethod
-import multiprocessing
-
-# PERFORMANCE OPTIMIZATION: Pre-compile frequently used regex patterns
-_REGEX_CACHE = {}
-
-# PERFORMANCE OPTIMIZATION: Cache for alias normalization
-_ALIAS_CACHE = {}
-
-def get_compiled_regex(pattern: str, flags=0) -> re.Pattern:
-    """Get cached compiled regex pattern to avoid recompilation."""
-    key = (pattern, flags)
-    if key not in _REGEX_CACHE:
-        _REGEX_CACHE[key] = re.compile(pattern, flags)
-    return _REGEX_CACHE[key]
-
-# PERFORMANCE OPTIMIZATION: Pre-compile locomotive patterns
-_LOCO_PATTERNS = [
-    # WDG series - Goods locomotives
-    r'(?i)(wdg[\-_]?(?:3a?|4(?:d|g)?|5))(?:[\-_]?[a-z0-9]*)*',
-    # WDM series - Mixed locomotives  
-    r'(?i)(wdm[\-_]?(?:2(?:a|b|c)?|3(?:a|b|c|d|f)?|7|16847|18500))(?:[\-_]?[a-z0-9]*)*',
-    # WAP series - Passenger locomotives
-    r'(?<![A-Za-z0-9])(wap(?:1|4(?:e)?|5|7))(?![A-Za-z0-9])',
-    # WAG series - Goods locomotives
-    r'(?<![A-Za-z0-9])(wag(?:5(?:a?|d|e|h|p)?|7|9(?:h)?|12))(?![A-Za-z0-9])',
-    # WDP series - Shunting locomotives
-    r'(?<![A-Za-z0-9])(wdp(?:1|2(?:a)?|3a?|4(?:b|d)?))(?![A-Za-z0-9])',
-    # WCAM series - AC Mixed locomotives
-    r'(?<![A-Za-z0-9])(wcam(?:1|2p?|3))(?![A-Za-z0-9])',
-    # WCG series - Goods locomotives
-    r'(?<![A-Za-z0-9])(wcg(?:1|2))(?![A-Za-z0-9])',
-    # WCM series - Mixed locomotives
-    r'(?<![A-Za-z0-9])(wcm(?:|1|6))(?![A-Za-z0-9])',
-    # WAM series - AC Mixed locomotives
-    r'(?<![A-Za-z0-9])(wam(?:4(?:6p)?))(?![A-Za-z0-9])',
-    # Vande Bharat engines
-    r'(?<![A-Za-z0-9])vbdc(?![A-Za-z0-9])',
-    r'(?<![A-Za-z0-9])vbdmc(?![A-Za-z0-9])',
-    # Other locomotives
-    r'(?<![A-Za-z0-9])(ydm4)(?![A-Za-z0-9])',
-    r'(?<![A-Za-z0-9])(zdm506)(?![A-Za-z0-9])',
-]
-
-_COMPILED_LOCO_PATTERNS = [get_compiled_regex(pattern) for pattern in _LOCO_PATTERNS]
-
-# PERFORMANCE OPTIMIZATION: Pre-compile common regex patterns
-_NORMALIZE_PATTERN = get_compiled_regex(r'[^a-z0-9]+')
-_TOKENIZE_PATTERN = get_compiled_regex(r'[a-z0-9]+')
-
-try:
-    from fuzzywuzzy import fuzz, process
-
-    FUZZYWUZZY_AVAILABLE = True
-except ImportError:
-    FUZZYWUZZY_AVAILABLE = False
-    # Suppress the warning - fallback works fine
-
-try:
-    import colorama
-    from colorama import Fore, Back, Style
-
-    colorama.init(autoreset=True)
-    COLORS_AVAILABLE = True
-except ImportError:
-    COLORS_AVAILABLE = False
-
-    # Fallback color class - no warning needed
-    class _DummyColor:
-        def __getattr__(self, name):
-            return ""
-
-    Fore = Back = Style = _DummyColor()
-
-
-class AssetKind(Enum):
-    """Asset type enumeration."""
-
-    ENGINE = "Engine"
-    WAGON = "Wagon"
-
-
-class MatchPhase(Enum):
-    """Asset resolution phase enumeration."""
-
-    EXACT_NAME = auto()
-    EXACT_NORM = auto()
-    DIGIT_NEAR = auto()
-    LOCAL_FOLDER = auto()
-    IR_COMPOSITE = auto()
-    WILDCARD_MATCH = auto()
-    KEY_TOKEN_ALL = auto()
-    KEY_TOKEN_PARTIAL = auto()
-    FOLDER_SCORE = auto()
-    GLOBAL_SCORE = auto()
-    SEMANTIC_MATCH = auto()
-    DEFAULT_ENGINE = auto()
-    DEFAULT_WAGON = auto()
-    UNRESOLVED = auto()
-
-
-class TractionType(Enum):
-    """Locomotive traction type."""
-
-    ELECTRIC = "Electric"
-    DIESEL = "Diesel"
-    STEAM = "Steam"
-    UNKNOWN = "Unknown"
-
-
-@dataclass
-class ScoreConfig:
-    """Scoring configuration for asset matching."""
-
-    # Basic scoring
-    norm_exact_bonus: int = 60
-    jaccard_multiplier: int = 100
-
-    # Engine scoring
-    engine_series_match: int = 140
-    engine_series_mismatch: int = -80
-    engine_class_match: int = 90
-    engine_class_mismatch: int = -70
-    engine_family_match: int = 50
-    engine_family_mismatch: int = -25
-    traction_match: int = 40
-    traction_mismatch: int = -150
-
-    # Coach/wagon scoring
-    coach_type_match: int = 120
-    coach_type_mismatch: int = -200
-    freight_type_match: int = 110
-    freight_type_mismatch: int = -55
-    carbody_match: int = 70
-    carbody_mismatch: int = -40
-    set_type_match: int = 50
-
-    # Penalty/bonus system
-    passenger_freight_mismatch: int = -800
-    unit_type_mismatch: int = -150
-    default_penalty: int = -100
-    non_default_bonus: int = 50
-
-    # Token matching bonuses
-    key_token_all_bonus: int = 60
-    key_token_partial_bonus: int = 45
-    ir_composite_bonus: int = 180
-    digit_near_bonus: int = 120
-
-    # Geographic and technical matching
-    region_match: int = 40
-    depot_match: int = 35
-    tech_spec_match: int = 50
-    manufacturer_match: int = 65
-    region_mismatch: int = -15
-    depot_mismatch: int = -10
-    tech_spec_mismatch: int = -20
-    manufacturer_mismatch: int = -25
-
-    # Minimum score thresholds
-    min_token_score: int = 150
-    partial_coverage_threshold: float = 0.6
-    near_digit_max_diff: int = 5
-
-
-@dataclass
-class AssetMetadata:
-    """Metadata extracted from asset names and folders."""
-
-    kind: AssetKind
-    name: str
-    folder: str = ""
-    normalized: str = ""
-    tokens: Set[str] = field(default_factory=set)
-    core_tokens: Set[str] = field(default_factory=set)
-
-    # Engine-specific attributes
-    engine_class: str = ""
-    engine_series: str = ""
-    engine_family: str = ""
-    traction: TractionType = TractionType.UNKNOWN
-    is_unit: bool = False
-
-    # Wagon-specific attributes
-    coach_type: str = ""
-    freight_type: str = ""
-    carbody: str = ""
-    set_type: str = ""
-
-    # Geographic and technical attributes
-    region: str = ""
-    depot: str = ""
-    tech_spec: str = ""
-    manufacturer: str = ""
-
-    # Additional metadata
-    variant: Optional[int] = None
-    livery: str = ""
-
-    def __post_init__(self):
-        """Post-initialization processing."""
-        if not self.normalized:
-            self.normalized = self._normalize_name()
-        if not self.tokens:
-            self.tokens = self._extract_tokens()
-        if not self.core_tokens:
-            self.core_tokens = self._extract_core_tokens()
-
-    def get(self, key: str, default=None):
-        """Dictionary-like access for backward compatibility."""
-        return getattr(self, key, default)
-
-    def _normalize_name(self) -> str:
-        """Normalize asset name for comparison."""
-        # Convert to lowercase and replace non-alphanumeric with spaces
-        normalized = re.sub(r"[^a-z0-9]+", " ", self.name.lower())
-        # Remove extra whitespace
-        return " ".join(normalized.split())
-
-    def _extract_tokens(self) -> Set[str]:
-        """Extract tokens from name and folder."""
-        tokens = set()
-        # Extract from name
-        name_tokens = _TOKENIZE_PATTERN.findall(self.normalized)
-        tokens.update(name_tokens)
-        # Extract from folder
-        if self.folder:
-            folder_norm = re.sub(r"[^a-z0-9]+", " ", self.folder.lower())
-            folder_tokens = _TOKENIZE_PATTERN.findall(folder_norm)
-            tokens.update(f"f:{token}" for token in folder_tokens)
-        return tokens
-
-    def _extract_core_tokens(self) -> Set[str]:
-        """Extract core classification tokens."""
-        core = set()
-        for attr in [
-            "engine_class",
-            "engine_series",
-            "coach_type",
-            "freight_type",
-            "carbody",
-            "set_type",
-        ]:
-            value = getattr(self, attr)
-            if value:
-                core.add(value.lower())
-        return core
-
-
-@dataclass
-class AssetRecord:
-    """Complete asset record with metadata and file information."""
-
-    kind: AssetKind
-    name: str
-    folder: str
-    path: Path
-    metadata: AssetMetadata
-    key_tokens: Set[str] = field(default_factory=set)
-    ir_composite: str = ""
-    # PERFORMANCE OPTIMIZATION: Cache class detection to avoid repeated regex calls
-    cached_class: str = ""
-    # PERFORMANCE OPTIMIZATION: Cache normalized strings and tokens
-    cached_normalized: str = ""
-    cached_tokens: Set[str] = field(default_factory=set)
-
-    def __post_init__(self):
-        """Post-initialization processing."""
-        if not self.key_tokens:
-            self.key_tokens = self._generate_key_tokens()
-        if not self.ir_composite:
-            self.ir_composite = self._build_ir_composite()
-        # PERFORMANCE OPTIMIZATION: Cache class detection result
-        if not self.cached_class:
-            self.cached_class = detect_wagon_or_engine_class(self.name, "Engine" if self.kind == AssetKind.ENGINE else "Wagon") or ""
-        # PERFORMANCE OPTIMIZATION: Cache normalized strings and tokens
-        if not self.cached_normalized:
-            self.cached_normalized = re.sub(r"[^a-z0-9]+", " ", self.name.lower()).strip()
-        if not self.cached_tokens:
-            self.cached_tokens = set(_TOKENIZE_PATTERN.findall(self.cached_normalized))
-
-    def __hash__(self):
-        return hash((self.kind, self.name, self.folder, str(self.path)))
-
-    def __eq__(self, other):
-        if not isinstance(other, AssetRecord):
-            return False
-        return (self.kind, self.name, self.folder, str(self.path)) == (
-            other.kind,
-            other.name,
-            other.folder,
-            str(other.path),
-        )
-
-    @property
-    def key_lower(self) -> str:
-        """Generate lowercase key for indexing."""
-        return f"{self.folder}|{self.name}".lower()
-
-    def _generate_key_tokens(self) -> Set[str]:
-        """Generate key tokens for indexing."""
-        tokens = set(self.metadata.tokens)
-        # Add folder-prefixed tokens
-        if self.folder:
-            folder_tokens = _TOKENIZE_PATTERN.findall(self.folder.lower())
-            tokens.update(f"f:{token}" for token in folder_tokens)
-        return tokens
-
-    def _build_ir_composite(self) -> str:
-        """Build Indian Railways composite identifier."""
-        parts = []
-        meta = self.metadata
-
-        if meta.carbody:
-            parts.append(meta.carbody.lower())
-
-        if meta.freight_type:
-            parts.append(meta.freight_type.lower())
-        elif meta.coach_type:
-            parts.append(meta.coach_type.lower())
-
-        if meta.set_type:
-            parts.append(meta.set_type.lower())
-
-        if meta.engine_class:
-            parts.append(meta.engine_class.lower())
-
-        if meta.engine_series:
-            parts.append(meta.engine_series.lower())
-
-        return "_".join(parts) if parts else ""
-
-
-@dataclass
-class MatchResult:
-    """Result of asset matching operation."""
-
-    chosen: Optional[AssetRecord]
-    phase: MatchPhase
-    score: float
-    target: AssetMetadata
-    candidates_evaluated: int = 0
-    match_details: Dict[str, Any] = field(default_factory=dict)
-
-    @property
-    def is_resolved(self) -> bool:
-        """Check if asset was successfully resolved."""
-        return self.chosen is not None
-
-    @property
-    def is_changed(self) -> bool:
-        """Check if resolution resulted in a change."""
-        if not self.chosen:
-            return False
-        return not (
-            self.chosen.folder.lower() == self.target.folder.lower()
-            and self.chosen.name.lower() == self.target.name.lower()
-        )
-
-
-class IndianRailwaysClassifier:
-    """Indian Railways locomotive and coach classification system - ENHANCED v2.2.5 WITH FREIGHT ANALYSIS."""
-
-    # ENHANCED: Locomotive classifications including multiple units
-    ENGINE_CLASSES = {
-        # Electric passenger
-        "wap1",
-        "wap4",
-        "wap5",
-        "wap7",
-        # Electric freight
-        "wag5",
-        "wag7",
-        "wag9",
-        "wag12",
-        # Electric mixed/heritage
-        "wam4",
-        "wcam2",
-        "wcam3",
-        "wcg2",
-        "wcm1",
-        "wcm2",
-        "wcm3",
-        "wcm4",
-        "wcm5",
-        # Diesel freight
-        "wdg3",
-        "wdg3a",
-        "wdg4",
-        "wdg4d",
-        "wdg4g",
-        # Diesel mixed/mainline
-        "wdm2",
-        "wdm3",
-        "wdm3a",
-        "wdm3d",
-        # Diesel passenger
-        "wdp1",
-        "wdp3",
-        "wdp4",
-        "wdp4b",
-        "wdp4d",
-        "wdp4e",
-        # Diesel shunting
-        "wds4",
-        "wds6",
-        # Heritage/meter gauge
-        "ydm4",
-        "yam1",
-        # ENHANCED v2.2.1: Multiple units (also treated as engine classes)
-        "emu",
-        "memu",
-        "dmu",
-        "mmu",
-        "demu",
-        # ENHANCED v2.2.1: Maintenance equipment
-        "plasser",
-        "maintenance",
-    }
-
-    # Coach classifications
-    COACH_TYPES = {
-        "1a",
-        "2a",
-        "3a",
-        "3e",
-        "sl",
-        "gs",
-        "cc",
-        "accc",
-        "ec",
-        "eog",
-        "pc",
-        "slr",
-        "ac",
-        "nonac",
-        "chair",
-        "executive",
-        "general",
-        "2s",
-        "diner",
-        "buffet",
-        "restaurant",
-        "luggage",
-    }
-
-    # ENHANCED v2.2.5: Freight wagon types based on freight_wag_files.csv analysis
-    FREIGHT_TYPES = {
-        # Open wagons (BOXN family) - ENHANCED
-        "boxn",
-        "boxnr",
-        "boxncr",
-        "boxng",
-        "boxnhl",
-        "boxnham",
-        "boxnm1",
-        "boxnm2",
-        "boxnlb",
-        "boxnhs",
-        "boxnha",
-        # Covered wagons - ENHANCED
-        "bcn",
-        "bcna",
-        "bcne",
-        "bcnh",
-        "bcnhl",
-        "bcnl",
-        "bccnr",
-        "bccw",
-        "bcbfg",
-        "bcfc",
-        "bvcm",
-        "covered",
-        "ventilated",
-        # ENHANCED v2.2.5: Additional covered wagon types from analysis
-        "bccn",
-        "bcnloa",
-        # Tank wagons - ENHANCED v2.2.2
-        "tank",
-        "tanker",
-        "btpn",
-        "btap",
-        "btcs",
-        "btpgln",
-        "btaln",
-        "btfln",
-        "btmn",
-        "btlr",
-        "btcdl",
-        "btk",
-        "btc",
-        # ENHANCED v2.2.5: Additional tank types from analysis
-        "bti",
-        # Flat/container wagons
-        "flat",
-        "flatcar",
-        "blc",
-        "blca",
-        "blcb",
-        "bcacm",
-        "bcacbm",
-        "bfns",
-        "bfr",
-        "bfki",
-        "bfkn",
-        "bfat",
-        "bft",
-        "nmg",
-        "nmgc",
-        "container",
-        "concor",
-        "intermodal",
-        # ENHANCED v2.2.5: Container wagon variants from analysis
-        "bca",
-        "bcb",
-        "con",
-        # Hopper wagons - ENHANCED v2.2.2
-        "bobr",
-        "bobrn",
-        "bobrnhs",
-        "boby",
-        "bobyn",
-        "gondola",
-        "hopper",
-        "stone",
-        "aggregate",
-        "ballast",
-        "coal",
-        "ore",
-        # Brake vans - ENHANCED v2.2.2
-        "brd",
-        "brn",
-        "brs",
-        "bru",
-        "bvzi",
-        "bvzc",
-        "brake",
-        # ENHANCED v2.2.5: Additional brake wagon types from analysis
-        "brna",
-        # Special wagons
-        "hpcv",
-        "hcpv",
-        "parcel",
-        "mail",
-        "low_loader",
-        "well_wagon",
-        "schnabel",
-        "heavy_haul",
-        "transformer",
-        "reactor",
-        # ENHANCED v2.2.5: Specialized freight from analysis
-        "cement",
-        "coil",
-        "slab",
-        "auto",
-        "timber",
-        "billet",
-        "pipe",
-        # ENHANCED v2.2.5: Milk transport wagons
-        "milktanker",
-        "vvn",
-        # ENHANCED v2.2.5: Manufacturer series from analysis
-        "bsam",
-        "asmi",
-        "apl",
-    }
-
-    # Carbody types
-    CARBODY_TYPES = {"lhb", "icf", "integral", "conventional", "modern"}
-
-    # Special train sets - ENHANCED v2.2.3
-    SPECIAL_SETS = {
-        "vandebharat",
-        "vande",
-        "vb",
-        "train18",
-        "humsafar",
-        "tejas",
-        "gatiman",
-        "rajdhani",
-        "shatabdi",
-        "janshatabdi",
-        "duronto",
-        "garibrath",
-        "antyodaya",
-        "deendayalu",
-        "anubhuti",
-        "utk",
-        "utkrisht",
-        "doubledecker",
-        "samparkkranti",
-        "yuva",
-    }
-
-    # ENHANCED v2.2.4: Traction classification including multiple units
-    ELECTRIC_CLASSES = {
-        "wap1",
-        "wap4",
-        "wap5",
-        "wap7",
-        "wag5",
-        "wag7",
-        "wag9",
-        "wag12",
-        "wam4",
-        "wcam2",
-        "wcam3",
-        "wcg2",
-        "wcm1",
-        "wcm2",
-        "wcm3",
-        "wcm4",
-        "wcm5",
-        # EMU/MEMU traction variants - ENHANCED
-        "emu",
-        "memu",
-        "ac_emu",
-        "dc_emu",
-        "mmu",
-    }
-
-    # ENHANCED v2.2.2: Multiple unit classifications
-    EMU_CLASSES = {
-        "emu",
-        "ac_emu",
-        "dc_emu",
-        "dmc",
-        "dtc",
-        "mc",
-        "tc",
-        "dc",
-        "dt",
-        "dmc1",
-        "dmc2",
-        "dtc1",
-        "dtc2",
-        "motorcoach",
-        "trailercoach",
-        "drivingcar",
-        "drivingtrailer",
-        "acemu",
-        "dcemu",
-    }
-    MEMU_CLASSES = {
-        "memu",
-        "dmc",
-        "dtc",
-        "mc",
-        "tc",
-        "dc",
-        "dt",
-        "dmc1",
-        "dmc2",
-        "dtc1",
-        "dtc2",
-        "motorcoach",
-        "trailercoach",
-        "drivingcar",
-        "drivingtrailer",
-    }
-    DMU_CLASSES = {
-        "demu",
-        "dmu",
-        "dpc",
-        "dtc",
-        "tc",
-        "dcc",
-        "dpc1",
-        "dpc2",
-        "dcc1",
-        "dcc2",
-        "motorcoach",
-        "trailercoach",
-        "drivingcar",
-        "drivingtrailer",
-    }
-    MMU_CLASSES = {
-        "mmu",
-        "dmc",
-        "dtc",
-        "mc",
-        "tc",
-        "dc",
-        "dt",
-        "dmc1",
-        "dmc2",
-        "dtc1",
-        "dtc2",
-        "motorcoach",
-        "trailercoach",
-        "drivingcar",
-        "drivingtrailer",
-    }
-
-    DIESEL_CLASSES = {
-        "wdg3",
-        "wdg3a",
-        "wdg4",
-        "wdg4d",
-        "wdg4g",
-        "wdm2",
-        "wdm3",
-        "wdm3a",
-        "wdm3d",
-        "wdp1",
-        "wdp3",
-        "wdp4",
-        "wdp4b",
-        "wdp4d",
-        "wdp4e",
-        "wds4",
-        "wds6",
-    }
-
-    # ENHANCED v2.2.5: Manufacturer/Series prefixes for freight detection
-    FREIGHT_MANUFACTURER_PREFIXES = {"bsam_", "asmi", "con_"}
-
-    # Comprehensive aliases system
-    ALIASES = {
-        # EMU/MEMU/DMU/MMU classes and car roles (expanded)
-        "memu": "memu",
-        "emu": "emu",
-        "mmu": "mmu",
-        "dmu": "dmu",
-        "demu": "demu",
-        "ac_emu": "ac_emu",
-        "dc_emu": "dc_emu",
-        "acemu": "ac_emu",
-        "dcemu": "dc_emu",
-        "dmc": "dmc",
-        "dtc": "dtc",
-        "mc": "mc",
-        "tc": "tc",
-        "dc": "dc",
-        "dt": "dt",
-        "dmc1": "dmc",
-        "dmc2": "dmc",
-        "dtc1": "dtc",
-        "dtc2": "dtc",
-        "motorcoach": "mc",
-        "trailercoach": "tc",
-        "drivingcar": "dc",
-        "drivingtrailer": "dt",
-        "dpc": "dpc",
-        "dcc": "dcc",
-        "dpc1": "dpc",
-        "dpc2": "dpc",
-        "dcc1": "dcc",
-        "dcc2": "dcc",
-        # AC Coach variations
-        "1ac": "1a",
-        "ac1": "1a",
-        "acfirst": "1a",
-        "ac_first": "1a",
-        "firstac": "1a",
-        "2ac": "2a",
-        "ac2": "2a",
-        "acsecond": "2a",
-        "ac_second": "2a",
-        "secondac": "2a",
-        "3ac": "3a",
-        "ac3": "3a",
-        "acthird": "3a",
-        "ac_third": "3a",
-        "thirdac": "3a",
-        # General classes
-        "gs": "gs",
-        "general": "gs",
-        "gencar": "gs",
-        "unreserved": "gs",
-        "second": "gs",
-        "secondclass": "gs",
-        "second_class": "gs",
-        "second-class": "gs",
-        # Sleeper variations
-        "sl": "sl",
-        "slp": "sl",
-        "sleeper": "sl",
-        "sleeping": "sl",
-        # Chair cars
-        "cc": "cc",
-        "chair": "cc",
-        "chaircar": "cc",
-        "accc": "accc",
-        "ac_chair": "accc",
-        "ac_cc": "accc",
-        # Special coaches
-        "pc": "pc",
-        "pantry": "pc",
-        "pantrycar": "pc",
-        "catering": "pc",
-        "eog": "eog",
-        "generator": "eog",
-        "power": "eog",
-        "powercar": "eog",
-        "slr": "slr",
-        "guard": "slr",
-        "luggage": "slr",
-        "caboose": "slr",
-        # Engine variations with hyphens and underscores
-        "wap-4": "wap4",
-        "wap_4": "wap4",
-        "wap-7": "wap7",
-        "wap_7": "wap7",
-        "wdg-3": "wdg3a",
-        "wdg_3": "wdg3a",
-        "wdg-4": "wdg4",
-        "wdg_4": "wdg4",
-        "wdm-2": "wdm2",
-        "wdm_2": "wdm2",
-        "wdm-3": "wdm3a",
-        "wdm_3": "wdm3a",
-        # Carbody aliases
-        "icf": "icf",
-        "integral": "icf",
-        "conventional": "icf",
-        "lhb": "lhb",
-        "linke_hofmann": "lhb",
-        "modern": "lhb",
-        # Freight aliases - ENHANCED v2.2.5
-        "boxn": "boxn",
-        "box": "boxn",
-        "bcn": "bcn",
-        "bcna": "bcna",
-        "tank": "tank",
-        "tanker": "tank",
-        "btpn": "btpn",
-        "flat": "flat",
-        "flatcar": "flat",
-        "container": "container",
-        "parcel": "parcel",
-        "hpcv": "hpcv",
-        "hcpv": "hcpv",
-        # New freight aliases from analysis
-        "bsam": "bsam",
-        "asmi": "asmi",
-        "con": "container",
-        "cement": "cement",
-        "coil": "coil",
-        "coal": "coal",
-        "milktanker": "milktanker",
-        "milk": "vvn",
-        # Special set aliases
-        "utk": "utk",
-        "utkrisht": "utk",
-        "utkal": "utk",
-        "vande": "vande",
-        "vandebharat": "vande",
-        "vb": "vande",
-        "train18": "vande",
-        "humsafar": "humsafar",
-        "tejas": "tejas",
-        "rajdhani": "rajdhani",
-        "shatabdi": "shatabdi",
-        "duronto": "duronto",
-    }
-
-    @classmethod
-    def get_traction_type(cls, engine_class: str) -> TractionType:
-        """Determine traction type from engine class."""
-        if not engine_class:
-            return TractionType.UNKNOWN
-
-        engine_class_lower = engine_class.lower()
-        if engine_class_lower in cls.ELECTRIC_CLASSES:
-            return TractionType.ELECTRIC
-        elif engine_class_lower in cls.DIESEL_CLASSES:
-            return TractionType.DIESEL
-        else:
-            return TractionType.UNKNOWN
-
-    @classmethod
-    def normalize_alias(cls, token: str) -> str:
-        """Normalize token using alias system with caching."""
-        token_lower = token.lower()
-        if token_lower not in _ALIAS_CACHE:
-            _ALIAS_CACHE[token_lower] = cls.ALIASES.get(token_lower, token_lower)
-        return _ALIAS_CACHE[token_lower]
-
-    @classmethod
-    def is_engine_class(cls, token: str) -> bool:
-        """Check if token is a valid engine class."""
-        return token.lower() in cls.ENGINE_CLASSES
-
-    @classmethod
-    def is_coach_type(cls, token: str) -> bool:
-        """Check if token is a valid coach type."""
-        return token.lower() in cls.COACH_TYPES
-
-    @classmethod
-    def is_freight_type(cls, token: str) -> bool:
-        """Check if token is a valid freight type."""
-        return token.lower() in cls.FREIGHT_TYPES
-
-
-class AssetMetadataExtractor:
-    """Extracts metadata from asset names and folders."""
-
-    def __init__(self, classifier: IndianRailwaysClassifier):
-        self.classifier = classifier
-        self.ignore_tokens = {
-            "sound",
-            "horn",
-            "ai-horn",
-            "cab",
-            "cabview",
-            "cvf",
-            "sms",
-            "sfx",
-            "audio",
-            "wav",
-            "mp3",
-            "readme",
-            "manual",
-            "docs",
-            "preview",
-            "thumbnail",
-            "texture",
-            "textures",
-            "common",
-        }
-
-    def extract_metadata(
-        self, kind: AssetKind, name: str, folder: str = ""
-    ) -> AssetMetadata:
-        """Extract comprehensive metadata from asset name and folder."""
-        metadata = AssetMetadata(kind=kind, name=name, folder=folder)
-
-        # Normalize and extract basic tokens
-        combined_text = f"{folder} {name}".lower()
-        normalized = re.sub(r"[^a-z0-9]+", " ", combined_text).strip()
-        tokens = set(normalized.split()) - self.ignore_tokens
-
-        # Apply aliases
-        normalized_tokens = {self.classifier.normalize_alias(token) for token in tokens}
-        metadata.tokens = normalized_tokens
-
-        # Extract specific classifications
-        self._extract_engine_metadata(metadata, normalized_tokens, combined_text)
-        self._extract_wagon_metadata(metadata, normalized_tokens, combined_text)
-        self._extract_geographic_metadata(metadata, normalized_tokens)
-        self._extract_technical_metadata(metadata, normalized_tokens)
-
-        # Extract variant number
-        variant_match = re.search(r"(\d+)$", name)
-        if variant_match:
-            try:
-                metadata.variant = int(variant_match.group(1))
-            except ValueError:
-                pass
-
-        return metadata
-
-    def _extract_engine_metadata(
-        self, metadata: AssetMetadata, tokens: Set[str], text: str
-    ):
-        """Extract engine-specific metadata."""
-        if metadata.kind != AssetKind.ENGINE:
-            return
-
-        # Search both tokens and folder/name for engine class
-        folder_norm = metadata.folder.lower().replace("_", " ")
-        name_norm = metadata.name.lower().replace("_", " ")
-        all_text = f"{folder_norm} {name_norm} {text}".lower()
-        for token in tokens:
-            if self.classifier.is_engine_class(token):
-                metadata.engine_class = token.upper()
-                metadata.traction = self.classifier.get_traction_type(token)
-                break
-        if not metadata.engine_class:
-            for ec in self.classifier.ENGINE_CLASSES:
-                if ec in all_text:
-                    metadata.engine_class = ec.upper()
-                    metadata.traction = self.classifier.get_traction_type(ec)
-                    break
-
-        # Extract engine series (class + number)
-        if metadata.engine_class:
-            series_pattern = (
-                rf"(?i){re.escape(metadata.engine_class)}[-_]?(\d{{1,3}}[a-z]?)"
-            )
-            series_match = re.search(series_pattern, all_text)
-            if series_match:
-                metadata.engine_series = (
-                    f"{metadata.engine_class}{series_match.group(1).upper()}"
-                )
-
-        # Detect multiple units
-        unit_indicators = {"emu", "memu", "dmu", "demu", "mmu", "medha"}
-        if tokens & unit_indicators or any(u in all_text for u in unit_indicators):
-            metadata.is_unit = True
-            if any(u in all_text for u in ["emu", "memu", "mmu"]):
-                metadata.traction = TractionType.ELECTRIC
-            elif any(u in all_text for u in ["dmu", "demu"]):
-                metadata.traction = TractionType.DIESEL
-
-        # Engine family detection
-        family_indicators = {
-            "alco": "ALCO",
-            "emd": "EMD",
-            "ge": "GE",
-            "siemens": "Siemens",
-            "alstom": "Alstom",
-        }
-        for token, family in family_indicators.items():
-            if token in tokens or token in all_text:
-                metadata.engine_family = family
-                break
-
-    def _extract_wagon_metadata(
-        self, metadata: AssetMetadata, tokens: Set[str], text: str
-    ):
-        """Extract wagon-specific metadata."""
-        if metadata.kind != AssetKind.WAGON:
-            return
-
-        # Coach type detection with priority
-        folder_norm = metadata.folder.lower().replace("_", " ")
-        name_norm = metadata.name.lower().replace("_", " ")
-        all_text = f"{folder_norm} {name_norm} {text}".lower()
-        coach_priority = [
-            "pc",
-            "slr",
-            "eog",
-            "1a",
-            "2a",
-            "3a",
-            "3e",
-            "accc",
-            "cc",
-            "sl",
-            "gs",
-        ]
-        for coach_type in coach_priority:
-            if coach_type in tokens or coach_type in all_text:
-                metadata.coach_type = coach_type.upper()
-                break
-
-        # Enhanced pattern matching for coach types
-        coach_patterns = {
-            # Specific AC classes (HIGHEST PRIORITY - check these first)
-            r'(?<![A-Za-z0-9])1a(?![A-Za-z0-9])': '1A',
-            r'(?<![A-Za-z0-9])2a(?![A-Za-z0-9])': '2A', 
-            r'(?<![A-Za-z0-9])3a(?![A-Za-z0-9])': '3A',
-            # AC3 pattern for combined AC+class notation
-            r'(?<![A-Za-z0-9])ac3(?![A-Za-z0-9])': '3A',
-            r'(?<![A-Za-z0-9])ac2(?![A-Za-z0-9])': '2A',
-            r'(?<![A-Za-z0-9])ac1(?![A-Za-z0-9])': '1A',
-            
-            # Vande Bharat patterns
-            r'(?i)vbcc\d*(?![A-Za-z0-9])': 'CC',
-            r'(?i)vande[-_]?bharat[-_]?cc\d*(?![A-Za-z0-9])': 'CC',
-            # Vande Bharat Executive Chair Car patterns
-            r'(?i)vbexcc\d*(?![A-Za-z0-9])': 'EC',
-            r'(?i)vande[-_]?bharat[-_]?excc\d*(?![A-Za-z0-9])': 'EC',
-            r'(?i)executive[-_]?chair[-_]?car(?![A-Za-z0-9])': 'EC',
-            
-            # AC Chair Car patterns (HIGH PRIORITY) - ENHANCED v2.2.3
-            r'(?i)chaircar[-_]?ac|ac[-_]?chaircar': 'ACCC',
-            r'(?i)chair[-_]?car[-_]?ac|ac[-_]?chair[-_]?car': 'ACCC',
-            r'(?i)ac[-_]?cc|cc[-_]?ac': 'ACCC',
-            
-            # AC Tier patterns (should not conflict with specific classes above)
-            r"(?i)ac[-_]?3[-_]?tier|3[-_]?tier[-_]?ac": "3A",
-            r"(?i)ac[-_]?2[-_]?tier|2[-_]?tier[-_]?ac": "2A",
-            r"(?i)ac[-_]?1[-_]?tier|1[-_]?tier[-_]?ac": "1A",
-            
-            # Generic AC chair patterns (lower priority)
-            r"(?i)ac[-_]?chair|chair[-_]?ac": "ACCC",
-            
-            # Service coaches
-            r"(?i)pantry[-_]?car|pantry": "PC",
-            r"(?i)guard|luggage[-_]?van": "SLR",
-            r"(?i)generator|power[-_]?car": "EOG",
-            r"(?i)slr[-_]?": "SLR",
-            
-            # Additional coach types - ordered by specificity (most specific first)
-            r"(?i)slr[-_]?": "SLR",
-            r"(?i)second[-_]?class[-_]?luggage": "SLR",
-            r"(?i)sleeper": "SL",
-            r"(?i)slp": "SL",
-            r"(?i)sl": "SL",
-            r"(?i)ac": "AC",
-            r"(?i)gs|general[-_]?second": "GS",
-            r"(?i)second[-_]?class": "GS",
-            r"(?i)second": "GS",
-            r"(?i)cc|chair[-_]?car": "CC",
-            r"(?i)fc|first[-_]?class": "FC",
-            r"(?i)sc": "SC",
-        }
-
-        if not metadata.coach_type:
-            for pattern, coach_type in coach_patterns.items():
-                if re.search(pattern, all_text):
-                    metadata.coach_type = coach_type
-                    break
-
-        # Freight type detection - FIXED: prioritize longer matches to handle BOBYN vs BOBY
-        # detect freight type with deterministic priority
-        priority = ["hcpv", "hpcv", "parcel", "mail"]
-        for key in priority:
-            if key in all_text:
-                metadata.freight_type = key.upper()
-                break
-
-        # FIXED: fallback with longest-match priority to handle BOBYN vs BOBY correctly
-        if not metadata.freight_type:
-            # Sort freight types by length (longest first) to prioritize BOBYN over BOBY
-            sorted_freight_types = sorted(self.classifier.FREIGHT_TYPES, key=len, reverse=True)
-            for ft in sorted_freight_types:
-                if ft in all_text:
-                    metadata.freight_type = ft.upper()
-                    break
-
-        # Carbody detection
-        carbody_indicators = {"lhb", "icf", "integral", "conventional"}
-        for token in tokens:
-            if token in carbody_indicators:
-                metadata.carbody = token.upper()
-                break
-        if not metadata.carbody:
-            for cb in self.classifier.CARBODY_TYPES:
-                if cb in all_text:
-                    metadata.carbody = cb.upper()
-                    break
-
-        # Special set detection
-        set_indicators = {
-            "utk",
-            "utkrisht",
-            "humsafar",
-            "tejas",
-            "vande",
-            "vandebharat",
-            "rajdhani",
-            "shatabdi",
-            "duronto",
-            "garibrath",
-        }
-        for token in tokens:
-            if token in set_indicators:
-                metadata.set_type = token.upper()
-                break
-        if not metadata.set_type:
-            for st in self.classifier.SPECIAL_SETS:
-                if st in all_text:
-                    metadata.set_type = st.upper()
-                    break
-
-    def _extract_geographic_metadata(self, metadata: AssetMetadata, tokens: Set[str]):
-        """Extract geographic metadata (regions, depots)."""
-        # Zone codes
-        zones = {
-            "sr": "SR",
-            "nr": "NR",
-            "er": "ER",
-            "wr": "WR",
-            "cr": "CR",
-            "scr": "SCR",
-            "ecr": "ECR",
-            "ncr": "NCR",
-            "swr": "SWR",
-            "nfr": "NFR",
-            "nwr": "NWR",
-            "ser": "SER",
-            "secr": "SECR",
-            "wcr": "WCR",
-            "ecor": "ECOR",
-            "ner": "NER",
-        }
-
-        # Major depot codes
-        depots = {
-            "mtp": "MTP",
-            "bza": "BZA",
-            "mas": "MAS",
-            "ndls": "NDLS",
-            "lko": "LKO",
-            "mdg": "MDG",
-            "kol": "KOL",
-            "mum": "MUM",
-            "pune": "PUNE",
-            "gzb": "GZB",
-            "ald": "ALD",
-            "bbs": "BBS",
-            "ghy": "GHY",
-            "vskp": "VSKP",
-            "kyn": "KYN",
-            "trd": "TRD",
-        }
-
-        for token in tokens:
-            if token in zones:
-                metadata.region = zones[token]
-            elif token in depots:
-                metadata.depot = depots[token]
-
-    def _extract_technical_metadata(self, metadata: AssetMetadata, tokens: Set[str]):
-        """Extract technical specifications."""
-        # Gauge detection
-        gauge_indicators = {
-            "bg": "BG",
-            "mg": "MG",
-            "ng": "NG",
-            "broad": "BG",
-            "meter": "MG",
-            "narrow": "NG",
-        }
-
-        # Manufacturer detection
-        manufacturers = {
-            "clw": "CLW",
-            "dlw": "DLW",
-            "icf": "ICF",
-            "rcf": "RCF",
-            "beml": "BEML",
-            "alstom": "Alstom",
-            "siemens": "Siemens",
-            "medha": "Medha",
-            "bhel": "BHEL",
-        }
-
-        for token in tokens:
-            if token in gauge_indicators:
-                metadata.tech_spec = gauge_indicators[token]
-            elif token in manufacturers:
-                metadata.manufacturer = manufacturers[token]
-
-
-class AssetIndex:
-    """Comprehensive asset indexing system with multiple lookup methods."""
-
-    def __init__(self):
-        self.assets: List[AssetRecord] = []
-        self.by_name: Dict[str, List[AssetRecord]] = defaultdict(list)
-        self.by_folder: Dict[str, List[AssetRecord]] = defaultdict(list)
-        self.by_kind: Dict[AssetKind, List[AssetRecord]] = defaultdict(list)
-        self.by_engine_class: Dict[str, List[AssetRecord]] = defaultdict(list)
-        self.by_coach_type: Dict[str, List[AssetRecord]] = defaultdict(list)
-        self.by_freight_type: Dict[str, List[AssetRecord]] = defaultdict(list)
-        self.by_traction: Dict[TractionType, List[AssetRecord]] = defaultdict(list)
-        self.by_ir_composite: Dict[str, List[AssetRecord]] = defaultdict(list)
-        self.key_token_index: Dict[str, List[AssetRecord]] = defaultdict(list)
-
-        # Performance optimization indices
-        self.lhb_assets: Dict[str, AssetRecord] = {}
-        self.icf_assets: Dict[str, AssetRecord] = {}
-        self.emu_assets: Dict[str, AssetRecord] = {}
-
-        self._lock = threading.RLock()
-
-    def add_asset(self, asset: AssetRecord):
-        """Add asset to all relevant indices."""
-        with self._lock:
-            self.assets.append(asset)
-
-            # Basic indices
-            self.by_name[asset.name.lower()].append(asset)
-            self.by_folder[asset.folder.lower()].append(asset)
-            self.by_kind[asset.kind].append(asset)
-
-            # Metadata-based indices
-            meta = asset.metadata
-            if meta.engine_class:
-                self.by_engine_class[meta.engine_class.lower()].append(asset)
-            if meta.coach_type:
-                self.by_coach_type[meta.coach_type.lower()].append(asset)
-            if meta.freight_type:
-                self.by_freight_type[meta.freight_type.lower()].append(asset)
-            if meta.traction != TractionType.UNKNOWN:
-                self.by_traction[meta.traction].append(asset)
-
-            # IR composite index
-            if asset.ir_composite:
-                self.by_ir_composite[asset.ir_composite].append(asset)
-
-            # Token index
-            for token in asset.key_tokens:
-                self.key_token_index[token].append(asset)
-
-            # Performance indices
-            if meta.carbody == "LHB":
-                self.lhb_assets[asset.name] = asset
-            elif meta.carbody == "ICF":
-                self.icf_assets[asset.name] = asset
-
-            if meta.is_unit and meta.traction == TractionType.ELECTRIC:
-                self.emu_assets[asset.name] = asset
-
-    def get_candidates(
-        self, target: AssetMetadata, strategy: str = "comprehensive"
-    ) -> List[AssetRecord]:
-        """Get candidate assets for matching."""
-        candidates = set()
-
-        if strategy == "exact":
-            # Only exact name matches
-            candidates.update(self.by_name.get(target.name.lower(), []))
-
-        elif strategy == "kind":
-            # All assets of same kind
-            candidates.update(self.by_kind.get(target.kind, []))
-
-        elif strategy == "targeted":
-            # Targeted search based on metadata
-            if target.engine_class:
-                candidates.update(
-                    self.by_engine_class.get(target.engine_class.lower(), [])
-                )
-            if target.coach_type:
-                candidates.update(self.by_coach_type.get(target.coach_type.lower(), []))
-            if target.freight_type:
-                candidates.update(
-                    self.by_freight_type.get(target.freight_type.lower(), [])
-                )
-            if target.traction != TractionType.UNKNOWN:
-                candidates.update(self.by_traction.get(target.traction, []))
-
-        else:  # comprehensive
-            # Start with same kind
-            candidates.update(self.by_kind.get(target.kind, []))
-
-            # Add targeted results
-            if target.engine_class:
-                candidates.update(
-                    self.by_engine_class.get(target.engine_class.lower(), [])
-                )
-            if target.coach_type:
-                candidates.update(self.by_coach_type.get(target.coach_type.lower(), []))
-            if target.freight_type:
-                candidates.update(
-                    self.by_freight_type.get(target.freight_type.lower(), [])
-                )
-
-        # Filter by kind
-        candidates = {c for c in candidates if c.kind == target.kind}
-
-        return list(candidates)
-
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get comprehensive index statistics."""
-        return {
-            "total_assets": len(self.assets),
-            "engines": len(self.by_kind[AssetKind.ENGINE]),
-            "wagons": len(self.by_kind[AssetKind.WAGON]),
-            "folders": len(self.by_folder),
-            "engine_classes": len(self.by_engine_class),
-            "coach_types": len(self.by_coach_type),
-            "freight_types": len(self.by_freight_type),
-            "ir_composites": len(self.by_ir_composite),
-            "lhb_assets": len(self.lhb_assets),
-            "icf_assets": len(self.icf_assets),
-            "emu_assets": len(self.emu_assets),
-        }
-
-    def __getstate__(self):
-        """Support for pickling - exclude non-picklable objects."""
-        state = self.__dict__.copy()
-        # Remove threading objects that can't be pickled
-        state['_lock'] = None
-        return state
-
-    def __setstate__(self, state):
-        """Support for unpickling - restore state."""
-        self.__dict__.update(state)
-        # Recreate threading objects in worker processes
-        if self._lock is None:
-            self._lock = threading.RLock()
-
-
-# ENHANCED v2.2.5: Policy implementation helper functions with freight analysis improvements
-def detect_role_from_name(name: str) -> str:
-    """Detect role (Engine/Wagon) from name patterns - ENHANCED v2.2.5 WITH VANDE BHARAT DETECTION."""
-    name_lower = name.lower()
-
-    # CRITICAL: Maintenance equipment detection FIRST
-    maintenance_indicators = [
-        "plasser",
-        "tamper",
-        "ballast_cleaner",
-        "rail_grinder",
-        "maintenance",
-        "track_machine",
-        "crane",
-        "breakdown",
-    ]
-    if any(indicator in name_lower for indicator in maintenance_indicators):
-        return "Engine"  # Maintenance equipment treated as engine for consist purposes
-
-    # ENHANCED v2.2.5: Vande Bharat detection (CRITICAL FIX)
-    vande_bharat_patterns = {
-        # Power cars (should be engines)
-        "vbpowercar": "Engine",
-        "vb_powercar": "Engine",
-        "powercar": "Engine",
-        "power_car": "Engine",
-        # Driver cars (should be engines)
-        "vbdmc": "Engine",
-        "vb_dmc": "Engine",
-        "vbdc": "Engine",
-        "vb_dc": "Engine",
-        "drivingcar": "Engine",
-        "driving_car": "Engine",
-        # Coach cars (should be wagons)
-        "vbcc": "Wagon",
-        "vb_cc": "Wagon",
-        "vbac": "Wagon",
-        "vb_ac": "Wagon",
-        "vbcoach": "Wagon",
-        "vb_coach": "Wagon",
-    }
-
-    for pattern, role in vande_bharat_patterns.items():
-        if pattern in name_lower:
-            return role
-
-    # Engine indicators
-    engine_patterns = [
-        r"\b(wap|wag|wdm|wdg|wdp|wds|wam|wcam|wcg|wcm)\d*\b",
-        r"\b(emu|memu|dmu|mmu|demu)\b",
-        r"\b(locomotive|engine|loco)\b",
-    ]
-
-    for pattern in engine_patterns:
-        if re.search(pattern, name_lower):
-            return "Engine"
-
-    # Wagon indicators
-    wagon_patterns = [
-        r"\b(coach|wagon|car)\b",
-        r"\b(boxn|bcn|tank|flat|container)\b",
-        r"\b(1a|2a|3a|sl|gs|cc|accc|eog|pc|slr)\b",
-    ]
-
-    for pattern in wagon_patterns:
-        if re.search(pattern, name_lower):
-            return "Wagon"
-
-    return ""
-
-
-def enhance_wagon_matching_with_compatibility(
-    pool: List[AssetRecord], wanted_class: str, wanted_name: str
-) -> List[AssetRecord]:
-    """Enhanced wagon matching with compatibility rules - ENHANCED v2.2.5 WITH FREIGHT ANALYSIS."""
-    if not wanted_class:
-        return pool
-
-    compatible_pool = []
-
-    # ENHANCED v2.2.5: Handle manufacturer prefix classes
-    if wanted_class in ["BSAM", "ASMI", "CON"]:
-        # For manufacturer series, be more permissive with base types
-        manufacturer_compatible = {
-            "BSAM": ["BOXN", "BOBYN", "BCNA", "TANK", "FLAT", "FREIGHT"],
-            "ASMI": ["BCA", "BCB", "BCN", "BTP", "BLC", "CONTAINER"],
-            "CON": ["CONTAINER", "FLAT", "BLC", "CONCOR"],
-        }
-
-        compatible_types = manufacturer_compatible.get(wanted_class, [wanted_class])
-
-        for asset in pool:
-            asset_class = detect_wagon_or_engine_class(asset.name, "Wagon" if asset.kind == AssetKind.WAGON else "Engine")
-            if asset_class in compatible_types or asset_class == wanted_class:
-                compatible_pool.append(asset)
-
-        return compatible_pool
-
-    # STRICT: Incompatible wagon types (these should NEVER match each other)
-    incompatible_groups = {
-        # Specialized wagons are incompatible with everything except themselves
-        "COIL": ["BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"],
-        "SLAB": ["BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"],
-        "AUTO": ["BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"],
-        "CEMENT": ["BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"],
-        # BCNA (covered) incompatible with specialized types
-        "BCNA": ["COIL", "SLAB", "AUTO", "CEMENT", "TIPPLER"],
-        # BOXN (open) incompatible with specialized types
-        "BOXN": ["COIL", "SLAB", "AUTO", "CEMENT", "TIPPLER"],
-        # TANK wagons incompatible with specialized types
-        "TANK": ["COIL", "SLAB", "AUTO", "CEMENT"],
-    }
-
-    # Define wagon compatibility groups (what CAN match) - ENHANCED v2.2.5
-    wagon_compatibility = {
-        # Specialized wagons (ONLY match themselves)
-        "COIL": ["COIL"],
-        "SLAB": ["SLAB"],
-        "AUTO": ["AUTO"],
-        "CEMENT": ["CEMENT"],
-        "TIPPLER": ["TIPPLER"],
-        # Container wagons group - ENHANCED
-        "CONTAINER": ["CONTAINER", "FLAT", "BLC", "BLCA", "BLCB", "CONCOR", "CON"],
-        "CON": ["CON", "CONTAINER", "FLAT", "BLC", "CONCOR"],
-        # Covered wagons group (BCNA family only) - ENHANCED
-        "BCNA": ["BCNA", "BCNE", "BCNH", "BCNL", "BCN", "BCCN"],
-        "BCNE": ["BCNA", "BCNE", "BCNH", "BCNL", "BCN", "BCCN"],
-        "BCN": ["BCNA", "BCNE", "BCNH", "BCNL", "BCN", "BCCN"],
-        "BCCN": ["BCCN", "BCNA", "BCN", "BCBFG", "BCFC"],
-        # Open wagons group (BOXN family only)
-        "BOXN": ["BOXN", "BOXNR", "BOXNG", "BOXNHL", "BOXNM1", "BOXNM2", "BOSTH"],
-        "BOXNR": ["BOXN", "BOXNR", "BOXNG", "BOXNHL", "BOXNM1", "BOXNM2", "BOSTH"],
-        "BOSTH": ["BOXN", "BOXNR", "BOXNG", "BOXNHL", "BOXNM1", "BOXNM2", "BOSTH"],
-        # Tank wagons group - ENHANCED v2.2.5
-        "BTPN": ["BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"],
-        "BTFLN": ["BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"],
-        "TANK": ["BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"],
-        "BTI": ["BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"],
-        "MILKTANKER": ["MILKTANKER", "VVN", "TANK"],
-        # Container/flat wagons group (extended) - ENHANCED
-        "FLAT": ["FLAT", "BLC", "BLCA", "CONTAINER", "CONCOR", "BCA", "BCB"],
-        "BLC": ["FLAT", "BLC", "BLCA", "CONTAINER", "CONCOR", "BCA", "BCB"],
-        "BCA": ["BCA", "BCB", "BLC", "CONTAINER", "FLAT"],
-        "BCB": ["BCA", "BCB", "BLC", "CONTAINER", "FLAT"],
-        "CONCOR": ["FLAT", "BLC", "BLCA", "CONTAINER", "CONCOR"],
-        # Parcel/mail wagons - STRICT: HCPV should prefer exact matches
-        "HPCV": ["HPCV", "HCPV"],  # Only exact parcel van types
-        "HCPV": ["HPCV", "HCPV"],  # Only exact parcel van types, exclude generic PARCEL
-        "PARCEL": ["HPCV", "HCPV", "PARCEL"],  # PARCEL can accept all parcel types
-        # Brake vans - ENHANCED v2.2.5 - BOBYN is freight wagon, not crew vehicle
-        "BRD": ["BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"],  # brake vans
-        "BRN": ["BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"],
-        "BRNA": ["BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"],
-        "BRW": ["BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"],
-        "BRAKE": ["BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"],
-        "BVZI": ["BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"],
-        "CABOOSE": ["BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"],
-
-        # Keep BOBYN strictly in freight group (open wagons)
-        "BOBYN": ["BOBYN", "BOXN", "BOY", "BOST"],  # open freight family
-    }
-
-    compatible_classes = wagon_compatibility.get(wanted_class, [wanted_class])
-    incompatible_classes = incompatible_groups.get(wanted_class, [])
-
-    for asset in pool:
-        asset_class = detect_wagon_or_engine_class(asset.name, "Wagon" if asset.kind == AssetKind.WAGON else "Engine")
-
-        # STRICT: For BCCW, only match assets with class BCCW
-        if wanted_class == "BCCW":
-            if asset_class == "BCCW":
-                compatible_pool.append(asset)
-            continue
-
-        # STRICT: Check for incompatible classes first
-        if asset_class and asset_class in incompatible_classes:
-            continue  # Skip incompatible wagon types
-
-        # If asset has a detectable class, check compatibility
-        if asset_class:
-            # PRIORITY: Exact class match gets highest preference
-            if _ci_eq(asset_class, wanted_class):
-                # Exact match - always include with highest priority
-                compatible_pool.append(asset)
-                logging.debug(f"EXACT_CLASS_MATCH: {asset.folder}/{asset.name} included (exact class: {asset_class})")
-            elif asset_class in compatible_classes:
-                # Compatible but not exact - include with lower priority
-                compatible_pool.append(asset)
-                logging.debug(f"COMPATIBLE_CLASS_MATCH: {asset.folder}/{asset.name} included (compatible class: {asset_class} for wanted: {wanted_class})")
-            # Note: Incompatible classes are filtered out in the main loop
-        else:
-            # If no detectable class, apply strict name-based filtering
-            asset_name_lower = asset.name.lower()
-
-            # CRITICAL: Container context checking
-            if wanted_class == "CONTAINER":
-                # For containers, require container-related terms
-                if any(
-                    term in asset_name_lower
-                    for term in ["con_", "container", "flat", "blc"]
-                ):
-                    compatible_pool.append(asset)
-                continue
-
-            # STRICT: Specialized wagon filtering
-            if wanted_class in ["COIL", "SLAB", "AUTO", "CEMENT", "TIPPLER"]:
-                # For specialized wagons, require EXACT type match in name
-                if wanted_class.lower() in asset_name_lower:
-                    # Additional check: ensure it's not a different specialized type
-                    other_specialized = ["coil", "slab", "auto", "cement", "tippler"]
-                    other_specialized.remove(wanted_class.lower())
-                    if not any(
-                        other in asset_name_lower for other in other_specialized
-                    ):
-                        compatible_pool.append(asset)
-                continue
-
-            # STRICT: BCNA wagon filtering
-            if wanted_class in ["BCNA", "BCN"]:
-                # Reject if contains specialized wagon terms
-                if any(
-                    term in asset_name_lower
-                    for term in ["coil", "slab", "auto", "cement", "con_"]
-                ):
-                    continue
-                # Accept if contains BCNA-related terms
-                if any(
-                    term in asset_name_lower
-                    for term in ["bcna", "bcne", "bcnh", "covered"]
-                ):
-                    compatible_pool.append(asset)
-                continue
-
-            # STRICT: BOXN wagon filtering
-            if wanted_class == "BOXN":
-                # Reject if contains specialized wagon terms or covered wagon terms
-                if any(
-                    term in asset_name_lower
-                    for term in [
-                        "coil",
-                        "slab",
-                        "auto",
-                        "cement",
-                        "covered",
-                        "bcna",
-                        "con_",
-                    ]
-                ):
-                    continue
-                # Accept if contains BOXN-related terms
-                if any(term in asset_name_lower for term in ["boxn", "open"]):
-                    compatible_pool.append(asset)
-                continue
-
-            # CRITICAL: Prevent container assets from matching non-container classes
-            if any(
-                term in asset_name_lower for term in ["con_", "container"]
-            ) and wanted_class not in ["CONTAINER", "FLAT", "BLC"]:
-                continue
-
-            # CRITICAL: Prevent specialized wagon names from matching standard classes
-            if any(
-                term in asset_name_lower for term in ["coil", "slab", "auto", "cement"]
-            ) and wanted_class not in ["COIL", "SLAB", "AUTO", "CEMENT"]:
-                continue
-
-            # CRITICAL: Prevent VVN/MILKTANKER wagons from matching container/shipping assets
-            if wanted_class in ["VVN", "MILKTANKER", "TANK"]:
-                # Reject shipping/container company names and container-related terms
-                if any(
-                    term in asset_name_lower
-                    for term in ["maersk", "seal", "con_", "container", "ship", "marine", "navy"]
-                ):
-                    continue
-                # Only allow if asset name contains milk/tank related terms
-                if not any(
-                    term in asset_name_lower
-                    for term in ["milk", "tanker", "tank", "vvn", "btpn", "btfln", "bti"]
-                ):
-                    continue
-
-            # CRITICAL: STRICT BOBYN filtering - only allow brake van freight wagons, exclude cabooses
-            if wanted_class == "BOBYN":
-                # For BOBYN (brake van freight wagons), be very strict - only allow if name contains brake van terms
-                brake_van_terms = ["bobyn", "brn", "brd", "brna"]  # Exclude "brake" to avoid cabooses
-                if not any(term in asset_name_lower for term in brake_van_terms):
-                    continue
-                # Additional check: ensure it's not a crew vehicle (caboose/guard van)
-                crew_vehicle_terms = ["caboose", "guard", "crew", "van", "control", "accommodation"]
-                if any(term in asset_name_lower for term in crew_vehicle_terms):
-                    continue
-                # Additional check: ensure it's not a different wagon type
-                incompatible_terms = ["tank", "boxn", "bcna", "container", "flat", "coil", "slab", "auto", "cement"]
-                if any(term in asset_name_lower for term in incompatible_terms):
-                    continue
-
-            # If no specific restrictions apply, allow the match
-            compatible_pool.append(asset)
-
-    return compatible_pool
-
-
-def detect_family_from_name(name: str, role: str = "Engine", subtype: str = "") -> str:
-    """Detect family from name.
-    
-    For engines: returns locomotive families (WAP/WAG/WDM/EMU/MEMU)
-    For wagons: returns coach families (AC/RAJDHANI/SLEEPER/GENERAL) only for passenger wagons
-    """
-    import re
-    name_lower = name.lower()
-
-    # For wagons, detect coach families ONLY for passenger wagons
-    if role == "Wagon":
-        # If this is a freight wagon, don't apply passenger coach family detection
-        if subtype == "Freight":
-            return ""  # Freight wagons don't have coach families
-            
-        # Coach families from store files (only for passenger wagons)
-        if "rajdhani" in name_lower:
-            return "RAJDHANI"
-        elif "pantry" in name_lower or "pc" in name_lower:
-            return "PANTRY"
-        elif re.search(r'(^|[\s_/-])slr([\s_/-]|\d|$)', name_lower) or name_lower.startswith('slr'):
-            return "SLR"
-        elif "sleeper" in name_lower:
-            return "SLEEPER"
-        elif "sl" in name_lower:
-            return "SLEEPER"
-        elif "chair" in name_lower or "accc" in name_lower:
-            return "CHAIR"
-        elif "ac" in name_lower and ("1a" in name_lower or "2a" in name_lower or "3a" in name_lower):
-            return "AC"
-        elif "ac" in name_lower:
-            return "AC"
-        elif "general" in name_lower or "gs" in name_lower:
-            return "GENERAL"
-        elif "second" in name_lower or "secondclass" in name_lower:
-            # Check if this is actually an SLR coach (like SECOND_CLASS_LUGGAGE)
-            if "luggage" in name_lower:
-                return "SLR"
-            return "GENERAL"
-        elif "power" in name_lower or "eog" in name_lower:
-            return "POWER"
-        return ""
-
-    # For engines, use locomotive family detection
-    # ENHANCED v2.2.4: Better EMU/MEMU distinction (order matters!)
-    if "memu" in name_lower:
-        return "MEMU"  # MEMU is more specific than EMU
-    elif "emu" in name_lower:
-        return "EMU"  # Generic EMU
-    elif "demu" in name_lower or "dmu" in name_lower:
-        return "DMU"
-    elif "mmu" in name_lower:
-        return "MMU"
-
-    # Locomotive families - use token-based detection for short indicators
-    # PRIORITIZE LOCOMOTIVE FAMILIES over generic indicators like "ai"
-    locomotive_families_priority = {
-        "wap": "WAP",
-        "wag": "WAG",
-        "wdm": "WDM",
-        "wdg": "WDG",
-        "wdp": "WDP",
-        "wds": "WDS",
-        "wam": "WAM",
-        "wcam": "WCAM",
-        "wcg": "WCG",
-        "wcm": "WCM",
-    }
-    
-    # Check priority locomotive families first
-    for family_key, family_name in locomotive_families_priority.items():
-        if len(family_key) <= 3:  # Short indicators need careful matching
-            import re
-            tokens = re.split(r'[\s_/-]', name_lower)
-            # Check if family_key is a substring of any token with specific conditions
-            for token in tokens:
-                if family_key in token:
-                    if token == family_key:
-                        # Exact match
-                        return family_name
-                    elif token.startswith(family_key) and token[len(family_key):].isalnum():
-                        # Family key followed by alphanumeric characters (e.g., "wdg4d", "wap7e")
-                        return family_name
-                    # Skip other cases to avoid false positives like "wag" in "wagons"
-        else:  # Longer indicators use substring match
-            if family_key in name_lower:
-                return family_name
-    
-    # Generic families (lower priority)
-    generic_families = {
-        "ai": "AI",  # AI systems (horns, etc.)
-        "acela": "ACELA",  # ACELA trains
-    }
-    
-    for family_key, family_name in generic_families.items():
-        if len(family_key) <= 3:  # Short indicators need careful matching
-            import re
-            tokens = re.split(r'[\s_/-]', name_lower)
-            # Check if family_key is a substring of any token with specific conditions
-            for token in tokens:
-                if family_key in token:
-                    if token == family_key:
-                        # Exact match
-                        return family_name
-                    elif token.startswith(family_key) and token[len(family_key):].isalnum():
-                        # Family key followed by alphanumeric characters (e.g., "wdg4d", "wap7e")
-                        return family_name
-                    # Skip other cases to avoid false positives like "wag" in "wagons"
-        else:  # Longer indicators use substring match
-            if family_key in name_lower:
-                return family_name
-
-    return ""
-
-
-def detect_subtype_from_name(name: str) -> str:
-    """Detect subtype (Passenger/Freight/Maintenance) from name - ENHANCED v2.2.5 WITH FREIGHT ANALYSIS."""
-    name_lower = name.lower()
-
-    # ENHANCED: Detect engine subtypes based on locomotive series
-    # Freight locomotives
-    freight_engine_series = [
-        "wag", "wdg", "wdm", "wds", "wam", "wcam", "wcg", "wcm"
-    ]
-    for series in freight_engine_series:
-        if series in name_lower:
-            return "Freight"
-    
-    # Passenger locomotives  
-    passenger_engine_series = [
-        "wap", "wdp"
-    ]
-    for series in passenger_engine_series:
-        if series in name_lower:
-            return "Passenger"
-
-    # ENHANCED v2.2.5: Handle manufacturer prefixes FIRST
-    clean_name = name_lower
-    for prefix in ["bsam_", "asmi", "con_"]:
-        if clean_name.startswith(prefix):
-            clean_name = clean_name[len(prefix) :]
-            break
-
-    # CRITICAL: Container detection FIRST (before passenger indicators to avoid false classification)
-    container_indicators = [
-        "con_",
-        "container",
-        "concor",
-        "intermodal",
-        "flat",
-        "flatcar",
-        "blc",
-        "blca",
-        "blcb",  # Container-carrying wagons
-    ]
-    if any(
-        indicator in name_lower or indicator in clean_name
-        for indicator in container_indicators
-    ):
-        return "Freight"  # Containers are freight
-
-    # ENHANCED: Check for passenger indicators AFTER container detection
-    # BUT check for freight wagons FIRST to avoid false passenger classification
-    freight_wagon_indicators = [
-        # Covered wagons (BCNA family) - EXPLICIT
-        "bcna",
-        "bcne",
-        "bcnh",
-        "bcnl",
-        "bccnr",
-        "bccw",
-        "bcn",
-        "bccn",
-        "bcbfg",
-        "bcfc",
-        # Open wagons (BOXN family) - EXPLICIT
-        "boxn",
-        "boxnr",
-        "boxng",
-        "boxnhl",
-        "boxnm1",
-        "boxnm2",
-        "bosth",  # BOSTH family (Open wagons for coal/ballast)
-        # Traditional freight wagons
-        "tank",
-        "freight",
-        "goods",
-        "cargo",
-        "bobo",
-        "bobr",
-        "boby",
-        "bobyn",
-        "btpn",
-        "btap",
-        "btfln",
-        "bti",
-        "flat",
-        "flatcar",
-        "container",
-        "concor",
-        "blc",
-        "brd",
-        "brn",
-        "brna",
-        "brake",
-        "bca",
-        "bcb",
-        "caboose",  # Caboose wagons (brake vans)
-        "wagon",   # Generic wagon indicator
-        # Parcel and mail (these are freight category)
-        "hpcv",
-        "hcpv",
-        "parcel",
-        "mail",
-        "post",
-        "baggage",
-        "luggage_van",  # but not SLR which is passenger service
-        # Specialized freight - ENHANCED v2.2.5
-        "coil",
-        "slab",
-        "slag",
-        "sled",
-        "slope",
-        "billet",
-        "pipe",
-        "automobile",
-        "timber",
-        "cement",
-        "milktanker",
-        # Manufacturer series - ENHANCED v2.2.5
-        "bsam",
-        "asmi",
-        "apl",
-    ]
-    if any(
-        indicator in name_lower or indicator in clean_name
-        for indicator in freight_wagon_indicators
-    ):
-        return "Freight"
-
-    passenger_indicators = [
-        '1a', '2a', '3a', 'ac', 'sl', 'gen', 'chair', 'sleeper', 'pantry', 'eog', 'pc', 'slr', 'fc', 'sc', 'gn', 'cc', 'accc'
-    ]
-    if any(indicator in name_lower for indicator in passenger_indicators):
-        return "Passenger"
-
-    # Passenger locomotive detection
-    passenger_locomotive_indicators = [
-        "wap",
-        "wdp",  # Passenger locomotive families
-        "wap1",
-        "wap4",
-        "wap5",
-        "wap7",  # Electric passenger
-        "wdp1",
-        "wdp3",
-        "wdp4",
-        "wdp4b",
-        "wdp4d",
-        "wdp4e",  # Diesel passenger
-    ]
-    if any(indicator in name_lower for indicator in passenger_locomotive_indicators):
-        return "Passenger"
-
-    # Passenger coach indicators (expanded)
-    passenger_coach_indicators = [
-        "1a",
-        "2a",
-        "3a",
-        "1ac",
-        "2ac",
-        "3ac",
-        "ac1",
-        "ac2",
-        "ac3",
-        "sl",
-        "slp",
-        "sleeper",
-        "sleeping",
-        "gs",
-        "gen",
-        "general",
-        "gencar",
-        "unreserved",
-        "second",
-        "secondclass",
-        "cc",
-        "chair",
-        "chaircar",
-        "accc",
-        "ac_chair",
-        "passenger",
-        "coach",
-        "utk",
-        "utkrisht",
-        "humsafar",
-        "tejas",
-        "rajdhani",
-        "shatabdi",
-        "duronto",
-        "vande",
-        "vandebharat",
-    ]
-    # CRITICAL: Only detect as passenger if NOT a container or freight context
-    if not any(
-        con in name_lower or con in clean_name
-        for con in ["con_", "container", "freight", "bsam", "asmi"]
-    ):
-        # Use more specific detection for short indicators to avoid false positives
-        passenger_detected = False
-        for indicator in passenger_coach_indicators:
-            if len(indicator) <= 2:
-                # For short indicators like "gs", check if they appear as separate tokens
-                # Split on various separators and check for exact matches
-                import re
-                tokens = re.split(r'[\s_/-]', name_lower)
-                if indicator in tokens:
-                    # Additional check: make sure it's not part of a longer token
-                    for token in tokens:
-                        if token == indicator:
-                            passenger_detected = True
-                            break
-                    if passenger_detected:
-                        break
-            else:
-                # For longer indicators, use substring match
-                if indicator in name_lower or indicator in clean_name:
-                    passenger_detected = True
-                    break
-        if passenger_detected:
-            return "Passenger"
-
-    # Service/Maintenance indicators (lower priority than locomotive detection)
-    service_indicators = [
-        "eog",
-        "generator",
-        "power",
-        "powercar",
-        "maintenance",
-        "service",
-        "inspection",
-        "pc",
-        "pantry",
-        "pantrycar",
-        "catering",
-        # Only detect AI/HORN as service if not part of locomotive name
-        "ai_system",  # More specific than just "ai"
-        "ai_horn",    # More specific than just "ai" + "horn"
-        "horn_system", # More specific than just "horn"
-    ]
-    
-    # Check service indicators with more specificity to avoid conflicts with locomotive names
-    for indicator in service_indicators:
-        if indicator in name_lower or indicator in clean_name:
-            return "Service"
-
-    # SLR is special - it's passenger service (guard's van on passenger trains)
-    if "slr" in name_lower and not any(
-        con in name_lower or con in clean_name for con in ["con_", "container"]
-    ):
-        return "Passenger"
-
-    return ""
-
-
-def detect_build_from_name_or_folder(name: str, folder: str) -> str:
-    """Detect build type (LHB/ICF/UTK) from name or folder - ENHANCED v2.2.5 WITH BLUE REMOVED."""
-    combined = f"{name} {folder}".lower()
-
-    # Priority-ordered build indicators (more specific first)
-    # CHANGE: Removed 'blue' and 'blu' as requested
-    build_indicators = [
-        # Special liveries/sets (highest priority) - ENHANCED v2.2.3: Added ANTYODAYA and DURONTO
-        ("antyodaya", "ANTYODAYA"),
-        ("antodaya", "ANTYODAYA"),  # Common misspelling
-        ("duronto", "DURONTO"),
-        ("utkrisht", "UTK"),
-        ("utk", "UTK"),
-        ("ukt", "UTK"),  # UKT is common misspelling
-        ("tejas", "TEJAS"),
-        ("humsafar", "HUMSAFAR"),
-        ("vande", "VANDE"),
-        ("vandebharat", "VANDE"),
-        ("garibrath", "GARIBRATH"),
-        ("garib_rath", "GARIBRATH"),
-        ("samparkkranti", "SAMPARKKRANTI"),
-        ("doubledecker", "DOUBLEDECKER"),
-        ("_ai", "AI"),  # AI systems (more specific to avoid false positives)
-        ("ai_", "AI"),  # AI systems
-        (" ai ", "AI"),  # AI systems with word boundaries
-        ("artificial_intelligence", "AI"),  # Full AI term
-        ("ai_system", "AI"),  # AI system designation
-        (" ai-", "AI"),  # AI with dash
-        ("-ai ", "AI"),  # Dash AI
-        ("ai-horn", "AI"),  # AI horn combination
-        ("ai_horn", "AI"),  # AI horn with underscore
-        ("aihorn", "AI"),  # AI horn without separator
-        ("horn_ai", "AI"),  # Horn AI combination
-        ("horn-ai", "AI"),  # Horn AI with dash
-        ("ai system", "AI"),  # AI system with space
-        ("ai-system", "AI"),  # AI system with dash
-       
-        # Build types (lower priority)
-        ("lhb", "LHB"),
-        ("linke_hofmann", "LHB"),
-        ("modern", "LHB"),
-        ("icf", "ICF"),
-        ("integral", "ICF"),
-        ("conventional", "ICF"),
-        ("alco", "ALCO"),
-        ("other", "OTHER"),
-    ]
-
-    # Check in priority order - return first match
-    for indicator, build_type in build_indicators:
-        # Special handling for AI to avoid false positives within words
-        if indicator in ["_ai", "ai_", " ai ", "artificial_intelligence", "ai_system", " ai-", "-ai "]:
-            # Use word boundaries for AI detection to avoid matching within words like "HYUNDAI"
-            import re
-            pattern = r'\b' + re.escape(indicator.strip()) + r'\b'
-            if re.search(pattern, combined, re.IGNORECASE):
-                return build_type
-        elif indicator in combined:
-            return build_type
-
-    return ""
-
-
-def detect_from_folder(folder: str) -> Tuple[str, str, str, str]:
-    """Detect family, subtype, class, build from folder name."""
-    if not folder:
-        return "", "", "", ""
-
-    folder_lower = folder.lower()
-
-    subtype = detect_subtype_from_name(folder_lower)
-    family = detect_family_from_name(folder_lower, "Engine", subtype)  # Default to Engine for folder-only detection
-    klass = detect_wagon_or_engine_class(folder_lower)
-    build = detect_build_from_name_or_folder("", folder_lower)
-
-    return family, subtype, klass, build
-
-
-def name_equal(name1: str, name2: str) -> bool:
-    """Check if two names are equal (case-insensitive)."""
-    return name1.lower().strip() == name2.lower().strip()
-
-
-def get_traction_type_from_family(family: str) -> TractionType:
-    """Get traction type from locomotive family - ENHANCED v2.2.3."""
-    if not family:
-        return TractionType.UNKNOWN
-
-    family_lower = family.lower()
-
-    # Electric locomotive families - ENHANCED v2.2.3
-    electric_families = {
-        "wap",
-        "wag",
-        "wam",
-        "wcam",
-        "wcg",
-        "wcm",
-        "emu",
-        "memu",
-        "mmu",
-    }
-    if family_lower in electric_families:
-        return TractionType.ELECTRIC
-
-    # Diesel locomotive families - ENHANCED v2.2.3
-    diesel_families = {"wdm", "wdg", "wdp", "wds", "dmu", "demu"}
-    if family_lower in diesel_families:
-        return TractionType.DIESEL
-
-    return TractionType.UNKNOWN
-
-
-def _ci_eq(a: Optional[str], b: Optional[str]) -> bool:
-    return (a or "").casefold() == (b or "").casefold()
-
-
-def apply_strict_attribute_filter(
-    pool: List[AssetRecord], family: str, subtype: str, klass: str, build: str
-) -> List[AssetRecord]:
-    """
-    NEW: Apply strict attribute filtering - only assets with EXACT matches for all four attributes.
-    This replaces the more lenient filtering used in the original version.
-    """
-    if not any([family, subtype, klass, build]):
-        # If no attributes detected, return empty pool (will lead to UNRESOLVED)
-        return []
-
-    filtered = []
-
-    for asset in pool:
-        # Extract asset attributes (use cached values where available)
-        asset_role = "Engine" if asset.kind == AssetKind.ENGINE else "Wagon"
-        asset_subtype = detect_subtype_from_name(
-            asset.name
-        ) or detect_subtype_from_name(asset.folder)
-        asset_family = detect_family_from_name(asset.name, asset_role, asset_subtype) or detect_family_from_name(
-            asset.folder, asset_role, asset_subtype
-        )
-        # PERFORMANCE OPTIMIZATION: Use cached class detection
-        asset_class = asset.cached_class
-        asset_build = detect_build_from_name_or_folder(asset.name, asset.folder)
-
-        # Initialize matches for this asset
-        matches = True
-
-        # ENHANCED v2.2.9: More flexible attribute matching for wagons
-        # For wagons, be more lenient with Family attribute since many wagons don't have locomotive-style family codes
-        is_wagon = asset.kind == AssetKind.WAGON
-        
-        if is_wagon:
-            # For wagons: strict matching - require EXACT matches for all detected attributes
-            # If target has an attribute, asset must have the same attribute value
-            class_conflict = klass and not (_ci_eq(asset_class, klass) or (
-                # Use compatibility for wagon class matching as fallback
-                enhance_wagon_matching_with_compatibility([asset], klass, asset.name) if klass else False
-            ))
-            family_conflict = family and not _ci_eq(asset_family, family)
-            subtype_conflict = subtype and not _ci_eq(asset_subtype, subtype)
-            build_conflict = build and not _ci_eq(asset_build, build)
-            
-            # Reject if any required attribute doesn't match
-            if class_conflict or family_conflict or subtype_conflict or build_conflict:
-                matches = False
-            else:
-                # All required attributes match (or weren't specified)
-                matches = True
-        else:
-            # For engines: strict matching - require EXACT matches for all detected attributes
-            # If target has an attribute, asset must have the same attribute value
-            class_conflict = klass and not _ci_eq(asset_class, klass)
-            family_conflict = family and not _ci_eq(asset_family, family)
-            subtype_conflict = subtype and not _ci_eq(asset_subtype, subtype)
-            build_conflict = build and not _ci_eq(asset_build, build)
-            
-            # Reject if any required attribute doesn't match
-            if class_conflict or family_conflict or subtype_conflict or build_conflict:
-                matches = False
-            else:
-                # All required attributes match (or weren't specified)
-                matches = True
-
-        if matches:
-            filtered.append(asset)
-
-    return filtered
-
-
-def find_digit_near_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
-    """Find assets with similar digit patterns for digit-near matching."""
-    import re
-
-    # Extract digit patterns from wanted name
-    wanted_digits = re.findall(r'\d+', wanted_name)
-    if not wanted_digits:
-        return []
-
-    matches = []
-    for asset in pool:
-        asset_digits = re.findall(r'\d+', asset.name)
-        if not asset_digits:
-            continue
-
-        # Check if digit patterns are similar (same count and close values)
-        if len(wanted_digits) == len(asset_digits):
-            digit_similarity = True
-            for wanted_digit, asset_digit in zip(wanted_digits, asset_digits):
-                try:
-                    wanted_num = int(wanted_digit)
-                    asset_num = int(asset_digit)
-                    # Allow digit difference of max 2 (e.g., 28052 matches 28059)
-                    if abs(wanted_num - asset_num) > 2:
-                        digit_similarity = False
-                        break
-                except ValueError:
-                    digit_similarity = False
-                    break
-
-            if digit_similarity:
-                matches.append(asset)
-
-    return matches
-
-
-def find_wildcard_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
-    """Find assets using wildcard pattern matching."""
-    import re
-    import fnmatch
-
-    matches = []
-    # Create wildcard patterns from the wanted name
-    patterns = [
-        wanted_name.replace('_', '*'),  # Replace underscores with wildcards
-        re.sub(r'\d+', '*', wanted_name),  # Replace digits with wildcards
-        wanted_name.replace('_', '?'),  # Replace underscores with single char wildcards
-    ]
-
-    for asset in pool:
-        for pattern in patterns:
-            if fnmatch.fnmatch(asset.name.lower(), pattern.lower()):
-                matches.append(asset)
-                break  # Only add once per asset
-
-    return matches
-
-
-def find_semantic_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
-    """Find assets with high semantic similarity using fuzzy matching."""
-    if not FUZZYWUZZY_AVAILABLE:
-        return []  # Return empty if fuzzywuzzy not available
-
-    matches = []
-    threshold = 75  # Minimum similarity score
-
-    for asset in pool:
-        # Calculate multiple similarity metrics
-        ratio = fuzz.ratio(wanted_name.lower(), asset.name.lower())
-        partial_ratio = fuzz.partial_ratio(wanted_name.lower(), asset.name.lower())
-        token_sort_ratio = fuzz.token_sort_ratio(wanted_name.lower(), asset.name.lower())
-
-        # Use the highest similarity score
-        similarity = max(ratio, partial_ratio, token_sort_ratio)
-
-        if similarity >= threshold:
-            matches.append(asset)
-
-    return matches
-
-
-def find_partial_token_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
-    """Find assets with partial token matches (at least 50% of tokens match)."""
-    wanted_name_norm = re.sub(r"[^a-z0-9]+", " ", wanted_name.lower()).strip()
-    wanted_tokens = set(wanted_name_norm.split())
-
-    if not wanted_tokens:
-        return []
-
-    matches = []
-    for asset in pool:
-        asset_name_norm = re.sub(r"[^a-z0-9]+", " ", asset.name.lower()).strip()
-        asset_tokens = set(asset_name_norm.split())
-
-        if not asset_tokens:
-            continue
-
-        # Calculate token overlap
-        intersection = len(wanted_tokens & asset_tokens)
-        total_unique = len(wanted_tokens | asset_tokens)
-
-        if total_unique > 0:
-            overlap_ratio = intersection / total_unique
-            # Require at least 40% token overlap
-            if overlap_ratio >= 0.4:
-                matches.append(asset)
-
-    return matches
-
-
-def pick_strict_default(
-    defaults_index: List[AssetRecord],
-    wanted_role: str,
-    family: str,
-    subtype: str,
-    klass: str,
-    build: str,
-) -> Optional[AssetRecord]:
-    """
-    NEW: Pick default with strict requirement - at least Subtype must match.
-    """
-    if not defaults_index or not subtype:
-        return None  # No defaults available or no subtype to match
-
-    # Filter defaults by role
-    role_defaults = [
-        d
-        for d in defaults_index
-        if (wanted_role == "Engine" and d.kind == AssetKind.ENGINE)
-        or (wanted_role == "Wagon" and d.kind == AssetKind.WAGON)
-    ]
-
-    if not role_defaults:
-        return None
-
-    # Filter by subtype requirement (strict)
-    subtype_matched = []
-    for default in role_defaults:
-        default_subtype = detect_subtype_from_name(
-            default.name
-        ) or detect_subtype_from_name(default.folder)
-        if _ci_eq(default_subtype, subtype):
-            subtype_matched.append(default)
-
-    if not subtype_matched:
-        return None  # No defaults match the required subtype
-
-    # Score the subtype-matched defaults
-    scored_defaults = []
-
-    for default in subtype_matched:
-        score = 100  # Base score for subtype match
-        default_name_lower = default.name.lower()
-
-        # Additional scoring for other attributes
-        default_family = detect_family_from_name(
-            default.name, wanted_role, default_subtype
-        ) or detect_family_from_name(default.folder, wanted_role, default_subtype)
-        default_class = detect_wagon_or_engine_class(default.name, wanted_role)
-        default_build = detect_build_from_name_or_folder(default.name, default.folder)
-
-        if family and _ci_eq(default_family, family):
-            score += 50
-        if klass and _ci_eq(default_class, klass):
-            score += 75
-        if build and _ci_eq(default_build, build):
-            score += 100
-
-        # Generic defaults bonus
-        if "default" in default_name_lower:
-            score += 25
-
-        scored_defaults.append((default, score))
-
-    # Sort by score and return best
-    scored_defaults.sort(key=lambda x: (-x[1], x[0].name.lower()))
-    return scored_defaults[0][0] if scored_defaults else None
-
-
-def rank_by_name_then_tokens(
-    pool: List[AssetRecord],
-    wanted_name: str,
-    wanted_folder: str,
-    klass: str,
-    build: str,
-) -> Optional[AssetRecord]:
-    """Rank candidates by name similarity then token matching."""
-    if not pool:
-        return None
-
-    import random
-
-    # PERFORMANCE OPTIMIZATION: Cache wanted name normalization
-    wanted_name_norm = re.sub(r"[^a-z0-9]+", " ", wanted_name.lower()).strip()
-    wanted_tokens = set(wanted_name_norm.split())
-
-    # Add folder tokens if available
-    if wanted_folder:
-        folder_norm = re.sub(r"[^a-z0-9]+", " ", wanted_folder.lower()).strip()
-        wanted_tokens.update(folder_norm.split())
-
-    # Detect token conflicts: both passenger-class indicators and generator indicators present
-    # Passenger-class tokens (coaches, reserved classes).
-    # Keep this limited to tokens already used in the codebase.
-    passenger_tokens = {
-        'cc', '1a', '2a', '3a', 'sl', 'sc', 'gs', '2s', 'accc', 'fc'
-    }
-
-    # Non-passenger / auxiliary tokens (generator cars, EOG, pantry etc.).
-    # Move 'pc' and 'slr' here as requested and avoid inventing new token names.
-    non_passenger_tokens = {'gc', 'eog', 'gen', 'gene', 'gn', 'pc', 'slr', 'pantry', 'generator', 'power', 'nmgc', 'drivingcar', 'brake', 'bvcm', 'bvzi', 'bvzc'}
-
-    wanted_has_passenger = bool(wanted_tokens & passenger_tokens)
-    wanted_has_non_passenger = bool(wanted_tokens & non_passenger_tokens)
-
-    # If both passenger and non-passenger indicators appear, prefer non-passenger assets
-    prefer_non_passenger = wanted_has_passenger and wanted_has_non_passenger
-
-    # Strict rule: if the wanted name explicitly contains generator-like tokens
-    # (gc, eog, gen, gene), we should NOT match to passenger-class assets (like CC).
-    wanted_has_generator_tokens = bool(wanted_tokens & {'gc', 'eog', 'gen', 'gene'})
-
-    # If conflict present, treat the wanted class as non-passenger: clear klass so
-    # passenger-class exact matches and bonuses are suppressed.
-    if prefer_non_passenger:
-        if logging.getLogger().isEnabledFor(logging.DEBUG):
-            logging.debug(
-                f"PREFERRED_NON_PASSENGER: Wanted '{wanted_name}' contains both passenger and non-passenger tokens; treating wanted class as non-passenger (suppressing passenger-class bonuses)"
-            )
-        klass = ''
-
-    scored_candidates = []
-
-    for asset in pool:
-        score = 0
-
-        # Normalized name equality (highest priority)
-        asset_name_norm = asset.cached_normalized
-        if asset_name_norm == wanted_name_norm:
-            score += 1000
-
-        # Token containment and overlap calculation
-        asset_tokens = asset.cached_tokens
-        token_intersection = wanted_tokens & asset_tokens
-        token_containment = wanted_tokens <= asset_tokens
-        token_overlap = len(token_intersection) > 0
-        
-        # Get asset class for comparison
-        asset_class = asset.cached_class
-        exact_class_match = asset_class and _ci_eq(asset_class, klass)
-        
-        # Optimized scoring logic
-        if token_containment or (token_overlap and exact_class_match):
-            # Determine class compatibility more efficiently
-            if not klass:
-                class_compatible = True
-            elif asset.kind == AssetKind.WAGON:
-                # For wagons, use cached compatibility check
-                class_compatible = exact_class_match or not asset_class  # Simplified check
-            else:
-                # For engines, exact match required
-                class_compatible = exact_class_match
-            
-            if class_compatible:
-                # Score based on token match quality
-                if token_containment:
-                    score += 900  # Perfect token containment
-                else:
-                    score += 700  # Partial tokens with exact class
-                
-                # Class match bonuses
-                if exact_class_match:
-                    score += 300
-                    # Extra bonus for high-priority classes
-                    if klass in ["HCPV", "HPCV"]:
-                        score += 100
-            elif not asset_class:
-                score += 600  # No class detected
-            else:
-                score += 50   # Incompatible class
-
-        # Jaccard similarity (optimized)
-        if wanted_tokens and asset_tokens:
-            union_size = len(wanted_tokens | asset_tokens)
-            if union_size > 0:
-                jaccard_score = int((len(token_intersection) / union_size) * 800)
-                score += jaccard_score
-
-        # Same folder bonus
-        if wanted_folder and asset.folder.lower() == wanted_folder.lower():
-            score += 100
-
-        # PERFORMANCE OPTIMIZATION: Cache build detection
-        asset_build = ""
-        if build:
-            asset_build = detect_build_from_name_or_folder(asset.name, asset.folder)
-            if asset_build == build:
-                score += 200 if build in ["UTK", "TEJAS", "HUMSAFAR", "VANDE"] else 80
-
-        # Class-specific bonuses (optimized)
-        if klass and exact_class_match:
-            if asset.kind == AssetKind.WAGON:
-                score += 150
-                if exact_class_match:
-                    score += 100
-            else:
-                score += 150
-
-        # Special handling: if the wanted name contains both passenger-class tokens and
-        # non-passenger indicators (e.g., 'cc' and 'gc' or 'pantry'), prefer candidate
-        # assets that look like auxiliary/non-passenger cars (EOG, Pantry, Power).
-        if prefer_non_passenger:
-            asset_tokens_lower = set(t.lower() for t in getattr(asset, 'cached_tokens', set()))
-            asset_name_lower = (asset.name or '').lower()
-            asset_folder_lower = (asset.folder or '').lower()
-
-            # Detect if asset looks like generator/pantry/power car
-            asset_is_aux = (
-                (asset.cached_class and asset.cached_class.upper() in ('EOG', 'GN', 'PC', 'SLR'))
-                or bool(asset_tokens_lower & non_passenger_tokens)
-                or re.search(r'(?i)\b(gc|eog|gen|gene|pantry|power|pantrycar|powercar|generator)\b', asset_name_lower)
-                or re.search(r'(?i)\b(gc|eog|gen|gene|pantry|power|pantrycar|powercar|generator)\b', asset_folder_lower)
-            )
-
-            if asset_is_aux:
-                # Strong boost so auxiliary cars are preferred in conflict cases
-                score += 500
-                if logging.getLogger().isEnabledFor(logging.DEBUG):
-                    logging.debug(
-                        f"AUX-PREFERENCE: Boosting asset {asset.folder}/{asset.name} for wanted='{wanted_name}' (aux indicator present)"
-                    )
-            else:
-                # Slight penalty for obvious passenger-class candidates to de-prioritize them
-                if asset.cached_class and asset.cached_class.upper() in {c.upper() for c in passenger_tokens}:
-                    score -= 250
-
-        # Enforce strict GC -> not-CC rule: if the wanted name looks like a generator
-        # (contains generator tokens), penalize passenger-class assets strongly so they
-        # are effectively never selected for generator wants.
-        if wanted_has_generator_tokens:
-            if asset.cached_class and asset.cached_class.upper() in {c.upper() for c in passenger_tokens}:
-                # Heavy penalty to prevent CC being selected when GC is requested
-                score -= 2000
-                if logging.getLogger().isEnabledFor(logging.DEBUG):
-                    logging.debug(
-                        f"GENERATOR-STRICT: Penalizing passenger asset {asset.folder}/{asset.name} for wanted='{wanted_name}' (generator token present)"
-                    )
-
-        # Prefer passenger-only assets when wanted has no non-passenger tokens
-        if not wanted_has_non_passenger:
-            asset_has_non_passenger = (
-                bool(getattr(asset, 'cached_tokens', set()) & non_passenger_tokens)
-                or re.search(r'(?i)\b(gc|eog|gen|gene|pantry|power|pantrycar|powercar|generator|brake|bvcm|bvzi|bvzc)\b', (asset.name or '').lower())
-            )
-            if asset_has_non_passenger:
-                score -= 1000  # Penalize assets with non-passenger tokens when wanted has none
-                if logging.getLogger().isEnabledFor(logging.DEBUG):
-                    logging.debug(
-                        f"PASSENGER-PREFERENCE: Penalizing non-passenger asset {asset.folder}/{asset.name} for wanted='{wanted_name}' (wanted has no non-passenger tokens)"
-                    )
-
-        # Non-defaults bonus
-        if not asset.folder.lower().startswith("_defaults"):
-            score += 50
-
-        # Add controlled random element for variety (optimized)
-        if klass:
-            if klass in ["BOBYN", "BOXN", "BRN", "BRNA"]:
-                score += random.randint(0, 2)
-            elif klass in ["WAG7", "WAG9", "WAP7"]:
-                score += random.randint(0, 3)
-            else:
-                score += random.randint(0, 4)
-        else:
-            score += random.randint(0, 3)
-
-        scored_candidates.append((asset, score))
-
-    # Sort by score (descending), then use deterministic tie-breaking for consistency
-    if klass == "BOBYN":
-        # For BOBYN wagons, use deterministic sorting for consistency
-        scored_candidates.sort(key=lambda x: (-x[1], x[0].name.lower()))
-    else:
-        # Use deterministic tie-breaking based on asset name hash for consistency
-        scored_candidates.sort(key=lambda x: (-x[1], hash(x[0].name.lower()) % 100, hash(x[0].folder.lower()) % 100))
-
-    # Conditional debug logging for top candidates (only when debug enabled)
-    if logging.getLogger().isEnabledFor(logging.DEBUG):
-        logging.debug(
-            f"RANKING for {wanted_name}: top 3 candidates: {[(c[0].folder + '/' + c[0].name, c[1]) for c in scored_candidates[:3]]}"
-        )
-
-        # If multiple candidates have the same top score, log the variety
-        if len(scored_candidates) > 1:
-            top_score = scored_candidates[0][1]
-            tied_candidates = [c for c in scored_candidates if c[1] == top_score]
-            if len(tied_candidates) > 1:
-                chosen_name = (
-                    scored_candidates[0][0].folder + "/" + scored_candidates[0][0].name
-                )
-                logging.debug(
-                    f"TIE-BREAKER: {len(tied_candidates)} candidates with score {top_score}, randomly selected: {chosen_name}"
-                )
-
-    return scored_candidates[0][0] if scored_candidates else None
-
-
-def choose_best(
-    candidates: List[AssetRecord],
-    wanted_name: str,
-    wanted_folder: str,
-    klass: str,
-    build: str,
-) -> AssetRecord:
-    """Choose the best candidate from exact matches."""
-    if not candidates:
-        return None
-
-    import random
-
-    # Prefer same folder
-    same_folder = [
-        c for c in candidates if c.folder.lower() == (wanted_folder or "").lower()
-    ]
-    if same_folder:
-        candidates = same_folder
-
-    # Prefer non-defaults
-    non_defaults = [
-        c for c in candidates if not c.folder.lower().startswith("_defaults")
-    ]
-    if non_defaults:
-        candidates = non_defaults
-
-    # If multiple candidates remain, use deterministic selection based on name hash
-    if len(candidates) > 1:
-        # Sort deterministically by name hash to ensure consistent selection
-        candidates.sort(key=lambda x: hash((x.folder + x.name).lower()))
-        chosen_name = candidates[0].folder + "/" + candidates[0].name
-        logging.info(
-            f"EXACT-MATCH TIE-BREAKER: {len(candidates)} exact matches for '{wanted_name}', randomly selected: {chosen_name}"
-        )
-
-    return candidates[0]
-
-
-def detect_wagon_or_engine_class(name: str, wanted_role: str = "Engine") -> str:
-    """
-    Detect specific class (WAP7, 3A, BOXN, HCPV, BRN/BRNA, etc.) in a boundary-safe way.
-    COMPREHENSIVE FIX with extensive debugging for BRN detection.
-    """
-    if not name:
-        return ""
-        
-    name_lower = str(name).lower()
-    if logging.getLogger().isEnabledFor(logging.DEBUG):
-        logging.debug(f"CLASS_DETECTION: Processing '{name}' -> '{name_lower}'")
-
-    # Normalize separators so '_' and '-' act like spaces; collapse to single spaces
-    norm = _NORMALIZE_PATTERN.sub(' ', name_lower).strip()
-    if logging.getLogger().isEnabledFor(logging.DEBUG):
-        logging.debug(f"CLASS_DETECTION: Normalized -> '{norm}'")
-
-    # ENHANCED v2.2.8: Compound wagon name handling (BEFORE pattern matching)
-    # For wagons with multiple class indicators, prioritize certain classes
-    class_indicators = ['brn', 'brna', 'brd', 'brw', 'hcpv', 'hpcv', 'bcn', 'boxn', 'bvcm']
-    found_classes = [cls for cls in class_indicators if cls in name_lower]
-    
-    if len(found_classes) > 1:
-        # This is a compound wagon - check for priority classes
-        parcel_indicators = ['hcpv', 'hpcv']
-        has_parcel = any(parcel in name_lower for parcel in parcel_indicators)
-        
-        if has_parcel:
-            logging.debug(f"CLASS_DETECTION: Compound wagon detected with classes {found_classes}, prioritizing HCPV due to parcel indicator")
-            return 'HCPV'
-    
-    # Special handling for BVCM + brake combinations
-    if 'bvcm' in name_lower and 'brake' in name_lower:
-        logging.debug(f"CLASS_DETECTION: BVCM + brake combination detected, prioritizing BVCM")
-        return 'BVCM'
-
-    # --- IMMEDIATE BRN/BRAKE DETECTION (HIGHEST PRIORITY) ---
-    # Handle BRN family specifically since this is your main issue
-    brn_patterns = {
-        'brn': 'BRN',
-        'brna': 'BRNA', 
-        'brd': 'BRD',
-        'brs': 'BRS',
-        'bru': 'BRU',
-        'brake': 'BRAKE',
-        'bvzi': 'BVZI',
-        'bvzc': 'BVZC',
-    }
-    
-    # Check for BRN patterns in both original and normalized text
-    for pattern, class_name in brn_patterns.items():
-        # Check in original name with word boundaries
-        regex_pattern = get_compiled_regex(rf'\b{pattern}\b')
-        if regex_pattern.search(name_lower):
-            logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' in original -> {class_name}")
-            return class_name
-        # Check in normalized text
-        if pattern in norm.split():
-            logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' in normalized -> {class_name}")
-            return class_name
-        # Check with underscores/hyphens
-        if f'_{pattern}_' in name_lower or f'-{pattern}-' in name_lower:
-            logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' with separators -> {class_name}")
-            return class_name
-        if name_lower.startswith(f'{pattern}_') or name_lower.endswith(f'_{pattern}'):
-            logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' at boundary -> {class_name}")
-            return class_name
-
-    # --- High-priority buckets (cheap checks) ---
-    if 'plasser' in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found maintenance -> PLASSER")
-        return "PLASSER"
-    if any(term in name_lower for term in ['tamper','ballast_cleaner','rail_grinder','track_machine','crane','breakdown']):
-        logging.debug(f"CLASS_DETECTION: Found maintenance equipment")
-        return "MAINTENANCE"
-
-    # --- LOCOMOTIVE CLASS DETECTION (check BEFORE AI_HORN to avoid conflicts) ---
-    if wanted_role != "Wagon":
-        for pattern in _COMPILED_LOCO_PATTERNS:
-            m = pattern.search(name_lower)
-            if m:
-                # Use capture group 1 if it exists (base class), otherwise use full match
-                if m.groups() and m.group(1):
-                    result = m.group(1).upper().replace('-', '').replace('_', '')
-                else:
-                    result = m.group(0).upper()
-                logging.debug(f"CLASS_DETECTION: Locomotive pattern -> {result}")
-                return result
-
-    # AI/HORN detection (AFTER locomotive detection to avoid conflicts)
-    if 'ai' in name_lower and 'horn' in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found AI horn -> AI_HORN")
-        return "AI_HORN"
-    if 'horn' in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found horn -> HORN")
-        return "HORN"
-
-    # Manufacturer/prefix
-    if name_lower.startswith('bsam_'):
-        base = name_lower[5:]
-        for ft in ['boxn','bobyn','bcna','tank','flat']:
-            if base.startswith(ft):
-                logging.debug(f"CLASS_DETECTION: BSAM prefix -> {ft.upper()}")
-                return ft.upper()
-        logging.debug(f"CLASS_DETECTION: Generic BSAM -> BSAM")
-        return "BSAM"
-    if name_lower.startswith('asmi'):
-        base = name_lower[4:]
-        for ft in ['bca','bcb','bcn','btp','blc']:
-            if base.startswith(ft):
-                logging.debug(f"CLASS_DETECTION: ASMI prefix -> {ft.upper()}")
-                return ft.upper()
-        logging.debug(f"CLASS_DETECTION: Generic ASMI -> ASMI")
-        return "ASMI"
-
-    # Multiple Unit classes
-    if 'memu' in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found MEMU")
-        return 'MEMU'
-    if 'emu' in name_lower and 'memu' not in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found EMU")
-        return 'EMU'
-    if 'dmu' in name_lower or 'demu' in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found DMU")
-        return 'DMU'
-    if 'mmu' in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found MMU")
-        return 'MMU'
-
-    # Container early
-    if name_lower.startswith('con_') or 'container' in name_lower:
-        logging.debug(f"CLASS_DETECTION: Found container")
-        return "CONTAINER"
-
-    # --- Explicit patterns (non-alnum lookarounds) - CHECKED FIRST ---
-    patterns = {
-        # Brake / Service - SPECIFIC FIX FOR BRN
-        r'(?<![A-Za-z0-9])brn(?![A-Za-z0-9])': 'BRN',
-        r'(?<![A-Za-z0-9])brna(?![A-Za-z0-9])': 'BRNA',
-        r'(?<![A-Za-z0-9])brd(?![A-Za-z0-9])': 'BRD',
-        r'(?<![A-Za-z0-9])brs(?![A-Za-z0-9])': 'BRS',
-        r'(?<![A-Za-z0-9])bru(?![A-Za-z0-9])': 'BRU',
-        r'(?<![A-Za-z0-9])bvcm(?![A-Za-z0-9])': 'BVCM',  # Brake van (before brake to avoid conflicts)
-        r'(?<![A-Za-z0-9])brake(?![A-Za-z0-9])': 'BRAKE',
-        r'(?<![A-Za-z0-9])caboose(?![A-Za-z0-9])': 'CABOOSE',  # Caboose wagon
-        
-        # Coach classes from store files
-        r'(?<![A-Za-z0-9])accc(?![A-Za-z0-9])': 'ACCC',  # AC Chair Car - CHECK FIRST
-        r'(?<![A-Za-z0-9])(?i:ac.*chair.*car|ac.*chair|chair.*car.*ac)(?![A-Za-z0-9])': 'ACCC',  # AC Chair Car variations
-        # ACCC compound pattern - MUST BE BEFORE general AC
-        r'(?<![A-Za-z0-9])(?i:ac\s*[-_]?\s*cc|cc\s*[-_]?\s*ac)(?![A-Za-z0-9])': 'ACCC',              # AC Chair Car compound
-        r'(?<![A-Za-z0-9])1a(?![A-Za-z0-9])': '1A',      # First AC
-        r'(?<![A-Za-z0-9])(?i:ac.*3.*tier|ac.*tier.*3)(?![A-Za-z0-9])': '3A',  # AC 3 Tier variations - BEFORE 2A
-        r'(?<![A-Za-z0-9])(?i:ac.*2.*tier|ac.*tier.*2)(?![A-Za-z0-9])': '2A',  # AC 2 Tier variations
-        r'(?<![A-Za-z0-9])2a(?![A-Za-z0-9])': '2A',      # Second AC
-        r'(?<![A-Za-z0-9])(?i:ac.*first.*class|first.*ac)(?![A-Za-z0-9])': '1A',  # AC First Class variations
-        r'(?<![A-Za-z0-9])slr(?![A-Za-z0-9])': 'SLR',    # Sleeper cum Luggage - BEFORE sl
-        r'(?<![A-Za-z0-9])sleeper(?![A-Za-z0-9])': 'SL', # Sleeper (full word)
-        r'(?<![A-Za-z0-9])sl(?![A-Za-z0-9])': 'SL',      # Sleeper - AFTER slr
-        r'(?<![A-Za-z0-9])sc(?![A-Za-z0-9])': 'SC',      # Second Class Chair
-        r'(?<![A-Za-z0-9])gs(?![A-Za-z0-9])': 'GS',      # General Second
-        r'(?<![A-Za-z0-9])(?i:second\s*class\s*luggage|secondclassluggage|second_class_luggage)(?![A-Za-z0-9])': 'SLR',  # Second Class Luggage
-        r'(?<![A-Za-z0-9])(?i:second\s*class|secondclass|second_class)(?![A-Za-z0-9])': 'GS',  # Second Class variations
-        r'(?<![A-Za-z0-9])second(?![A-Za-z0-9])': 'GS',  # Second (standalone)
-        r'(?<![A-Za-z0-9])pc(?![A-Za-z0-9])': 'PC',      # Pantry Car
-        r'(?<![A-Za-z0-9])eog(?![A-Za-z0-9])': 'EOG',    # End on Generator
-        r'(?<![A-Za-z0-9])fc(?![A-Za-z0-9])': 'FC',      # First Class
-        r'(?<![A-Za-z0-9])cc(?![A-Za-z0-9])': 'CC',      # AC Chair Car - MOVED AFTER ACCC
-        r'(?<![A-Za-z0-9])gn(?![A-Za-z0-9])': 'GN',      # General
-        r'(?<![A-Za-z0-9])2s(?![A-Za-z0-9])': '2S',      # Second Sitting
-        
-        # Additional wagon classes from store files
-        r'(?<![A-Za-z0-9])btcs(?![A-Za-z0-9])': 'BTCS',  # Tank wagon
-        r'(?<![A-Za-z0-9])btpgln(?![A-Za-z0-9])': 'BTPGLN',  # Tank wagon
-        r'(?<![A-Za-z0-9])apl(?![A-Za-z0-9])': 'APL',    # Parcel wagon
-        r'(?<![A-Za-z0-9])auto(?![A-Za-z0-9])': 'AUTO',  # Automobile wagon
-        r'(?<![A-Za-z0-9])coil(?![A-Za-z0-9])': 'COIL',  # Coil wagon
-        r'(?<![A-Za-z0-9])hopper(?![A-Za-z0-9])': 'HOPPER',  # Hopper wagon
-        r'(?<![A-Za-z0-9])pipe(?![A-Za-z0-9])': 'PIPE',  # Pipe wagon
-        r'(?<![A-Za-z0-9])tender(?![A-Za-z0-9])': 'TENDER',  # Tender wagon
-        
-        # Parcel/mail
-        r'(?<![A-Za-z0-9])hcpv(?![A-Za-z0-9])': 'HCPV',
-        r'(?<![A-Za-z0-9])hpcv(?![A-Za-z0-9])': 'HCPV',
-        r'(?<![A-Za-z0-9])parcel(?![A-Za-z0-9])': 'PARCEL',
-        r'(?<![A-Za-z0-9])mail(?![A-Za-z0-9])': 'MAIL',
-
-        # BCN/BCNA family
-        r'(?<![A-Za-z0-9])bcna\d*(?![A-Za-z0-9])': 'BCNA',
-        r'(?<![A-Za-z0-9])bcne(?![A-Za-z0-9])': 'BCNE',
-        r'(?<![A-Za-z0-9])bcnh(?![A-Za-z0-9])': 'BCNH',
-        r'(?<![A-Za-z0-9])bcnl(?![A-Za-z0-9])': 'BCNL',
-        r'(?<![A-Za-z0-9])bccnr(?![A-Za-z0-9])': 'BCCNR',
-        r'(?<![A-Za-z0-9])bccw(?![A-Za-z0-9])': 'BCCW',
-        r'(?<![A-Za-z0-9])bcn(?!a)(?![A-Za-z0-9])': 'BCN',
-        r'(?<![A-Za-z0-9])bcnhl(?![A-Za-z0-9])': 'BCNHL',
-        r'(?<![A-Za-z0-9])bccn(?![A-Za-z0-9])': 'BCCN',
-        
-        # BOBYN family (Brake van)
-        r'(?<![A-Za-z0-9])bobyn[a-z0-9_\-]*?(?![A-Za-z0-9])': 'BOBYN',
-        
-        # BOXN family
-        r'(?<![A-Za-z0-9])boxn[a-z0-9_\-]*?(?![A-Za-z0-9])': 'BOXN',
-        
-        # BOSTH family (Open wagons for coal/ballast)
-        r'(?<![A-Za-z0-9])bosth[a-z0-9_\-]*?(?![A-Za-z0-9])': 'BOSTH',
-        
-        # Tanks
-        r'(?<![A-Za-z0-9])btfln(?![A-Za-z0-9])': 'BTFLN',
-        r'(?<![A-Za-z0-9])btpn(?![A-Za-z0-9])': 'BTPN',
-        r'(?<![A-Za-z0-9])tank(?![A-Za-z0-9])': 'TANK',
-        
-        # Flats / Containers
-        r'(?<![A-Za-z0-9])flat(?:car)?(?![A-Za-z0-9])': 'FLAT',
-        r'(?<![A-Za-z0-9])blc[a-z0-9_\-]*(?![A-Za-z0-9])': 'BLC',
-        
-        # Specialized freight patterns (train-specific and OE wagons) - AVOIDING GN conflict
-        r'(?<![A-Za-z0-9])\d+[-_]?class(?![A-Za-z0-9])': 'GN',  # Train number + CLASS (general class wagon)
-        r'(?<![A-Za-z0-9])\d+[-_]?gc\d*(?![A-Za-z0-9])': 'EOG',  # Train number + GC (generator car)
-        r'(?<![A-Za-z0-9])\d+[-_]?gen\d*(?![A-Za-z0-9])': 'EOG',  # Train number + GEN (generator car)
-        r'(?<![A-Za-z0-9])\d+gene(?![A-Za-z0-9])': 'EOG',  # Train number + GENE (generator car)
-        r'(?<![A-Za-z0-9])\d+[-_]?gene(?![A-Za-z0-9])': 'EOG',  # Train number + GENE (generator car)
-        r'(?<![A-Za-z0-9])\d+[-_]?goods?(?![A-Za-z0-9])': 'BOXN',  # Train number + GOODS (covered wagon)
-        r'(?<![A-Za-z0-9])\d+[-_]?cargo(?![A-Za-z0-9])': 'BOXN',  # Train number + CARGO (covered wagon)
-        r'(?<![A-Za-z0-9])\d+[-_]?cont(?![A-Za-z0-9])': 'BOXN',  # Train number + CONT (covered wagon)
-        r'(?<![A-Za-z0-9])\d+car\d*(?![A-Za-z0-9])': 'BOXN',  # Number + CAR + optional number (covered wagon)
-        r'(?<![A-Za-z0-9])\d+grcar\d*(?![A-Za-z0-9])': 'BOXN',  # Number + GRCAR + optional number (covered wagon)
-        r'(?<![A-Za-z0-9])\d+wdcar\d*(?![A-Za-z0-9])': 'BOXN',  # Number + WDCAR + optional number (covered wagon)
-        r'(?<![A-Za-z0-9])oe\d+cardin\d*(?![A-Za-z0-9])': 'BOXN',  # OE + number + CARDIN + number (covered wagon)
-        r'(?<![A-Za-z0-9])oebarcar(?![A-Za-z0-9])': 'BOXN',  # OE bar car (covered wagon)
-        
-        # Brand/product specific freight wagons (AVOIDING GN conflict with coaches)
-        r'(?<![A-Za-z0-9])cream[-_]?bell(?![A-Za-z0-9])': 'MILKTANKER',  # Cream Bell (dairy) - milk tanker
-        r'(?<![A-Za-z0-9])fanta[-_]?time(?![A-Za-z0-9])': 'TANK',  # Fanta Time (beverage) - tank wagon
-        r'(?<![A-Za-z0-9])gnfc(?![A-Za-z0-9])': 'TANK',  # GNFC (chemicals) - chemical tank
-        r'(?<![A-Za-z0-9])chem(?![A-Za-z0-9])': 'TANK',  # Chemical wagons - tank wagon
-    }
-
-    # Raw text pass
-    for pat, klass in patterns.items():
-        if re.search(pat, name_lower):
-            logging.debug(f"CLASS_DETECTION: Matched pattern {pat} -> {klass}")
-            return klass
-
-    # Relaxed pass over normalized text
-    for pat, klass in patterns.items():
-        relaxed = pat.replace('(?<![A-Za-z0-9])', r'(?:^|\s|[^A-Za-z0-9])')
-        relaxed = relaxed.replace('(?![A-Za-z0-9])', r'(?:[^A-Za-z0-9]|\s|$)')
-        if re.search(relaxed, norm):
-            logging.debug(f"CLASS_DETECTION: Matched relaxed pattern {relaxed} -> {klass}")
-            return klass
-
-    # ENHANCED: Embedded pattern pass for cases like "MAXBCNA", "SUPERBOXN", etc.
-    # Add specific embedded patterns for common compound wagon names
-    # Order matters: more specific patterns first
-    embedded_patterns = {
-        # BCN/BCNA family embedded patterns (more specific first)
-        r'bcna\d*': 'BCNA',  # Matches bcna, bcna123, etc. when embedded
-        r'bcne': 'BCNE',
-        r'bcnh': 'BCNH',
-        r'bcnl': 'BCNL',
-        r'bccn': 'BCCN',
-        r'bcn\d+': 'BCN',   # Matches bcn123, bcn456, etc. (with digits)
-        r'bcn': 'BCN',      # Matches bcn only (at end to avoid conflicts)
-
-        # ACCC embedded patterns
-        r'accc': 'ACCC',    # AC Chair Car
-
-        # BOXN family embedded patterns
-        r'boxn[a-z0-9]*': 'BOXN',
-
-        # BOBYN family embedded patterns
-        r'bobyn[a-z0-9]*': 'BOBYN',
-
-        # Additional wagon embedded patterns
-        r'btcs': 'BTCS',
-        r'bvcm': 'BVCM',
-        r'caboose': 'CABOOSE',
-        r'coil': 'COIL',
-        r'hopper': 'HOPPER',
-
-        # Tank family embedded patterns
-        r'btfln': 'BTFLN',
-        r'btpn': 'BTPN',
-    }
-
-    for embedded_pat, klass in embedded_patterns.items():
-        if re.search(embedded_pat, name_lower):
-            # For embedded patterns, we want to match wagon codes within compound names
-            # but avoid obvious false positives like matching 'bcna' in 'abcna'
-            match = re.search(embedded_pat, name_lower)
-            if match:
-                start, end = match.span()
-                matched_text = name_lower[start:end]
-
-                # Avoid false positives: don't match if the wagon code is clearly part of another word
-                # Exception: allow if the match is at the end of the string
-                if end == len(name_lower):
-                    # Match is at end of string - this is likely a valid embedded wagon code
-                    logging.debug(f"CLASS_DETECTION: Matched embedded pattern {embedded_pat} at end -> {klass}")
-                    return klass
-                elif start > 0 and name_lower[start-1].isalpha():
-                    # Match is preceded by a letter - likely a false positive like 'abcna'
-                    continue
-                else:
-                    # Match appears to be a valid embedded wagon code
-                    logging.debug(f"CLASS_DETECTION: Matched embedded pattern {embedded_pat} -> {klass}")
-                    return klass
-
-    # --- FIXED: GENERIC TOKEN/PREFIX FALLBACK (covers ALL freight classes) ---
-    tokens = norm.split()
-    logging.debug(f"CLASS_DETECTION: Tokens -> {tokens}")
-    
-    try:
-        freight_types = set(IndianRailwaysClassifier.FREIGHT_TYPES)
-        aliases = dict(IndianRailwaysClassifier.ALIASES)
-        logging.debug(f"CLASS_DETECTION: freight_types size={len(freight_types)}, 'brn' in freight_types = {'brn' in freight_types}")
-    except Exception as e:
-        logging.debug(f"CLASS_DETECTION: Failed to load classifier data: {e}")
-        freight_types = set()
-        aliases = {}
-
-    best = ""
-    for tok in tokens:
-        logging.debug(f"CLASS_DETECTION: Processing token '{tok}'")
-        canon = aliases.get(tok, tok)  # apply alias map first (stays lowercase)
-        logging.debug(f"CLASS_DETECTION: Token '{tok}' -> canonical '{canon}'")
-        
-        # FIXED: exact match with consistent case
-        if canon in freight_types:  # Check lowercase 'brn' in {'brn', 'brna', ...}
-            cand = canon.upper()  # Return uppercase 'BRN'
-            logging.debug(f"CLASS_DETECTION: Exact match '{canon}' -> '{cand}'")
-        else:
-            # FIXED: longest-prefix with consistent case
-            cand = ""
-            for L in range(len(canon), 2, -1):  # Use lowercase canon, not uppercase cu
-                prefix = canon[:L]
-                if prefix in freight_types:  # Check lowercase prefix in lowercase set
-                    cand = prefix.upper()  # Return uppercase result
-                    logging.debug(f"CLASS_DETECTION: Prefix match '{prefix}' -> '{cand}'")
-                    break
-            
-        if cand and (not best or len(cand) > len(best)):
-            best = cand
-            logging.debug(f"CLASS_DETECTION: New best candidate '{best}'")
-
-    if best:
-        logging.debug(f"CLASS_DETECTION: Generic token/prefix fallback -> {best}")
-        return best
-
-    # --- COACH CLASS DETECTION ---
-    # Coach classes (1A, 2A, 3A, GS, SL, etc.)
-    coach_patterns = {
-        # Specific AC classes (HIGHEST PRIORITY - check these first)
-        r'(?<![A-Za-z0-9])1a(?![A-Za-z0-9])': '1A',
-        r'(?<![A-Za-z0-9])2a(?![A-Za-z0-9])': '2A', 
-        r'(?<![A-Za-z0-9])3a(?![A-Za-z0-9])': '3A',
-        # AC3 pattern for combined AC+class notation
-        r'(?<![A-Za-z0-9])ac3(?![A-Za-z0-9])': '3A',
-        r'(?<![A-Za-z0-9])ac2(?![A-Za-z0-9])': '2A',
-        r'(?<![A-Za-z0-9])ac1(?![A-Za-z0-9])': '1A',
-        
-        # Vande Bharat patterns
-        r'(?i)vbcc\d*(?![A-Za-z0-9])': 'CC',
-        r'(?i)vande[-_]?bharat[-_]?cc\d*(?![A-Za-z0-9])': 'CC',
-        # Vande Bharat Executive Chair Car patterns
-        r'(?i)vbexcc\d*(?![A-Za-z0-9])': 'EC',
-        r'(?i)vande[-_]?bharat[-_]?excc\d*(?![A-Za-z0-9])': 'EC',
-        r'(?i)executive[-_]?chair[-_]?car(?![A-Za-z0-9])': 'EC',
-        
-        # AC Tier patterns (should not conflict with specific classes above)
-        r'(?i)ac[-_]?1[-_]?tier|1[-_]?tier[-_]?ac': '1A',
-        r'(?i)ac[-_]?2[-_]?tier|2[-_]?tier[-_]?ac': '2A', 
-        r'(?i)ac[-_]?3[-_]?tier|3[-_]?tier[-_]?ac': '3A',
-        
-        # AC Chair Car patterns (HIGH PRIORITY) - ENHANCED v2.2.3
-        r'(?i)chaircar[-_]?ac|ac[-_]?chaircar': 'ACCC',
-        r'(?i)chair[-_]?car[-_]?ac|ac[-_]?chair[-_]?car': 'ACCC',
-        r'(?i)ac[-_]?cc|cc[-_]?ac': 'ACCC',
-        
-        
-        
-        # Generic AC chair patterns (lower priority)
-        r'(?i)ac[-_]?chair|chair[-_]?ac': 'ACCC',
-        
-        # Non-AC classes
-        r'(?<![A-Za-z0-9])gs(?![A-Za-z0-9])': 'GS',
-        r'(?<![A-Za-z0-9])slp(?![A-Za-z0-9])': 'SL',
-        r'(?<![A-Za-z0-9])sl(?![A-Za-z0-9])': 'SL',
-        r'(?<![A-Za-z0-9])sleeper(?![A-Za-z0-9])': 'SL',
-        
-        # Service cars
-        r'(?i)pantry[-_]?car|pantry': 'PC',
-        r'(?i)guard|luggage[-_]?van': 'SLR',
-        r'(?<![A-Za-z0-9])slr(?![A-Za-z0-9])': 'SLR',
-        r'(?i)generator|power[-_]?car': 'EOG',
-        r'(?<![A-Za-z0-9])pc(?![A-Za-z0-9])': 'PC',
-        r'(?<![A-Za-z0-9])pantry(?![A-Za-z0-9])': 'PC',
-        r'(?<![A-Za-z0-9])eog(?![A-Za-z0-9])': 'EOG',
-        r'(?<![A-Za-z0-9])generator(?![A-Za-z0-9])': 'EOG',
-        
-        # Chair Car
-        r'(?<![A-Za-z0-9])cc(?![A-Za-z0-9])': 'CC',
-        r'(?<![A-Za-z0-9])chair(?![A-Za-z0-9])': 'CC',
-        
-        # Other coach types
-        r'(?<![A-Za-z0-9])fc(?![A-Za-z0-9])': 'FC',
-        r'(?<![A-Za-z0-9])sc(?![A-Za-z0-9])': 'SC',
-        r'(?<![A-Za-z0-9])gn(?![A-Za-z0-9])': 'GN',
-        r'(?<![A-Za-z0-9])gen(?![A-Za-z0-9])': 'GN',
-        r'(?<![A-Za-z0-9])general(?![A-Za-z0-9])': 'GN',
-        
-        # AC First class patterns (HIGH PRIORITY - before generic AC)
-        r'(?i)ac[-_]?first|first[-_]?ac': '1A',
-        r'(?i)ac1|1ac': '1A',
-        
-        # AC Second class patterns
-        r'(?i)ac[-_]?second|second[-_]?ac': '2A',
-        r'(?i)ac2|2ac': '2A',
-        
-        # AC Third class patterns  
-        r'(?i)ac[-_]?third|third[-_]?ac': '3A',
-        r'(?i)ac3|3ac': '3A',
-        
-        # OE (Overseas/Export) coach patterns
-        r'(?i)oe[-_]?sleep[-_]?car|oesleepcar': 'SL',
-        r'(?i)oe[-_]?serv[-_]?car|oeservcar': 'SLR',
-        
-        # Second class patterns
-        r'(?i)second[-_]?class|secondclass': 'GS',
-        r'(?i)second[-_]?cla': 'GS',
-        
-        # Express train patterns
-        r'(?i)express[-_]?second[-_]?cla': 'GS',
-        r'(?i)exp[-_]?second[-_]?cla': 'GS',
-        
-        # Generic coach patterns
-        r'(?i)new[-_]?gc': 'GN',
-        r'(?i)gc$': 'GN',  # GC at end of name
-        r'(?i)^gc': 'GN',  # GC at start of name
-        
-        # H1/HA1 patterns (likely AC First class variants)
-        r'(?i)h1$|ha1$': '1A',
-        
-        # Tender patterns (for steam locomotives)
-        r'(?i)tender': 'TENDER',
-        
-        # Container patterns
-        r'(?i)container': 'CONTAINER',
-        r'(?i)con$': 'CONTAINER',
-        
-        # Trans patterns (likely transfer/container)
-        r'(?i)trans': 'CONTAINER',
-    }
-
-    # Check coach patterns
-    for pat, klass in coach_patterns.items():
-        if re.search(pat, name_lower):
-            logging.debug(f"CLASS_DETECTION: Matched coach pattern {pat} -> {klass}")
-            return klass
-
-    # Relaxed coach pattern matching
-    for pat, klass in coach_patterns.items():
-        relaxed = pat.replace('(?<![A-Za-z0-9])', r'(?:^|\s|[^A-Za-z0-9])')
-        relaxed = relaxed.replace('(?![A-Za-z0-9])', r'(?:[^A-Za-z0-9]|\s|$)')
-        if re.search(relaxed, norm):
-            logging.debug(f"CLASS_DETECTION: Matched relaxed coach pattern {relaxed} -> {klass}")
-            return klass
-
-    logging.debug(f"CLASS_DETECTION: No class detected for '{name}'")
-    return ""
-
-
-class AssetResolver:
-    """Main asset resolution engine with STRICT ATTRIBUTE LOCKING - ENHANCED v2.3.0."""
-
-    def __init__(self, config: ScoreConfig, classifier: IndianRailwaysClassifier):
-        self.config = config
-        self.classifier = classifier
-        self.extractor = AssetMetadataExtractor(classifier)
-        self.index = AssetIndex()
-
-        # Statistics
-        self.stats = {
-            "total_processed": 0,
-            "resolved": 0,
-            "changed": 0,
-            "unresolved": 0,
-            "by_phase": Counter(),
-        }
-
-        self._lock = threading.RLock()
-        self._logged_matches = set()  # Track logged matches to prevent duplicates
-
-        # Logging configuration
-        self._verbose_logging = os.getenv('CONSIST_RESOLVER_VERBOSE', 'false').lower() == 'true'
-
-    def __getstate__(self):
-        """Support for pickling - exclude non-picklable objects."""
-        state = self.__dict__.copy()
-        # Remove threading objects that can't be pickled
-        state['_lock'] = None
-        state['_logged_matches'] = None  # Mark for recreation
-        return state
-
-    def __setstate__(self, state):
-        """Support for unpickling - restore state."""
-        self.__dict__.update(state)
-        # Recreate threading objects in worker processes
-        if self._lock is None:
-            self._lock = threading.RLock()
-        if self._logged_matches is None:
-            self._logged_matches = set()
-
-    def build_asset_index(
-        self, trainset_dir: Path, required_folders: Optional[Set[str]] = None
-    ) -> int:
-        """Build comprehensive asset index from trainset directory."""
-        logging.info(f"Building asset index from {trainset_dir}")
-        if not trainset_dir.exists() or not trainset_dir.is_dir():
-            raise ValueError(f"Trainset directory not found: {trainset_dir}")
-
-        folders_to_scan = [d for d in trainset_dir.iterdir() if d.is_dir()]
-        assets_found = 0
-
-        # Process folders with progress reporting
-        total_folders = len(folders_to_scan)
-        for i, folder_path in enumerate(folders_to_scan):
-            if i % 50 == 0:  # Progress every 50 folders
-                logging.info(
-                    f"Scanning folder {i+1}/{total_folders}: {folder_path.name}"
-                )
-            folder_assets = self._scan_folder(folder_path)
-            assets_found += folder_assets
-
-        logging.info(
-            f"Asset index built: {assets_found} assets in {total_folders} folders"
-        )
-
-        # Log detailed statistics
-        stats = self.index.get_statistics()
-        logging.info(f"Index statistics: {stats}")
-
-        return assets_found
-
-    def _scan_folder(self, folder_path: Path) -> int:
-        """Scan a single folder for assets."""
-        assets_found = 0
-        folder_name = folder_path.name
-
-        # Find engine files
-        for engine_file in folder_path.glob("*.eng"):
-            try:
-                metadata = self.extractor.extract_metadata(
-                    AssetKind.ENGINE, engine_file.stem, folder_name
-                )
-                asset = AssetRecord(
-                    kind=AssetKind.ENGINE,
-                    name=engine_file.stem,
-                    folder=folder_name,
-                    path=engine_file,
-                    metadata=metadata,
-                )
-                self.index.add_asset(asset)
-                assets_found += 1
-            except Exception as e:
-                logging.debug(f"Error processing engine {engine_file}: {e}")
-
-        # Find wagon files
-        for wagon_file in folder_path.glob("*.wag"):
-            try:
-                metadata = self.extractor.extract_metadata(
-                    AssetKind.WAGON, wagon_file.stem, folder_name
-                )
-                asset = AssetRecord(
-                    kind=AssetKind.WAGON,
-                    name=wagon_file.stem,
-                    folder=folder_name,
-                    path=wagon_file,
-                    metadata=metadata,
-                )
-                self.index.add_asset(asset)
-                assets_found += 1
-            except Exception as e:
-                logging.debug(f"Error processing wagon {wagon_file}: {e}")
-
-        return assets_found
-
-    def _log_match_once(self, match_key: str, message: str) -> None:
-        """Log a match message only once to prevent duplicates."""
-        if not self._verbose_logging:
-            return  # Skip logging if verbose mode is disabled
-
-        with self._lock:
-            if match_key not in self._logged_matches:
-                self._logged_matches.add(match_key)
-                logging.info(message)
-
-    def resolve_asset(self, kind: AssetKind, folder: str, name: str) -> MatchResult:
-        """
-        NEW STRICT ATTRIBUTE LOCKING RESOLVER v2.3.0:
-        1. DERIVE AND LOCK - extract Family, Subtype, Class, Build from consist entry
-        2. STRICT FILTERING - only consider trainset assets with EXACT matches for all four attributes
-        3. NAME-FIRST - exact name match within locked attributes (first preference)
-        4. TOKEN MATCHING - apply name/token ranking within locked attributes
-        5. DEFAULT STRICT - require at least Subtype match for defaults
-        6. UNRESOLVED - if no attributes detected or no matches found, mark as UNRESOLVED
-        """
-        with self._lock:
-            self.stats["total_processed"] += 1
-
-        # Convert kind to role string
-        wanted_role = "Engine" if kind == AssetKind.ENGINE else "Wagon"
-
-        # --- STEP 1: DERIVE AND LOCK ATTRIBUTES FROM CONSIST ENTRY ---
-        # Determine subtype first to inform family detection
-        subtype = detect_subtype_from_name(name) or detect_subtype_from_name(folder)
-        family = detect_family_from_name(name, wanted_role, subtype) or detect_family_from_name(folder, wanted_role, subtype)
-        klass = detect_wagon_or_engine_class(name, wanted_role) or detect_wagon_or_engine_class(
-            folder, wanted_role
-        )
-        build = detect_build_from_name_or_folder(name, folder)
-
-        # --- STEP 1.1: SPECIAL AI HORN MATCHING ---
-        # If this is an AI horn equipped asset, match it to any AI horn wagon
-        if build == "AI":
-            self._log_match_once(
-                f"ai_horn_detect_{name}",
-                f"[AI_HORN] MATCH: '{name}' -> detected AI horn asset, searching for wagons"
-            )
-            # Look for any wagon asset containing both "ai" and "horn" in the name
-            ai_horn_matches = [
-                asset for asset in self.index.assets
-                if asset.kind == AssetKind.WAGON and
-                   "ai" in asset.name.lower() and "horn" in asset.name.lower()
-            ]
-            if ai_horn_matches:
-                chosen = ai_horn_matches[0]  # Take the first match
-                self._log_match_once(
-                    f"ai_horn_found_{name}_{chosen.folder}_{chosen.name}",
-                    f"[AI_HORN] MATCH: '{name}' -> {len(ai_horn_matches)} AI horn wagons found, selected: {chosen.folder}/{chosen.name}"
-                )
-                with self._lock:
-                    self.stats["resolved"] += 1
-                    if (
-                        chosen.folder.lower() != folder.lower()
-                        or chosen.name.lower() != name.lower()
-                    ):
-                        self.stats["changed"] += 1
-                    self.stats["by_phase"][MatchPhase.EXACT_NAME] += 1
-
-                return MatchResult(
-                    chosen=chosen,
-                    phase=MatchPhase.EXACT_NAME,
-                    score=1000.0,
-                    target=self.extractor.extract_metadata(kind, name, folder),
-                    candidates_evaluated=1,
-                    match_details={
-                        "reason": "ai-horn-special-match",
-                        "family": family,
-                        "subtype": subtype,
-                        "class": klass,
-                        "build": build,
-                        "matched_to": f"{chosen.folder}/{chosen.name}"
-                    },
-                )
-            else:
-                logging.warning(f"AI HORN MATCH: No AI horn wagons found in trainset for '{name}' (looked for files containing 'ai' and 'horn')")
-        # SECOND-CHANCE: if class is still empty but subtype suggests freight,
-        # try combined detection over 'folder' and 'name' with generic token fallback.
-        if not klass and (subtype or '').lower() == 'freight':
-            combined = f"{folder}_{name}"
-            alt = detect_wagon_or_engine_class(combined, wanted_role)
-            if alt:
-                logging.debug(f"CLASS_DETECTION: Second-chance (combined) -> {alt}")
-                klass = alt
-
-        # THIRD-CHANCE: if we have a freight wagon class but no subtype, set subtype to Freight
-        if not subtype and klass:
-            freight_wagon_classes = {
-                # BCNA family
-                'BCNA', 'BCNE', 'BCNH', 'BCNL', 'BCCNR', 'BCCW', 'BCN', 'BCCN', 'BCBFG', 'BCFC',
-                # BOXN family  
-                'BOXN', 'BOXNR', 'BOXNG', 'BOXNHL', 'BOXNM1', 'BOXNM2', 'BOSTH',
-                # Tank wagons
-                'BTPN', 'BTFLN', 'BTAP', 'BTCS', 'BTI', 'TANK', 'MILKTANKER', 'VVN',
-                # Flat/Container wagons
-                'FLAT', 'BLC', 'BLCA', 'BLCB', 'CONTAINER', 'CON', 'CONCOR', 'BCA', 'BCB',
-                # Brake vans
-                'BRD', 'BRN', 'BRNA', 'BRAKE', 'BOBYN', 'BVZI', 'BRW', 'BRS', 'BRU',
-                # Parcel/Mail
-                'HCPV', 'HPCV', 'PARCEL', 'MAIL',
-                # Specialized freight
-                'COIL', 'SLAB', 'AUTO', 'CEMENT', 'TIPPLER',
-                # Manufacturer series
-                'BSAM', 'ASMI', 'APL'
-            }
-            if klass.upper() in freight_wagon_classes:
-                subtype = 'Freight'
-                logging.debug(f"SUBTYPE_DETECTION: Fallback - detected freight wagon class {klass}, setting subtype to Freight")
-
-
-        # --- STEP 1.5: DEFAULT CLASS FALLBACK FOR FREIGHT WAGONS ---
-        # If we have a freight wagon but no class detected, default to oil tanker
-        if not klass and subtype and subtype.lower() == 'freight' and wanted_role == 'Wagon':
-            # Check if this looks like an oil/gas related wagon
-            name_lower = name.lower()
-            folder_lower = folder.lower()
-            
-            # Oil/Gas/ONGC related indicators
-            oil_indicators = [
-                'ongc', 'oil', 'gas', 'petrol', 'diesel', 'fuel', 'tanker', 'tank',
-                'crude', 'refinery', 'pipeline', 'petroleum', 'energy', 'hydrocarbon'
-            ]
-            
-            # Check name and folder for oil-related terms
-            has_oil_indicator = any(
-                indicator in name_lower or indicator in folder_lower 
-                for indicator in oil_indicators
-            )
-            
-            if has_oil_indicator:
-                klass = 'TANK'  # Default to oil tanker
-                logging.info(f"DEFAULT CLASS: Wagon {folder}/{name} has no class but appears oil-related, defaulting to TANK")
-            else:
-                # Generic freight wagon fallback - could be any type
-                klass = 'FREIGHT'  # Generic freight wagon
-                logging.info(f"DEFAULT CLASS: Wagon {folder}/{name} has no class, defaulting to FREIGHT")
-
-        # --- STEP 2: CHECK FOR UNRESOLVED CONDITIONS ---
-        # If ALL attributes are missing (empty), try fallback classification before marking as UNRESOLVED
-        if not any([family, subtype, klass, build]):
-            # ENHANCED v2.2.7: Fallback classification for wagons with no attributes
-            if wanted_role == 'Wagon':
-                name_lower = name.lower()
-                folder_lower = folder.lower()
-                combined_text = f"{folder} {name}".lower()
-
-                # Check if it's NOT passenger (passenger wagons should remain unresolved if no attributes)
-                passenger_indicators = [
-                    '1a', '2a', '3a', 'ac', 'sl', 'gs', 'cc', 'chair', 'sleeper',
-                    'passenger', 'coach', 'pantry', 'eog', 'rajdhani', 'shatabdi'
-                ]
-
-                is_passenger = any(indicator in combined_text for indicator in passenger_indicators)
-
-                if not is_passenger:
-                    # Oil/Gas/ONGC related indicators - set to tanker
-                    oil_indicators = [
-                        'ongc', 'oil', 'gas', 'petrol', 'diesel', 'fuel', 'tanker', 'tank',
-                        'crude', 'refinery', 'pipeline', 'petroleum', 'energy', 'hydrocarbon',
-                        'lng', 'lpg', 'chemical', 'petrochem'
-                    ]
-
-                    has_oil_indicator = any(
-                        indicator in combined_text for indicator in oil_indicators
-                    )
-
-                    if has_oil_indicator:
-                        # Set fallback attributes for oil/gas wagons
-                        subtype = 'Freight'
-                        klass = 'TANK'
-                        logging.info(f"FALLBACK CLASSIFICATION: Wagon {folder}/{name} has no attributes but appears oil/gas related, defaulting to Freight/TANK")
-                    else:
-                        # Generic freight wagon fallback
-                        subtype = 'Freight'
-                        klass = 'FREIGHT'
-                        logging.info(f"FALLBACK CLASSIFICATION: Wagon {folder}/{name} has no attributes, defaulting to Freight/FREIGHT")
-
-                    # Continue with normal resolution using fallback attributes
-                    # Don't return unresolved - let the normal flow handle it
-                else:
-                    # It's a passenger wagon with no attributes - leave as unresolved
-                    logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=passenger-no-attributes")
-                    with self._lock:
-                        self.stats["unresolved"] += 1
-                        self.stats["by_phase"][MatchPhase.UNRESOLVED] += 1
-                    return MatchResult(
-                        chosen=None,
-                        phase=MatchPhase.UNRESOLVED,
-                        score=0.0,
-                        target=self.extractor.extract_metadata(kind, name, folder),
-                        candidates_evaluated=0,
-                        match_details={
-                            "reason": "no-attributes-passenger",
-                            "family": family,
-                            "subtype": subtype,
-                            "class": klass,
-                            "build": build,
-                        },
-                    )
-            else:
-                # ENGINE FALLBACK: For engines with no attributes, try nearest engine match
-                if wanted_role == "Engine" and kind == AssetKind.ENGINE:
-                    all_engines = [asset for asset in self.index.by_kind.get(AssetKind.ENGINE, [])]
-                    if all_engines:
-                        # Find the best engine match using name similarity
-                        engine_match = rank_by_name_then_tokens(all_engines, name, folder, klass, build)
-                        if engine_match:
-                            logging.info(
-                                f"ENGINE NEAREST MATCH (NO ATTRIBUTES): Found nearest engine match for '{name}': {engine_match.folder}/{engine_match.name}"
-                            )
-                            with self._lock:
-                                self.stats["resolved"] += 1
-                                if (
-                                    engine_match.folder.lower() != folder.lower()
-                                    or engine_match.name.lower() != name.lower()
-                                ):
-                                    self.stats["changed"] += 1
-                                self.stats["by_phase"][MatchPhase.GLOBAL_SCORE] += 1
-
-                            return MatchResult(
-                                chosen=engine_match,
-                                phase=MatchPhase.GLOBAL_SCORE,
-                                score=550.0,
-                                target=self.extractor.extract_metadata(kind, name, folder),
-                                candidates_evaluated=len(all_engines),
-                                match_details={
-                                    "reason": "engine-nearest-match-no-attributes",
-                                    "family": family,
-                                    "subtype": subtype,
-                                    "class": klass,
-                                    "build": build,
-                                },
-                            )
-
-                # Not a wagon or engine fallback didn't apply - mark as unresolved
-                logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=no-attributes-detected")
-                with self._lock:
-                    self.stats["unresolved"] += 1
-                    self.stats["by_phase"][MatchPhase.UNRESOLVED] += 1
-                return MatchResult(
-                    chosen=None,
-                    phase=MatchPhase.UNRESOLVED,
-                    score=0.0,
-                    target=self.extractor.extract_metadata(kind, name, folder),
-                    candidates_evaluated=0,
-                    match_details={
-                        "reason": "no-attributes",
-                        "family": family,
-                        "subtype": subtype,
-                        "class": klass,
-                        "build": build,
-                    },
-                )
-
-        # --- STEP 3: STRICT FILTERING - GET ONLY ATTRIBUTE-LOCKED CANDIDATES ---
-        # Get all assets of the same kind
-        all_assets = list(self.index.by_kind.get(kind, []))
-
-        # --- STEP 3.5: EXACT NAME MATCH PRIORITY (BEFORE ATTRIBUTE FILTERING) ---
-        # Check for exact name matches in the ENTIRE pool first (highest priority)
-        all_exact_name_matches = [c for c in all_assets if name_equal(c.name, name)]
-        if all_exact_name_matches:
-            # Choose the best exact match, even if attributes don't match perfectly
-            chosen = choose_best(all_exact_name_matches, name, folder, klass, build)
-            if chosen:
-                logging.debug(f"FINAL MATCH: Wagon {name} -> {chosen.folder}/{chosen.name} Phase=EXACT_NAME Score=1000 Reason=exact-name-any-attributes")
-                with self._lock:
-                    self.stats["resolved"] += 1
-                    if (
-                        chosen.folder.lower() != folder.lower()
-                        or chosen.name.lower() != name.lower()
-                    ):
-                        self.stats["changed"] += 1
-                    self.stats["by_phase"][MatchPhase.EXACT_NAME] += 1
-
-                return MatchResult(
-                    chosen=chosen,
-                    phase=MatchPhase.EXACT_NAME,
-                    score=1000.0,
-                    target=self.extractor.extract_metadata(kind, name, folder),
-                    candidates_evaluated=len(all_exact_name_matches),
-                    match_details={
-                        "reason": "exact-name-any-attributes",
-                        "family": family,
-                        "subtype": subtype,
-                        "class": klass,
-                        "build": build,
-                    },
-                )
-
-        # Apply strict attribute filtering - only exact matches (for non-exact matches)
-        locked_pool = apply_strict_attribute_filter(
-            all_assets, family, subtype, klass, build
-        )
-
-        # Debug logging for filtering results
-        logging.debug(
-            f"STRICT FILTER for {folder}/{name}: total_assets={len(all_assets)}, locked_pool={len(locked_pool)}"
-        )
-
-        if not locked_pool:
-            # PERFORMANCE OPTIMIZATION: Try lenient fallback before giving up
-            logging.debug(
-                f"STRICT FILTER returned no matches for {folder}/{name}, trying lenient fallback..."
-            )
-            
-            # Try more lenient filtering - focus on class match primarily
-            lenient_pool = []
-            for asset in all_assets:
-                asset_class = asset.cached_class
-                # Lenient matching: require class match if class is detected, otherwise accept any
-                if not klass or _ci_eq(asset_class, klass):
-                    lenient_pool.append(asset)
-            
-            if lenient_pool:
-                logging.info(
-                    f"LENIENT FALLBACK: Found {len(lenient_pool)} assets with class match for {folder}/{name}"
-                )
-                # Continue with normal matching using the lenient pool
-                locked_pool = lenient_pool
-            else:
-                logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=no-matching-attributes-even-lenient")
-                with self._lock:
-                    self.stats["unresolved"] += 1
-                    self.stats["by_phase"][MatchPhase.UNRESOLVED] += 1
-                return MatchResult(
-                    chosen=None,
-                    phase=MatchPhase.UNRESOLVED,
-                    score=0.0,
-                    target=self.extractor.extract_metadata(kind, name, folder),
-                    candidates_evaluated=len(all_assets),
-                    match_details={
-                        "reason": "no-matching-attributes-even-lenient",
-                        "family": family,
-                        "subtype": subtype,
-                        "class": klass,
-                        "build": build,
-                    },
-                )
-
-        # --- STEP 4: NAME-FIRST WITHIN LOCKED POOL ---
-        # This is now secondary - only reached if no exact matches found in entire pool
-        exact_name_matches = [c for c in locked_pool if name_equal(c.name, name)]
-        if exact_name_matches:
-            chosen = choose_best(exact_name_matches, name, folder, klass, build)
-            if chosen:
-                logging.debug(f"FINAL MATCH: Wagon {name} -> {chosen.folder}/{chosen.name} Phase=EXACT_NAME Score=1000 Reason=exact-name-locked")
-                with self._lock:
-                    self.stats["resolved"] += 1
-                    if (
-                        chosen.folder.lower() != folder.lower()
-                        or chosen.name.lower() != name.lower()
-                    ):
-                        self.stats["changed"] += 1
-                    self.stats["by_phase"][MatchPhase.EXACT_NAME] += 1
-
-                return MatchResult(
-                    chosen=chosen,
-                    phase=MatchPhase.EXACT_NAME,
-                    score=1000.0,
-                    target=self.extractor.extract_metadata(kind, name, folder),
-                    candidates_evaluated=len(exact_name_matches),
-                    match_details={
-                        "reason": "exact-name-locked",
-                        "family": family,
-                        "subtype": subtype,
-                        "class": klass,
-                        "build": build,
-                    },
-                )
-
-        # --- STEP 5: TOKEN MATCHING WITHIN LOCKED POOL ---
-        token_match = rank_by_name_then_tokens(locked_pool, name, folder, klass, build)
-        if token_match:
-            logging.debug(f"FINAL MATCH: Wagon {name} -> {token_match.folder}/{token_match.name} Phase=KEY_TOKEN_ALL Score=900 Reason=token-match-locked")
-            with self._lock:
-                self.stats["resolved"] += 1
-                if (
-                    token_match.folder.lower() != folder.lower()
-                    or token_match.name.lower() != name.lower()
-                ):
-                    self.stats["changed"] += 1
-                self.stats["by_phase"][MatchPhase.KEY_TOKEN_ALL] += 1
-
-            return MatchResult(
-                chosen=token_match,
-                phase=MatchPhase.KEY_TOKEN_ALL,
-                score=900.0,
-                target=self.extractor.extract_metadata(kind, name, folder),
-                candidates_evaluated=len(locked_pool),
-                match_details={
-                    "reason": "token-match-locked",
-                    "family": family,
-                    "subtype": subtype,
-                    "class": klass,
-                    "build": build,
-                },
-            )
-
-        # --- STEP 5.5: LOCAL FOLDER MATCHING ---
-        # Try to find matches in the same folder first (for variety)
-        local_folder_matches = [c for c in locked_pool if c.folder.lower() == folder.lower()]
-        if local_folder_matches and not token_match:
-            local_match = rank_by_name_then_tokens(local_folder_matches, name, folder, klass, build)
-            if local_match:
-                logging.debug(f"FINAL MATCH: Wagon {name} -> {local_match.folder}/{local_match.name} Phase=LOCAL_FOLDER Score=850 Reason=local-folder-match")
-                with self._lock:
-                    self.stats["resolved"] += 1
-                    if (
-                        local_match.folder.lower() != folder.lower()
-                        or local_match.name.lower() != name.lower()
-                    ):
-                        self.stats["changed"] += 1
-                    self.stats["by_phase"][MatchPhase.LOCAL_FOLDER] += 1
-
-                return MatchResult(
-                    chosen=local_match,
-                    phase=MatchPhase.LOCAL_FOLDER,
-                    score=850.0,
-                    target=self.extractor.extract_metadata(kind, name, folder),
-                    candidates_evaluated=len(local_folder_matches),
-                    match_details={
-                        "reason": "local-folder-match",
-                        "family": family,
-                        "subtype": subtype,
-                        "class": klass,
-                        "build": build,
-                    },
-                )
-
-        # --- STEP 5.6: DIGIT NEAR MATCHING ---
-        # Try to find matches with similar digit patterns
-        if not token_match and not local_match:
-            digit_near_matches = find_digit_near_matches(locked_pool, name)
-            if digit_near_matches:
-                digit_match = rank_by_name_then_tokens(digit_near_matches, name, folder, klass, build)
-                if digit_match:
-                    logging.debug(f"FINAL MATCH: Wagon {name} -> {digit_match.folder}/{digit_match.name} Phase=DIGIT_NEAR Score=800 Reason=digit-near-match")
-                    with self._lock:
-                        self.stats["resolved"] += 1
-                        if (
-                            digit_match.folder.lower() != folder.lower()
-                            or digit_match.name.lower() != name.lower()
-                        ):
-                            self.stats["changed"] += 1
-                        self.stats["by_phase"][MatchPhase.DIGIT_NEAR] += 1
-
-                    return MatchResult(
-                        chosen=digit_match,
-                        phase=MatchPhase.DIGIT_NEAR,
-                        score=800.0,
-                        target=self.extractor.extract_metadata(kind, name, folder),
-                        candidates_evaluated=len(digit_near_matches),
-                        match_details={
-                            "reason": "digit-near-match",
-                            "family": family,
-                            "subtype": subtype,
-                            "class": klass,
-                            "build": build,
-                        },
-                    )
-
-        # --- STEP 5.7: WILDCARD MATCHING ---
-        # Try wildcard matching for flexible patterns
-        if not token_match and not local_match and not digit_match:
-            wildcard_matches = find_wildcard_matches(locked_pool, name)
-            if wildcard_matches:
-                wildcard_match = rank_by_name_then_tokens(wildcard_matches, name, folder, klass, build)
-                if wildcard_match:
-                    logging.debug(f"FINAL MATCH: Wagon {name} -> {wildcard_match.folder}/{wildcard_match.name} Phase=WILDCARD_MATCH Score=750 Reason=wildcard-match")
-                    with self._lock:
-                        self.stats["resolved"] += 1
-                        if (
-                            wildcard_match.folder.lower() != folder.lower()
-                            or wildcard_match.name.lower() != name.lower()
-                        ):
-                            self.stats["changed"] += 1
-                        self.stats["by_phase"][MatchPhase.WILDCARD_MATCH] += 1
-
-                    return MatchResult(
-                        chosen=wildcard_match,
-                        phase=MatchPhase.WILDCARD_MATCH,
-                        score=750.0,
-                        target=self.extractor.extract_metadata(kind, name, folder),
-                        candidates_evaluated=len(wildcard_matches),
-                        match_details={
-                            "reason": "wildcard-match",
-                            "family": family,
-                            "subtype": subtype,
-                            "class": klass,
-                            "build": build,
-                        },
-                    )
-
-        # --- STEP 5.8: SEMANTIC MATCHING ---
-        # Try semantic similarity matching as a last resort before defaults
-        if not token_match and not local_match and not digit_match and not wildcard_match:
-            semantic_matches = find_semantic_matches(locked_pool, name)
-            if semantic_matches:
-                semantic_match = rank_by_name_then_tokens(semantic_matches, name, folder, klass, build)
-                if semantic_match:
-                    logging.debug(f"FINAL MATCH: Wagon {name} -> {semantic_match.folder}/{semantic_match.name} Phase=SEMANTIC_MATCH Score=700 Reason=semantic-match")
-                    with self._lock:
-                        self.stats["resolved"] += 1
-                        if (
-                            semantic_match.folder.lower() != folder.lower()
-                            or semantic_match.name.lower() != name.lower()
-                        ):
-                            self.stats["changed"] += 1
-                        self.stats["by_phase"][MatchPhase.SEMANTIC_MATCH] += 1
-
-                    return MatchResult(
-                        chosen=semantic_match,
-                        phase=MatchPhase.SEMANTIC_MATCH,
-                        score=700.0,
-                        target=self.extractor.extract_metadata(kind, name, folder),
-                        candidates_evaluated=len(semantic_matches),
-                        match_details={
-                            "reason": "semantic-match",
-                            "family": family,
-                            "subtype": subtype,
-                            "class": klass,
-                            "build": build,
-                        },
-                    )
-
-        # --- STEP 5.9: PARTIAL TOKEN MATCHING ---
-        # Try partial token matching for more flexible matching
-        if not token_match and not local_match and not digit_match and not wildcard_match and not semantic_match:
-            partial_token_matches = find_partial_token_matches(locked_pool, name)
-            if partial_token_matches:
-                partial_match = rank_by_name_then_tokens(partial_token_matches, name, folder, klass, build)
-                if partial_match:
-                    logging.debug(f"FINAL MATCH: Wagon {name} -> {partial_match.folder}/{partial_match.name} Phase=KEY_TOKEN_PARTIAL Score=650 Reason=partial-token-match")
-                    with self._lock:
-                        self.stats["resolved"] += 1
-                        if (
-                            partial_match.folder.lower() != folder.lower()
-                            or partial_match.name.lower() != name.lower()
-                        ):
-                            self.stats["changed"] += 1
-                        self.stats["by_phase"][MatchPhase.KEY_TOKEN_PARTIAL] += 1
-
-                    return MatchResult(
-                        chosen=partial_match,
-                        phase=MatchPhase.KEY_TOKEN_PARTIAL,
-                        score=650.0,
-                        target=self.extractor.extract_metadata(kind, name, folder),
-                        candidates_evaluated=len(partial_token_matches),
-                        match_details={
-                            "reason": "partial-token-match",
-                            "family": family,
-                            "subtype": subtype,
-                            "class": klass,
-                            "build": build,
-                        },
-                    )
-
-        # --- STEP 6: STRICT DEFAULT FALLBACK ---
-        # For defaults, require at least Subtype to match
-        defaults_index = [
-            a for a in self.index.assets if a.folder.lower().startswith("_defaults")
-        ]
-        default_match = pick_strict_default(
-            defaults_index, wanted_role, family, subtype, klass, build
-        )
-        if default_match:
-            logging.debug(f"FINAL MATCH: Wagon {name} -> {default_match.folder}/{default_match.name} Phase={phase} Score=600 Reason=strict-default")
-            with self._lock:
-                self.stats["resolved"] += 1
-                if (
-                    default_match.folder.lower() != folder.lower()
-                    or default_match.name.lower() != name.lower()
-                ):
-                    self.stats["changed"] += 1
-                phase = (
-                    MatchPhase.DEFAULT_ENGINE
-                    if wanted_role == "Engine"
-                    else MatchPhase.DEFAULT_WAGON
-                )
-                self.stats["by_phase"][phase] += 1
-
-            return MatchResult(
-                chosen=default_match,
-                phase=phase,
-                score=600.0,
-                target=self.extractor.extract_metadata(kind, name, folder),
-                candidates_evaluated=len(defaults_index),
-                match_details={
-                    "reason": "strict-default",
-                    "family": family,
-                    "subtype": subtype,
-                    "class": klass,
-                    "build": build,
-                },
-            )
-
-        # --- STEP 6.5: ENGINE NEAREST MATCH FALLBACK ---
-        # For engines, if no matches found in locked pool, find nearest engine match
-        if not default_match and wanted_role == "Engine" and kind == AssetKind.ENGINE:
-            all_engines = [asset for asset in self.index.by_kind.get(AssetKind.ENGINE, [])]
-            if all_engines:
-                # Find the best engine match using name similarity
-                engine_match = rank_by_name_then_tokens(all_engines, name, folder, klass, build)
-                if engine_match:
-                    logging.debug(f"FINAL MATCH: Wagon {name} -> {engine_match.folder}/{engine_match.name} Phase=GLOBAL_SCORE Score=550 Reason=engine-nearest-match")
-                    with self._lock:
-                        self.stats["resolved"] += 1
-                        if (
-                            engine_match.folder.lower() != folder.lower()
-                            or engine_match.name.lower() != name.lower()
-                        ):
-                            self.stats["changed"] += 1
-                        self.stats["by_phase"][MatchPhase.GLOBAL_SCORE] += 1
-
-                    return MatchResult(
-                        chosen=engine_match,
-                        phase=MatchPhase.GLOBAL_SCORE,
-                        score=550.0,
-                        target=self.extractor.extract_metadata(kind, name, folder),
-                        candidates_evaluated=len(all_engines),
-                        match_details={
-                            "reason": "engine-nearest-match",
-                            "family": family,
-                            "subtype": subtype,
-                            "class": klass,
-                            "build": build,
-                        },
-                    )
-
-        # --- STEP 7: FINAL UNRESOLVED ---
-        # Last chance: For engines, try nearest match even if we get to final unresolved
-        if wanted_role == "Engine" and kind == AssetKind.ENGINE:
-            all_engines = [asset for asset in self.index.by_kind.get(AssetKind.ENGINE, [])]
-            if all_engines:
-                # Find the best engine match using name similarity
-                engine_match = rank_by_name_then_tokens(all_engines, name, folder, klass, build)
-                if engine_match:
-                    logging.debug(f"FINAL MATCH: Wagon {name} -> {engine_match.folder}/{engine_match.name} Phase=GLOBAL_SCORE Score=500 Reason=engine-nearest-match-final")
-                    with self._lock:
-                        self.stats["resolved"] += 1
-                        if (
-                            engine_match.folder.lower() != folder.lower()
-                            or engine_match.name.lower() != name.lower()
-                        ):
-                            self.stats["changed"] += 1
-                        self.stats["by_phase"][MatchPhase.GLOBAL_SCORE] += 1
-
-                    return MatchResult(
-                        chosen=engine_match,
-                        phase=MatchPhase.GLOBAL_SCORE,
-                        score=500.0,  # Slightly lower score for final fallback
-                        target=self.extractor.extract_metadata(kind, name, folder),
-                        candidates_evaluated=len(all_engines),
-                        match_details={
-                            "reason": "engine-nearest-match-final",
-                            "family": family,
-                            "subtype": subtype,
-                            "class": klass,
-                            "build": build,
-                        },
-                    )
-
-        logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=no-final-match")
-        with self._lock:
-            self.stats["unresolved"] += 1
-            self.stats["by_phase"][MatchPhase.UNRESOLVED] += 1
-
-        return MatchResult(
-            chosen=None,
-            phase=MatchPhase.UNRESOLVED,
-            score=0.0,
-            target=self.extractor.extract_metadata(kind, name, folder),
-            candidates_evaluated=len(locked_pool) if 'locked_pool' in locals() else 0,
-            match_details={
-                "reason": "no-final-match",
-                "family": family if 'family' in locals() else "",
-                "subtype": subtype if 'subtype' in locals() else "",
-                "class": klass if 'klass' in locals() else "",
-                "build": build if 'build' in locals() else "",
-            },
-        )
-
-class ConsistParser:
-    """Parser for MSTS consist (.con) files."""
-
-    def _read_lines_with_encoding(self, path):
-        data = path.read_bytes()
-        # BOM / NUL detection → UTF-16
-        if (
-            data.startswith(b"\xff\xfe")
-            or data.startswith(b"\xfe\xff")
-            or b"\x00" in data[:128]
-        ):
-            try:
-                return data.decode("utf-16").splitlines()
-            except UnicodeError:
-                return data.decode("utf-16le", errors="ignore").splitlines()
-        # fallbacks
-        for enc in ("utf-8-sig", "cp1252", "latin-1"):
-            try:
-                return data.decode(enc).splitlines()
-            except UnicodeError:
-                pass
-        return data.decode("utf-8", errors="ignore").splitlines()
-
-    @dataclass
-    class ConsistEntry:
-        """Represent a single asset reference in consist file."""
-
-        index: int
-        kind: AssetKind
-        folder: str
-        name: str
-        kind_token: str
-        line_content: str
-
-    @dataclass
-    class ParsedConsist:
-        """Represent a parsed consist file."""
-
-        path: Path
-        filename: str
-        entries: List["ConsistParser.ConsistEntry"]
-        lines: List[str]
-
-        def get_required_folders(self) -> Set[str]:
-            """Get set of all folders referenced in this consist."""
-            return {entry.folder for entry in self.entries if entry.folder}
-
-    def parse_consist_file(self, consist_path: Path) -> ParsedConsist:
-        try:
-            lines = self._read_lines_with_encoding(consist_path)
-        except Exception as e:
-            logging.warning(f"Failed to read consist file {consist_path}: {e}")
-            return self.ParsedConsist(consist_path, consist_path.name, [], [])
-
-        entries = []
-
-        block_type = None
-        block_lines = []
-        for i, line in enumerate(lines):
-            # Detect block start
-            if re.match(r"\s*Wagon\s*\(", line, re.IGNORECASE):
-                block_type = "Wagon"
-                block_lines = [line]
-                continue
-            elif re.match(r"\s*Engine\s*\(", line, re.IGNORECASE):
-                block_type = "Engine"
-                block_lines = [line]
-                continue
-            # If inside block, collect lines
-            if block_type:
-                block_lines.append(line)
-                # Detect block end
-                if line.strip() == ")":
-                    # Search for asset data inside block
-                    for j, block_line in enumerate(block_lines):
-                        match = re.search(
-                            r"(EngineData|WagonData)\s*\(([^)]*)\)",
-                            block_line,
-                            re.IGNORECASE,
-                        )
-                        if match:
-                            kind_token = match.group(1)
-                            inside = match.group(2).strip()
-                            import shlex
-
-                            try:
-                                tokens = shlex.split(inside)
-                            except Exception:
-                                tokens = inside.split()
-                            raw_name = tokens[0] if len(tokens) > 0 else ""
-                            raw_folder = tokens[1] if len(tokens) > 1 else ""
-                            kind = (
-                                AssetKind.ENGINE
-                                if kind_token.lower().startswith("engine")
-                                else AssetKind.WAGON
-                            )
-                            entry = self.ConsistEntry(
-                                index=i - len(block_lines) + j + 1,
-                                kind=kind,
-                                folder=raw_folder,
-                                name=raw_name,
-                                kind_token=kind_token,
-                                line_content=block_line.strip(),
-                            )
-                            entries.append(entry)
-                    block_type = None
-                    block_lines = []
-
-        return self.ParsedConsist(
-            consist_path, consist_path.name, entries, [line.rstrip() for line in lines]
-        )
-
-    def parse_multiple_consists(self, consist_paths: List[Path]) -> List[ParsedConsist]:
-        """Parse multiple consist files with parallel processing."""
-        results = []
-
-        if len(consist_paths) == 1:
-            # Single file - no need for threading
-            return [self.parse_consist_file(consist_paths[0])]
-
-        # Parallel processing for multiple files
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            future_to_path = {
-                executor.submit(self.parse_consist_file, path): path
-                for path in consist_paths
-            }
-
-            for future in as_completed(future_to_path):
-                try:
-                    result = future.result(timeout=30)
-                    results.append(result)
-                except Exception as e:
-                    path = future_to_path[future]
-                    logging.error(f"Failed to parse {path}: {e}")
-
-        return results
-
-
-class MSSTResolver:
-    """CLI wrapper for AssetResolver, handling config and consist resolution."""
-
-    def __init__(self, config_path=None):
-        # Load config if provided, else use defaults
-        if config_path and hasattr(config_path, "exists") and config_path.exists():
-            import json
-
-            with open(config_path, "r", encoding="utf-8") as f:
-                config_dict = json.load(f)
-            self.config = ScoreConfig(**config_dict)
-        else:
-            self.config = ScoreConfig()
-
-        self.classifier = IndianRailwaysClassifier()
-        self.resolver = AssetResolver(self.config, self.classifier)
-        self.parser = ConsistParser()
-
-    def _resolve_asset_worker(self, entry_data):
-        """Worker function for parallel asset resolution."""
-        kind, folder, name = entry_data
-        return self.resolver.resolve_asset(kind, folder, name)
-
-    def resolve_consists(
-        self, consists_path, trainset_dir, dry_run=False, explain=False
-    ):
-        start_time = time.time()
-        consists_path = Path(consists_path)
-        trainset_dir = Path(trainset_dir)
-
-        # Find all .con files
-        consist_files = list(consists_path.glob("*.con"))
-        if not consist_files:
-            logging.error(f"No consist files found in {consists_path}")
-            return {"unresolved": 0}
-
-        logging.info(f"Found {len(consist_files)} consist files to process")
-
-        # Parse consists
-        consists = self.parser.parse_multiple_consists(consist_files)
-
-        # Log parsing results
-        total_entries = sum(len(c.entries) for c in consists)
-        logging.info(
-            f"Parsed {len(consists)} consists with {total_entries} asset references"
-        )
-
-        # Build asset index
-        assets_indexed = self.resolver.build_asset_index(trainset_dir)
-
-        # Prepare all entries for parallel processing
-        all_entries = []
-        entry_info = []  # Keep track of which result belongs to which entry (filename, entry, original_index)
-
-        for consist in consists:
-            for entry in consist.entries:
-                idx = len(all_entries)
-                all_entries.append((entry.kind, entry.folder, entry.name))
-                entry_info.append((consist.filename, entry, idx))
-
-        # Resolve all entries using parallel processing
-        logging.info("Starting STRICT ATTRIBUTE LOCKING resolution process with optimized parallel processing...")
-        
-        # Use ProcessPoolExecutor for CPU-bound asset resolution with dynamic worker scaling
-        cpu_count = multiprocessing.cpu_count()
-        max_workers = min(cpu_count * 2, 16)  # Cap at 16 to avoid excessive overhead
-        logging.info(f"Using ProcessPoolExecutor with {max_workers} workers (CPU cores: {cpu_count})")
-        
-        results = []
-        
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all entries for parallel processing and track original index
-            future_to_entry = {
-                executor.submit(self._resolve_asset_worker, entry_data): (entry_data, info)
-                for entry_data, info in zip(all_entries, entry_info)
-            }
-
-            # Collect results as they complete
-            raw_results = []
-            for future in as_completed(future_to_entry):
-                entry_data, (consist_filename, entry, orig_idx) = future_to_entry[future]
-                try:
-                    result = future.result(timeout=30)  # 30 second timeout per asset
-                    raw_results.append((orig_idx, entry_data, result, consist_filename, entry))
-                except Exception as e:
-                    logging.error(f"Error processing asset {entry.folder}/{entry.name}: {str(e)}")
-                    failed_result = MatchResult(
-                        chosen=None,
-                        phase=MatchPhase.UNRESOLVED,
-                        score=0.0,
-                        target=self.resolver.extractor.extract_metadata(entry.kind, entry.name, entry.folder),
-                        candidates_evaluated=0,
-                        match_details={"reason": f"parallel_processing_error: {str(e)}"}
-                    )
-                    raw_results.append((orig_idx, entry_data, failed_result, consist_filename, entry))
-
-            # Sort results by original order to ensure consistency
-            raw_results.sort(key=lambda x: x[0])
-            
-            # Process results in deterministic order
-            seen_explains = set()
-            # Buckets for explain messages - we will print/log changed first, unresolved next, unchanged last
-            changed_explains: List[Tuple[int, str]] = []
-            unresolved_explains: List[Tuple[int, str, str]] = []  # (orig_idx, explain_msg, diff_text)
-            unchanged_explains: List[Tuple[int, str]] = []
-            for orig_idx, entry_data, result, consist_filename, entry in raw_results:
-                try:
-                    results.append(result)
-                    
-                    if explain:
-                        details = result.match_details
-                        resolved_info = (
-                            f"{result.chosen.folder}/{result.chosen.name}"
-                            if result.chosen
-                            else "UNRESOLVED"
-                        )
-
-                        # Prefer locked class from attribute detection; fallback to chosen asset metadata
-                        resolved_class = ""
-                        locked_class = details.get("class", "") if details else ""
-                        if locked_class:
-                            resolved_class = locked_class
-                        elif result.chosen:
-                            meta = result.chosen.metadata
-                            if getattr(meta, "freight_type", ""):
-                                resolved_class = meta.freight_type
-                            elif getattr(meta, "coach_type", ""):
-                                resolved_class = meta.coach_type
-                            elif getattr(meta, "engine_class", ""):
-                                resolved_class = meta.engine_class
-                            else:
-                                resolved_class = ""
-                        else:
-                            resolved_class = ""
-
-                        # Show both detected (locked) attributes and chosen asset attributes
-                        chosen_meta = {
-                            "family": "",
-                            "subtype": "",
-                            "class": "",
-                            "build": "",
-                        }
-                        if result.chosen and getattr(result.chosen, "metadata", None):
-                            meta = result.chosen.metadata
-                            # First try to detect attributes from asset name/folder
-                            detected_class = ""
-                            detected_subtype = ""
-                            detected_family = ""
-                            detected_build = ""
-                            if result.chosen:
-                                asset_role = "Engine" if result.chosen.kind == AssetKind.ENGINE else "Wagon"
-                                detected_class = detect_wagon_or_engine_class(
-                                    result.chosen.name, asset_role
-                                ) or detect_wagon_or_engine_class(result.chosen.folder, asset_role) or ""
-                                detected_subtype = detect_subtype_from_name(
-                                    result.chosen.name
-                                ) or detect_subtype_from_name(result.chosen.folder) or ""
-                                detected_family = detect_family_from_name(
-                                    result.chosen.name, asset_role, detected_subtype
-                                ) or detect_family_from_name(result.chosen.folder, asset_role, detected_subtype) or ""
-                                detected_build = detect_build_from_name_or_folder(
-                                    result.chosen.name, result.chosen.folder
-                                ) or ""
-                            
-                            # Use detected values first, then metadata, then locked attributes
-                            chosen_meta["family"] = detected_family or getattr(meta, "family", "") or ""
-                            chosen_meta["subtype"] = detected_subtype or getattr(meta, "subtype", "") or ""
-                            chosen_meta["class"] = (
-                                detected_class
-                                or getattr(meta, "freight_type", "")
-                                or getattr(meta, "coach_type", "")
-                                or getattr(meta, "engine_class", "")
-                                or ""
-                            )
-                            chosen_meta["build"] = detected_build or getattr(meta, "build", "") or ""
-
-                        locked_meta = {
-                            "family": details.get("family", "") if details else "",
-                            "subtype": details.get("subtype", "") if details else "",
-                            "class": details.get("class", "") if details else "",
-                            "build": details.get("build", "") if details else "",
-                        }
-
-                        # For exact matches, if chosen asset has no detectable attributes, use locked attributes
-                        if result.phase == MatchPhase.EXACT_NAME:
-                            if not chosen_meta["family"] and locked_meta["family"]:
-                                chosen_meta["family"] = locked_meta["family"]
-                            if not chosen_meta["subtype"] and locked_meta["subtype"]:
-                                chosen_meta["subtype"] = locked_meta["subtype"]
-                            if not chosen_meta["class"] and locked_meta["class"]:
-                                chosen_meta["class"] = locked_meta["class"]
-                            if not chosen_meta["build"] and locked_meta["build"]:
-                                chosen_meta["build"] = locked_meta["build"]
-
-                        # Build per-attribute display showing LOCKED -> CHOSEN
-                        attr_pairs = []
-                        for label, key in (
-                            ("Family", "family"),
-                            ("Subtype", "subtype"),
-                            ("Class", "class"),
-                            ("Build", "build"),
-                        ):
-                            lval = locked_meta.get(key, "") or "-"
-                            cval = chosen_meta.get(key, "") or "-"
-                            if lval != cval:
-                                attr_pairs.append(f"{label}: {lval} -> {cval}")
-                            else:
-                                attr_pairs.append(f"{label}: {lval}")
-
-                        # Compose a compact explain message that clearly shows changed attrs
-                        attrs_text = " | ".join(attr_pairs)
-
-                        # Build a stable key from the original entry data including the original index
-                        entry_key = (
-                            entry_data[0].value if hasattr(entry_data[0], 'value') else str(entry_data[0]),
-                            entry_data[1],
-                            entry_data[2],
-                            orig_idx,
-                        )
-
-                        explain_msg = (
-                            f"{entry_key[0]} {entry_key[1]}/{entry_key[2]} -> {resolved_info} "
-                            f"Phase={result.phase.name} Score={result.score:.0f} "
-                            f"Reason={details.get('reason', '')} | {attrs_text}"
-                        )
-
-                        # Collect explain messages into buckets so we can control display order
-                        if entry_key not in seen_explains:
-                            seen_explains.add(entry_key)
-                            # Determine category: changed (asset resolved to different target),
-                            # unresolved (no chosen), or unchanged (already matching)
-                            if result.chosen is None:
-                                # Build a small diff summary for unresolved (what was requested)
-                                # Show locked vs requested attributes
-                                diff_text = attrs_text
-                                unresolved_explains.append((orig_idx, explain_msg, diff_text))
-                            else:
-                                if result.is_changed:
-                                    changed_explains.append((orig_idx, explain_msg))
-                                else:
-                                    unchanged_explains.append((orig_idx, explain_msg))
-                except Exception as e:
-                    logging.error(f"Failed to resolve asset {entry_data}: {e}")
-                    # Create unresolved result for failed entries
-                    failed_result = MatchResult(
-                        chosen=None,
-                        phase=MatchPhase.UNRESOLVED,
-                        score=0.0,
-                        target=self.resolver.extractor.extract_metadata(entry.kind, entry.name, entry.folder),
-                        candidates_evaluated=0,
-                        match_details={"reason": f"parallel_processing_error: {str(e)}"}
-                    )
-                    results.append(failed_result)
-
-        # Emit explain messages in the requested order: changed, unresolved (with diffs), unchanged
-        if explain:
-            # Sort each bucket by original index to preserve file order
-            changed_explains.sort(key=lambda x: x[0])
-            unresolved_explains.sort(key=lambda x: x[0])
-            unchanged_explains.sort(key=lambda x: x[0])
-
-            # First print changed explains
-            if changed_explains:
-                logging.info("--- CHANGED ENTRIES ---")
-                print("--- CHANGED ENTRIES ---")
-            for _idx, msg in changed_explains:
-                print(msg)
-                logging.info(f"FINAL MATCH: {msg}")
-
-            # Then print unresolved explains including diffs
-            if unresolved_explains:
-                logging.info("--- UNRESOLVED ENTRIES ---")
-                print("--- UNRESOLVED ENTRIES ---")
-            for _idx, msg, diff in unresolved_explains:
-                # Show the explain msg and a compact diff line
-                print(msg)
-                logging.info(f"FINAL MATCH: {msg}")
-                if diff:
-                    print(f"  DIFF: {diff}")
-                    logging.info(f"FINAL DIFF: {diff}")
-
-            # Finally, print unchanged explains
-            if unchanged_explains:
-                logging.info("--- UNCHANGED (already matching) ---")
-                print("--- UNCHANGED (already matching) ---")
-            for _idx, msg in unchanged_explains:
-                print(msg)
-                logging.info(f"FINAL MATCH: {msg}")
-
-        logging.info(f"Asset resolution completed. Processed {len(results)} entries.")        # Write results if not dry_run
-        if not dry_run:
-            logging.info("Writing changes to consist files...")
-            self._write_results(consists, results)
-        else:
-            logging.info("DRY-RUN mode: No changes written to files")
-
-        # Final stats
-        duration = time.time() - start_time
-        stats = self._generate_final_statistics(results, duration, assets_indexed)
-        self._display_summary(stats, dry_run)
-
-        return stats
-
-    def _write_results(self, consists, results):
-        """Write resolution results back to consist files."""
-        result_iter = iter(results)
-        files_modified = 0
-
-        for consist in consists:
-            lines_modified = False
-            changes_made = 0
-            new_lines = consist.lines.copy()
-
-            for entry in consist.entries:
-                result = next(result_iter)
-
-                if result.is_resolved and result.is_changed:
-                    chosen = result.chosen
-                    # Modify the line
-                    old_line = new_lines[entry.index]
-                    new_line = (
-                        f'    {entry.kind_token} ( {chosen.name} "{chosen.folder}" )'
-                    )
-                    new_lines[entry.index] = new_line
-                    lines_modified = True
-                    changes_made += 1
-                    logging.info(
-                        f"CHANGE: {consist.filename} line {entry.index + 1}: {entry.folder}/{entry.name} -> {chosen.folder}/{chosen.name}"
-                    )
-
-            # Write file if modified
-            if lines_modified:
-                try:
-                    with open(consist.path, "w", encoding="utf-8") as f:
-                        f.write("\n".join(new_lines) + "\n")
-                    files_modified += 1
-                    logging.info(
-                        f"Updated consist file: {consist.path} ({changes_made} changes)"
-                    )
-                except Exception as e:
-                    logging.error(f"Failed to write {consist.path}: {e}")
-
-        logging.info(
-            f"File writing completed. Modified {files_modified} consist files."
-        )
-
-    def _generate_final_statistics(self, results, duration, assets_indexed):
-        """Generate comprehensive final statistics."""
-        total = len(results)
-        resolved = sum(1 for r in results if r.is_resolved)
-        changed = sum(1 for r in results if r.is_changed)
-        unresolved = total - resolved
-        already_matching = resolved - changed
-
-        phase_counts = Counter(r.phase for r in results)
-
-        return {
-            "total_processed": total,
-            "resolved": resolved,
-            "changed": changed,
-            "unresolved": unresolved,
-            "already_matching": already_matching,
-            "assets_indexed": assets_indexed,
-            "duration_seconds": duration,
-            "resolution_rate": resolved / total if total > 0 else 0,
-            "change_rate": changed / total if total > 0 else 0,
-            "phase_breakdown": dict(phase_counts),
-            "resolver_stats": self.resolver.index.get_statistics(),
-        }
-
-    def _display_summary(self, stats, dry_run):
-        """Display comprehensive summary with colors and log to file."""
-        summary_lines = []
-
-        header = "MSTS ASSET RESOLVER - STRICT ATTRIBUTE LOCKING v2.3.0 - FINAL SUMMARY"
-        separator = "=" * 80
-
-        # Build summary content
-        summary_lines.append("")
-        summary_lines.append(separator)
-        summary_lines.append(header)
-        summary_lines.append(separator)
-        summary_lines.append(
-            f"Files Processed: {stats['total_processed']} asset references"
-        )
-        summary_lines.append(
-            f"Assets Indexed: {stats['assets_indexed']} trainset assets"
-        )
-        summary_lines.append(
-            f"Processing Time: {stats['duration_seconds']:.1f} seconds"
-        )
-        summary_lines.append("")
-
-        # Resolution statistics
-        summary_lines.append(
-            f"RESOLVED: {stats['resolved']} ({stats['resolution_rate']*100:.1f}%)"
-        )
-        summary_lines.append(
-            f"CHANGED: {stats['changed']} ({stats['change_rate']*100:.1f}%)"
-        )
-        already_matching_rate = (
-            stats["already_matching"] / stats["total_processed"]
-            if stats["total_processed"] > 0
-            else 0
-        )
-        summary_lines.append(
-            f"ALREADY MATCHING: {stats['already_matching']} ({already_matching_rate*100:.1f}%)"
-        )
-        summary_lines.append(
-            f"UNRESOLVED: {stats['unresolved']} ({(1 - stats['resolution_rate'])*100:.1f}%)"
-        )
-        summary_lines.append("")
-
-        # Phase breakdown
-        summary_lines.append("Resolution Method Breakdown:")
-        for phase, count in stats["phase_breakdown"].items():
-            percentage = (count / stats["total_processed"]) * 100
-            summary_lines.append(f"  • {phase.name}: {count} ({percentage:.1f}%)")
-        summary_lines.append("")
-
-        # Recommendations
-        summary_lines.append("Recommendations:")
-        if stats["unresolved"] > 0:
-            summary_lines.append(
-                "  • Review UNRESOLVED items for missing trainset assets or incomplete attribute detection"
-            )
-        if stats["changed"] > 0 and dry_run:
-            summary_lines.append(
-                f"  • Run without --dry-run to apply {stats['changed']} changes"
-            )
-        if stats["resolution_rate"] > 0.8:
-            summary_lines.append(
-                f"  • Excellent! {stats['resolution_rate']*100:.1f}% resolution rate achieved with strict matching"
-            )
-
-        summary_lines.append("STRICT ATTRIBUTE LOCKING FEATURES:")
-        summary_lines.append(
-            "  • Family, Subtype, Class, Build derived and locked from consist entries"
-        )
-        summary_lines.append(
-            "  • Only trainset assets with EXACT attribute matches considered"
-        )
-        summary_lines.append("  • Default fallback requires at least Subtype match")
-        summary_lines.append(
-            "  • Entries with no detectable attributes marked UNRESOLVED"
-        )
-        summary_lines.append(separator)
-
-        # Display on terminal with colors
-        print("\n" + "=" * 80)
-        self._print_status(
-            "MSTS ASSET RESOLVER - STRICT ATTRIBUTE LOCKING v2.3.0 - FINAL SUMMARY",
-            Fore.YELLOW + Style.BRIGHT,
-        )
-        print("=" * 80)
-
-        # Basic statistics
-        print(f"Files Processed: {stats['total_processed']} asset references")
-        print(f"Assets Indexed: {stats['assets_indexed']} trainset assets")
-        print(f"Processing Time: {stats['duration_seconds']:.1f} seconds")
-        print()
-
-        # Resolution statistics
-        self._print_colored_stat(
-            "RESOLVED", stats["resolved"], stats["resolution_rate"], Fore.GREEN
-        )
-        self._print_colored_stat(
-            "CHANGED", stats["changed"], stats["change_rate"], Fore.BLUE
-        )
-        self._print_colored_stat(
-            "ALREADY MATCHING",
-            stats["already_matching"],
-            already_matching_rate,
-            Fore.YELLOW,
-        )
-        self._print_colored_stat(
-            "UNRESOLVED", stats["unresolved"], 1 - stats["resolution_rate"], Fore.RED
-        )
-        print()
-
-        # Phase breakdown
-        print("Resolution Method Breakdown:")
-        for phase, count in stats["phase_breakdown"].items():
-            percentage = (count / stats["total_processed"]) * 100
-            print(f"  • {phase.name}: {count} ({percentage:.1f}%)")
-        print()
-
-        # Recommendations
-        print("Recommendations:")
-        if stats["unresolved"] > 0:
-            self._print_status(
-                "  • Review UNRESOLVED items for missing trainset assets or incomplete attribute detection",
-                Fore.RED,
-            )
-        if stats["changed"] > 0 and dry_run:
-            self._print_status(
-                f"  • Run without --dry-run to apply {stats['changed']} changes",
-                Fore.GREEN,
-            )
-        if stats["resolution_rate"] > 0.8:
-            self._print_status(
-                f"  • Excellent! {stats['resolution_rate']*100:.1f}% resolution rate achieved with strict matching",
-                Fore.GREEN,
-            )
-
-        print()
-        print("STRICT ATTRIBUTE LOCKING FEATURES:")
-        self._print_status(
-            "  • Family, Subtype, Class, Build derived and locked from consist entries",
-            Fore.CYAN,
-        )
-        self._print_status(
-            "  • Only trainset assets with EXACT attribute matches considered",
-            Fore.CYAN,
-        )
-        self._print_status(
-            "  • Default fallback requires at least Subtype match", Fore.CYAN
-        )
-        self._print_status(
-            "  • Entries with no detectable attributes marked UNRESOLVED", Fore.CYAN
-        )
-
-        print("=" * 80)
-
-        # Log complete summary to file
-        for line in summary_lines:
-            logging.info(f"SUMMARY: {line}")
-
-    def _print_colored_stat(self, label: str, value: int, percentage: float, color):
-        """Print a colored statistic line."""
-        if COLORS_AVAILABLE:
-            print(f"{color}{label}: {value} ({percentage*100:.1f}%)")
-        else:
-            print(f"{label}: {value} ({percentage*100:.1f}%)")
-
-    def _print_status(self, message: str, color=None):
-        """Print a status message with optional color."""
-        if COLORS_AVAILABLE and color:
-            print(color + message)
-        else:
-            print(message)
-
-
-def main():
-    """Main application entry point."""
-    parser = argparse.ArgumentParser(
-        description="Advanced MSTS Asset Resolver with STRICT ATTRIBUTE LOCKING (v2.3.0)",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  python consistEditor.py consists/ trainsets/
-  python consistEditor.py consists/ trainsets/ --dry-run --explain
-  python consistEditor.py consists/ trainsets/ --config config.json
-
-NEW v2.3.0 STRICT ATTRIBUTE LOCKING:
-  - DERIVE AND LOCK: Extract Family, Subtype, Class, Build from consist entry
-  - STRICT FILTERING: Only consider trainset assets with EXACT matches for all four attributes
-  - NAME-FIRST: Exact name match within locked attributes (highest priority)
-  - TOKEN MATCHING: Apply name/token ranking within locked attributes
-  - DEFAULT STRICT: Require at least Subtype match for defaults
-  - UNRESOLVED: If no attributes detected or no matches found, mark as UNRESOLVED
-
-PREVIOUS ENHANCEMENTS (v2.2.5):
-  - ENHANCED: Comprehensive freight detection based on 533 real wagon files analysis
-  - NEW: Support for BSAM series (168 wagons), CON_ containers (42 wagons), ASMI series (37 wagons)
-  - NEW: Enhanced freight types: CEMENT, COIL, COAL, MILKTANKER, BCCN, BRNA, BRW, BCA, BCB, BTI
-        """,
-    )
-
-    parser.add_argument(
-        "consists_path",
-        type=Path,
-        help="Path to consists directory containing .con files",
-    )
-    parser.add_argument(
-        "trainset_dir",
-        type=Path,
-        help="Path to trainset directory containing asset folders",
-    )
-    parser.add_argument(
-        "--dry-run", action="store_true", help="Preview changes without modifying files"
-    )
-    parser.add_argument(
-        "--explain", action="store_true", help="Show detailed resolution information"
-    )
-    parser.add_argument("--config", type=Path, help="Path to configuration JSON file")
-    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
-    parser.add_argument("--seed", type=int, help="Random seed for reproducible results (default: 42)")
-
-    args = parser.parse_args()
-
-    # Delete previous log file FIRST - with retry for Windows file locking
-    log_path = Path("msts_resolver.log")
-    if log_path.exists():
-        import time
-
-        for attempt in range(3):
-            try:
-                log_path.unlink()
-                break
-            except (PermissionError, OSError) as e:
-                if attempt < 2:  # Try up to 3 times
-                    time.sleep(0.5)  # Short delay between retries
-                else:
-                    # If all retries fail, try to rename it instead
-                    try:
-                        import random
-
-                        backup_name = (
-                            f"msts_resolver_old_{random.randint(1000,9999)}.log"
-                        )
-                        log_path.rename(backup_name)
-                    except Exception:
-                        # If everything fails, just continue - logs will append
-                        pass
-            except Exception:
-                break
-
-    # Set up logging AFTER deleting old log
-    log_level = logging.DEBUG if args.debug else logging.INFO
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("msts_resolver.log"),
-            logging.StreamHandler(sys.stdout),
-        ],
-    )
-
-    try:
-        # Create resolver instance
-        resolver = MSSTResolver(args.config)
-
-        # Show startup message
-        import random
-        import time
-
-        # Use fixed seed for consistent results, or configurable seed
-        if hasattr(args, 'seed') and args.seed is not None:
-            random.seed(args.seed)
-            logging.info(f"Random seed set to: {args.seed}")
-        else:
-            # Use fixed seed for consistent results instead of time-based
-            random.seed(42)  # Fixed seed for reproducible results
-            logging.info(f"Random seed initialized: 42 (fixed for consistency)")
-
-        startup_msg = "MSTS Asset Resolver v2.3.0 - STRICT ATTRIBUTE LOCKING"
-        print(startup_msg)
-        print("=" * 80)
-        logging.info(startup_msg)
-        logging.info("=" * 80)
-        logging.info("NEW v2.3.0 STRICT ATTRIBUTE LOCKING:")
-        logging.info(
-            "- DERIVE AND LOCK: Extract Family, Subtype, Class, Build from consist entry"
-        )
-        logging.info(
-            "- STRICT FILTERING: Only consider trainset assets with EXACT matches for all four attributes"
-        )
-        logging.info(
-            "- NAME-FIRST: Exact name match within locked attributes (highest priority)"
-        )
-        logging.info(
-            "- TOKEN MATCHING: Apply name/token ranking within locked attributes"
-        )
-        logging.info("- DEFAULT STRICT: Require at least Subtype match for defaults")
-        logging.info(
-            "- UNRESOLVED: If no attributes detected or no matches found, mark as UNRESOLVED"
-        )
-        logging.info("PREVIOUS v2.2.5 ENHANCEMENTS:")
-        logging.info(
-            "- ENHANCED: Comprehensive freight detection based on 533 real wagon files analysis"
-        )
-        logging.info(
-            "- NEW: Support for BSAM series (168 wagons), CON_ containers (42 wagons), ASMI series (37 wagons)"
-        )
-        logging.info(
-            "- NEW: Enhanced freight types: CEMENT, COIL, COAL, MILKTANKER, BCCN, BRNA, BRW, BCA, BCB, BTI"
-        )
-        # Random seed already initialized above for consistency
-
-        # Run resolution
-        results = resolver.resolve_consists(
-            consists_path=args.consists_path,
-            trainset_dir=args.trainset_dir,
-            dry_run=args.dry_run,
-            explain=args.explain,
-        )
-
-        # Exit with appropriate code
-        if results["unresolved"] > 0:
-            sys.exit(1)  # Some assets unresolved
-        else:
-            sys.exit(0)  # All assets resolved
-
-    except KeyboardInterrupt:
-        print("\nOperation cancelled by user")
-        sys.exit(130)
-    except Exception as e:
-        logging.error(f"Fatal error: {e}")
-        if args.debug:
-            import traceback
-
-            traceback.print_exc()
-        sys.exit(1)
-
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+import argparse
+import fnmatch
+import json
+import logging
+import random
+import re
+import shlex
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from enum import Enum, IntEnum
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union, Any
+import sys
+import hashlib
+import zlib
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from types import MappingProxyType
+import threading
+from abc import ABC, abstractmethod
+import multiprocessing
+
+# PERFORMANCE OPTIMIZATION: Bounded, thread-safe regex compilation cache
+# (lru_cache has a C-coded hit path and avoids the check-then-set race of a
+# plain module dict under threaded ingestion)
+@lru_cache(maxsize=2048)
+def _compile_regex(pattern: str, flags: int) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+def get_compiled_regex(pattern: str, flags=0) -> re.Pattern:
+    """Get cached compiled regex pattern to avoid recompilation."""
+    return _compile_regex(pattern, flags)
+
+
+# PERFORMANCE OPTIMIZATION: Classification fields (engine_class, coach_type,
+# freight_type) take values from small closed sets; interning the uppercased
+# result means tens of thousands of records share one string object per value
+# and equality checks short-circuit on identity
+@lru_cache(maxsize=1024)
+def _intern_upper(value: str) -> str:
+    return sys.intern(value.upper())
+
+
+# Lowercasing twin for query-time index keys: classification values come from
+# the same small closed sets, so the lowered key is computed once per value
+@lru_cache(maxsize=1024)
+def _intern_lower(value: str) -> str:
+    return sys.intern(value.lower())
+
+# PERFORMANCE OPTIMIZATION: Pre-compile locomotive patterns
+_LOCO_PATTERNS = [
+    # WDG series - Goods locomotives
+    r'(?i)(wdg[\-_]?(?:3a?|4(?:d|g)?|5))(?:[\-_]?[a-z0-9]*)*',
+    # WDM series - Mixed locomotives  
+    r'(?i)(wdm[\-_]?(?:2(?:a|b|c)?|3(?:a|b|c|d|f)?|7|16847|18500))(?:[\-_]?[a-z0-9]*)*',
+    # WAP series - Passenger locomotives
+    r'(?<![A-Za-z0-9])(wap(?:1|4(?:e)?|5|7))(?![A-Za-z0-9])',
+    # WAG series - Goods locomotives
+    r'(?<![A-Za-z0-9])(wag(?:5(?:a?|d|e|h|p)?|7|9(?:h)?|12))(?![A-Za-z0-9])',
+    # WDP series - Shunting locomotives
+    r'(?<![A-Za-z0-9])(wdp(?:1|2(?:a)?|3a?|4(?:b|d)?))(?![A-Za-z0-9])',
+    # WCAM series - AC Mixed locomotives
+    r'(?<![A-Za-z0-9])(wcam(?:1|2p?|3))(?![A-Za-z0-9])',
+    # WCG series - Goods locomotives
+    r'(?<![A-Za-z0-9])(wcg(?:1|2))(?![A-Za-z0-9])',
+    # WCM series - Mixed locomotives
+    r'(?<![A-Za-z0-9])(wcm(?:|1|6))(?![A-Za-z0-9])',
+    # WAM series - AC Mixed locomotives
+    r'(?<![A-Za-z0-9])(wam(?:4(?:6p)?))(?![A-Za-z0-9])',
+    # Vande Bharat engines
+    r'(?<![A-Za-z0-9])vbdc(?![A-Za-z0-9])',
+    r'(?<![A-Za-z0-9])vbdmc(?![A-Za-z0-9])',
+    # Other locomotives
+    r'(?<![A-Za-z0-9])(ydm4)(?![A-Za-z0-9])',
+    r'(?<![A-Za-z0-9])(zdm506)(?![A-Za-z0-9])',
+]
+
+_COMPILED_LOCO_PATTERNS = [get_compiled_regex(pattern) for pattern in _LOCO_PATTERNS]
+
+# PERFORMANCE OPTIMIZATION: every locomotive pattern opens with a short
+# literal series code (wdg, wap, vbd, ...). The patterns run with search(),
+# so the code can sit anywhere in the name - the scan is therefore gated on
+# a cheap substring probe for that literal rather than on the name's first
+# characters; a pattern whose literal is absent can never match and its
+# regex is skipped entirely
+_LOCO_PROBE_RE = get_compiled_regex(r'[a-z]{3}')
+
+
+def _loco_literal_probe(pattern: str) -> str:
+    stripped = pattern.replace('(?i)', '').replace('(?<![A-Za-z0-9])', '')
+    probe = _LOCO_PROBE_RE.match(stripped.lstrip('('))
+    return probe.group(0) if probe else ''
+
+
+_LOCO_PATTERN_PROBES = tuple(
+    (compiled, _loco_literal_probe(source))
+    for compiled, source in zip(_COMPILED_LOCO_PATTERNS, _LOCO_PATTERNS)
+)
+
+# PERFORMANCE OPTIMIZATION: Pre-compile common regex patterns
+_NORMALIZE_PATTERN = get_compiled_regex(r'[^a-z0-9]+')
+_TOKENIZE_PATTERN = get_compiled_regex(r'[a-z0-9]+')
+_VARIANT_TAIL = get_compiled_regex(r'(\d+)$')
+
+
+# PERFORMANCE OPTIMIZATION: translate-table twin of _NORMALIZE_PATTERN - a
+# C-level table walk instead of a regex scan for the common normalization.
+# The dict subclass makes codepoints beyond the prebuilt Latin-1 range behave
+# like the regex too: anything that is not [a-z0-9] becomes a space.
+class _NormalizeTable(dict):
+    def __missing__(self, code):
+        return 32
+
+
+_NORMALIZE_TABLE = _NormalizeTable({code: 32 for code in range(256)})
+for _code in map(ord, "abcdefghijklmnopqrstuvwxyz0123456789"):
+    _NORMALIZE_TABLE[_code] = _code
+del _code
+
+
+def _normalize_tokens(text: str) -> List[str]:
+    """Lowercased [a-z0-9]+ runs of text, via the translate table.
+
+    Equivalent to splitting _NORMALIZE_PATTERN.sub(' ', text.lower()); joining
+    the result with single spaces reproduces the normalized form exactly.
+    """
+    return text.lower().translate(_NORMALIZE_TABLE).split()
+
+# PERFORMANCE OPTIMIZATION: Per-engine-class series patterns, compiled once on
+# first use instead of rebuilt per asset
+_ENGINE_SERIES_PATTERNS: Dict[str, re.Pattern] = {}
+
+
+def _engine_series_pattern(engine_class: str) -> re.Pattern:
+    """Get the compiled series pattern (class + number suffix) for an engine class."""
+    pattern = _ENGINE_SERIES_PATTERNS.get(engine_class)
+    if pattern is None:
+        pattern = get_compiled_regex(
+            rf"(?i){re.escape(engine_class)}[-_]?(\d{{1,3}}[a-z]?)"
+        )
+        _ENGINE_SERIES_PATTERNS[engine_class] = pattern
+    return pattern
+
+# PERFORMANCE OPTIMIZATION: Prefer rapidfuzz (C++/SIMD edit distance) over
+# fuzzywuzzy, which wraps quadratic difflib when its C extension is missing.
+# A difflib-backed shim is the last resort so fuzzy matching always works.
+try:
+    from rapidfuzz import fuzz, process
+
+    FUZZ_BACKEND = "rapidfuzz"
+except ImportError:
+    try:
+        from fuzzywuzzy import fuzz, process
+
+        FUZZ_BACKEND = "fuzzywuzzy"
+    except ImportError:
+        process = None
+
+        class _DifflibFuzz:
+            """Minimal fuzz-compatible shim backed by difflib (slow path)."""
+
+            @staticmethod
+            def ratio(a: str, b: str) -> float:
+                return SequenceMatcher(None, a, b).ratio() * 100
+
+            @staticmethod
+            def partial_ratio(a: str, b: str) -> float:
+                if not a or not b:
+                    return 0.0
+                shorter, longer = (a, b) if len(a) <= len(b) else (b, a)
+                matcher = SequenceMatcher(None, shorter, longer)
+                best = 0.0
+                for block in matcher.get_matching_blocks():
+                    start = max(block.b - block.a, 0)
+                    segment = longer[start : start + len(shorter)]
+                    r = SequenceMatcher(None, shorter, segment).ratio()
+                    if r > best:
+                        best = r
+                return best * 100
+
+            @staticmethod
+            def token_sort_ratio(a: str, b: str) -> float:
+                return _DifflibFuzz.ratio(
+                    " ".join(sorted(a.split())), " ".join(sorted(b.split()))
+                )
+
+        fuzz = _DifflibFuzz()
+        FUZZ_BACKEND = "difflib"
+
+# Retained for backward compatibility with older call sites/configs
+FUZZYWUZZY_AVAILABLE = FUZZ_BACKEND in ("rapidfuzz", "fuzzywuzzy")
+
+
+def ratio(a: str, b: str) -> float:
+    """String similarity (0-100) via the best available fuzzy backend."""
+    return fuzz.ratio(a, b)
+
+# PERFORMANCE OPTIMIZATION: Optional numpy/numba acceleration for the hot
+# token-intersection kernel. Both are optional - the pure-Python two-pointer
+# scan below remains the fallback and the single source of truth for behavior.
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    njit = None
+    prange = range
+    NUMBA_AVAILABLE = False
+
+# PERFORMANCE OPTIMIZATION: Optional Aho-Corasick automaton for multi-keyword
+# scans - one linear pass in C instead of a regex alternation. The compiled
+# alternation scanners remain the fallback.
+try:
+    import ahocorasick
+
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+# PERFORMANCE OPTIMIZATION: Optional pyarrow backend for bulk name
+# classification - Arrow's vectorized regex kernels scan a whole name column
+# per stage instead of a Python loop per name. The memoized per-name
+# detectors remain the fallback.
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pc = None
+    PYARROW_AVAILABLE = False
+
+try:
+    import colorama
+    from colorama import Fore, Back, Style
+
+    colorama.init(autoreset=True)
+    COLORS_AVAILABLE = True
+except ImportError:
+    COLORS_AVAILABLE = False
+
+    # Fallback color class - no warning needed
+    class _DummyColor:
+        def __getattr__(self, name):
+            return ""
+
+    Fore = Back = Style = _DummyColor()
+
+
+class AssetKind(Enum):
+    """Asset type enumeration."""
+
+    ENGINE = "Engine"
+    WAGON = "Wagon"
+
+
+class MatchPhase(IntEnum):
+    """Asset resolution phase enumeration.
+
+    PERFORMANCE OPTIMIZATION: IntEnum with explicit values - phases hash and
+    compare as plain ints in the per-phase stats counters, and the values are
+    stable for serialization (auto() kept the same 1..14 numbering).
+    """
+
+    EXACT_NAME = 1
+    EXACT_NORM = 2
+    DIGIT_NEAR = 3
+    LOCAL_FOLDER = 4
+    IR_COMPOSITE = 5
+    WILDCARD_MATCH = 6
+    KEY_TOKEN_ALL = 7
+    KEY_TOKEN_PARTIAL = 8
+    FOLDER_SCORE = 9
+    GLOBAL_SCORE = 10
+    SEMANTIC_MATCH = 11
+    DEFAULT_ENGINE = 12
+    DEFAULT_WAGON = 13
+    UNRESOLVED = 14
+
+
+class TractionType(Enum):
+    """Locomotive traction type."""
+
+    ELECTRIC = "Electric"
+    DIESEL = "Diesel"
+    STEAM = "Steam"
+    UNKNOWN = "Unknown"
+
+
+@dataclass(slots=True)
+class ScoreConfig:
+    """Scoring configuration for asset matching."""
+
+    # Basic scoring
+    norm_exact_bonus: int = 60
+    jaccard_multiplier: int = 100
+
+    # Engine scoring
+    engine_series_match: int = 140
+    engine_series_mismatch: int = -80
+    engine_class_match: int = 90
+    engine_class_mismatch: int = -70
+    engine_family_match: int = 50
+    engine_family_mismatch: int = -25
+    traction_match: int = 40
+    traction_mismatch: int = -150
+
+    # Coach/wagon scoring
+    coach_type_match: int = 120
+    coach_type_mismatch: int = -200
+    freight_type_match: int = 110
+    freight_type_mismatch: int = -55
+    carbody_match: int = 70
+    carbody_mismatch: int = -40
+    set_type_match: int = 50
+
+    # Penalty/bonus system
+    passenger_freight_mismatch: int = -800
+    unit_type_mismatch: int = -150
+    default_penalty: int = -100
+    non_default_bonus: int = 50
+
+    # Token matching bonuses
+    key_token_all_bonus: int = 60
+    key_token_partial_bonus: int = 45
+    ir_composite_bonus: int = 180
+    digit_near_bonus: int = 120
+
+    # Geographic and technical matching
+    region_match: int = 40
+    depot_match: int = 35
+    tech_spec_match: int = 50
+    manufacturer_match: int = 65
+    region_mismatch: int = -15
+    depot_mismatch: int = -10
+    tech_spec_mismatch: int = -20
+    manufacturer_mismatch: int = -25
+
+    # Minimum score thresholds
+    min_token_score: int = 150
+    partial_coverage_threshold: float = 0.6
+    near_digit_max_diff: int = 5
+
+
+@dataclass(slots=True)
+class AssetMetadata:
+    """Metadata extracted from asset names and folders."""
+
+    kind: AssetKind
+    name: str
+    folder: str = ""
+    normalized: str = ""
+    tokens: Set[str] = field(default_factory=set)
+    # PERFORMANCE OPTIMIZATION: core_tokens is derived lazily on first access
+    # (see the core_tokens property) - most records never reach the phases
+    # that consume it
+    _core_tokens: Optional[Set[str]] = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: Sorted token tuple + stored length for
+    # allocation-free Jaccard (see jaccard_sorted)
+    tokens_sorted: Tuple[str, ...] = field(default_factory=tuple)
+    tokens_len: int = 0
+    # PERFORMANCE OPTIMIZATION: Lowercased name/folder cached once for the
+    # case-insensitive comparisons in matching
+    name_lower: str = ""
+    folder_lower: str = ""
+
+    # Engine-specific attributes
+    engine_class: str = ""
+    engine_series: str = ""
+    engine_family: str = ""
+    traction: TractionType = TractionType.UNKNOWN
+    is_unit: bool = False
+
+    # Wagon-specific attributes
+    coach_type: str = ""
+    freight_type: str = ""
+    carbody: str = ""
+    set_type: str = ""
+
+    # Geographic and technical attributes
+    region: str = ""
+    depot: str = ""
+    tech_spec: str = ""
+    manufacturer: str = ""
+
+    # Additional metadata
+    variant: Optional[int] = None
+    livery: str = ""
+
+    def __post_init__(self):
+        """Post-initialization processing."""
+        if not self.name_lower:
+            self.name_lower = self.name.lower()
+        if not self.folder_lower:
+            self.folder_lower = self.folder.lower()
+        # PERFORMANCE OPTIMIZATION: Fused normalize+tokenize - a single
+        # _TOKENIZE_PATTERN pass over the lowercased name yields both the
+        # normalized string and the name tokens, instead of one regex pass
+        # for normalization plus a second findall over the result.
+        if not self.normalized or not self.tokens:
+            name_tokens = _TOKENIZE_PATTERN.findall(self.name_lower)
+            if not self.normalized:
+                self.normalized = " ".join(name_tokens)
+            if not self.tokens:
+                tokens = set(name_tokens)
+                if self.folder:
+                    folder_tokens = _TOKENIZE_PATTERN.findall(self.folder_lower)
+                    tokens.update(f"f:{token}" for token in folder_tokens)
+                self.tokens = tokens
+        if not self.tokens_sorted:
+            self.tokens_sorted = tuple(sorted(self.tokens))
+            self.tokens_len = len(self.tokens)
+
+    @property
+    def core_tokens(self) -> Set[str]:
+        """Core classification tokens, derived lazily from the class fields."""
+        if self._core_tokens is None:
+            self._core_tokens = self._extract_core_tokens()
+        return self._core_tokens
+
+    def get(self, key: str, default=None):
+        """Dictionary-like access for backward compatibility."""
+        return getattr(self, key, default)
+
+    def _extract_core_tokens(self) -> Set[str]:
+        """Extract core classification tokens."""
+        core = set()
+        for attr in [
+            "engine_class",
+            "engine_series",
+            "coach_type",
+            "freight_type",
+            "carbody",
+            "set_type",
+        ]:
+            value = getattr(self, attr)
+            if value:
+                core.add(value.lower())
+        return core
+
+
+@dataclass(slots=True)
+class AssetRecord:
+    """Complete asset record with metadata and file information."""
+
+    kind: AssetKind
+    name: str
+    folder: str
+    path: Path
+    metadata: AssetMetadata
+    # PERFORMANCE OPTIMIZATION: key_tokens and ir_composite are derived
+    # lazily on first access (see the properties below) - records resolved in
+    # the EXACT_NAME/EXACT_NORM phases never need them
+    _key_tokens: Optional[FrozenSet[str]] = field(init=False, repr=False, default=None)
+    _ir_composite: Optional[str] = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: Cache class detection to avoid repeated regex calls
+    cached_class: str = ""
+    # PERFORMANCE OPTIMIZATION: Cache normalized strings and tokens
+    cached_normalized: str = ""
+    cached_tokens: FrozenSet[str] = field(default_factory=frozenset)
+    # PERFORMANCE OPTIMIZATION: Sorted token tuple + stored length for
+    # allocation-free Jaccard (see jaccard_sorted)
+    tokens_sorted: Tuple[str, ...] = field(default_factory=tuple)
+    tokens_len: int = 0
+    # PERFORMANCE OPTIMIZATION: Interned int32 vocabulary ids for the tokens,
+    # so the hot intersection kernel compares ints (see intersection_len_ids).
+    # Computed lazily: records built in ingestion worker processes must intern
+    # against the consuming process's vocabulary, not a worker-local one.
+    _token_ids: Any = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: the same vocabulary ids as one arbitrary-width
+    # int bitmask, so set intersection/union collapse to AND/OR + bit_count()
+    # on installs without numba. Lazy for the same worker-process reason.
+    _token_bits: Optional[int] = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: subtype/family/build detection cached per
+    # record, lazily like key_tokens - the strict attribute filter re-derived
+    # them from name and folder on every call
+    _cached_subtype: Optional[str] = field(init=False, repr=False, default=None)
+    _cached_family: Optional[str] = field(init=False, repr=False, default=None)
+    _cached_build: Optional[str] = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: digit runs in the name as ints, extracted once
+    # for the digit-near matcher instead of per scan
+    _cached_digits: Optional[Tuple[int, ...]] = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: deterministic tie-break hash for choose_best,
+    # computed once per record instead of per selection pass
+    _tiebreak_hash: Optional[int] = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: query-independent ranker flags (does this
+    # record look like an auxiliary car / carry non-passenger indicators),
+    # resolved once per record instead of re-running the indicator regexes
+    # on every ranker call that reaches the preference branches
+    _is_aux_car: Optional[bool] = field(init=False, repr=False, default=None)
+    _has_non_passenger_marks: Optional[bool] = field(init=False, repr=False, default=None)
+    # PERFORMANCE OPTIMIZATION: Identity key and hash computed once; records
+    # are added to sets/dicts repeatedly during matching and str(Path) would
+    # otherwise be re-allocated on every probe
+    _key: Tuple[AssetKind, str, str, str] = field(init=False, repr=False, default=())
+    _hash: int = field(init=False, repr=False, default=0)
+    # PERFORMANCE OPTIMIZATION: Lowercased name/folder and the index key,
+    # computed once instead of per comparison / property access
+    name_lower: str = field(init=False, default="")
+    folder_lower: str = field(init=False, default="")
+    _key_lower: str = field(init=False, repr=False, default="")
+
+    def __post_init__(self):
+        """Post-initialization processing."""
+        self._key = (self.kind, self.name, self.folder, str(self.path))
+        self._hash = hash(self._key)
+        self.name_lower = self.name.lower()
+        # PERFORMANCE OPTIMIZATION: folders recur across the whole index, so
+        # the lowered form comes from the shared interned pool (_lower_intern)
+        self.folder_lower = _lower_intern(self.folder)
+        self._key_lower = f"{self.folder_lower}|{self.name_lower}"
+        # PERFORMANCE OPTIMIZATION: Cache class detection result
+        if not self.cached_class:
+            self.cached_class = detect_wagon_or_engine_class(self.name, "Engine" if self.kind == AssetKind.ENGINE else "Wagon") or ""
+        # PERFORMANCE OPTIMIZATION: Cache normalized strings and tokens
+        if not self.cached_normalized:
+            self.cached_normalized = " ".join(_normalize_tokens(self.name))
+        if not self.cached_tokens:
+            # PERFORMANCE OPTIMIZATION: frozenset of interned tokens - set
+            # intersections against other records hit identity comparison, and
+            # token-overlap scans reuse this instead of re-splitting the name
+            self.cached_tokens = frozenset(
+                map(sys.intern, self.cached_normalized.split())
+            )
+        if not self.tokens_sorted:
+            self.tokens_sorted = tuple(sorted(self.cached_tokens))
+            self.tokens_len = len(self.cached_tokens)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, AssetRecord):
+            return False
+        return self._key == other._key
+
+    @property
+    def key_lower(self) -> str:
+        """Lowercase key for indexing (cached at construction)."""
+        return self._key_lower
+
+    @property
+    def token_ids(self):
+        """Sorted interned vocabulary ids for cached_tokens (computed lazily)."""
+        if self._token_ids is None:
+            self._token_ids = token_ids(self.cached_tokens)
+        return self._token_ids
+
+    @property
+    def token_bits(self) -> int:
+        """Vocabulary bitmask for cached_tokens (computed lazily)."""
+        if self._token_bits is None:
+            self._token_bits = token_bits(self.cached_tokens)
+        return self._token_bits
+
+    @property
+    def cached_subtype(self) -> str:
+        """Subtype detected from name, then folder (computed lazily)."""
+        if self._cached_subtype is None:
+            self._cached_subtype = detect_subtype_from_name(
+                self.name
+            ) or detect_subtype_from_name(self.folder)
+        return self._cached_subtype
+
+    @property
+    def cached_family(self) -> str:
+        """Family detected from name, then folder (computed lazily)."""
+        if self._cached_family is None:
+            role = "Engine" if self.kind == AssetKind.ENGINE else "Wagon"
+            subtype = self.cached_subtype
+            self._cached_family = detect_family_from_name(
+                self.name, role, subtype
+            ) or detect_family_from_name(self.folder, role, subtype)
+        return self._cached_family
+
+    @property
+    def cached_digits(self) -> Tuple[int, ...]:
+        """Digit runs in the name, as ints (computed lazily)."""
+        if self._cached_digits is None:
+            self._cached_digits = tuple(int(d) for d in _DIGITS_RE.findall(self.name))
+        return self._cached_digits
+
+    @property
+    def cached_build(self) -> str:
+        """Build type detected from name/folder (computed lazily)."""
+        if self._cached_build is None:
+            self._cached_build = detect_build_from_name_or_folder(self.name, self.folder)
+        return self._cached_build
+
+    @property
+    def tiebreak_hash(self) -> int:
+        """Exact-match tie-break hash over folder_lower + name_lower (lazy).
+
+        lower() distributes over concatenation, so the key covers the same
+        string as the historical hash((folder + name).lower()), but through
+        crc32 - str hashing is randomized per interpreter run via
+        PYTHONHASHSEED, so hash() was only consistent within one process.
+        """
+        if self._tiebreak_hash is None:
+            self._tiebreak_hash = zlib.crc32(
+                (self.folder_lower + self.name_lower).encode()
+            )
+        return self._tiebreak_hash
+
+    @property
+    def is_aux_car(self) -> bool:
+        """Whether the record looks like an auxiliary car (generator, pantry,
+        power, guard) rather than a passenger coach (computed lazily)."""
+        if self._is_aux_car is None:
+            self._is_aux_car = bool(
+                (self.cached_class and self.cached_class.upper() in ('EOG', 'GN', 'PC', 'SLR'))
+                or self.cached_tokens & _RANK_NON_PASSENGER_TOKENS
+                or _RANK_AUX_INDICATOR_RE.search(self.name_lower)
+                or _RANK_AUX_INDICATOR_RE.search(self.folder_lower)
+            )
+        return self._is_aux_car
+
+    @property
+    def has_non_passenger_marks(self) -> bool:
+        """Whether the name or tokens carry non-passenger indicators
+        (computed lazily)."""
+        if self._has_non_passenger_marks is None:
+            self._has_non_passenger_marks = bool(
+                self.cached_tokens & _RANK_NON_PASSENGER_TOKENS
+                or _RANK_NON_PASSENGER_RE.search(self.name_lower)
+            )
+        return self._has_non_passenger_marks
+
+    @property
+    def key_tokens(self) -> FrozenSet[str]:
+        """Key tokens for indexing (computed lazily)."""
+        if self._key_tokens is None:
+            self._key_tokens = self._generate_key_tokens()
+        return self._key_tokens
+
+    @property
+    def ir_composite(self) -> str:
+        """Indian Railways composite key (computed lazily)."""
+        if self._ir_composite is None:
+            self._ir_composite = self._build_ir_composite()
+        return self._ir_composite
+
+    def _generate_key_tokens(self) -> FrozenSet[str]:
+        """Generate key tokens for indexing.
+
+        PERFORMANCE OPTIMIZATION: tokens are interned so the token index
+        keyed on them hits the unicode pointer-equality dict fast path,
+        and the result is a frozenset (immutable, slightly smaller).
+        """
+        tokens = {sys.intern(token) for token in self.metadata.tokens}
+        # Add folder-prefixed tokens
+        if self.folder:
+            folder_tokens = _TOKENIZE_PATTERN.findall(self.folder_lower)
+            tokens.update(sys.intern(f"f:{token}") for token in folder_tokens)
+        return frozenset(tokens)
+
+    def _build_ir_composite(self) -> str:
+        """Build Indian Railways composite identifier."""
+        parts = []
+        meta = self.metadata
+
+        if meta.carbody:
+            parts.append(meta.carbody.lower())
+
+        if meta.freight_type:
+            parts.append(meta.freight_type.lower())
+        elif meta.coach_type:
+            parts.append(meta.coach_type.lower())
+
+        if meta.set_type:
+            parts.append(meta.set_type.lower())
+
+        if meta.engine_class:
+            parts.append(meta.engine_class.lower())
+
+        if meta.engine_series:
+            parts.append(meta.engine_series.lower())
+
+        return "_".join(parts) if parts else ""
+
+
+@dataclass(slots=True)
+class MatchResult:
+    """Result of asset matching operation."""
+
+    chosen: Optional[AssetRecord]
+    phase: MatchPhase
+    score: float
+    target: AssetMetadata
+    candidates_evaluated: int = 0
+    match_details: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_resolved(self) -> bool:
+        """Check if asset was successfully resolved."""
+        return self.chosen is not None
+
+    @property
+    def is_changed(self) -> bool:
+        """Check if resolution resulted in a change."""
+        if not self.chosen:
+            return False
+        return not (
+            self.chosen.folder_lower == self.target.folder_lower
+            and self.chosen.name_lower == self.target.name_lower
+        )
+
+
+class IndianRailwaysClassifier:
+    """Indian Railways locomotive and coach classification system - ENHANCED v2.2.5 WITH FREIGHT ANALYSIS."""
+
+    # ENHANCED: Locomotive classifications including multiple units
+    ENGINE_CLASSES = frozenset({
+        # Electric passenger
+        "wap1",
+        "wap4",
+        "wap5",
+        "wap7",
+        # Electric freight
+        "wag5",
+        "wag7",
+        "wag9",
+        "wag12",
+        # Electric mixed/heritage
+        "wam4",
+        "wcam2",
+        "wcam3",
+        "wcg2",
+        "wcm1",
+        "wcm2",
+        "wcm3",
+        "wcm4",
+        "wcm5",
+        # Diesel freight
+        "wdg3",
+        "wdg3a",
+        "wdg4",
+        "wdg4d",
+        "wdg4g",
+        # Diesel mixed/mainline
+        "wdm2",
+        "wdm3",
+        "wdm3a",
+        "wdm3d",
+        # Diesel passenger
+        "wdp1",
+        "wdp3",
+        "wdp4",
+        "wdp4b",
+        "wdp4d",
+        "wdp4e",
+        # Diesel shunting
+        "wds4",
+        "wds6",
+        # Heritage/meter gauge
+        "ydm4",
+        "yam1",
+        # ENHANCED v2.2.1: Multiple units (also treated as engine classes)
+        "emu",
+        "memu",
+        "dmu",
+        "mmu",
+        "demu",
+        # ENHANCED v2.2.1: Maintenance equipment
+        "plasser",
+        "maintenance",
+    })
+
+    # Coach classifications
+    COACH_TYPES = frozenset({
+        "1a",
+        "2a",
+        "3a",
+        "3e",
+        "sl",
+        "gs",
+        "cc",
+        "accc",
+        "ec",
+        "eog",
+        "pc",
+        "slr",
+        "ac",
+        "nonac",
+        "chair",
+        "executive",
+        "general",
+        "2s",
+        "diner",
+        "buffet",
+        "restaurant",
+        "luggage",
+    })
+
+    # ENHANCED v2.2.5: Freight wagon types based on freight_wag_files.csv analysis
+    FREIGHT_TYPES = frozenset({
+        # Open wagons (BOXN family) - ENHANCED
+        "boxn",
+        "boxnr",
+        "boxncr",
+        "boxng",
+        "boxnhl",
+        "boxnham",
+        "boxnm1",
+        "boxnm2",
+        "boxnlb",
+        "boxnhs",
+        "boxnha",
+        # Covered wagons - ENHANCED
+        "bcn",
+        "bcna",
+        "bcne",
+        "bcnh",
+        "bcnhl",
+        "bcnl",
+        "bccnr",
+        "bccw",
+        "bcbfg",
+        "bcfc",
+        "bvcm",
+        "covered",
+        "ventilated",
+        # ENHANCED v2.2.5: Additional covered wagon types from analysis
+        "bccn",
+        "bcnloa",
+        # Tank wagons - ENHANCED v2.2.2
+        "tank",
+        "tanker",
+        "btpn",
+        "btap",
+        "btcs",
+        "btpgln",
+        "btaln",
+        "btfln",
+        "btmn",
+        "btlr",
+        "btcdl",
+        "btk",
+        "btc",
+        # ENHANCED v2.2.5: Additional tank types from analysis
+        "bti",
+        # Flat/container wagons
+        "flat",
+        "flatcar",
+        "blc",
+        "blca",
+        "blcb",
+        "bcacm",
+        "bcacbm",
+        "bfns",
+        "bfr",
+        "bfki",
+        "bfkn",
+        "bfat",
+        "bft",
+        "nmg",
+        "nmgc",
+        "container",
+        "concor",
+        "intermodal",
+        # ENHANCED v2.2.5: Container wagon variants from analysis
+        "bca",
+        "bcb",
+        "con",
+        # Hopper wagons - ENHANCED v2.2.2
+        "bobr",
+        "bobrn",
+        "bobrnhs",
+        "boby",
+        "bobyn",
+        "gondola",
+        "hopper",
+        "stone",
+        "aggregate",
+        "ballast",
+        "coal",
+        "ore",
+        # Brake vans - ENHANCED v2.2.2
+        "brd",
+        "brn",
+        "brs",
+        "bru",
+        "bvzi",
+        "bvzc",
+        "brake",
+        # ENHANCED v2.2.5: Additional brake wagon types from analysis
+        "brna",
+        # Special wagons
+        "hpcv",
+        "hcpv",
+        "parcel",
+        "mail",
+        "low_loader",
+        "well_wagon",
+        "schnabel",
+        "heavy_haul",
+        "transformer",
+        "reactor",
+        # ENHANCED v2.2.5: Specialized freight from analysis
+        "cement",
+        "coil",
+        "slab",
+        "auto",
+        "timber",
+        "billet",
+        "pipe",
+        # ENHANCED v2.2.5: Milk transport wagons
+        "milktanker",
+        "vvn",
+        # ENHANCED v2.2.5: Manufacturer series from analysis
+        "bsam",
+        "asmi",
+        "apl",
+    })
+
+    # Carbody types
+    CARBODY_TYPES = frozenset({"lhb", "icf", "integral", "conventional", "modern"})
+
+    # Special train sets - ENHANCED v2.2.3
+    SPECIAL_SETS = frozenset({
+        "vandebharat",
+        "vande",
+        "vb",
+        "train18",
+        "humsafar",
+        "tejas",
+        "gatiman",
+        "rajdhani",
+        "shatabdi",
+        "janshatabdi",
+        "duronto",
+        "garibrath",
+        "antyodaya",
+        "deendayalu",
+        "anubhuti",
+        "utk",
+        "utkrisht",
+        "doubledecker",
+        "samparkkranti",
+        "yuva",
+    })
+
+    # ENHANCED v2.2.4: Traction classification including multiple units
+    ELECTRIC_CLASSES = frozenset({
+        "wap1",
+        "wap4",
+        "wap5",
+        "wap7",
+        "wag5",
+        "wag7",
+        "wag9",
+        "wag12",
+        "wam4",
+        "wcam2",
+        "wcam3",
+        "wcg2",
+        "wcm1",
+        "wcm2",
+        "wcm3",
+        "wcm4",
+        "wcm5",
+        # EMU/MEMU traction variants - ENHANCED
+        "emu",
+        "memu",
+        "ac_emu",
+        "dc_emu",
+        "mmu",
+    })
+
+    # ENHANCED v2.2.2: Multiple unit classifications
+    # Car roles shared by the electric multiple-unit families (EMU/MEMU/MMU)
+    _MU_CAR_ROLES = frozenset({
+        "dmc",
+        "dtc",
+        "mc",
+        "tc",
+        "dc",
+        "dt",
+        "dmc1",
+        "dmc2",
+        "dtc1",
+        "dtc2",
+        "motorcoach",
+        "trailercoach",
+        "drivingcar",
+        "drivingtrailer",
+    })
+    EMU_CLASSES = frozenset({
+        "emu",
+        "ac_emu",
+        "dc_emu",
+        "acemu",
+        "dcemu",
+    }) | _MU_CAR_ROLES
+    MEMU_CLASSES = frozenset({"memu"}) | _MU_CAR_ROLES
+    DMU_CLASSES = frozenset({
+        "demu",
+        "dmu",
+        "dpc",
+        "dtc",
+        "tc",
+        "dcc",
+        "dpc1",
+        "dpc2",
+        "dcc1",
+        "dcc2",
+        "motorcoach",
+        "trailercoach",
+        "drivingcar",
+        "drivingtrailer",
+    })
+    MMU_CLASSES = frozenset({"mmu"}) | _MU_CAR_ROLES
+
+    DIESEL_CLASSES = frozenset({
+        "wdg3",
+        "wdg3a",
+        "wdg4",
+        "wdg4d",
+        "wdg4g",
+        "wdm2",
+        "wdm3",
+        "wdm3a",
+        "wdm3d",
+        "wdp1",
+        "wdp3",
+        "wdp4",
+        "wdp4b",
+        "wdp4d",
+        "wdp4e",
+        "wds4",
+        "wds6",
+    })
+
+    # ENHANCED v2.2.5: Manufacturer/Series prefixes for freight detection
+    FREIGHT_MANUFACTURER_PREFIXES = frozenset({"bsam_", "asmi", "con_"})
+
+    # Comprehensive aliases system
+    # PERFORMANCE OPTIMIZATION: wrapped in MappingProxyType below - the table
+    # is read-only at runtime and accidental mutation would silently skew
+    # classification
+    ALIASES = {
+        # EMU/MEMU/DMU/MMU classes and car roles (expanded)
+        "memu": "memu",
+        "emu": "emu",
+        "mmu": "mmu",
+        "dmu": "dmu",
+        "demu": "demu",
+        "ac_emu": "ac_emu",
+        "dc_emu": "dc_emu",
+        "acemu": "ac_emu",
+        "dcemu": "dc_emu",
+        "dmc": "dmc",
+        "dtc": "dtc",
+        "mc": "mc",
+        "tc": "tc",
+        "dc": "dc",
+        "dt": "dt",
+        "dmc1": "dmc",
+        "dmc2": "dmc",
+        "dtc1": "dtc",
+        "dtc2": "dtc",
+        "motorcoach": "mc",
+        "trailercoach": "tc",
+        "drivingcar": "dc",
+        "drivingtrailer": "dt",
+        "dpc": "dpc",
+        "dcc": "dcc",
+        "dpc1": "dpc",
+        "dpc2": "dpc",
+        "dcc1": "dcc",
+        "dcc2": "dcc",
+        # AC Coach variations
+        "1ac": "1a",
+        "ac1": "1a",
+        "acfirst": "1a",
+        "ac_first": "1a",
+        "firstac": "1a",
+        "2ac": "2a",
+        "ac2": "2a",
+        "acsecond": "2a",
+        "ac_second": "2a",
+        "secondac": "2a",
+        "3ac": "3a",
+        "ac3": "3a",
+        "acthird": "3a",
+        "ac_third": "3a",
+        "thirdac": "3a",
+        # General classes
+        "gs": "gs",
+        "general": "gs",
+        "gencar": "gs",
+        "unreserved": "gs",
+        "second": "gs",
+        "secondclass": "gs",
+        "second_class": "gs",
+        "second-class": "gs",
+        # Sleeper variations
+        "sl": "sl",
+        "slp": "sl",
+        "sleeper": "sl",
+        "sleeping": "sl",
+        # Chair cars
+        "cc": "cc",
+        "chair": "cc",
+        "chaircar": "cc",
+        "accc": "accc",
+        "ac_chair": "accc",
+        "ac_cc": "accc",
+        # Special coaches
+        "pc": "pc",
+        "pantry": "pc",
+        "pantrycar": "pc",
+        "catering": "pc",
+        "eog": "eog",
+        "generator": "eog",
+        "power": "eog",
+        "powercar": "eog",
+        "slr": "slr",
+        "guard": "slr",
+        "luggage": "slr",
+        "caboose": "slr",
+        # Engine variations with hyphens and underscores
+        "wap-4": "wap4",
+        "wap_4": "wap4",
+        "wap-7": "wap7",
+        "wap_7": "wap7",
+        "wdg-3": "wdg3a",
+        "wdg_3": "wdg3a",
+        "wdg-4": "wdg4",
+        "wdg_4": "wdg4",
+        "wdm-2": "wdm2",
+        "wdm_2": "wdm2",
+        "wdm-3": "wdm3a",
+        "wdm_3": "wdm3a",
+        # Carbody aliases
+        "icf": "icf",
+        "integral": "icf",
+        "conventional": "icf",
+        "lhb": "lhb",
+        "linke_hofmann": "lhb",
+        "modern": "lhb",
+        # Freight aliases - ENHANCED v2.2.5
+        "boxn": "boxn",
+        "box": "boxn",
+        "bcn": "bcn",
+        "bcna": "bcna",
+        "tank": "tank",
+        "tanker": "tank",
+        "btpn": "btpn",
+        "flat": "flat",
+        "flatcar": "flat",
+        "container": "container",
+        "parcel": "parcel",
+        "hpcv": "hpcv",
+        "hcpv": "hcpv",
+        # New freight aliases from analysis
+        "bsam": "bsam",
+        "asmi": "asmi",
+        "con": "container",
+        "cement": "cement",
+        "coil": "coil",
+        "coal": "coal",
+        "milktanker": "milktanker",
+        "milk": "vvn",
+        # Special set aliases
+        "utk": "utk",
+        "utkrisht": "utk",
+        "utkal": "utk",
+        "vande": "vande",
+        "vandebharat": "vande",
+        "vb": "vande",
+        "train18": "vande",
+        "humsafar": "humsafar",
+        "tejas": "tejas",
+        "rajdhani": "rajdhani",
+        "shatabdi": "shatabdi",
+        "duronto": "duronto",
+    }
+    ALIASES = MappingProxyType(ALIASES)
+
+    # PERFORMANCE OPTIMIZATION: class -> traction map built once by
+    # _build_maps(); one dict lookup instead of two set probes per call
+    _CLASS_TRACTION: Dict[str, TractionType] = {}
+
+    @classmethod
+    def _build_maps(cls):
+        """Build derived lookup tables from the classification sets."""
+        traction = dict.fromkeys(cls.ELECTRIC_CLASSES, TractionType.ELECTRIC)
+        traction.update(dict.fromkeys(cls.DIESEL_CLASSES, TractionType.DIESEL))
+        cls._CLASS_TRACTION = traction
+
+    @classmethod
+    def get_traction_type(cls, engine_class: str) -> TractionType:
+        """Determine traction type from engine class."""
+        if not engine_class:
+            return TractionType.UNKNOWN
+        return cls._CLASS_TRACTION.get(engine_class.lower(), TractionType.UNKNOWN)
+
+    # PERFORMANCE OPTIMIZATION: the alias lookup is bound as a default arg at
+    # class-creation time, skipping the class-attribute walk on every call
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _normalize_alias_cached(token_lower: str, _get=ALIASES.get) -> str:
+        return _get(token_lower, token_lower)
+
+    @classmethod
+    def normalize_alias(cls, token: str) -> str:
+        """Normalize token using alias system with caching."""
+        return cls._normalize_alias_cached(token.lower())
+
+    @classmethod
+    def is_engine_class(cls, token: str) -> bool:
+        """Check if token is a valid engine class."""
+        return token.lower() in cls.ENGINE_CLASSES
+
+    @classmethod
+    def is_coach_type(cls, token: str) -> bool:
+        """Check if token is a valid coach type."""
+        return token.lower() in cls.COACH_TYPES
+
+    @classmethod
+    def is_freight_type(cls, token: str) -> bool:
+        """Check if token is a valid freight type."""
+        return token.lower() in cls.FREIGHT_TYPES
+
+
+IndianRailwaysClassifier._build_maps()
+
+
+# PERFORMANCE OPTIMIZATION: Single-pass alternation scanners for the classifier
+# literal sets. One compiled regex scan over the text replaces the per-asset
+# O(|classes| x |text|) "for cls in SET: if cls in text" substring loops.
+# Alternatives are sorted longest-first so BOBYN still wins over BOBY at the
+# same position.
+def _build_literal_scanner(literals: Set[str]) -> re.Pattern:
+    """Compile a longest-first alternation over a set of literal tokens."""
+    return get_compiled_regex(
+        "|".join(sorted(map(re.escape, literals), key=len, reverse=True))
+    )
+
+
+_ENGINE_CLASS_SCAN = _build_literal_scanner(IndianRailwaysClassifier.ENGINE_CLASSES)
+_FREIGHT_TYPE_SCAN = _build_literal_scanner(IndianRailwaysClassifier.FREIGHT_TYPES)
+
+# PERFORMANCE OPTIMIZATION: Aho-Corasick automaton over the freight literals
+# when pyahocorasick is installed - reports every (overlapping) occurrence in
+# one linear pass, so the longest hit (BOBYN over BOBY) falls out without the
+# regex alternation.
+_FREIGHT_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    _FREIGHT_AUTOMATON = ahocorasick.Automaton()
+    for _literal in IndianRailwaysClassifier.FREIGHT_TYPES:
+        _FREIGHT_AUTOMATON.add_word(_literal, _literal)
+    _FREIGHT_AUTOMATON.make_automaton()
+    del _literal
+
+
+def _longest_freight_hit(text: str) -> str:
+    """Longest freight-type literal occurring anywhere in text, or ''."""
+    if _FREIGHT_AUTOMATON is not None:
+        best = ""
+        for _, literal in _FREIGHT_AUTOMATON.iter(text):
+            if len(literal) > len(best):
+                best = literal
+        return best
+    hits = _FREIGHT_TYPE_SCAN.findall(text)
+    return max(hits, key=len) if hits else ""
+_CARBODY_SCAN = _build_literal_scanner(IndianRailwaysClassifier.CARBODY_TYPES)
+_SPECIAL_SET_SCAN = _build_literal_scanner(IndianRailwaysClassifier.SPECIAL_SETS)
+
+# PERFORMANCE OPTIMIZATION: Multiple-unit detection in one linear scan.
+# The four literals cover the full indicator set under substring semantics:
+# "memu"/"demu"/"acemu" all contain "emu", so one findall replaces the
+# chained any(u in all_text ...) walks while keeping identical results.
+_UNIT_INDICATORS = frozenset({"emu", "memu", "dmu", "demu", "mmu", "medha"})
+_UNIT_SCAN = get_compiled_regex(r"emu|mmu|dmu|medha")
+
+# PERFORMANCE OPTIMIZATION: Coach-type detection patterns for
+# AssetMetadataExtractor._extract_wagon_metadata, compiled once at import
+# instead of rebuilding the dict (and re-probing the regex cache) per wagon.
+# Order matters - most specific patterns first. all_text is lowercased before
+# matching, so the patterns are plain lowercase literals with no (?i) flag -
+# case-insensitive alternations disable re's literal-prefix fast scan.
+_COACH_PATTERN_SPECS: List[Tuple[str, str]] = [
+        # Specific AC classes (HIGHEST PRIORITY - check these first)
+        (r'(?<![A-Za-z0-9])1a(?![A-Za-z0-9])', '1A'),
+        (r'(?<![A-Za-z0-9])2a(?![A-Za-z0-9])', '2A'),
+        (r'(?<![A-Za-z0-9])3a(?![A-Za-z0-9])', '3A'),
+        # AC3 pattern for combined AC+class notation
+        (r'(?<![A-Za-z0-9])ac3(?![A-Za-z0-9])', '3A'),
+        (r'(?<![A-Za-z0-9])ac2(?![A-Za-z0-9])', '2A'),
+        (r'(?<![A-Za-z0-9])ac1(?![A-Za-z0-9])', '1A'),
+
+        # Vande Bharat patterns
+        (r'vbcc\d*(?![A-Za-z0-9])', 'CC'),
+        (r'vande[-_]?bharat[-_]?cc\d*(?![A-Za-z0-9])', 'CC'),
+        # Vande Bharat Executive Chair Car patterns
+        (r'vbexcc\d*(?![A-Za-z0-9])', 'EC'),
+        (r'vande[-_]?bharat[-_]?excc\d*(?![A-Za-z0-9])', 'EC'),
+        (r'executive[-_]?chair[-_]?car(?![A-Za-z0-9])', 'EC'),
+
+        # AC Chair Car patterns (HIGH PRIORITY) - ENHANCED v2.2.3
+        (r'chaircar[-_]?ac|ac[-_]?chaircar', 'ACCC'),
+        (r'chair[-_]?car[-_]?ac|ac[-_]?chair[-_]?car', 'ACCC'),
+        (r'ac[-_]?cc|cc[-_]?ac', 'ACCC'),
+
+        # AC Tier patterns (should not conflict with specific classes above)
+        (r"ac[-_]?3[-_]?tier|3[-_]?tier[-_]?ac", "3A"),
+        (r"ac[-_]?2[-_]?tier|2[-_]?tier[-_]?ac", "2A"),
+        (r"ac[-_]?1[-_]?tier|1[-_]?tier[-_]?ac", "1A"),
+
+        # Generic AC chair patterns (lower priority)
+        (r"ac[-_]?chair|chair[-_]?ac", "ACCC"),
+
+        # Service coaches
+        (r"pantry[-_]?car|pantry", "PC"),
+        (r"guard|luggage[-_]?van", "SLR"),
+        (r"generator|power[-_]?car", "EOG"),
+        (r"slr[-_]?", "SLR"),
+
+        # Additional coach types - ordered by specificity (most specific first)
+        (r"second[-_]?class[-_]?luggage", "SLR"),
+        (r"sleeper", "SL"),
+        (r"slp", "SL"),
+        (r"sl", "SL"),
+        (r"ac", "AC"),
+        (r"gs|general[-_]?second", "GS"),
+        (r"second[-_]?class", "GS"),
+        (r"second", "GS"),
+        (r"cc|chair[-_]?car", "CC"),
+        (r"fc|first[-_]?class", "FC"),
+        (r"sc", "SC"),
+]
+
+_COACH_PATTERNS: List[Tuple[re.Pattern, str]] = [
+    (get_compiled_regex(pattern), coach_type)
+    for pattern, coach_type in _COACH_PATTERN_SPECS
+]
+
+
+def _scoped_alternative(pattern: str) -> str:
+    """Wrap a pattern for use inside an alternation, scoping any (?i) prefix."""
+    if pattern.startswith("(?i)"):
+        return f"(?i:{pattern[4:]})"
+    return f"(?:{pattern})"
+
+
+# PERFORMANCE OPTIMIZATION: Union of every coach pattern, used as a guard in
+# _extract_wagon_metadata - most wagons (all freight stock) have no coach
+# keyword at all, and one engine pass rejects them instead of ~28 per-pattern
+# probes. The priority loop still decides the type when the guard fires, since
+# a lastgroup dispatch would flip priority order to leftmost-position order.
+_COACH_SCAN_ALL = get_compiled_regex(
+    "|".join(_scoped_alternative(pattern) for pattern, _ in _COACH_PATTERN_SPECS)
+)
+
+
+# PERFORMANCE OPTIMIZATION: token classification tables for the extraction
+# passes, built once at import instead of as per-call dict/set literals.
+# Literal keys are compiler-interned, so token probes hit the unicode
+# pointer-equality fast path for tokens interned at record construction.
+_ZONES = {
+    "sr": "SR", "nr": "NR", "er": "ER", "wr": "WR", "cr": "CR",
+    "scr": "SCR", "ecr": "ECR", "ncr": "NCR", "swr": "SWR", "nfr": "NFR",
+    "nwr": "NWR", "ser": "SER", "secr": "SECR", "wcr": "WCR",
+    "ecor": "ECOR", "ner": "NER",
+}
+_DEPOTS = {
+    "mtp": "MTP", "bza": "BZA", "mas": "MAS", "ndls": "NDLS", "lko": "LKO",
+    "mdg": "MDG", "kol": "KOL", "mum": "MUM", "pune": "PUNE", "gzb": "GZB",
+    "ald": "ALD", "bbs": "BBS", "ghy": "GHY", "vskp": "VSKP", "kyn": "KYN",
+    "trd": "TRD",
+}
+_GAUGE_INDICATORS = {
+    "bg": "BG", "mg": "MG", "ng": "NG",
+    "broad": "BG", "meter": "MG", "narrow": "NG",
+}
+_MANUFACTURERS = {
+    "clw": "CLW", "dlw": "DLW", "icf": "ICF", "rcf": "RCF", "beml": "BEML",
+    "alstom": "Alstom", "siemens": "Siemens", "medha": "Medha", "bhel": "BHEL",
+}
+_CARBODY_INDICATORS = frozenset({"lhb", "icf", "integral", "conventional"})
+_SET_INDICATORS = frozenset({
+    "utk", "utkrisht", "humsafar", "tejas", "vande", "vandebharat",
+    "rajdhani", "shatabdi", "duronto", "garibrath",
+})
+
+
+@dataclass(slots=True)
+class _ExtractContext:
+    """Precomputed per-asset search text shared by the extraction passes.
+
+    PERFORMANCE OPTIMIZATION: the normalized token set and combined search
+    string are built once in extract_metadata instead of being recomputed by
+    each _extract_* method.
+    """
+
+    tokens: Set[str]
+    all_text: str
+
+
+class AssetMetadataExtractor:
+    """Extracts metadata from asset names and folders."""
+
+    def __init__(self, classifier: IndianRailwaysClassifier):
+        self.classifier = classifier
+        self.ignore_tokens = {
+            "sound",
+            "horn",
+            "ai-horn",
+            "cab",
+            "cabview",
+            "cvf",
+            "sms",
+            "sfx",
+            "audio",
+            "wav",
+            "mp3",
+            "readme",
+            "manual",
+            "docs",
+            "preview",
+            "thumbnail",
+            "texture",
+            "textures",
+            "common",
+        }
+
+    def extract_metadata(
+        self, kind: AssetKind, name: str, folder: str = ""
+    ) -> AssetMetadata:
+        """Extract comprehensive metadata from asset name and folder."""
+        metadata = AssetMetadata(kind=kind, name=name, folder=folder)
+
+        # Normalize and extract basic tokens
+        combined_text = f"{folder} {name}".lower()
+        normalized = _NORMALIZE_PATTERN.sub(" ", combined_text).strip()
+        tokens = set(normalized.split()) - self.ignore_tokens
+
+        # Apply aliases
+        normalized_tokens = {self.classifier.normalize_alias(token) for token in tokens}
+        metadata.tokens = normalized_tokens
+
+        # PERFORMANCE OPTIMIZATION: normalize the search text once and thread
+        # it through the extraction passes instead of each pass rebuilding the
+        # same folder_norm/name_norm/all_text strings
+        folder_norm = folder.lower().replace("_", " ")
+        name_norm = name.lower().replace("_", " ")
+        ctx = _ExtractContext(
+            tokens=normalized_tokens,
+            all_text=f"{folder_norm} {name_norm} {combined_text}",
+        )
+
+        # Extract specific classifications
+        self._extract_engine_metadata(metadata, ctx)
+        self._extract_wagon_metadata(metadata, ctx)
+        self._extract_token_metadata(metadata, ctx)
+
+        # Extract variant number
+        variant_match = _VARIANT_TAIL.search(name)
+        if variant_match:
+            try:
+                metadata.variant = int(variant_match.group(1))
+            except ValueError:
+                pass
+
+        return metadata
+
+    def _extract_engine_metadata(self, metadata: AssetMetadata, ctx: _ExtractContext):
+        """Extract engine-specific metadata."""
+        if metadata.kind != AssetKind.ENGINE:
+            return
+
+        # Search both tokens and folder/name for engine class
+        tokens = ctx.tokens
+        all_text = ctx.all_text
+        for token in tokens:
+            if self.classifier.is_engine_class(token):
+                metadata.engine_class = _intern_upper(token)
+                metadata.traction = self.classifier.get_traction_type(token)
+                break
+        if not metadata.engine_class:
+            class_match = _ENGINE_CLASS_SCAN.search(all_text)
+            if class_match:
+                ec = class_match.group(0)
+                metadata.engine_class = _intern_upper(ec)
+                metadata.traction = self.classifier.get_traction_type(ec)
+
+        # Extract engine series (class + number)
+        if metadata.engine_class:
+            series_match = _engine_series_pattern(metadata.engine_class).search(all_text)
+            if series_match:
+                metadata.engine_series = (
+                    f"{metadata.engine_class}{series_match.group(1).upper()}"
+                )
+
+        # Detect multiple units
+        # PERFORMANCE OPTIMIZATION: single _UNIT_SCAN pass over all_text
+        # instead of repeated substring walks per indicator
+        unit_hits = set(_UNIT_SCAN.findall(all_text))
+        if unit_hits or tokens & _UNIT_INDICATORS:
+            metadata.is_unit = True
+            if "emu" in unit_hits or "mmu" in unit_hits:
+                metadata.traction = TractionType.ELECTRIC
+            elif "dmu" in unit_hits:
+                metadata.traction = TractionType.DIESEL
+
+        # Engine family detection
+        family_indicators = {
+            "alco": "ALCO",
+            "emd": "EMD",
+            "ge": "GE",
+            "siemens": "Siemens",
+            "alstom": "Alstom",
+        }
+        for token, family in family_indicators.items():
+            if token in tokens or token in all_text:
+                metadata.engine_family = family
+                break
+
+    def _extract_wagon_metadata(self, metadata: AssetMetadata, ctx: _ExtractContext):
+        """Extract wagon-specific metadata."""
+        if metadata.kind != AssetKind.WAGON:
+            return
+
+        # Coach type detection with priority
+        tokens = ctx.tokens
+        all_text = ctx.all_text
+        coach_priority = [
+            "pc",
+            "slr",
+            "eog",
+            "1a",
+            "2a",
+            "3a",
+            "3e",
+            "accc",
+            "cc",
+            "sl",
+            "gs",
+        ]
+        for coach_type in coach_priority:
+            if coach_type in tokens or coach_type in all_text:
+                metadata.coach_type = _intern_upper(coach_type)
+                break
+
+        # Enhanced pattern matching for coach types
+        # PERFORMANCE OPTIMIZATION: shared precompiled _COACH_PATTERNS instead
+        # of rebuilding the pattern dict per wagon
+        if not metadata.coach_type and _COACH_SCAN_ALL.search(all_text):
+            for pattern, coach_type in _COACH_PATTERNS:
+                if pattern.search(all_text):
+                    metadata.coach_type = _intern_upper(coach_type)
+                    break
+
+        # Freight type detection - FIXED: prioritize longer matches to handle BOBYN vs BOBY
+        # detect freight type with deterministic priority
+        priority = ["hcpv", "hpcv", "parcel", "mail"]
+        for key in priority:
+            if key in all_text:
+                metadata.freight_type = _intern_upper(key)
+                break
+
+        # FIXED: fallback with longest-match priority to handle BOBYN vs BOBY correctly
+        if not metadata.freight_type:
+            # Longest hit anywhere in the text, so BOBYN is still preferred
+            # over BOBY (automaton pass when available, alternation otherwise)
+            freight_hit = _longest_freight_hit(all_text)
+            if freight_hit:
+                metadata.freight_type = _intern_upper(freight_hit)
+
+    def _extract_token_metadata(self, metadata: AssetMetadata, ctx: _ExtractContext):
+        """Extract geographic, technical, carbody and special-set metadata.
+
+        PERFORMANCE OPTIMIZATION: one fused pass over the token set instead
+        of separate geographic/technical/carbody/set loops. Each table probe
+        is independent per token (a token like "icf" is both a carbody and a
+        manufacturer), matching what the separate loops produced.
+        """
+        tokens = ctx.tokens
+        is_wagon = metadata.kind == AssetKind.WAGON
+        for token in tokens:
+            # Zone codes, then major depot codes
+            zone = _ZONES.get(token)
+            if zone:
+                metadata.region = zone
+            else:
+                depot = _DEPOTS.get(token)
+                if depot:
+                    metadata.depot = depot
+
+            # Gauge detection, then manufacturer detection
+            gauge = _GAUGE_INDICATORS.get(token)
+            if gauge:
+                metadata.tech_spec = gauge
+            else:
+                manufacturer = _MANUFACTURERS.get(token)
+                if manufacturer:
+                    metadata.manufacturer = manufacturer
+
+            if is_wagon:
+                # Carbody / special set detection (first matching token wins)
+                if not metadata.carbody and token in _CARBODY_INDICATORS:
+                    metadata.carbody = token.upper()
+                if not metadata.set_type and token in _SET_INDICATORS:
+                    metadata.set_type = token.upper()
+
+        if is_wagon:
+            # Substring fallbacks only when no token matched
+            if not metadata.carbody:
+                carbody_match = _CARBODY_SCAN.search(ctx.all_text)
+                if carbody_match:
+                    metadata.carbody = carbody_match.group(0).upper()
+            if not metadata.set_type:
+                set_match = _SPECIAL_SET_SCAN.search(ctx.all_text)
+                if set_match:
+                    metadata.set_type = set_match.group(0).upper()
+
+
+# PERFORMANCE OPTIMIZATION: Batched multi-process ingestion. Submitting one
+# task per asset drowns in IPC overhead, so workers receive batches of
+# (kind, name, folder, path) tuples and return finished AssetRecords. The
+# extractor is a lazily-built per-process singleton so each worker constructs
+# the classifier exactly once.
+_INGEST_BATCH_SIZE = 2000
+
+_INGEST_EXTRACTOR: Optional["AssetMetadataExtractor"] = None
+
+
+def _get_ingest_extractor() -> "AssetMetadataExtractor":
+    global _INGEST_EXTRACTOR
+    if _INGEST_EXTRACTOR is None:
+        _INGEST_EXTRACTOR = AssetMetadataExtractor(IndianRailwaysClassifier())
+    return _INGEST_EXTRACTOR
+
+
+def _ingest_batch(
+    items: List[Tuple[AssetKind, str, str, str]]
+) -> List["AssetRecord"]:
+    """Build AssetRecords for a batch of (kind, name, folder, path) entries."""
+    extractor = _get_ingest_extractor()
+    records = []
+    for kind, name, folder, path_str in items:
+        try:
+            metadata = extractor.extract_metadata(kind, name, folder)
+            records.append(
+                AssetRecord(
+                    kind=kind,
+                    name=name,
+                    folder=folder,
+                    path=Path(path_str),
+                    metadata=metadata,
+                )
+            )
+        except Exception as e:
+            logging.debug(f"Error processing {kind.value.lower()} {path_str}: {e}")
+    return records
+
+
+def _chunked(items: List, size: int):
+    """Yield successive size-sized slices of a list."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class AssetIndex:
+    """Comprehensive asset indexing system with multiple lookup methods."""
+
+    # PERFORMANCE OPTIMIZATION: fixed-offset attribute access on the query
+    # path (get_candidates touches several maps per lookup) and no per-index
+    # __dict__, matching the slots=True record dataclasses
+    __slots__ = (
+        "assets", "by_name", "by_norm", "by_folder", "by_kind",
+        "by_engine_class", "by_coach_type", "by_freight_type", "by_traction",
+        "by_ir_composite", "key_token_index", "lhb_assets", "icf_assets",
+        "emu_assets", "ai_horn_wagons", "_lock", "_frozen",
+    )
+
+    def __init__(self):
+        # PERFORMANCE OPTIMIZATION: plain dicts + setdefault in add_asset
+        # instead of defaultdict - avoids the __missing__ hop per update in
+        # the per-record ingestion loop and keeps lookups from creating
+        # empty entries
+        self.assets: List[AssetRecord] = []
+        self.by_name: Dict[str, List[AssetRecord]] = {}
+        # PERFORMANCE OPTIMIZATION: reverse index on the normalized name so
+        # exact-normalized lookups are O(1) instead of scanning the pool
+        self.by_norm: Dict[str, List[AssetRecord]] = {}
+        self.by_folder: Dict[str, List[AssetRecord]] = {}
+        self.by_kind: Dict[AssetKind, List[AssetRecord]] = {}
+        self.by_engine_class: Dict[str, List[AssetRecord]] = {}
+        self.by_coach_type: Dict[str, List[AssetRecord]] = {}
+        self.by_freight_type: Dict[str, List[AssetRecord]] = {}
+        self.by_traction: Dict[TractionType, List[AssetRecord]] = {}
+        self.by_ir_composite: Dict[str, List[AssetRecord]] = {}
+        self.key_token_index: Dict[str, List[AssetRecord]] = {}
+
+        # Performance optimization indices
+        self.lhb_assets: Dict[str, AssetRecord] = {}
+        self.icf_assets: Dict[str, AssetRecord] = {}
+        self.emu_assets: Dict[str, AssetRecord] = {}
+        # PERFORMANCE OPTIMIZATION: wagons with both "ai" and "horn" in the
+        # name, collected at ingestion - the AI-horn special match consumed
+        # an O(total assets) scan per AI-build consist entry otherwise
+        self.ai_horn_wagons: List[AssetRecord] = []
+
+        self._lock = threading.RLock()
+        self._frozen = False
+
+    # Names of the lookup maps wrapped read-only by freeze()
+    _MAP_ATTRS = (
+        "by_name", "by_norm", "by_folder", "by_kind", "by_engine_class",
+        "by_coach_type", "by_freight_type", "by_traction", "by_ir_composite",
+        "key_token_index", "lhb_assets", "icf_assets", "emu_assets",
+    )
+
+    def freeze(self):
+        """Switch the index from the build phase to the read-only query phase.
+
+        PERFORMANCE OPTIMIZATION: the index is populated once during the
+        trainset scan and only read afterwards, so the query path takes no
+        lock at all. Wrapping the lookup maps in MappingProxyType makes the
+        lock-free reads safe by construction - a stray post-build add_asset
+        fails fast instead of racing readers.
+        """
+        with self._lock:
+            if self._frozen:
+                return
+            for attr in self._MAP_ATTRS:
+                setattr(self, attr, MappingProxyType(getattr(self, attr)))
+            self._frozen = True
+
+    def add_asset(self, asset: AssetRecord):
+        """Add asset to all relevant indices."""
+        if self._frozen:
+            raise RuntimeError("AssetIndex is frozen; no further inserts allowed")
+        with self._lock:
+            self._add_asset_unlocked(asset)
+
+    def add_assets(self, assets: Iterable[AssetRecord]) -> int:
+        """Add a batch of assets under a single lock acquisition.
+
+        PERFORMANCE OPTIMIZATION: bulk ingestion pays the RLock
+        acquire/release cost once per batch instead of once per record,
+        which keeps concurrent scanners from serializing on per-asset
+        lock traffic.
+        """
+        if self._frozen:
+            raise RuntimeError("AssetIndex is frozen; no further inserts allowed")
+        count = 0
+        with self._lock:
+            for asset in assets:
+                self._add_asset_unlocked(asset)
+                count += 1
+        return count
+
+    def _add_asset_unlocked(self, asset: AssetRecord):
+        self.assets.append(asset)
+
+        # Basic indices (cached lowercase fields; setdefault avoids the
+        # defaultdict __missing__ hop). PERFORMANCE OPTIMIZATION: string
+        # keys are interned so repeated lookups against these maps take the
+        # pointer-equality dict fast path
+        intern = sys.intern
+        self.by_name.setdefault(intern(asset.name_lower), []).append(asset)
+        # name_equal() compares stripped lowercase names; register the
+        # stripped key too so index lookups stay equivalent to the old
+        # linear scan even for names with stray surrounding whitespace
+        stripped = asset.name_lower.strip()
+        if stripped != asset.name_lower:
+            self.by_name.setdefault(intern(stripped), []).append(asset)
+        self.by_norm.setdefault(intern(asset.cached_normalized), []).append(asset)
+        self.by_folder.setdefault(intern(asset.folder_lower), []).append(asset)
+        self.by_kind.setdefault(asset.kind, []).append(asset)
+        if (
+            asset.kind == AssetKind.WAGON
+            and "ai" in asset.name_lower
+            and "horn" in asset.name_lower
+        ):
+            self.ai_horn_wagons.append(asset)
+
+        # Metadata-based indices
+        meta = asset.metadata
+        if meta.engine_class:
+            self.by_engine_class.setdefault(intern(meta.engine_class.lower()), []).append(asset)
+        if meta.coach_type:
+            self.by_coach_type.setdefault(intern(meta.coach_type.lower()), []).append(asset)
+        if meta.freight_type:
+            self.by_freight_type.setdefault(intern(meta.freight_type.lower()), []).append(asset)
+        if meta.traction != TractionType.UNKNOWN:
+            self.by_traction.setdefault(meta.traction, []).append(asset)
+
+        # IR composite index
+        if asset.ir_composite:
+            self.by_ir_composite.setdefault(intern(asset.ir_composite), []).append(asset)
+
+        # Token index (bind the method once for the inner loop)
+        token_setdefault = self.key_token_index.setdefault
+        for token in asset.key_tokens:
+            token_setdefault(token, []).append(asset)
+
+        # Performance indices
+        if meta.carbody == "LHB":
+            self.lhb_assets[asset.name] = asset
+        elif meta.carbody == "ICF":
+            self.icf_assets[asset.name] = asset
+
+        if meta.is_unit and meta.traction == TractionType.ELECTRIC:
+            self.emu_assets[asset.name] = asset
+
+    # PERFORMANCE OPTIMIZATION: per-strategy candidate methods instead of a
+    # string if/elif chain re-evaluated on every call. Accumulation still
+    # fuses the kind filter and dedups via an insertion-ordered dict so each
+    # record is hashed at most once; the single-bucket paths skip dedup
+    # entirely (an asset appears once per index bucket).
+
+    def get_candidates_exact(self, target: AssetMetadata) -> List[AssetRecord]:
+        """Exact name matches, then exact normalized-name matches."""
+        kind = target.kind
+        name_pool = self.by_name.get(target.name_lower, ())
+        if not target.normalized:
+            return [c for c in name_pool if c.kind == kind]
+        candidates: Dict[AssetRecord, None] = {
+            c: None for c in name_pool if c.kind == kind
+        }
+        for c in self.by_norm.get(target.normalized, ()):
+            if c.kind == kind:
+                candidates[c] = None
+        return list(candidates)
+
+    def get_candidates_kind(self, target: AssetMetadata) -> List[AssetRecord]:
+        """All assets of the same kind."""
+        return list(self.by_kind.get(target.kind, ()))
+
+    def _collect_targeted(
+        self, target: AssetMetadata, candidates: Dict[AssetRecord, None]
+    ):
+        """Accumulate metadata-targeted buckets into candidates."""
+        kind = target.kind
+
+        def _add(records):
+            for c in records:
+                if c.kind == kind:
+                    candidates[c] = None
+
+        if target.engine_class:
+            _add(self.by_engine_class.get(_intern_lower(target.engine_class), ()))
+        if target.coach_type:
+            _add(self.by_coach_type.get(_intern_lower(target.coach_type), ()))
+        if target.freight_type:
+            _add(self.by_freight_type.get(_intern_lower(target.freight_type), ()))
+
+    def get_candidates_targeted(self, target: AssetMetadata) -> List[AssetRecord]:
+        """Targeted search based on metadata."""
+        candidates: Dict[AssetRecord, None] = {}
+        self._collect_targeted(target, candidates)
+        if target.traction != TractionType.UNKNOWN:
+            kind = target.kind
+            for c in self.by_traction.get(target.traction, ()):
+                if c.kind == kind:
+                    candidates[c] = None
+        return list(candidates)
+
+    def get_candidates_comprehensive(self, target: AssetMetadata) -> List[AssetRecord]:
+        """Same kind plus metadata-targeted results."""
+        candidates: Dict[AssetRecord, None] = dict.fromkeys(
+            self.by_kind.get(target.kind, ())
+        )
+        self._collect_targeted(target, candidates)
+        return list(candidates)
+
+    _CANDIDATE_DISPATCH = {
+        "exact": get_candidates_exact,
+        "kind": get_candidates_kind,
+        "targeted": get_candidates_targeted,
+    }
+
+    def get_candidates(
+        self, target: AssetMetadata, strategy: str = "comprehensive"
+    ) -> List[AssetRecord]:
+        """Get candidate assets for matching."""
+        method = self._CANDIDATE_DISPATCH.get(strategy)
+        if method is None:  # comprehensive (and any unknown strategy, as before)
+            return self.get_candidates_comprehensive(target)
+        return method(self, target)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get comprehensive index statistics."""
+        return {
+            "total_assets": len(self.assets),
+            "engines": len(self.by_kind.get(AssetKind.ENGINE, [])),
+            "wagons": len(self.by_kind.get(AssetKind.WAGON, [])),
+            "folders": len(self.by_folder),
+            "engine_classes": len(self.by_engine_class),
+            "coach_types": len(self.by_coach_type),
+            "freight_types": len(self.by_freight_type),
+            "ir_composites": len(self.by_ir_composite),
+            "lhb_assets": len(self.lhb_assets),
+            "icf_assets": len(self.icf_assets),
+            "emu_assets": len(self.emu_assets),
+        }
+
+    def __getstate__(self):
+        """Support for pickling - ship only the flat asset list.
+
+        PERFORMANCE OPTIMIZATION: every asset is referenced from several
+        by_* buckets, so pickling the maps shipped thousands of bucket
+        lists and string keys that are all derivable from the records.
+        Workers rebuild the indices locally from the asset list, which
+        also drops the unpicklable lock and MappingProxyType views for
+        free.
+        """
+        return {"assets": self.assets, "frozen": self._frozen}
+
+    def __setstate__(self, state):
+        """Support for unpickling - rebuild all indices from the assets."""
+        self.__init__()
+        self.add_assets(state["assets"])
+        if state.get("frozen"):
+            self.freeze()
+
+
+# ENHANCED v2.2.5: Policy implementation helper functions with freight analysis improvements
+# PERFORMANCE OPTIMIZATION: Staged role-indicator alternations for
+# detect_role_from_name, compiled once at module scope. Each stage keeps the
+# original check order (maintenance, Vande Bharat engine cars, Vande Bharat
+# coaches, engine indicators, wagon indicators) so priority is unchanged;
+# within a stage every literal maps to the same role, so one scan per stage
+# replaces the per-indicator substring probes and per-pattern searches.
+_ROLE_MAINT_SCAN = get_compiled_regex(
+    r"plasser|tamper|ballast_cleaner|rail_grinder|maintenance|track_machine"
+    r"|crane|breakdown"
+)
+_ROLE_VB_ENGINE_SCAN = get_compiled_regex(
+    r"vbpowercar|vb_powercar|powercar|power_car|vbdmc|vb_dmc|vbdc|vb_dc"
+    r"|drivingcar|driving_car"
+)
+_ROLE_VB_WAGON_SCAN = get_compiled_regex(
+    r"vbcc|vb_cc|vbac|vb_ac|vbcoach|vb_coach"
+)
+_ROLE_ENGINE_SCAN = get_compiled_regex(
+    r"\b(?:wap|wag|wdm|wdg|wdp|wds|wam|wcam|wcg|wcm)\d*\b"
+    r"|\b(?:emu|memu|dmu|mmu|demu)\b"
+    r"|\b(?:locomotive|engine|loco)\b"
+)
+_ROLE_WAGON_SCAN = get_compiled_regex(
+    r"\b(?:coach|wagon|car)\b"
+    r"|\b(?:boxn|bcn|tank|flat|container)\b"
+    r"|\b(?:1a|2a|3a|sl|gs|cc|accc|eog|pc|slr)\b"
+)
+
+
+# PERFORMANCE OPTIMIZATION: pure function of its arguments, so repeat
+# classifications of the same asset name (index build plus every matching
+# pass) are one cache hit instead of a five-stage regex walk
+@lru_cache(maxsize=65536)
+def detect_role_from_name(name: str) -> str:
+    """Detect role (Engine/Wagon) from name patterns - ENHANCED v2.2.5 WITH VANDE BHARAT DETECTION."""
+    name_lower = name.lower()
+
+    # CRITICAL: Maintenance equipment detection FIRST
+    # (maintenance equipment is treated as engine for consist purposes)
+    if _ROLE_MAINT_SCAN.search(name_lower):
+        return "Engine"
+
+    # ENHANCED v2.2.5: Vande Bharat detection (CRITICAL FIX)
+    # Power/driver cars are engines, coach cars are wagons
+    if _ROLE_VB_ENGINE_SCAN.search(name_lower):
+        return "Engine"
+    if _ROLE_VB_WAGON_SCAN.search(name_lower):
+        return "Wagon"
+
+    # Engine indicators
+    if _ROLE_ENGINE_SCAN.search(name_lower):
+        return "Engine"
+
+    # Wagon indicators
+    if _ROLE_WAGON_SCAN.search(name_lower):
+        return "Wagon"
+
+    return ""
+
+
+def classify_names_bulk(names: List[str]) -> Tuple[List[str], List[str]]:
+    """Classify a batch of asset names at once, returning (roles, families).
+
+    PERFORMANCE OPTIMIZATION: with pyarrow installed, the five role stages
+    run as vectorized regex kernels over the whole name column and the
+    per-name work reduces to combining boolean masks in stage-priority
+    order. Without pyarrow (and for small batches) the memoized per-name
+    detectors are used. Families always go through
+    detect_family_from_name - the token/prefix ranking does not map onto a
+    substring kernel.
+    """
+    if PYARROW_AVAILABLE and len(names) >= 256:
+        arr = pc.utf8_lower(pa.array(names, type=pa.string()))
+
+        def _mask(scan: re.Pattern) -> List[bool]:
+            return pc.match_substring_regex(arr, scan.pattern).to_pylist()
+
+        maint = _mask(_ROLE_MAINT_SCAN)
+        vb_eng = _mask(_ROLE_VB_ENGINE_SCAN)
+        vb_wag = _mask(_ROLE_VB_WAGON_SCAN)
+        eng = _mask(_ROLE_ENGINE_SCAN)
+        wag = _mask(_ROLE_WAGON_SCAN)
+        roles = []
+        for i in range(len(names)):
+            # Same stage priority as detect_role_from_name
+            if maint[i] or vb_eng[i]:
+                roles.append("Engine")
+            elif vb_wag[i]:
+                roles.append("Wagon")
+            elif eng[i]:
+                roles.append("Engine")
+            elif wag[i]:
+                roles.append("Wagon")
+            else:
+                roles.append("")
+    else:
+        roles = [detect_role_from_name(name) for name in names]
+
+    families = [
+        detect_family_from_name(name, role or "Engine")
+        for name, role in zip(names, roles)
+    ]
+    return roles, families
+
+
+# PERFORMANCE OPTIMIZATION: Compatibility tables for
+# enhance_wagon_matching_with_compatibility, built once at module scope as
+# frozensets - the function used to re-allocate dozens of small lists per
+# call and do O(n) list membership inside the pool loop.
+# Manufacturer prefix classes: be more permissive with base types
+_MFR_COMPAT: Dict[str, frozenset] = {
+    "BSAM": frozenset({"BOXN", "BOBYN", "BCNA", "TANK", "FLAT", "FREIGHT"}),
+    "ASMI": frozenset({"BCA", "BCB", "BCN", "BTP", "BLC", "CONTAINER"}),
+    "CON": frozenset({"CONTAINER", "FLAT", "BLC", "CONCOR"}),
+}
+
+# STRICT: Incompatible wagon types (these should NEVER match each other)
+_INCOMPAT_GROUPS: Dict[str, frozenset] = {
+    # Specialized wagons are incompatible with everything except themselves
+    "COIL": frozenset({"BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"}),
+    "SLAB": frozenset({"BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"}),
+    "AUTO": frozenset({"BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"}),
+    "CEMENT": frozenset({"BCNA", "BOXN", "TANK", "FLAT", "BLC", "CONTAINER", "FREIGHT"}),
+    # BCNA (covered) / BOXN (open) incompatible with specialized types
+    "BCNA": frozenset({"COIL", "SLAB", "AUTO", "CEMENT", "TIPPLER"}),
+    "BOXN": frozenset({"COIL", "SLAB", "AUTO", "CEMENT", "TIPPLER"}),
+    # TANK wagons incompatible with specialized types
+    "TANK": frozenset({"COIL", "SLAB", "AUTO", "CEMENT"}),
+}
+_NO_INCOMPAT: frozenset = frozenset()
+
+# Wagon compatibility groups (what CAN match) - ENHANCED v2.2.5
+_WAGON_COMPAT: Dict[str, frozenset] = {
+    # Specialized wagons (ONLY match themselves)
+    "COIL": frozenset({"COIL"}),
+    "SLAB": frozenset({"SLAB"}),
+    "AUTO": frozenset({"AUTO"}),
+    "CEMENT": frozenset({"CEMENT"}),
+    "TIPPLER": frozenset({"TIPPLER"}),
+    # Container wagons group - ENHANCED
+    "CONTAINER": frozenset({"CONTAINER", "FLAT", "BLC", "BLCA", "BLCB", "CONCOR", "CON"}),
+    "CON": frozenset({"CON", "CONTAINER", "FLAT", "BLC", "CONCOR"}),
+    # Covered wagons group (BCNA family only) - ENHANCED
+    "BCNA": frozenset({"BCNA", "BCNE", "BCNH", "BCNL", "BCN", "BCCN"}),
+    "BCNE": frozenset({"BCNA", "BCNE", "BCNH", "BCNL", "BCN", "BCCN"}),
+    "BCN": frozenset({"BCNA", "BCNE", "BCNH", "BCNL", "BCN", "BCCN"}),
+    "BCCN": frozenset({"BCCN", "BCNA", "BCN", "BCBFG", "BCFC"}),
+    # Open wagons group (BOXN family only)
+    "BOXN": frozenset({"BOXN", "BOXNR", "BOXNG", "BOXNHL", "BOXNM1", "BOXNM2", "BOSTH"}),
+    "BOXNR": frozenset({"BOXN", "BOXNR", "BOXNG", "BOXNHL", "BOXNM1", "BOXNM2", "BOSTH"}),
+    "BOSTH": frozenset({"BOXN", "BOXNR", "BOXNG", "BOXNHL", "BOXNM1", "BOXNM2", "BOSTH"}),
+    # Tank wagons group - ENHANCED v2.2.5
+    "BTPN": frozenset({"BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"}),
+    "BTFLN": frozenset({"BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"}),
+    "TANK": frozenset({"BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"}),
+    "BTI": frozenset({"BTPN", "BTAP", "BTCS", "BTFLN", "TANK", "BTI"}),
+    "MILKTANKER": frozenset({"MILKTANKER", "VVN", "TANK"}),
+    # Container/flat wagons group (extended) - ENHANCED
+    "FLAT": frozenset({"FLAT", "BLC", "BLCA", "CONTAINER", "CONCOR", "BCA", "BCB"}),
+    "BLC": frozenset({"FLAT", "BLC", "BLCA", "CONTAINER", "CONCOR", "BCA", "BCB"}),
+    "BCA": frozenset({"BCA", "BCB", "BLC", "CONTAINER", "FLAT"}),
+    "BCB": frozenset({"BCA", "BCB", "BLC", "CONTAINER", "FLAT"}),
+    "CONCOR": frozenset({"FLAT", "BLC", "BLCA", "CONTAINER", "CONCOR"}),
+    # Parcel/mail wagons - STRICT: HCPV should prefer exact matches
+    "HPCV": frozenset({"HPCV", "HCPV"}),  # Only exact parcel van types
+    "HCPV": frozenset({"HPCV", "HCPV"}),  # Only exact parcel van types, exclude generic PARCEL
+    "PARCEL": frozenset({"HPCV", "HCPV", "PARCEL"}),  # PARCEL can accept all parcel types
+    # Brake vans - ENHANCED v2.2.5 - BOBYN is freight wagon, not crew vehicle
+    "BRD": frozenset({"BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"}),
+    "BRN": frozenset({"BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"}),
+    "BRNA": frozenset({"BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"}),
+    "BRW": frozenset({"BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"}),
+    "BRAKE": frozenset({"BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"}),
+    "BVZI": frozenset({"BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"}),
+    "CABOOSE": frozenset({"BRD", "BRN", "BRNA", "BRW", "BRAKE", "BVZI", "CABOOSE"}),
+    # Keep BOBYN strictly in freight group (open wagons)
+    "BOBYN": frozenset({"BOBYN", "BOXN", "BOY", "BOST"}),  # open freight family
+}
+
+
+# PERFORMANCE OPTIMIZATION: name-based fallback predicates for the
+# compatibility filter, compiled once as alternations so each check is a
+# single C-level scan instead of several Python `in` probes over list
+# literals rebuilt per asset.
+_COMPAT_CONTAINER_RE = get_compiled_regex(r"con_|container|flat|blc")
+_COMPAT_SPECIALIZED = ("coil", "slab", "auto", "cement", "tippler")
+# For each specialized class, a scan for the *other* specialized terms
+_COMPAT_SPECIALIZED_OTHERS = {
+    cls.upper(): get_compiled_regex("|".join(t for t in _COMPAT_SPECIALIZED if t != cls))
+    for cls in _COMPAT_SPECIALIZED
+}
+_COMPAT_BCNA_REJECT_RE = get_compiled_regex(r"coil|slab|auto|cement|con_")
+_COMPAT_BCNA_ACCEPT_RE = get_compiled_regex(r"bcna|bcne|bcnh|covered")
+_COMPAT_BOXN_REJECT_RE = get_compiled_regex(r"coil|slab|auto|cement|covered|bcna|con_")
+_COMPAT_BOXN_ACCEPT_RE = get_compiled_regex(r"boxn|open")
+_COMPAT_CON_GUARD_RE = get_compiled_regex(r"con_|container")
+_COMPAT_SPECIALIZED_GUARD_RE = get_compiled_regex(r"coil|slab|auto|cement")
+_COMPAT_VVN_REJECT_RE = get_compiled_regex(r"maersk|seal|con_|container|ship|marine|navy")
+_COMPAT_VVN_ACCEPT_RE = get_compiled_regex(r"milk|tanker|tank|vvn|btpn|btfln|bti")
+_COMPAT_BRAKE_VAN_RE = get_compiled_regex(r"bobyn|brn|brd|brna")  # Exclude "brake" to avoid cabooses
+_COMPAT_CREW_RE = get_compiled_regex(r"caboose|guard|crew|van|control|accommodation")
+_COMPAT_BOBYN_REJECT_RE = get_compiled_regex(r"tank|boxn|bcna|container|flat|coil|slab|auto|cement")
+
+
+# PERFORMANCE OPTIMIZATION: the name-based fallback branch of the
+# compatibility filter is a conjunction of scan predicates that depends only
+# on wanted_class, so the whole branch chain is resolved once per class into
+# a tuple of (pattern, must_match) conditions. An asset with no detectable
+# class is accepted iff every condition holds, which reproduces the original
+# accept/reject/guard control flow without re-branching per asset.
+@lru_cache(maxsize=256)
+def _compat_fallback_rule(wanted_class: str) -> Tuple[Tuple[re.Pattern, bool], ...]:
+    """Build the (pattern, must_match) conditions for one wanted_class."""
+    # CRITICAL: Container context checking - require container-related terms
+    if wanted_class == "CONTAINER":
+        return ((_COMPAT_CONTAINER_RE, True),)
+    # STRICT: Specialized wagon filtering - require the exact type in the
+    # name and reject any other specialized type
+    if wanted_class in ("COIL", "SLAB", "AUTO", "CEMENT", "TIPPLER"):
+        return (
+            (get_compiled_regex(wanted_class.lower()), True),
+            (_COMPAT_SPECIALIZED_OTHERS[wanted_class], False),
+        )
+    # STRICT: BCNA/BOXN wagon filtering - reject specialized terms, require
+    # family terms
+    if wanted_class in ("BCNA", "BCN"):
+        return ((_COMPAT_BCNA_REJECT_RE, False), (_COMPAT_BCNA_ACCEPT_RE, True))
+    if wanted_class == "BOXN":
+        return ((_COMPAT_BOXN_REJECT_RE, False), (_COMPAT_BOXN_ACCEPT_RE, True))
+
+    conditions = []
+    # CRITICAL: Prevent container assets from matching non-container classes
+    if wanted_class not in ("CONTAINER", "FLAT", "BLC"):
+        conditions.append((_COMPAT_CON_GUARD_RE, False))
+    # CRITICAL: Prevent specialized wagon names from matching standard classes
+    if wanted_class not in ("COIL", "SLAB", "AUTO", "CEMENT"):
+        conditions.append((_COMPAT_SPECIALIZED_GUARD_RE, False))
+    # CRITICAL: Prevent VVN/MILKTANKER wagons from matching container or
+    # shipping assets; only allow milk/tank related names
+    if wanted_class in ("VVN", "MILKTANKER", "TANK"):
+        conditions.append((_COMPAT_VVN_REJECT_RE, False))
+        conditions.append((_COMPAT_VVN_ACCEPT_RE, True))
+    # CRITICAL: STRICT BOBYN filtering - only brake van freight wagons,
+    # excluding cabooses/crew vehicles and other wagon types
+    if wanted_class == "BOBYN":
+        conditions.append((_COMPAT_BRAKE_VAN_RE, True))
+        conditions.append((_COMPAT_CREW_RE, False))
+        conditions.append((_COMPAT_BOBYN_REJECT_RE, False))
+    return tuple(conditions)
+
+
+def enhance_wagon_matching_with_compatibility(
+    pool: List[AssetRecord], wanted_class: str, wanted_name: str
+) -> List[AssetRecord]:
+    """Enhanced wagon matching with compatibility rules - ENHANCED v2.2.5 WITH FREIGHT ANALYSIS."""
+    if not wanted_class:
+        return pool
+
+    compatible_pool = []
+
+    # ENHANCED v2.2.5: Handle manufacturer prefix classes
+    if wanted_class in ("BSAM", "ASMI", "CON"):
+        # For manufacturer series, be more permissive with base types
+        compatible_types = _MFR_COMPAT.get(wanted_class, (wanted_class,))
+
+        for asset in pool:
+            # PERFORMANCE OPTIMIZATION: reuse the class detected once at record
+            # construction instead of re-classifying per compatibility call
+            asset_class = asset.cached_class
+            if asset_class in compatible_types or asset_class == wanted_class:
+                compatible_pool.append(asset)
+
+        return compatible_pool
+
+    compatible_classes = _WAGON_COMPAT.get(wanted_class)
+    if compatible_classes is None:
+        compatible_classes = frozenset({wanted_class})
+    incompatible_classes = _INCOMPAT_GROUPS.get(wanted_class, _NO_INCOMPAT)
+    fallback_rule = _compat_fallback_rule(wanted_class)
+
+    for asset in pool:
+        asset_class = asset.cached_class
+
+        # STRICT: For BCCW, only match assets with class BCCW
+        if wanted_class == "BCCW":
+            if asset_class == "BCCW":
+                compatible_pool.append(asset)
+            continue
+
+        # STRICT: Check for incompatible classes first
+        if asset_class and asset_class in incompatible_classes:
+            continue  # Skip incompatible wagon types
+
+        # If asset has a detectable class, check compatibility
+        if asset_class:
+            # PRIORITY: Exact class match gets highest preference
+            if _ci_eq(asset_class, wanted_class):
+                # Exact match - always include with highest priority
+                compatible_pool.append(asset)
+                # PERFORMANCE OPTIMIZATION: lazy %-formatting - no f-string
+                # is materialized per asset when DEBUG is off
+                logging.debug("EXACT_CLASS_MATCH: %s/%s included (exact class: %s)", asset.folder, asset.name, asset_class)
+            elif asset_class in compatible_classes:
+                # Compatible but not exact - include with lower priority
+                compatible_pool.append(asset)
+                logging.debug("COMPATIBLE_CLASS_MATCH: %s/%s included (compatible class: %s for wanted: %s)", asset.folder, asset.name, asset_class, wanted_class)
+            # Note: Incompatible classes are filtered out in the main loop
+        else:
+            # If no detectable class, apply strict name-based filtering via
+            # the per-class condition tuple resolved before the loop
+            asset_name_lower = asset.name_lower
+            for pattern, must_match in fallback_rule:
+                if bool(pattern.search(asset_name_lower)) != must_match:
+                    break
+            else:
+                # All conditions hold (or none apply) - allow the match
+                compatible_pool.append(asset)
+
+    return compatible_pool
+
+
+# PERFORMANCE OPTIMIZATION: Locomotive/generic family lookup tables for
+# detect_family_from_name, built once at import. Short keys are matched as
+# token prefixes via _FAMILY_PREFIXES (keyed by their own text, probed with
+# token[:3] / token[:2]); longer keys use substring matching. The rank keeps
+# the original priority order (locomotive families before generic "ai").
+_TOKEN_SPLIT_RE = re.compile(r"[\s_/-]")
+_SLR_TOKEN_RE = re.compile(r"(^|[\s_/-])slr([\s_/-]|\d|$)")
+_DIGITS_RE = re.compile(r"\d+")
+# Ranks mirror the original key order; wcam (7) and acela (11) are substring
+# keys and live in _FAMILY_SUBSTRINGS
+_FAMILY_PREFIXES: Dict[str, Tuple[int, str, str]] = {
+    "wap": (0, "wap", "WAP"),
+    "wag": (1, "wag", "WAG"),
+    "wdm": (2, "wdm", "WDM"),
+    "wdg": (3, "wdg", "WDG"),
+    "wdp": (4, "wdp", "WDP"),
+    "wds": (5, "wds", "WDS"),
+    "wam": (6, "wam", "WAM"),
+    "wcg": (8, "wcg", "WCG"),
+    "wcm": (9, "wcm", "WCM"),
+    "ai": (10, "ai", "AI"),
+}
+_FAMILY_SUBSTRINGS: Tuple[Tuple[int, str, str], ...] = (
+    (7, "wcam", "WCAM"),
+    (11, "acela", "ACELA"),
+)
+
+
+# PERFORMANCE OPTIMIZATION: memoized for the same reason as
+# detect_role_from_name - the token scan is pure and names repeat heavily
+@lru_cache(maxsize=65536)
+def detect_family_from_name(name: str, role: str = "Engine", subtype: str = "") -> str:
+    """Detect family from name.
+    
+    For engines: returns locomotive families (WAP/WAG/WDM/EMU/MEMU)
+    For wagons: returns coach families (AC/RAJDHANI/SLEEPER/GENERAL) only for passenger wagons
+    """
+    name_lower = name.lower()
+
+    # For wagons, detect coach families ONLY for passenger wagons
+    if role == "Wagon":
+        # If this is a freight wagon, don't apply passenger coach family detection
+        if subtype == "Freight":
+            return ""  # Freight wagons don't have coach families
+            
+        # Coach families from store files (only for passenger wagons)
+        if "rajdhani" in name_lower:
+            return "RAJDHANI"
+        elif "pantry" in name_lower or "pc" in name_lower:
+            return "PANTRY"
+        elif _SLR_TOKEN_RE.search(name_lower) or name_lower.startswith('slr'):
+            return "SLR"
+        elif "sleeper" in name_lower:
+            return "SLEEPER"
+        elif "sl" in name_lower:
+            return "SLEEPER"
+        elif "chair" in name_lower or "accc" in name_lower:
+            return "CHAIR"
+        elif "ac" in name_lower and ("1a" in name_lower or "2a" in name_lower or "3a" in name_lower):
+            return "AC"
+        elif "ac" in name_lower:
+            return "AC"
+        elif "general" in name_lower or "gs" in name_lower:
+            return "GENERAL"
+        elif "second" in name_lower or "secondclass" in name_lower:
+            # Check if this is actually an SLR coach (like SECOND_CLASS_LUGGAGE)
+            if "luggage" in name_lower:
+                return "SLR"
+            return "GENERAL"
+        elif "power" in name_lower or "eog" in name_lower:
+            return "POWER"
+        return ""
+
+    # For engines, use locomotive family detection
+    # ENHANCED v2.2.4: Better EMU/MEMU distinction (order matters!)
+    if "memu" in name_lower:
+        return "MEMU"  # MEMU is more specific than EMU
+    elif "emu" in name_lower:
+        return "EMU"  # Generic EMU
+    elif "demu" in name_lower or "dmu" in name_lower:
+        return "DMU"
+    elif "mmu" in name_lower:
+        return "MMU"
+
+    # Locomotive families - token-prefix detection for short indicators
+    # PERFORMANCE OPTIMIZATION: single pass over the tokens with a prefix map
+    # instead of one token re-split and scan per family key. Key priority
+    # (locomotive families before generic indicators like "ai") is preserved
+    # by keeping the best (lowest) priority rank seen across all tokens.
+    best_rank = -1
+    best_family = ""
+    for token in _TOKEN_SPLIT_RE.split(name_lower):
+        hit = _FAMILY_PREFIXES.get(token[:3]) or _FAMILY_PREFIXES.get(token[:2])
+        if hit is None:
+            continue
+        rank, family_key, family_name = hit
+        if best_rank != -1 and rank >= best_rank:
+            continue
+        rest = token[len(family_key):]
+        # Exact token, or key followed by alphanumerics (e.g. "wdg4d",
+        # "wap7e") - but not e.g. "wap-" leftovers with punctuation
+        if not rest or rest.isalnum():
+            best_rank = rank
+            best_family = family_name
+    # Longer indicators use substring match over the whole name
+    for rank, family_key, family_name in _FAMILY_SUBSTRINGS:
+        if best_rank != -1 and rank >= best_rank:
+            break
+        if family_key in name_lower:
+            best_rank = rank
+            best_family = family_name
+    return best_family
+
+
+# PERFORMANCE OPTIMIZATION: Subtype indicator tables for
+# detect_subtype_from_name, compiled once at import as alternation scans
+# instead of per-call list literals probed with any(indicator in name). The
+# old code also probed a manufacturer-prefix-stripped copy of the name
+# (clean_name); that copy is a suffix of name_lower, so every hit in it is
+# also a hit in name_lower and the duplicate probes were redundant.
+# Freight locomotive series
+_SUBTYPE_FREIGHT_ENGINE_SET = frozenset({
+    "wag", "wdg", "wdm", "wds", "wam", "wcam", "wcg", "wcm",
+})
+# Passenger locomotive series
+_SUBTYPE_PASSENGER_ENGINE_SET = frozenset({"wap", "wdp"})
+# Container-carrying wagons (containers are freight)
+_SUBTYPE_CONTAINER_SET = frozenset({
+    "con_", "container", "concor", "intermodal", "flat", "flatcar",
+    "blc", "blca", "blcb",
+})
+# Freight wagons: covered (BCNA family), open (BOXN/BOSTH families),
+# traditional freight, parcel/mail, specialized freight and the
+# manufacturer series prefixes
+_SUBTYPE_FREIGHT_WAGON_SET = frozenset({
+    "bcna", "bcne", "bcnh", "bcnl", "bccnr", "bccw", "bcn", "bccn",
+    "bcbfg", "bcfc",
+    "boxn", "boxnr", "boxng", "boxnhl", "boxnm1", "boxnm2", "bosth",
+    "tank", "freight", "goods", "cargo", "bobo", "bobr", "boby", "bobyn",
+    "btpn", "btap", "btfln", "bti", "flat", "flatcar", "container",
+    "concor", "blc", "brd", "brn", "brna", "brake", "bca", "bcb",
+    "caboose", "wagon",
+    "hpcv", "hcpv", "parcel", "mail", "post", "baggage", "luggage_van",
+    "coil", "slab", "slag", "sled", "slope", "billet", "pipe",
+    "automobile", "timber", "cement", "milktanker",
+    "bsam", "asmi", "apl",
+})
+_SUBTYPE_PASSENGER_SET = frozenset({
+    "1a", "2a", "3a", "ac", "sl", "gen", "chair", "sleeper", "pantry",
+    "eog", "pc", "slr", "fc", "sc", "gn", "cc", "accc",
+})
+_SUBTYPE_PASSENGER_LOCO_SET = frozenset({
+    "wap", "wdp", "wap1", "wap4", "wap5", "wap7",
+    "wdp1", "wdp3", "wdp4", "wdp4b", "wdp4d", "wdp4e",
+})
+# Scanners over the staged sets (fallback path; see automaton below)
+_SUBTYPE_FREIGHT_ENGINE_SCAN = _build_literal_scanner(_SUBTYPE_FREIGHT_ENGINE_SET)
+_SUBTYPE_PASSENGER_ENGINE_SCAN = _build_literal_scanner(_SUBTYPE_PASSENGER_ENGINE_SET)
+_SUBTYPE_CONTAINER_SCAN = _build_literal_scanner(_SUBTYPE_CONTAINER_SET)
+_SUBTYPE_FREIGHT_WAGON_SCAN = _build_literal_scanner(_SUBTYPE_FREIGHT_WAGON_SET)
+_SUBTYPE_PASSENGER_SCAN = _build_literal_scanner(_SUBTYPE_PASSENGER_SET)
+_SUBTYPE_PASSENGER_LOCO_SCAN = _build_literal_scanner(_SUBTYPE_PASSENGER_LOCO_SET)
+
+# PERFORMANCE OPTIMIZATION: Aho-Corasick automaton over the six staged
+# indicator sets when pyahocorasick is installed - one linear pass over the
+# name replaces up to six alternation scans. Each literal carries
+# (stage, subtype); an indicator appearing in several stages keeps its
+# earliest stage, and the lowest-stage hit wins, which reproduces the
+# sequential scan order. The staged scanners above remain the fallback and
+# the single source of truth for behavior.
+_SUBTYPE_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    _SUBTYPE_AUTOMATON = ahocorasick.Automaton()
+    for _stage, _subtype, _literals in (
+        (0, "Freight", _SUBTYPE_FREIGHT_ENGINE_SET),
+        (1, "Passenger", _SUBTYPE_PASSENGER_ENGINE_SET),
+        (2, "Freight", _SUBTYPE_CONTAINER_SET),
+        (3, "Freight", _SUBTYPE_FREIGHT_WAGON_SET),
+        (4, "Passenger", _SUBTYPE_PASSENGER_SET),
+        (5, "Passenger", _SUBTYPE_PASSENGER_LOCO_SET),
+    ):
+        for _literal in _literals:
+            if not _SUBTYPE_AUTOMATON.exists(_literal):
+                _SUBTYPE_AUTOMATON.add_word(_literal, (_stage, _subtype))
+    _SUBTYPE_AUTOMATON.make_automaton()
+    del _stage, _subtype, _literals, _literal
+
+# Passenger coach indicators: short codes (<= 2 chars) must appear as whole
+# tokens to avoid false positives; longer ones match as substrings
+_SUBTYPE_COACH_SHORT_TOKENS = frozenset({"1a", "2a", "3a", "sl", "gs", "cc"})
+_SUBTYPE_COACH_LONG_SCAN = _build_literal_scanner(frozenset({
+    "1ac", "2ac", "3ac", "ac1", "ac2", "ac3", "slp", "sleeper", "sleeping",
+    "gen", "general", "gencar", "unreserved", "second", "secondclass",
+    "chair", "chaircar", "accc", "ac_chair", "passenger", "coach",
+    "utk", "utkrisht", "humsafar", "tejas", "rajdhani", "shatabdi",
+    "duronto", "vande", "vandebharat",
+}))
+# Guard: no passenger-coach classification in container/freight context
+_SUBTYPE_FREIGHT_CONTEXT_SCAN = _build_literal_scanner(frozenset({
+    "con_", "container", "freight", "bsam", "asmi",
+}))
+# Service indicators are kept specific (ai_system rather than bare "ai") to
+# avoid conflicts with locomotive names
+_SUBTYPE_SERVICE_SCAN = _build_literal_scanner(frozenset({
+    "eog", "generator", "power", "powercar", "maintenance", "service",
+    "inspection", "pc", "pantry", "pantrycar", "catering",
+    "ai_system", "ai_horn", "horn_system",
+}))
+_SUBTYPE_CONTAINER_CONTEXT_SCAN = _build_literal_scanner(frozenset({"con_", "container"}))
+
+
+# PERFORMANCE OPTIMIZATION: memoized like detect_role_from_name - pure
+# string classifier, called with the same names across filter passes
+@lru_cache(maxsize=65536)
+def detect_subtype_from_name(name: str) -> str:
+    """Detect subtype (Passenger/Freight/Maintenance) from name - ENHANCED v2.2.5 WITH FREIGHT ANALYSIS."""
+    name_lower = name.lower()
+
+    if _SUBTYPE_AUTOMATON is not None:
+        # One linear pass; the lowest-stage hit decides, matching the
+        # sequential scan order of the fallback below
+        best_stage = None
+        best_subtype = ""
+        for _, (stage, subtype) in _SUBTYPE_AUTOMATON.iter(name_lower):
+            if best_stage is None or stage < best_stage:
+                best_stage = stage
+                best_subtype = subtype
+        if best_stage is not None:
+            return best_subtype
+    else:
+        # ENHANCED: Detect engine subtypes based on locomotive series
+        if _SUBTYPE_FREIGHT_ENGINE_SCAN.search(name_lower):
+            return "Freight"
+        if _SUBTYPE_PASSENGER_ENGINE_SCAN.search(name_lower):
+            return "Passenger"
+
+        # CRITICAL: Container detection FIRST (before passenger indicators to avoid false classification)
+        if _SUBTYPE_CONTAINER_SCAN.search(name_lower):
+            return "Freight"  # Containers are freight
+
+        # ENHANCED: Check for passenger indicators AFTER container detection
+        # BUT check for freight wagons FIRST to avoid false passenger classification
+        if _SUBTYPE_FREIGHT_WAGON_SCAN.search(name_lower):
+            return "Freight"
+
+        if _SUBTYPE_PASSENGER_SCAN.search(name_lower):
+            return "Passenger"
+
+        # Passenger locomotive detection
+        if _SUBTYPE_PASSENGER_LOCO_SCAN.search(name_lower):
+            return "Passenger"
+
+    # CRITICAL: Only detect as passenger coach if NOT a container or freight context
+    if not _SUBTYPE_FREIGHT_CONTEXT_SCAN.search(name_lower):
+        if _SUBTYPE_COACH_LONG_SCAN.search(name_lower):
+            return "Passenger"
+        # Short indicators like "gs" must appear as separate tokens
+        if not _SUBTYPE_COACH_SHORT_TOKENS.isdisjoint(_TOKEN_SPLIT_RE.split(name_lower)):
+            return "Passenger"
+
+    # Service/Maintenance indicators (lower priority than locomotive detection)
+    if _SUBTYPE_SERVICE_SCAN.search(name_lower):
+        return "Service"
+
+    # SLR is special - it's passenger service (guard's van on passenger trains)
+    if "slr" in name_lower and not _SUBTYPE_CONTAINER_CONTEXT_SCAN.search(name_lower):
+        return "Passenger"
+
+    return ""
+
+
+# Build indicators whose detection needs word boundaries (AI variants) to
+# avoid matching inside words like "HYUNDAI"
+_BUILD_AI_BOUNDED = frozenset({
+    "_ai", "ai_", " ai ", "artificial_intelligence", "ai_system", " ai-", "-ai ",
+})
+
+
+def _compile_build_indicators(specs):
+    """Pair each build indicator with a precompiled boundary pattern (or None)."""
+    compiled = []
+    for indicator, build_type in specs:
+        if indicator in _BUILD_AI_BOUNDED:
+            pattern = get_compiled_regex(
+                r"\b" + re.escape(indicator.strip()) + r"\b", re.IGNORECASE
+            )
+        else:
+            pattern = None
+        compiled.append((indicator, pattern, build_type))
+    return tuple(compiled)
+
+
+# PERFORMANCE OPTIMIZATION: priority-ordered build indicators compiled once
+# at import - the per-call path no longer rebuilds the spec list or the AI
+# word-boundary patterns. The priority loop stays a loop: first match wins,
+# which a single union regex (leftmost-position semantics) would not preserve.
+# CHANGE: Removed 'blue' and 'blu' as requested
+_BUILD_INDICATORS = _compile_build_indicators([
+        # Special liveries/sets (highest priority) - ENHANCED v2.2.3: Added ANTYODAYA and DURONTO
+        ("antyodaya", "ANTYODAYA"),
+        ("antodaya", "ANTYODAYA"),  # Common misspelling
+        ("duronto", "DURONTO"),
+        ("utkrisht", "UTK"),
+        ("utk", "UTK"),
+        ("ukt", "UTK"),  # UKT is common misspelling
+        ("tejas", "TEJAS"),
+        ("humsafar", "HUMSAFAR"),
+        ("vande", "VANDE"),
+        ("vandebharat", "VANDE"),
+        ("garibrath", "GARIBRATH"),
+        ("garib_rath", "GARIBRATH"),
+        ("samparkkranti", "SAMPARKKRANTI"),
+        ("doubledecker", "DOUBLEDECKER"),
+        ("_ai", "AI"),  # AI systems (more specific to avoid false positives)
+        ("ai_", "AI"),  # AI systems
+        (" ai ", "AI"),  # AI systems with word boundaries
+        ("artificial_intelligence", "AI"),  # Full AI term
+        ("ai_system", "AI"),  # AI system designation
+        (" ai-", "AI"),  # AI with dash
+        ("-ai ", "AI"),  # Dash AI
+        ("ai-horn", "AI"),  # AI horn combination
+        ("ai_horn", "AI"),  # AI horn with underscore
+        ("aihorn", "AI"),  # AI horn without separator
+        ("horn_ai", "AI"),  # Horn AI combination
+        ("horn-ai", "AI"),  # Horn AI with dash
+        ("ai system", "AI"),  # AI system with space
+        ("ai-system", "AI"),  # AI system with dash
+       
+        # Build types (lower priority)
+        ("lhb", "LHB"),
+        ("linke_hofmann", "LHB"),
+        ("modern", "LHB"),
+        ("icf", "ICF"),
+        ("integral", "ICF"),
+        ("conventional", "ICF"),
+        ("alco", "ALCO"),
+        ("other", "OTHER"),
+])
+
+
+# PERFORMANCE OPTIMIZATION: one alternation over every build indicator, used
+# as an existence gate - most asset names carry no build indicator at all and
+# a single C-level scan rejects them without walking the priority loop. The
+# loop still decides the winner when the gate fires, because leftmost-position
+# alternation semantics would not preserve list priority.
+_BUILD_GATE_RE = get_compiled_regex(
+    "|".join(
+        sorted(
+            {
+                (r"\b" + re.escape(ind.strip()) + r"\b") if pat is not None else re.escape(ind)
+                for ind, pat, _ in _BUILD_INDICATORS
+            },
+            key=len,
+            reverse=True,
+        )
+    )
+)
+
+
+@lru_cache(maxsize=65536)
+def detect_build_from_name_or_folder(name: str, folder: str) -> str:
+    """Detect build type (LHB/ICF/UTK) from name or folder - ENHANCED v2.2.5 WITH BLUE REMOVED."""
+    combined = f"{name} {folder}".lower()
+
+    if not _BUILD_GATE_RE.search(combined):
+        return ""
+
+    # Check in priority order - return first match
+    for indicator, pattern, build_type in _BUILD_INDICATORS:
+        if pattern is not None:
+            # Word-bounded AI detection
+            if pattern.search(combined):
+                return build_type
+        elif indicator in combined:
+            return build_type
+
+    return ""
+
+
+def detect_from_folder(folder: str) -> Tuple[str, str, str, str]:
+    """Detect family, subtype, class, build from folder name."""
+    if not folder:
+        return "", "", "", ""
+
+    folder_lower = folder.lower()
+
+    subtype = detect_subtype_from_name(folder_lower)
+    family = detect_family_from_name(folder_lower, "Engine", subtype)  # Default to Engine for folder-only detection
+    klass = detect_wagon_or_engine_class(folder_lower)
+    build = detect_build_from_name_or_folder("", folder_lower)
+
+    return family, subtype, klass, build
+
+
+def name_equal(name1: str, name2: str) -> bool:
+    """Check if two names are equal (case-insensitive)."""
+    return name1.lower().strip() == name2.lower().strip()
+
+
+# PERFORMANCE OPTIMIZATION: family sets hoisted to module scope - the set
+# literals were rebuilt (and their elements rehashed) on every call
+# Electric locomotive families - ENHANCED v2.2.3
+_ELECTRIC_FAMILIES = frozenset({
+    "wap", "wag", "wam", "wcam", "wcg", "wcm", "emu", "memu", "mmu",
+})
+# Diesel locomotive families - ENHANCED v2.2.3
+_DIESEL_FAMILIES = frozenset({"wdm", "wdg", "wdp", "wds", "dmu", "demu"})
+
+
+def get_traction_type_from_family(family: str) -> TractionType:
+    """Get traction type from locomotive family - ENHANCED v2.2.3."""
+    if not family:
+        return TractionType.UNKNOWN
+
+    family_lower = family.lower()
+
+    if family_lower in _ELECTRIC_FAMILIES:
+        return TractionType.ELECTRIC
+
+    if family_lower in _DIESEL_FAMILIES:
+        return TractionType.DIESEL
+
+    return TractionType.UNKNOWN
+
+
+# PERFORMANCE OPTIMIZATION: attribute values (class/family/subtype/build)
+# come from small closed sets, so their casefolded forms are cached - the
+# strict filter called str.casefold eight times per asset, allocating a new
+# string each time. Cache hits also return a shared object, letting == short
+# circuit on identity.
+@lru_cache(maxsize=4096)
+def _casefold_cached(value: str) -> str:
+    return sys.intern(value.casefold())
+
+
+# PERFORMANCE OPTIMIZATION: folders repeat across thousands of records but a
+# trainset only has ~a hundred unique folder names - interning the lowered
+# form once per unique folder makes the scorer's equality probes pointer
+# compares and stops the per-record .lower() allocation
+@lru_cache(maxsize=1024)
+def _lower_intern(value: str) -> str:
+    return sys.intern(value.lower())
+
+
+def _ci_eq(a: Optional[str], b: Optional[str]) -> bool:
+    return _casefold_cached(a or "") == _casefold_cached(b or "")
+
+
+def sorted_intersection_len(a: Tuple[str, ...], b: Tuple[str, ...], la: int, lb: int) -> int:
+    """Count common elements of two sorted token tuples with a two-pointer scan."""
+    i = j = inter = 0
+    while i < la and j < lb:
+        x = a[i]
+        y = b[j]
+        if x == y:
+            inter += 1
+            i += 1
+            j += 1
+        elif x < y:
+            i += 1
+        else:
+            j += 1
+    return inter
+
+
+def jaccard_sorted(a: Tuple[str, ...], b: Tuple[str, ...], la: int, lb: int) -> float:
+    """Jaccard similarity over sorted token tuples.
+
+    PERFORMANCE OPTIMIZATION: avoids building intersection/union sets -
+    union size is derived as la + lb - inter, so no second allocation.
+    """
+    if not la or not lb:
+        return 0.0
+    inter = sorted_intersection_len(a, b, la, lb)
+    return inter / (la + lb - inter)
+
+
+# PERFORMANCE OPTIMIZATION: Global token vocabulary. Tokens are interned to
+# dense int32 ids once (at record construction / per query), so the hot
+# intersection loop compares machine ints instead of strings. Interning is a
+# bijection, so id-based intersection counts are identical to the string ones.
+_VOCAB: Dict[str, int] = {}
+
+
+def token_ids(tokens: Set[str]):
+    """Intern a token set into a sorted sequence of dense vocabulary ids.
+
+    Returns an int32 numpy array when numpy is available (so the numba kernel
+    gets arrays without per-call conversion), otherwise a plain tuple.
+    """
+    vocab = _VOCAB
+    ids = sorted(vocab.setdefault(token, len(vocab)) for token in tokens)
+    if NUMPY_AVAILABLE:
+        return np.asarray(ids, dtype=np.int32)
+    return tuple(ids)
+
+
+def token_bits(tokens: Iterable[str]) -> int:
+    """Intern a token set into a vocabulary bitmask.
+
+    PERFORMANCE OPTIMIZATION: Python ints are arbitrary-width, so the mask has
+    no vocabulary-size cap; intersection and union sizes become a C-level
+    AND/OR plus int.bit_count() (CPU popcount) with no allocation per pair.
+    Interning is the same bijection as token_ids, so the counts are identical
+    to the string-set ones.
+    """
+    vocab = _VOCAB
+    bits = 0
+    for token in tokens:
+        bits |= 1 << vocab.setdefault(token, len(vocab))
+    return bits
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _intersection_len_ids_jit(a, b):  # pragma: no cover - requires numba
+        i = j = inter = 0
+        la = a.shape[0]
+        lb = b.shape[0]
+        while i < la and j < lb:
+            x = a[i]
+            y = b[j]
+            if x == y:
+                inter += 1
+                i += 1
+                j += 1
+            elif x < y:
+                i += 1
+            else:
+                j += 1
+        return inter
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, cache=True)
+    def _batch_intersection_jit(flat, offsets, wanted):  # pragma: no cover - requires numba
+        """Intersection counts of `wanted` against ragged id rows, in parallel."""
+        n = offsets.shape[0] - 1
+        lw = wanted.shape[0]
+        out = np.empty(n, dtype=np.int32)
+        for k in prange(n):
+            i = offsets[k]
+            end = offsets[k + 1]
+            j = 0
+            inter = 0
+            while i < end and j < lw:
+                x = flat[i]
+                y = wanted[j]
+                if x == y:
+                    inter += 1
+                    i += 1
+                    j += 1
+                elif x < y:
+                    i += 1
+                else:
+                    j += 1
+            out[k] = inter
+        return out
+
+
+# Pool size below which the per-pair kernel beats batch array assembly
+_BATCH_INTERSECTION_MIN_POOL = 64
+
+
+def batch_intersection_lens(pool: List["AssetRecord"], wanted_ids, wanted_len: int) -> Optional[List[int]]:
+    """Intersection counts of the wanted ids against every record in the pool.
+
+    PERFORMANCE OPTIMIZATION: with numba present and a large pool, the ragged
+    per-record id rows are packed into one flat array and scanned by a
+    prange-parallel kernel - one compiled call replaces N Python-level kernel
+    dispatches. Returns None when the scalar per-pair path should be used;
+    that path stays the single source of truth for behavior.
+    """
+    if not (NUMBA_AVAILABLE and wanted_len and len(pool) >= _BATCH_INTERSECTION_MIN_POOL):
+        return None
+    rows = [asset.token_ids for asset in pool]
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([row.shape[0] for row in rows], out=offsets[1:])
+    flat = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    return _batch_intersection_jit(flat, offsets, wanted_ids).tolist()
+
+
+def intersection_len_ids(a, b, la: int, lb: int) -> int:
+    """Count common ids of two sorted id sequences (JIT-compiled when numba is present)."""
+    if NUMBA_AVAILABLE and la >= 8 and lb >= 8:
+        return int(_intersection_len_ids_jit(a, b))
+    i = j = inter = 0
+    while i < la and j < lb:
+        x = a[i]
+        y = b[j]
+        if x == y:
+            inter += 1
+            i += 1
+            j += 1
+        elif x < y:
+            i += 1
+        else:
+            j += 1
+    return inter
+
+
+def apply_strict_attribute_filter(
+    pool: List[AssetRecord], family: str, subtype: str, klass: str, build: str
+) -> List[AssetRecord]:
+    """
+    NEW: Apply strict attribute filtering - only assets with EXACT matches for all four attributes.
+    This replaces the more lenient filtering used in the original version.
+    """
+    if not any([family, subtype, klass, build]):
+        # If no attributes detected, return empty pool (will lead to UNRESOLVED)
+        return []
+
+    filtered = []
+
+    for asset in pool:
+        # PERFORMANCE OPTIMIZATION: all four attributes come from the
+        # per-record caches instead of re-running the detectors per call
+        asset_subtype = asset.cached_subtype
+        asset_family = asset.cached_family
+        asset_class = asset.cached_class
+        asset_build = asset.cached_build
+
+        # Initialize matches for this asset
+        matches = True
+
+        # ENHANCED v2.2.9: More flexible attribute matching for wagons
+        # For wagons, be more lenient with Family attribute since many wagons don't have locomotive-style family codes
+        is_wagon = asset.kind == AssetKind.WAGON
+        
+        if is_wagon:
+            # For wagons: strict matching - require EXACT matches for all detected attributes
+            # If target has an attribute, asset must have the same attribute value
+            class_conflict = klass and not (_ci_eq(asset_class, klass) or (
+                # Use compatibility for wagon class matching as fallback
+                enhance_wagon_matching_with_compatibility([asset], klass, asset.name) if klass else False
+            ))
+            family_conflict = family and not _ci_eq(asset_family, family)
+            subtype_conflict = subtype and not _ci_eq(asset_subtype, subtype)
+            build_conflict = build and not _ci_eq(asset_build, build)
+            
+            # Reject if any required attribute doesn't match
+            if class_conflict or family_conflict or subtype_conflict or build_conflict:
+                matches = False
+            else:
+                # All required attributes match (or weren't specified)
+                matches = True
+        else:
+            # For engines: strict matching - require EXACT matches for all detected attributes
+            # If target has an attribute, asset must have the same attribute value
+            class_conflict = klass and not _ci_eq(asset_class, klass)
+            family_conflict = family and not _ci_eq(asset_family, family)
+            subtype_conflict = subtype and not _ci_eq(asset_subtype, subtype)
+            build_conflict = build and not _ci_eq(asset_build, build)
+            
+            # Reject if any required attribute doesn't match
+            if class_conflict or family_conflict or subtype_conflict or build_conflict:
+                matches = False
+            else:
+                # All required attributes match (or weren't specified)
+                matches = True
+
+        if matches:
+            filtered.append(asset)
+
+    return filtered
+
+
+def find_digit_near_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
+    """Find assets with similar digit patterns for digit-near matching."""
+    # Extract digit patterns from wanted name
+    # PERFORMANCE OPTIMIZATION: convert the wanted digits to ints once; each
+    # asset's digits come pre-extracted from cached_digits, so the scan is
+    # pure integer compares with no regex or int() per asset
+    wanted_digits = tuple(int(d) for d in _DIGITS_RE.findall(wanted_name))
+    if not wanted_digits:
+        return []
+
+    wanted_count = len(wanted_digits)
+    matches = []
+    for asset in pool:
+        asset_digits = asset.cached_digits
+        if not asset_digits:
+            continue
+
+        # Check if digit patterns are similar (same count and close values)
+        # Allow digit difference of max 2 (e.g., 28052 matches 28059)
+        if len(asset_digits) == wanted_count and all(
+            abs(wanted_num - asset_num) <= 2
+            for wanted_num, asset_num in zip(wanted_digits, asset_digits)
+        ):
+            matches.append(asset)
+
+    return matches
+
+
+def find_wildcard_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
+    """Find assets using wildcard pattern matching."""
+    matches = []
+    # Create wildcard patterns from the wanted name
+    patterns = [
+        wanted_name.replace('_', '*'),  # Replace underscores with wildcards
+        _DIGITS_RE.sub('*', wanted_name),  # Replace digits with wildcards
+        wanted_name.replace('_', '?'),  # Replace underscores with single char wildcards
+    ]
+
+    # PERFORMANCE OPTIMIZATION: translate each pattern to a compiled regex
+    # once, outside the pool loop - fnmatch.fnmatch re-translates per call
+    compiled = [get_compiled_regex(fnmatch.translate(p.lower())) for p in patterns]
+
+    for asset in pool:
+        asset_name_lower = asset.name_lower
+        if any(c.match(asset_name_lower) for c in compiled):
+            matches.append(asset)
+
+    return matches
+
+
+def find_semantic_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
+    """Find assets with high semantic similarity using fuzzy matching."""
+    threshold = 75  # Minimum similarity score
+    wanted_lower = wanted_name.lower()
+
+    # PERFORMANCE OPTIMIZATION: with rapidfuzz available, score the whole pool
+    # in batched C++ loops via process.extract instead of three Python-level
+    # scorer calls per asset. An asset matches when ANY scorer clears the
+    # threshold (max >= t <=> any >= t), so the union of the three per-scorer
+    # result sets reproduces the scalar loop exactly.
+    if FUZZ_BACKEND == "rapidfuzz":
+        choices = [asset.name_lower for asset in pool]
+        matched_indices: Set[int] = set()
+        for scorer in (fuzz.ratio, fuzz.partial_ratio, fuzz.token_sort_ratio):
+            for _choice, _score, index in process.extract(
+                wanted_lower,
+                choices,
+                scorer=scorer,
+                score_cutoff=threshold,
+                limit=None,
+            ):
+                matched_indices.add(index)
+        return [pool[i] for i in sorted(matched_indices)]
+
+    matches = []
+    for asset in pool:
+        asset_lower = asset.name_lower
+        # PERFORMANCE OPTIMIZATION: cheapest scorer first, short-circuit on the
+        # first one that clears the threshold
+        if (
+            fuzz.ratio(wanted_lower, asset_lower) >= threshold
+            or fuzz.partial_ratio(wanted_lower, asset_lower) >= threshold
+            or fuzz.token_sort_ratio(wanted_lower, asset_lower) >= threshold
+        ):
+            matches.append(asset)
+
+    return matches
+
+
+def find_partial_token_matches(pool: List[AssetRecord], wanted_name: str) -> List[AssetRecord]:
+    """Find assets with partial token matches (at least 50% of tokens match)."""
+    wanted_tokens = frozenset(_normalize_tokens(wanted_name))
+
+    if not wanted_tokens:
+        return []
+
+    # PERFORMANCE OPTIMIZATION: tokens as a vocabulary bitmask - per-asset
+    # overlap is AND/OR + popcount on cached masks, no set construction
+    wanted_bits = token_bits(wanted_tokens)
+
+    matches = []
+    for asset in pool:
+        asset_bits = asset.token_bits
+
+        if not asset_bits:
+            continue
+
+        # Calculate token overlap
+        intersection = (wanted_bits & asset_bits).bit_count()
+        total_unique = (wanted_bits | asset_bits).bit_count()
+
+        if total_unique > 0:
+            overlap_ratio = intersection / total_unique
+            # Require at least 40% token overlap
+            if overlap_ratio >= 0.4:
+                matches.append(asset)
+
+    return matches
+
+
+def _collect_fallback_matches(
+    pool: List[AssetRecord], wanted_name: str, wanted_folder_lower: str
+) -> Tuple[List[AssetRecord], List[AssetRecord], List[AssetRecord], List[AssetRecord]]:
+    """Local-folder, digit-near, wildcard and partial-token candidates in one
+    pool pass.
+
+    PERFORMANCE OPTIMIZATION: the cheap fallback finders each walked the full
+    pool, so the unresolved tail of a resolve fetched every record several
+    times. This fused traversal computes all four checks per record; the
+    standalone find_* functions remain the behavioral reference and the
+    per-record tests here mirror them exactly (the local-folder column is the
+    same folder_lower comparison resolve_asset ran as its own pass). Semantic
+    matching is not fused: it is the compute-bound one and only worth running
+    when these lists come back empty.
+    """
+    # Digit-near precomputation (see find_digit_near_matches)
+    wanted_digits = tuple(int(d) for d in _DIGITS_RE.findall(wanted_name))
+    wanted_count = len(wanted_digits)
+
+    # Wildcard precompilation (see find_wildcard_matches)
+    wildcard_patterns = [
+        wanted_name.replace('_', '*'),
+        _DIGITS_RE.sub('*', wanted_name),
+        wanted_name.replace('_', '?'),
+    ]
+    compiled = [get_compiled_regex(fnmatch.translate(p.lower())) for p in wildcard_patterns]
+
+    # Partial-token precomputation (see find_partial_token_matches)
+    wanted_tokens = frozenset(_normalize_tokens(wanted_name))
+    wanted_bits = token_bits(wanted_tokens) if wanted_tokens else 0
+
+    local_folder_matches: List[AssetRecord] = []
+    digit_matches: List[AssetRecord] = []
+    wildcard_matches: List[AssetRecord] = []
+    partial_matches: List[AssetRecord] = []
+
+    for asset in pool:
+        if asset.folder_lower == wanted_folder_lower:
+            local_folder_matches.append(asset)
+
+        if wanted_count:
+            asset_digits = asset.cached_digits
+            if (
+                asset_digits
+                and len(asset_digits) == wanted_count
+                and all(
+                    abs(wanted_num - asset_num) <= 2
+                    for wanted_num, asset_num in zip(wanted_digits, asset_digits)
+                )
+            ):
+                digit_matches.append(asset)
+
+        asset_name_lower = asset.name_lower
+        if any(c.match(asset_name_lower) for c in compiled):
+            wildcard_matches.append(asset)
+
+        if wanted_bits:
+            asset_bits = asset.token_bits
+            if asset_bits:
+                intersection = (wanted_bits & asset_bits).bit_count()
+                total_unique = (wanted_bits | asset_bits).bit_count()
+                if total_unique > 0 and intersection / total_unique >= 0.4:
+                    partial_matches.append(asset)
+
+    return local_folder_matches, digit_matches, wildcard_matches, partial_matches
+
+
+def pick_strict_default(
+    defaults_index: List[AssetRecord],
+    wanted_role: str,
+    family: str,
+    subtype: str,
+    klass: str,
+    build: str,
+) -> Optional[AssetRecord]:
+    """
+    NEW: Pick default with strict requirement - at least Subtype must match.
+    """
+    if not defaults_index or not subtype:
+        return None  # No defaults available or no subtype to match
+
+    # Filter defaults by role
+    role_defaults = [
+        d
+        for d in defaults_index
+        if (wanted_role == "Engine" and d.kind == AssetKind.ENGINE)
+        or (wanted_role == "Wagon" and d.kind == AssetKind.WAGON)
+    ]
+
+    if not role_defaults:
+        return None
+
+    # Filter by subtype requirement (strict)
+    # PERFORMANCE OPTIMIZATION: cached_subtype is exactly the historical
+    # name-then-folder detection, computed once per record
+    subtype_matched = [
+        default for default in role_defaults if _ci_eq(default.cached_subtype, subtype)
+    ]
+
+    if not subtype_matched:
+        return None  # No defaults match the required subtype
+
+    # Historical behavior: the family hint is the subtype detected for the
+    # last role default examined above, not each candidate's own - preserved
+    # so existing default selections do not shift
+    hint_subtype = role_defaults[-1].cached_subtype
+
+    # Score the subtype-matched defaults
+    # PERFORMANCE OPTIMIZATION: single pass tracking the running best instead
+    # of materializing and sorting a scored list; the detectors below are
+    # memoized, so repeat calls are cache hits
+    best: Optional[AssetRecord] = None
+    best_rank: Optional[Tuple[int, str]] = None
+
+    for default in subtype_matched:
+        score = 100  # Base score for subtype match
+        default_name_lower = default.name_lower
+
+        # Additional scoring for other attributes
+        default_family = detect_family_from_name(
+            default.name, wanted_role, hint_subtype
+        ) or detect_family_from_name(default.folder, wanted_role, hint_subtype)
+        default_class = detect_wagon_or_engine_class(default.name, wanted_role)
+        default_build = detect_build_from_name_or_folder(default.name, default.folder)
+
+        if family and _ci_eq(default_family, family):
+            score += 50
+        if klass and _ci_eq(default_class, klass):
+            score += 75
+        if build and _ci_eq(default_build, build):
+            score += 100
+
+        # Generic defaults bonus
+        if "default" in default_name_lower:
+            score += 25
+
+        rank = (-score, default_name_lower)
+        if best_rank is None or rank < best_rank:
+            best_rank = rank
+            best = default
+
+    return best
+
+
+# PERFORMANCE OPTIMIZATION: ranking token sets hoisted to module scope - the
+# set literals were rebuilt on every call (and the uppercased passenger set on
+# every asset)
+# Passenger-class tokens (coaches, reserved classes).
+# Keep this limited to tokens already used in the codebase.
+_RANK_PASSENGER_TOKENS = frozenset({
+    'cc', '1a', '2a', '3a', 'sl', 'sc', 'gs', '2s', 'accc', 'fc'
+})
+_RANK_PASSENGER_CLASSES_UPPER = frozenset(t.upper() for t in _RANK_PASSENGER_TOKENS)
+# Non-passenger / auxiliary tokens (generator cars, EOG, pantry etc.).
+# Move 'pc' and 'slr' here as requested and avoid inventing new token names.
+_RANK_NON_PASSENGER_TOKENS = frozenset({
+    'gc', 'eog', 'gen', 'gene', 'gn', 'pc', 'slr', 'pantry', 'generator',
+    'power', 'nmgc', 'drivingcar', 'brake', 'bvcm', 'bvzi', 'bvzc',
+})
+# Generator-like tokens (gc, eog, gen, gene): wanted names carrying these
+# must not match passenger-class assets (like CC)
+_RANK_GENERATOR_TOKENS = frozenset({'gc', 'eog', 'gen', 'gene'})
+# PERFORMANCE OPTIMIZATION: compiled once - the ranker previously handed
+# these alternations to re.search as source strings on every candidate
+_RANK_AUX_INDICATOR_RE = get_compiled_regex(
+    r'(?i)\b(gc|eog|gen|gene|pantry|power|pantrycar|powercar|generator)\b'
+)
+_RANK_NON_PASSENGER_RE = get_compiled_regex(
+    r'(?i)\b(gc|eog|gen|gene|pantry|power|pantrycar|powercar|generator|brake|bvcm|bvzi|bvzc)\b'
+)
+class _LazyTop3:
+    """Defers building the ranker's top-3 debug payload until the logging
+    framework actually formats the record (a DEBUG-level filter or handler
+    threshold can still drop it after isEnabledFor says yes)."""
+
+    __slots__ = ("scored",)
+
+    def __init__(self, scored):
+        self.scored = scored
+
+    def __str__(self):
+        return repr(
+            [(c[-1].folder + "/" + c[-1].name, -c[0]) for c in self.scored[:3]]
+        )
+
+
+# Per-call constant folds: priority parcel classes, premium builds, and the
+# variety-bonus upper bound per class (missing class -> 4, no class -> 3)
+_RANK_PRIORITY_CLASSES = frozenset({'HCPV', 'HPCV'})
+_RANK_PREMIUM_BUILDS = frozenset({'UTK', 'TEJAS', 'HUMSAFAR', 'VANDE'})
+_RANK_VARIETY_UPPER = {
+    'BOBYN': 2, 'BOXN': 2, 'BRN': 2, 'BRNA': 2,
+    'WAG7': 3, 'WAG9': 3, 'WAP7': 3,
+}
+
+
+def rank_by_name_then_tokens(
+    pool: List[AssetRecord],
+    wanted_name: str,
+    wanted_folder: str,
+    klass: str,
+    build: str,
+) -> Optional[AssetRecord]:
+    """Rank candidates by name similarity then token matching."""
+    if not pool:
+        return None
+
+    # PERFORMANCE OPTIMIZATION: Cache wanted name normalization (translate
+    # table instead of a regex scan; joining reproduces the normalized form)
+    wanted_norm_tokens = _normalize_tokens(wanted_name)
+    wanted_name_norm = " ".join(wanted_norm_tokens)
+    wanted_tokens = set(wanted_norm_tokens)
+
+    # Add folder tokens if available
+    if wanted_folder:
+        wanted_tokens.update(_normalize_tokens(wanted_folder))
+
+    # PERFORMANCE OPTIMIZATION: Interned id sequence + length, computed once
+    # per query for the int-based intersection kernel; without numba the
+    # bitmask form drives the per-asset popcount path instead
+    wanted_ids = token_ids(wanted_tokens)
+    wanted_len = len(wanted_tokens)
+    wanted_bits = None if NUMBA_AVAILABLE else token_bits(wanted_tokens)
+
+    # Detect token conflicts: both passenger-class indicators and generator indicators present
+    wanted_has_passenger = bool(wanted_tokens & _RANK_PASSENGER_TOKENS)
+    wanted_has_non_passenger = bool(wanted_tokens & _RANK_NON_PASSENGER_TOKENS)
+
+    # If both passenger and non-passenger indicators appear, prefer non-passenger assets
+    prefer_non_passenger = wanted_has_passenger and wanted_has_non_passenger
+
+    # Strict rule: if the wanted name explicitly contains generator-like tokens
+    # (gc, eog, gen, gene), we should NOT match to passenger-class assets (like CC).
+    wanted_has_generator_tokens = bool(wanted_tokens & _RANK_GENERATOR_TOKENS)
+
+    # If conflict present, treat the wanted class as non-passenger: clear klass so
+    # passenger-class exact matches and bonuses are suppressed.
+    if prefer_non_passenger:
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                f"PREFERRED_NON_PASSENGER: Wanted '{wanted_name}' contains both passenger and non-passenger tokens; treating wanted class as non-passenger (suppressing passenger-class bonuses)"
+            )
+        klass = ''
+
+    scored_candidates = []
+
+    # PERFORMANCE OPTIMIZATION: loop-invariant casefold of the wanted folder
+    wanted_folder_lower = wanted_folder.lower() if wanted_folder else ""
+
+    # PERFORMANCE OPTIMIZATION: partial evaluation of the target-constant
+    # branch decisions - klass/build membership and the variety-bonus bound
+    # do not change per asset, so they are folded once per call against the
+    # module-level lookup tables (no tuple literals rebuilt here)
+    klass_is_priority = klass in _RANK_PRIORITY_CLASSES
+    build_bonus = 200 if build in _RANK_PREMIUM_BUILDS else 80
+    variety_upper = _RANK_VARIETY_UPPER.get(klass, 4) if klass else 3
+
+    # PERFORMANCE OPTIMIZATION: on large pools with numba available, all
+    # intersection counts are computed up front by one parallel batch kernel
+    batch_inters = batch_intersection_lens(pool, wanted_ids, wanted_len)
+
+    # PERFORMANCE OPTIMIZATION: without the kernel, the intersection column
+    # is still filled pool-at-a-time here - one comprehension instead of a
+    # per-asset three-way path dispatch inside the scoring loop
+    if batch_inters is not None:
+        inters = batch_inters
+    elif wanted_bits is not None:
+        # no numba - SWAR path, AND + popcount
+        inters = [
+            (wanted_bits & asset.token_bits).bit_count() for asset in pool
+        ]
+    else:
+        inters = [
+            intersection_len_ids(
+                wanted_ids, asset.token_ids, wanted_len, asset.tokens_len
+            )
+            for asset in pool
+        ]
+
+    for asset_index, asset in enumerate(pool):
+        score = 0
+
+        # Normalized name equality (highest priority)
+        asset_name_norm = asset.cached_normalized
+        if asset_name_norm == wanted_name_norm:
+            score += 1000
+
+        # Token containment and overlap calculation
+        asset_len = asset.tokens_len
+        inter = inters[asset_index]
+        token_containment = inter == wanted_len
+        token_overlap = inter > 0
+        
+        # Get asset class for comparison
+        asset_class = asset.cached_class
+        exact_class_match = asset_class and _ci_eq(asset_class, klass)
+        
+        # Optimized scoring logic
+        if token_containment or (token_overlap and exact_class_match):
+            # Determine class compatibility more efficiently
+            if not klass:
+                class_compatible = True
+            elif asset.kind == AssetKind.WAGON:
+                # For wagons, use cached compatibility check
+                class_compatible = exact_class_match or not asset_class  # Simplified check
+            else:
+                # For engines, exact match required
+                class_compatible = exact_class_match
+            
+            if class_compatible:
+                # Score based on token match quality
+                if token_containment:
+                    score += 900  # Perfect token containment
+                else:
+                    score += 700  # Partial tokens with exact class
+                
+                # Class match bonuses
+                if exact_class_match:
+                    score += 300
+                    # Extra bonus for high-priority classes
+                    if klass_is_priority:
+                        score += 100
+            elif not asset_class:
+                score += 600  # No class detected
+            else:
+                score += 50   # Incompatible class
+
+        # Jaccard similarity (optimized)
+        if wanted_len and asset_len:
+            union_size = wanted_len + asset_len - inter
+            if union_size > 0:
+                jaccard_score = int((inter / union_size) * 800)
+                score += jaccard_score
+
+        # Same folder bonus
+        if wanted_folder and asset.folder_lower == wanted_folder_lower:
+            score += 100
+
+        # PERFORMANCE OPTIMIZATION: Cache build detection
+        asset_build = ""
+        if build:
+            asset_build = asset.cached_build
+            if asset_build == build:
+                score += build_bonus
+
+        # Class-specific bonuses (optimized)
+        if klass and exact_class_match:
+            if asset.kind == AssetKind.WAGON:
+                score += 150
+                if exact_class_match:
+                    score += 100
+            else:
+                score += 150
+
+        # Special handling: if the wanted name contains both passenger-class tokens and
+        # non-passenger indicators (e.g., 'cc' and 'gc' or 'pantry'), prefer candidate
+        # assets that look like auxiliary/non-passenger cars (EOG, Pantry, Power).
+        if prefer_non_passenger:
+            # PERFORMANCE OPTIMIZATION: the aux-car verdict is a property of
+            # the record alone, so it is memoized on the record (is_aux_car)
+            # instead of re-running the indicator regexes per ranker call
+            if asset.is_aux_car:
+                # Strong boost so auxiliary cars are preferred in conflict cases
+                score += 500
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(
+                        f"AUX-PREFERENCE: Boosting asset {asset.folder}/{asset.name} for wanted='{wanted_name}' (aux indicator present)"
+                    )
+            else:
+                # Slight penalty for obvious passenger-class candidates to de-prioritize them
+                if asset.cached_class and asset.cached_class.upper() in _RANK_PASSENGER_CLASSES_UPPER:
+                    score -= 250
+
+        # Enforce strict GC -> not-CC rule: if the wanted name looks like a generator
+        # (contains generator tokens), penalize passenger-class assets strongly so they
+        # are effectively never selected for generator wants.
+        if wanted_has_generator_tokens:
+            if asset.cached_class and asset.cached_class.upper() in _RANK_PASSENGER_CLASSES_UPPER:
+                # Heavy penalty to prevent CC being selected when GC is requested
+                score -= 2000
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(
+                        f"GENERATOR-STRICT: Penalizing passenger asset {asset.folder}/{asset.name} for wanted='{wanted_name}' (generator token present)"
+                    )
+
+        # Prefer passenger-only assets when wanted has no non-passenger tokens
+        if not wanted_has_non_passenger:
+            # PERFORMANCE OPTIMIZATION: memoized on the record, same as the
+            # aux-car verdict above
+            if asset.has_non_passenger_marks:
+                score -= 1000  # Penalize assets with non-passenger tokens when wanted has none
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(
+                        f"PASSENGER-PREFERENCE: Penalizing non-passenger asset {asset.folder}/{asset.name} for wanted='{wanted_name}' (wanted has no non-passenger tokens)"
+                    )
+
+        # Non-defaults bonus
+        if not asset.folder_lower.startswith("_defaults"):
+            score += 50
+
+        # Add controlled random element for variety (optimized)
+        score += random.randint(0, variety_upper)
+
+        # PERFORMANCE OPTIMIZATION: the composite rank key is materialized at
+        # append time, so min/sort below compare plain tuples in C instead of
+        # calling a key lambda per comparison. The running index replicates
+        # the stable-sort insertion order on full key ties (AssetRecord
+        # itself is not orderable). The tie-break is the cached lowercase
+        # name: the old mod-100 hash pair collided at pool sizes of a dozen
+        # and added no real randomness (the variety randint already supplies
+        # that), while lexicographic order is deterministic and hash-free -
+        # this also makes the historical BOBYN-only name tie-break the rule.
+        scored_candidates.append(
+            (-score, asset.name_lower, len(scored_candidates), asset)
+        )
+
+    if not scored_candidates:
+        return None
+
+    # PERFORMANCE OPTIMIZATION: only pay for a full O(N log N) sort when debug
+    # logging actually needs the ordered ranking; otherwise a single O(N) pass
+    # selects the identical top candidate under the same composite key.
+    if not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return min(scored_candidates)[-1]
+
+    scored_candidates.sort()
+
+    # PERFORMANCE OPTIMIZATION: %s-style with a lazy payload - the top-3
+    # list is only materialized if a handler actually emits the record
+    logging.debug(
+        "RANKING for %s: top 3 candidates: %s", wanted_name, _LazyTop3(scored_candidates)
+    )
+
+    # If multiple candidates have the same top score, log the variety
+    if len(scored_candidates) > 1:
+        top_score = scored_candidates[0][0]
+        tied_candidates = [c for c in scored_candidates if c[0] == top_score]
+        if len(tied_candidates) > 1:
+            chosen_name = (
+                scored_candidates[0][-1].folder + "/" + scored_candidates[0][-1].name
+            )
+            logging.debug(
+                f"TIE-BREAKER: {len(tied_candidates)} candidates with score {top_score}, randomly selected: {chosen_name}"
+            )
+
+    return scored_candidates[0][-1]
+
+
+def choose_best(
+    candidates: List[AssetRecord],
+    wanted_name: str,
+    wanted_folder: str,
+    klass: str,
+    build: str,
+) -> AssetRecord:
+    """Choose the best candidate from exact matches."""
+    if not candidates:
+        return None
+
+    # Prefer same folder, then non-defaults within the preferred bucket
+    # PERFORMANCE OPTIMIZATION: candidate folders come pre-lowercased and a
+    # single traversal partitions into the three buckets the two chained
+    # list comprehensions used to need two passes (and two filters) for
+    wanted_folder_lower = (wanted_folder or "").lower()
+    same_folder = []
+    same_non_defaults = []
+    non_defaults = []
+    for c in candidates:
+        folder_lower = c.folder_lower
+        is_non_default = not folder_lower.startswith("_defaults")
+        if folder_lower == wanted_folder_lower:
+            same_folder.append(c)
+            if is_non_default:
+                same_non_defaults.append(c)
+        if is_non_default:
+            non_defaults.append(c)
+    if same_folder:
+        candidates = same_non_defaults or same_folder
+    elif non_defaults:
+        candidates = non_defaults
+
+    # If multiple candidates remain, use deterministic selection based on name hash
+    if len(candidates) > 1:
+        # Sort deterministically by name hash to ensure consistent selection
+        # PERFORMANCE OPTIMIZATION: the hash is cached on the record instead
+        # of re-allocating (folder + name).lower() per candidate per call
+        candidates.sort(key=lambda x: x.tiebreak_hash)
+        chosen_name = candidates[0].folder + "/" + candidates[0].name
+        logging.info(
+            f"EXACT-MATCH TIE-BREAKER: {len(candidates)} exact matches for '{wanted_name}', randomly selected: {chosen_name}"
+        )
+
+    return candidates[0]
+
+
+# PERFORMANCE OPTIMIZATION: the class-detection pattern tables below were
+# dict literals rebuilt inside detect_wagon_or_engine_class on every call and
+# matched through re.search, whose module cache churns at this pattern count.
+# They are hoisted here and compiled once, in the original priority order
+# (dict insertion order), together with the relaxed variants used for the
+# normalized-text passes.
+
+# --- Explicit patterns (non-alnum lookarounds) - CHECKED FIRST ---
+_CLASS_EXPLICIT_SPECS = {
+    # Brake / Service - SPECIFIC FIX FOR BRN
+    r'(?<![A-Za-z0-9])brn(?![A-Za-z0-9])': 'BRN',
+    r'(?<![A-Za-z0-9])brna(?![A-Za-z0-9])': 'BRNA',
+    r'(?<![A-Za-z0-9])brd(?![A-Za-z0-9])': 'BRD',
+    r'(?<![A-Za-z0-9])brs(?![A-Za-z0-9])': 'BRS',
+    r'(?<![A-Za-z0-9])bru(?![A-Za-z0-9])': 'BRU',
+    r'(?<![A-Za-z0-9])bvcm(?![A-Za-z0-9])': 'BVCM',  # Brake van (before brake to avoid conflicts)
+    r'(?<![A-Za-z0-9])brake(?![A-Za-z0-9])': 'BRAKE',
+    r'(?<![A-Za-z0-9])caboose(?![A-Za-z0-9])': 'CABOOSE',  # Caboose wagon
+    
+    # Coach classes from store files
+    r'(?<![A-Za-z0-9])accc(?![A-Za-z0-9])': 'ACCC',  # AC Chair Car - CHECK FIRST
+    r'(?<![A-Za-z0-9])(?i:ac.*chair.*car|ac.*chair|chair.*car.*ac)(?![A-Za-z0-9])': 'ACCC',  # AC Chair Car variations
+    # ACCC compound pattern - MUST BE BEFORE general AC
+    r'(?<![A-Za-z0-9])(?i:ac\s*[-_]?\s*cc|cc\s*[-_]?\s*ac)(?![A-Za-z0-9])': 'ACCC',              # AC Chair Car compound
+    r'(?<![A-Za-z0-9])1a(?![A-Za-z0-9])': '1A',      # First AC
+    r'(?<![A-Za-z0-9])(?i:ac.*3.*tier|ac.*tier.*3)(?![A-Za-z0-9])': '3A',  # AC 3 Tier variations - BEFORE 2A
+    r'(?<![A-Za-z0-9])(?i:ac.*2.*tier|ac.*tier.*2)(?![A-Za-z0-9])': '2A',  # AC 2 Tier variations
+    r'(?<![A-Za-z0-9])2a(?![A-Za-z0-9])': '2A',      # Second AC
+    r'(?<![A-Za-z0-9])(?i:ac.*first.*class|first.*ac)(?![A-Za-z0-9])': '1A',  # AC First Class variations
+    r'(?<![A-Za-z0-9])slr(?![A-Za-z0-9])': 'SLR',    # Sleeper cum Luggage - BEFORE sl
+    r'(?<![A-Za-z0-9])sleeper(?![A-Za-z0-9])': 'SL', # Sleeper (full word)
+    r'(?<![A-Za-z0-9])sl(?![A-Za-z0-9])': 'SL',      # Sleeper - AFTER slr
+    r'(?<![A-Za-z0-9])sc(?![A-Za-z0-9])': 'SC',      # Second Class Chair
+    r'(?<![A-Za-z0-9])gs(?![A-Za-z0-9])': 'GS',      # General Second
+    r'(?<![A-Za-z0-9])(?i:second\s*class\s*luggage|secondclassluggage|second_class_luggage)(?![A-Za-z0-9])': 'SLR',  # Second Class Luggage
+    r'(?<![A-Za-z0-9])(?i:second\s*class|secondclass|second_class)(?![A-Za-z0-9])': 'GS',  # Second Class variations
+    r'(?<![A-Za-z0-9])second(?![A-Za-z0-9])': 'GS',  # Second (standalone)
+    r'(?<![A-Za-z0-9])pc(?![A-Za-z0-9])': 'PC',      # Pantry Car
+    r'(?<![A-Za-z0-9])eog(?![A-Za-z0-9])': 'EOG',    # End on Generator
+    r'(?<![A-Za-z0-9])fc(?![A-Za-z0-9])': 'FC',      # First Class
+    r'(?<![A-Za-z0-9])cc(?![A-Za-z0-9])': 'CC',      # AC Chair Car - MOVED AFTER ACCC
+    r'(?<![A-Za-z0-9])gn(?![A-Za-z0-9])': 'GN',      # General
+    r'(?<![A-Za-z0-9])2s(?![A-Za-z0-9])': '2S',      # Second Sitting
+    
+    # Additional wagon classes from store files
+    r'(?<![A-Za-z0-9])btcs(?![A-Za-z0-9])': 'BTCS',  # Tank wagon
+    r'(?<![A-Za-z0-9])btpgln(?![A-Za-z0-9])': 'BTPGLN',  # Tank wagon
+    r'(?<![A-Za-z0-9])apl(?![A-Za-z0-9])': 'APL',    # Parcel wagon
+    r'(?<![A-Za-z0-9])auto(?![A-Za-z0-9])': 'AUTO',  # Automobile wagon
+    r'(?<![A-Za-z0-9])coil(?![A-Za-z0-9])': 'COIL',  # Coil wagon
+    r'(?<![A-Za-z0-9])hopper(?![A-Za-z0-9])': 'HOPPER',  # Hopper wagon
+    r'(?<![A-Za-z0-9])pipe(?![A-Za-z0-9])': 'PIPE',  # Pipe wagon
+    r'(?<![A-Za-z0-9])tender(?![A-Za-z0-9])': 'TENDER',  # Tender wagon
+    
+    # Parcel/mail
+    r'(?<![A-Za-z0-9])hcpv(?![A-Za-z0-9])': 'HCPV',
+    r'(?<![A-Za-z0-9])hpcv(?![A-Za-z0-9])': 'HCPV',
+    r'(?<![A-Za-z0-9])parcel(?![A-Za-z0-9])': 'PARCEL',
+    r'(?<![A-Za-z0-9])mail(?![A-Za-z0-9])': 'MAIL',
+
+    # BCN/BCNA family
+    r'(?<![A-Za-z0-9])bcna\d*(?![A-Za-z0-9])': 'BCNA',
+    r'(?<![A-Za-z0-9])bcne(?![A-Za-z0-9])': 'BCNE',
+    r'(?<![A-Za-z0-9])bcnh(?![A-Za-z0-9])': 'BCNH',
+    r'(?<![A-Za-z0-9])bcnl(?![A-Za-z0-9])': 'BCNL',
+    r'(?<![A-Za-z0-9])bccnr(?![A-Za-z0-9])': 'BCCNR',
+    r'(?<![A-Za-z0-9])bccw(?![A-Za-z0-9])': 'BCCW',
+    r'(?<![A-Za-z0-9])bcn(?!a)(?![A-Za-z0-9])': 'BCN',
+    r'(?<![A-Za-z0-9])bcnhl(?![A-Za-z0-9])': 'BCNHL',
+    r'(?<![A-Za-z0-9])bccn(?![A-Za-z0-9])': 'BCCN',
+    
+    # BOBYN family (Brake van)
+    r'(?<![A-Za-z0-9])bobyn[a-z0-9_\-]*?(?![A-Za-z0-9])': 'BOBYN',
+    
+    # BOXN family
+    r'(?<![A-Za-z0-9])boxn[a-z0-9_\-]*?(?![A-Za-z0-9])': 'BOXN',
+    
+    # BOSTH family (Open wagons for coal/ballast)
+    r'(?<![A-Za-z0-9])bosth[a-z0-9_\-]*?(?![A-Za-z0-9])': 'BOSTH',
+    
+    # Tanks
+    r'(?<![A-Za-z0-9])btfln(?![A-Za-z0-9])': 'BTFLN',
+    r'(?<![A-Za-z0-9])btpn(?![A-Za-z0-9])': 'BTPN',
+    r'(?<![A-Za-z0-9])tank(?![A-Za-z0-9])': 'TANK',
+    
+    # Flats / Containers
+    r'(?<![A-Za-z0-9])flat(?:car)?(?![A-Za-z0-9])': 'FLAT',
+    r'(?<![A-Za-z0-9])blc[a-z0-9_\-]*(?![A-Za-z0-9])': 'BLC',
+    
+    # Specialized freight patterns (train-specific and OE wagons) - AVOIDING GN conflict
+    r'(?<![A-Za-z0-9])\d+[-_]?class(?![A-Za-z0-9])': 'GN',  # Train number + CLASS (general class wagon)
+    r'(?<![A-Za-z0-9])\d+[-_]?gc\d*(?![A-Za-z0-9])': 'EOG',  # Train number + GC (generator car)
+    r'(?<![A-Za-z0-9])\d+[-_]?gen\d*(?![A-Za-z0-9])': 'EOG',  # Train number + GEN (generator car)
+    r'(?<![A-Za-z0-9])\d+gene(?![A-Za-z0-9])': 'EOG',  # Train number + GENE (generator car)
+    r'(?<![A-Za-z0-9])\d+[-_]?gene(?![A-Za-z0-9])': 'EOG',  # Train number + GENE (generator car)
+    r'(?<![A-Za-z0-9])\d+[-_]?goods?(?![A-Za-z0-9])': 'BOXN',  # Train number + GOODS (covered wagon)
+    r'(?<![A-Za-z0-9])\d+[-_]?cargo(?![A-Za-z0-9])': 'BOXN',  # Train number + CARGO (covered wagon)
+    r'(?<![A-Za-z0-9])\d+[-_]?cont(?![A-Za-z0-9])': 'BOXN',  # Train number + CONT (covered wagon)
+    r'(?<![A-Za-z0-9])\d+car\d*(?![A-Za-z0-9])': 'BOXN',  # Number + CAR + optional number (covered wagon)
+    r'(?<![A-Za-z0-9])\d+grcar\d*(?![A-Za-z0-9])': 'BOXN',  # Number + GRCAR + optional number (covered wagon)
+    r'(?<![A-Za-z0-9])\d+wdcar\d*(?![A-Za-z0-9])': 'BOXN',  # Number + WDCAR + optional number (covered wagon)
+    r'(?<![A-Za-z0-9])oe\d+cardin\d*(?![A-Za-z0-9])': 'BOXN',  # OE + number + CARDIN + number (covered wagon)
+    r'(?<![A-Za-z0-9])oebarcar(?![A-Za-z0-9])': 'BOXN',  # OE bar car (covered wagon)
+    
+    # Brand/product specific freight wagons (AVOIDING GN conflict with coaches)
+    r'(?<![A-Za-z0-9])cream[-_]?bell(?![A-Za-z0-9])': 'MILKTANKER',  # Cream Bell (dairy) - milk tanker
+    r'(?<![A-Za-z0-9])fanta[-_]?time(?![A-Za-z0-9])': 'TANK',  # Fanta Time (beverage) - tank wagon
+    r'(?<![A-Za-z0-9])gnfc(?![A-Za-z0-9])': 'TANK',  # GNFC (chemicals) - chemical tank
+    r'(?<![A-Za-z0-9])chem(?![A-Za-z0-9])': 'TANK',  # Chemical wagons - tank wagon
+}
+
+
+# ENHANCED: Embedded patterns for cases like "MAXBCNA", "SUPERBOXN", etc.
+# Order matters: more specific patterns first
+_CLASS_EMBEDDED_SPECS = {
+    # BCN/BCNA family embedded patterns (more specific first)
+    r'bcna\d*': 'BCNA',  # Matches bcna, bcna123, etc. when embedded
+    r'bcne': 'BCNE',
+    r'bcnh': 'BCNH',
+    r'bcnl': 'BCNL',
+    r'bccn': 'BCCN',
+    r'bcn\d+': 'BCN',   # Matches bcn123, bcn456, etc. (with digits)
+    r'bcn': 'BCN',      # Matches bcn only (at end to avoid conflicts)
+
+    # ACCC embedded patterns
+    r'accc': 'ACCC',    # AC Chair Car
+
+    # BOXN family embedded patterns
+    r'boxn[a-z0-9]*': 'BOXN',
+
+    # BOBYN family embedded patterns
+    r'bobyn[a-z0-9]*': 'BOBYN',
+
+    # Additional wagon embedded patterns
+    r'btcs': 'BTCS',
+    r'bvcm': 'BVCM',
+    r'caboose': 'CABOOSE',
+    r'coil': 'COIL',
+    r'hopper': 'HOPPER',
+
+    # Tank family embedded patterns
+    r'btfln': 'BTFLN',
+    r'btpn': 'BTPN',
+}
+
+
+# Coach classes (1A, 2A, 3A, GS, SL, etc.)
+_CLASS_COACH_SPECS = {
+    # Specific AC classes (HIGHEST PRIORITY - check these first)
+    r'(?<![A-Za-z0-9])1a(?![A-Za-z0-9])': '1A',
+    r'(?<![A-Za-z0-9])2a(?![A-Za-z0-9])': '2A', 
+    r'(?<![A-Za-z0-9])3a(?![A-Za-z0-9])': '3A',
+    # AC3 pattern for combined AC+class notation
+    r'(?<![A-Za-z0-9])ac3(?![A-Za-z0-9])': '3A',
+    r'(?<![A-Za-z0-9])ac2(?![A-Za-z0-9])': '2A',
+    r'(?<![A-Za-z0-9])ac1(?![A-Za-z0-9])': '1A',
+    
+    # Vande Bharat patterns
+    r'(?i)vbcc\d*(?![A-Za-z0-9])': 'CC',
+    r'(?i)vande[-_]?bharat[-_]?cc\d*(?![A-Za-z0-9])': 'CC',
+    # Vande Bharat Executive Chair Car patterns
+    r'(?i)vbexcc\d*(?![A-Za-z0-9])': 'EC',
+    r'(?i)vande[-_]?bharat[-_]?excc\d*(?![A-Za-z0-9])': 'EC',
+    r'(?i)executive[-_]?chair[-_]?car(?![A-Za-z0-9])': 'EC',
+    
+    # AC Tier patterns (should not conflict with specific classes above)
+    r'(?i)ac[-_]?1[-_]?tier|1[-_]?tier[-_]?ac': '1A',
+    r'(?i)ac[-_]?2[-_]?tier|2[-_]?tier[-_]?ac': '2A', 
+    r'(?i)ac[-_]?3[-_]?tier|3[-_]?tier[-_]?ac': '3A',
+    
+    # AC Chair Car patterns (HIGH PRIORITY) - ENHANCED v2.2.3
+    r'(?i)chaircar[-_]?ac|ac[-_]?chaircar': 'ACCC',
+    r'(?i)chair[-_]?car[-_]?ac|ac[-_]?chair[-_]?car': 'ACCC',
+    r'(?i)ac[-_]?cc|cc[-_]?ac': 'ACCC',
+    
+    
+    
+    # Generic AC chair patterns (lower priority)
+    r'(?i)ac[-_]?chair|chair[-_]?ac': 'ACCC',
+    
+    # Non-AC classes
+    r'(?<![A-Za-z0-9])gs(?![A-Za-z0-9])': 'GS',
+    r'(?<![A-Za-z0-9])slp(?![A-Za-z0-9])': 'SL',
+    r'(?<![A-Za-z0-9])sl(?![A-Za-z0-9])': 'SL',
+    r'(?<![A-Za-z0-9])sleeper(?![A-Za-z0-9])': 'SL',
+    
+    # Service cars
+    r'(?i)pantry[-_]?car|pantry': 'PC',
+    r'(?i)guard|luggage[-_]?van': 'SLR',
+    r'(?<![A-Za-z0-9])slr(?![A-Za-z0-9])': 'SLR',
+    r'(?i)generator|power[-_]?car': 'EOG',
+    r'(?<![A-Za-z0-9])pc(?![A-Za-z0-9])': 'PC',
+    r'(?<![A-Za-z0-9])pantry(?![A-Za-z0-9])': 'PC',
+    r'(?<![A-Za-z0-9])eog(?![A-Za-z0-9])': 'EOG',
+    r'(?<![A-Za-z0-9])generator(?![A-Za-z0-9])': 'EOG',
+    
+    # Chair Car
+    r'(?<![A-Za-z0-9])cc(?![A-Za-z0-9])': 'CC',
+    r'(?<![A-Za-z0-9])chair(?![A-Za-z0-9])': 'CC',
+    
+    # Other coach types
+    r'(?<![A-Za-z0-9])fc(?![A-Za-z0-9])': 'FC',
+    r'(?<![A-Za-z0-9])sc(?![A-Za-z0-9])': 'SC',
+    r'(?<![A-Za-z0-9])gn(?![A-Za-z0-9])': 'GN',
+    r'(?<![A-Za-z0-9])gen(?![A-Za-z0-9])': 'GN',
+    r'(?<![A-Za-z0-9])general(?![A-Za-z0-9])': 'GN',
+    
+    # AC First class patterns (HIGH PRIORITY - before generic AC)
+    r'(?i)ac[-_]?first|first[-_]?ac': '1A',
+    r'(?i)ac1|1ac': '1A',
+    
+    # AC Second class patterns
+    r'(?i)ac[-_]?second|second[-_]?ac': '2A',
+    r'(?i)ac2|2ac': '2A',
+    
+    # AC Third class patterns  
+    r'(?i)ac[-_]?third|third[-_]?ac': '3A',
+    r'(?i)ac3|3ac': '3A',
+    
+    # OE (Overseas/Export) coach patterns
+    r'(?i)oe[-_]?sleep[-_]?car|oesleepcar': 'SL',
+    r'(?i)oe[-_]?serv[-_]?car|oeservcar': 'SLR',
+    
+    # Second class patterns
+    r'(?i)second[-_]?class|secondclass': 'GS',
+    r'(?i)second[-_]?cla': 'GS',
+    
+    # Express train patterns
+    r'(?i)express[-_]?second[-_]?cla': 'GS',
+    r'(?i)exp[-_]?second[-_]?cla': 'GS',
+    
+    # Generic coach patterns
+    r'(?i)new[-_]?gc': 'GN',
+    r'(?i)gc$': 'GN',  # GC at end of name
+    r'(?i)^gc': 'GN',  # GC at start of name
+    
+    # H1/HA1 patterns (likely AC First class variants)
+    r'(?i)h1$|ha1$': '1A',
+    
+    # Tender patterns (for steam locomotives)
+    r'(?i)tender': 'TENDER',
+    
+    # Container patterns
+    r'(?i)container': 'CONTAINER',
+    r'(?i)con$': 'CONTAINER',
+    
+    # Trans patterns (likely transfer/container)
+    r'(?i)trans': 'CONTAINER',
+}
+
+
+
+def _class_token_literal(pattern: str) -> str:
+    """Literal whose whole-token presence in the normalized text is exactly
+    the relaxed match, or ''.
+
+    Only lookaround-wrapped plain literals qualify: the normalized text
+    contains nothing but lowercase alphanumerics and single spaces, so the
+    relaxed boundaries can only land on start, end or a space - i.e. token
+    boundaries - and a set lookup replaces the regex search.
+    """
+    if pattern.startswith('(?<![A-Za-z0-9])') and pattern.endswith('(?![A-Za-z0-9])'):
+        core = pattern[len('(?<![A-Za-z0-9])'):-len('(?![A-Za-z0-9])')]
+        if get_compiled_regex(r'[a-z0-9_]+').fullmatch(core):
+            return core
+    return ''
+
+
+def _compile_class_patterns(specs):
+    """Compile a pattern->class table plus its relaxed normalized-text twin.
+
+    Relaxed entries are (regex, class, token_literal) triples; token_literal
+    is non-empty for the majority of patterns that reduce to whole-token
+    membership on the normalized text (see _class_token_literal), and ''
+    for the genuinely regex-shaped ones, which keep their compiled form.
+    """
+    strict = tuple((get_compiled_regex(p), k) for p, k in specs.items())
+    relaxed = tuple(
+        (
+            get_compiled_regex(
+                p.replace('(?<![A-Za-z0-9])', r'(?:^|\s|[^A-Za-z0-9])').replace(
+                    '(?![A-Za-z0-9])', r'(?:[^A-Za-z0-9]|\s|$)'
+                )
+            ),
+            k,
+            _class_token_literal(p),
+        )
+        for p, k in specs.items()
+    )
+    return strict, relaxed
+
+
+_CLASS_EXPLICIT_PATTERNS, _CLASS_EXPLICIT_RELAXED = _compile_class_patterns(_CLASS_EXPLICIT_SPECS)
+_CLASS_COACH_PATTERNS, _CLASS_COACH_RELAXED = _compile_class_patterns(_CLASS_COACH_SPECS)
+_CLASS_EMBEDDED_PATTERNS = tuple(
+    (get_compiled_regex(p), k) for p, k in _CLASS_EMBEDDED_SPECS.items()
+)
+
+
+def _class_pattern_gate(pairs):
+    """Build a single union alternation used as an existence prefilter.
+
+    PERFORMANCE OPTIMIZATION: one C-level scan answers "could any pattern in
+    this table match?" so the common miss case skips the whole priority loop.
+    The union cannot *replace* the loop: alternation resolves by leftmost
+    match position, not table order, so the loop still decides which class
+    wins when the gate fires.
+    """
+    return get_compiled_regex(
+        "|".join(_scoped_alternative(entry[0].pattern) for entry in pairs)
+    )
+
+
+_CLASS_EXPLICIT_GATE = _class_pattern_gate(_CLASS_EXPLICIT_PATTERNS)
+_CLASS_EXPLICIT_RELAXED_GATE = _class_pattern_gate(_CLASS_EXPLICIT_RELAXED)
+_CLASS_COACH_GATE = _class_pattern_gate(_CLASS_COACH_PATTERNS)
+_CLASS_COACH_RELAXED_GATE = _class_pattern_gate(_CLASS_COACH_RELAXED)
+_CLASS_EMBEDDED_GATE = _class_pattern_gate(_CLASS_EMBEDDED_PATTERNS)
+
+# Recognizes the literal body of a class pattern once its lookarounds are
+# stripped, optionally followed by one of the quantified tails the tables
+# use (bcna\d*, bcn\d+, boxn[a-z0-9]*, boxn[a-z0-9_\-]*?). The captured
+# prefix is a substring the pattern cannot match without.
+_CLASS_CORE_RE = get_compiled_regex(
+    r'([a-z0-9_]+)(?:\\d[*+]|\[a-z0-9\]\*|\[a-z0-9_\\-\]\*\??)?\Z'
+)
+
+
+def _class_literal_core(pattern: str) -> str:
+    """Required literal core of a class pattern, or '' when none is safely
+    extractable (alternations, leading digit runs, optional infixes)."""
+    core = pattern
+    for wrapper in ('(?<![A-Za-z0-9])', '(?![A-Za-z0-9])', '(?i)'):
+        core = core.replace(wrapper, '')
+    match = _CLASS_CORE_RE.fullmatch(core.lstrip('^').rstrip('$'))
+    return match.group(1) if match else ''
+
+
+_CLASS_EXPLICIT_CORES = tuple(_class_literal_core(p) for p in _CLASS_EXPLICIT_SPECS)
+_CLASS_EMBEDDED_CORES = tuple(_class_literal_core(p) for p in _CLASS_EMBEDDED_SPECS)
+_CLASS_COACH_CORES = tuple(_class_literal_core(p) for p in _CLASS_COACH_SPECS)
+
+# PERFORMANCE OPTIMIZATION: Aho-Corasick automaton over those literal cores
+# when pyahocorasick is installed - one linear pass over the name yields the
+# hit set, and only the boundary regexes whose core actually occurred are
+# confirmed. Cores occur contiguously in name_lower iff they occur in the
+# normalized text, so the same hit set prescreens the relaxed passes too.
+# The union gates above remain the fallback and the single source of truth
+# for behavior.
+_CLASS_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    _CLASS_AUTOMATON = ahocorasick.Automaton()
+    for _cores in (_CLASS_EXPLICIT_CORES, _CLASS_EMBEDDED_CORES, _CLASS_COACH_CORES):
+        for _core in _cores:
+            if _core and not _CLASS_AUTOMATON.exists(_core):
+                _CLASS_AUTOMATON.add_word(_core, _core)
+    _CLASS_AUTOMATON.make_automaton()
+    del _cores, _core
+
+
+def _class_pass_candidates(pairs, cores, gate, text, hits):
+    """Candidate (regex, class) pairs for one detection pass, in table order.
+
+    With an automaton hit set, only patterns whose literal core occurred
+    (plus the few without an extractable core) need confirming; without one,
+    the union gate decides between the full table and nothing.
+    """
+    if hits is not None:
+        return [pair for pair, core in zip(pairs, cores) if not core or core in hits]
+    return pairs if gate.search(text) else ()
+
+
+# PERFORMANCE OPTIMIZATION: Compound-wagon prescreen - one C-level union
+# scan decides whether any class indicator occurs at all before the nine
+# per-literal substring probes run. findall on the union cannot replace the
+# probes outright: overlapping indicators ('brna' contains both 'brn' and
+# 'brna') yield one regex match but two distinct probe hits, and the >1
+# compound test depends on that distinct count.
+_COMPOUND_CLASS_INDICATORS = ('brn', 'brna', 'brd', 'brw', 'hcpv', 'hpcv', 'bcn', 'boxn', 'bvcm')
+_COMPOUND_CLASS_GATE = get_compiled_regex('|'.join(_COMPOUND_CLASS_INDICATORS))
+_COMPOUND_PARCEL_INDICATORS = frozenset({'hcpv', 'hpcv'})
+
+# PERFORMANCE OPTIMIZATION: BRN-family probes precomputed at import - the
+# highest-priority loop used to rebuild the \b regex and four separator
+# f-strings per pattern on every call. All four checks stay: \b treats '_'
+# as a word character, so the '_brn_'/'-brn-' and prefix/suffix substring
+# probes catch separator placements the word-boundary regex cannot.
+_BRN_PROBES = tuple(
+    (
+        pattern,
+        class_name,
+        get_compiled_regex(rf'\b{pattern}\b'),
+        f'_{pattern}_',
+        f'-{pattern}-',
+        f'{pattern}_',
+        f'_{pattern}',
+    )
+    for pattern, class_name in {
+        'brn': 'BRN',
+        'brna': 'BRNA',
+        'brd': 'BRD',
+        'brs': 'BRS',
+        'bru': 'BRU',
+        'brake': 'BRAKE',
+        'bvzi': 'BVZI',
+        'bvzc': 'BVZC',
+    }.items()
+)
+
+
+def detect_wagon_or_engine_class(name: str, wanted_role: str = "Engine") -> str:
+    """
+    Detect specific class (WAP7, 3A, BOXN, HCPV, BRN/BRNA, etc.) in a boundary-safe way.
+    COMPREHENSIVE FIX with extensive debugging for BRN detection.
+    """
+    if not name:
+        return ""
+
+    name_lower = str(name).lower()
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(f"CLASS_DETECTION: Processing '{name}' -> '{name_lower}'")
+
+    return _detect_class_impl(name_lower, wanted_role)
+
+
+# PERFORMANCE OPTIMIZATION: memoized like the other detectors - this is the
+# single most expensive classifier (staged pattern walk over the whole name)
+# and is re-invoked with the same (name, role) pairs across matching passes.
+# The cache keys on the already-lowercased name so case variants of the same
+# asset share one slot (the wrapper lowercases before calling).
+@lru_cache(maxsize=65536)
+def _detect_class_impl(name_lower: str, wanted_role: str) -> str:
+    # PERFORMANCE OPTIMIZATION: one level check per call guards the ~40
+    # debug sites below - their f-strings otherwise interpolate on every
+    # cache miss only for logging.debug to discard the result
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+    # Normalize separators so '_' and '-' act like spaces; collapse to single spaces
+    norm = _NORMALIZE_PATTERN.sub(' ', name_lower).strip()
+    if debug_enabled:
+        logging.debug(f"CLASS_DETECTION: Normalized -> '{norm}'")
+
+    # ENHANCED v2.2.8: Compound wagon name handling (BEFORE pattern matching)
+    # For wagons with multiple class indicators, prioritize certain classes
+    if _COMPOUND_CLASS_GATE.search(name_lower):
+        found_classes = [cls for cls in _COMPOUND_CLASS_INDICATORS if cls in name_lower]
+
+        if len(found_classes) > 1:
+            # This is a compound wagon - check for priority classes
+            has_parcel = not _COMPOUND_PARCEL_INDICATORS.isdisjoint(found_classes)
+
+            if has_parcel:
+                if debug_enabled:
+                    logging.debug(f"CLASS_DETECTION: Compound wagon detected with classes {found_classes}, prioritizing HCPV due to parcel indicator")
+                return 'HCPV'
+
+    # Special handling for BVCM + brake combinations
+    if 'bvcm' in name_lower and 'brake' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: BVCM + brake combination detected, prioritizing BVCM")
+        return 'BVCM'
+
+    # --- IMMEDIATE BRN/BRAKE DETECTION (HIGHEST PRIORITY) ---
+    # Handle BRN family specifically since this is your main issue
+
+    # Check for BRN patterns in both original and normalized text
+    norm_tokens = norm.split()
+    for pattern, class_name, regex_pattern, infix_u, infix_h, prefix, suffix in _BRN_PROBES:
+        # Check in original name with word boundaries
+        if regex_pattern.search(name_lower):
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' in original -> {class_name}")
+            return class_name
+        # Check in normalized text
+        if pattern in norm_tokens:
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' in normalized -> {class_name}")
+            return class_name
+        # Check with underscores/hyphens
+        if infix_u in name_lower or infix_h in name_lower:
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' with separators -> {class_name}")
+            return class_name
+        if name_lower.startswith(prefix) or name_lower.endswith(suffix):
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Found BRN pattern '{pattern}' at boundary -> {class_name}")
+            return class_name
+
+    # --- High-priority buckets (cheap checks) ---
+    if 'plasser' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found maintenance -> PLASSER")
+        return "PLASSER"
+    if any(term in name_lower for term in ['tamper','ballast_cleaner','rail_grinder','track_machine','crane','breakdown']):
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found maintenance equipment")
+        return "MAINTENANCE"
+
+    # --- LOCOMOTIVE CLASS DETECTION (check BEFORE AI_HORN to avoid conflicts) ---
+    if wanted_role != "Wagon":
+        for pattern, probe in _LOCO_PATTERN_PROBES:
+            if probe and probe not in name_lower:
+                continue
+            m = pattern.search(name_lower)
+            if m:
+                # Use capture group 1 if it exists (base class), otherwise use full match
+                if m.groups() and m.group(1):
+                    result = m.group(1).upper().replace('-', '').replace('_', '')
+                else:
+                    result = m.group(0).upper()
+                if debug_enabled:
+                    logging.debug(f"CLASS_DETECTION: Locomotive pattern -> {result}")
+                return result
+
+    # AI/HORN detection (AFTER locomotive detection to avoid conflicts)
+    if 'ai' in name_lower and 'horn' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found AI horn -> AI_HORN")
+        return "AI_HORN"
+    if 'horn' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found horn -> HORN")
+        return "HORN"
+
+    # Manufacturer/prefix
+    if name_lower.startswith('bsam_'):
+        base = name_lower[5:]
+        for ft in ['boxn','bobyn','bcna','tank','flat']:
+            if base.startswith(ft):
+                if debug_enabled:
+                    logging.debug(f"CLASS_DETECTION: BSAM prefix -> {ft.upper()}")
+                return ft.upper()
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Generic BSAM -> BSAM")
+        return "BSAM"
+    if name_lower.startswith('asmi'):
+        base = name_lower[4:]
+        for ft in ['bca','bcb','bcn','btp','blc']:
+            if base.startswith(ft):
+                if debug_enabled:
+                    logging.debug(f"CLASS_DETECTION: ASMI prefix -> {ft.upper()}")
+                return ft.upper()
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Generic ASMI -> ASMI")
+        return "ASMI"
+
+    # Multiple Unit classes
+    if 'memu' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found MEMU")
+        return 'MEMU'
+    if 'emu' in name_lower and 'memu' not in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found EMU")
+        return 'EMU'
+    if 'dmu' in name_lower or 'demu' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found DMU")
+        return 'DMU'
+    if 'mmu' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found MMU")
+        return 'MMU'
+
+    # Container early
+    if name_lower.startswith('con_') or 'container' in name_lower:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Found container")
+        return "CONTAINER"
+
+
+    # One linear automaton pass prescreens all five pattern passes below
+    class_hits = None
+    if _CLASS_AUTOMATON is not None:
+        class_hits = {literal for _end, literal in _CLASS_AUTOMATON.iter(name_lower)}
+
+    # Raw text pass
+    for rx, klass in _class_pass_candidates(
+        _CLASS_EXPLICIT_PATTERNS, _CLASS_EXPLICIT_CORES, _CLASS_EXPLICIT_GATE, name_lower, class_hits
+    ):
+        if rx.search(name_lower):
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Matched pattern {rx.pattern} -> {klass}")
+            return klass
+
+    # Relaxed pass over normalized text
+    # PERFORMANCE OPTIMIZATION: lookaround-wrapped literal patterns reduce to
+    # whole-token membership on the normalized text, so most entries are a
+    # set probe instead of a regex search (see _class_token_literal)
+    norm_token_set = set(norm_tokens)
+    for rx, klass, token_literal in _class_pass_candidates(
+        _CLASS_EXPLICIT_RELAXED, _CLASS_EXPLICIT_CORES, _CLASS_EXPLICIT_RELAXED_GATE, norm, class_hits
+    ):
+        matched = (token_literal in norm_token_set) if token_literal else rx.search(norm)
+        if matched:
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Matched relaxed pattern {rx.pattern} -> {klass}")
+            return klass
+
+    # ENHANCED: Embedded pattern pass for cases like "MAXBCNA", "SUPERBOXN", etc.
+    # Add specific embedded patterns for common compound wagon names
+    # Order matters: more specific patterns first
+
+    for rx, klass in _class_pass_candidates(
+        _CLASS_EMBEDDED_PATTERNS, _CLASS_EMBEDDED_CORES, _CLASS_EMBEDDED_GATE, name_lower, class_hits
+    ):
+        # For embedded patterns, we want to match wagon codes within compound names
+        # but avoid obvious false positives like matching 'bcna' in 'abcna'
+        match = rx.search(name_lower)
+        if match:
+            start, end = match.span()
+
+            # Avoid false positives: don't match if the wagon code is clearly part of another word
+            # Exception: allow if the match is at the end of the string
+            if end == len(name_lower):
+                # Match is at end of string - this is likely a valid embedded wagon code
+                if debug_enabled:
+                    logging.debug(f"CLASS_DETECTION: Matched embedded pattern {rx.pattern} at end -> {klass}")
+                return klass
+            elif start > 0 and name_lower[start-1].isalpha():
+                # Match is preceded by a letter - likely a false positive like 'abcna'
+                continue
+            else:
+                # Match appears to be a valid embedded wagon code
+                if debug_enabled:
+                    logging.debug(f"CLASS_DETECTION: Matched embedded pattern {rx.pattern} -> {klass}")
+                return klass
+
+    # --- FIXED: GENERIC TOKEN/PREFIX FALLBACK (covers ALL freight classes) ---
+    tokens = norm.split()
+    if debug_enabled:
+        logging.debug(f"CLASS_DETECTION: Tokens -> {tokens}")
+    
+    try:
+        # PERFORMANCE OPTIMIZATION: use the classifier tables directly -
+        # FREIGHT_TYPES is a frozenset and ALIASES a read-only mapping, so
+        # the per-call set()/dict() copies were pure allocation overhead
+        freight_types = IndianRailwaysClassifier.FREIGHT_TYPES
+        aliases = IndianRailwaysClassifier.ALIASES
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: freight_types size={len(freight_types)}, 'brn' in freight_types = {'brn' in freight_types}")
+    except Exception as e:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Failed to load classifier data: {e}")
+        freight_types = frozenset()
+        aliases = {}
+
+    best = ""
+    for tok in tokens:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Processing token '{tok}'")
+        canon = aliases.get(tok, tok)  # apply alias map first (stays lowercase)
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Token '{tok}' -> canonical '{canon}'")
+        
+        # FIXED: exact match with consistent case
+        if canon in freight_types:  # Check lowercase 'brn' in {'brn', 'brna', ...}
+            cand = canon.upper()  # Return uppercase 'BRN'
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Exact match '{canon}' -> '{cand}'")
+        else:
+            # FIXED: longest-prefix with consistent case
+            cand = ""
+            for L in range(len(canon), 2, -1):  # Use lowercase canon, not uppercase cu
+                prefix = canon[:L]
+                if prefix in freight_types:  # Check lowercase prefix in lowercase set
+                    cand = prefix.upper()  # Return uppercase result
+                    if debug_enabled:
+                        logging.debug(f"CLASS_DETECTION: Prefix match '{prefix}' -> '{cand}'")
+                    break
+            
+        if cand and (not best or len(cand) > len(best)):
+            best = cand
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: New best candidate '{best}'")
+
+    if best:
+        if debug_enabled:
+            logging.debug(f"CLASS_DETECTION: Generic token/prefix fallback -> {best}")
+        return best
+
+    # --- COACH CLASS DETECTION ---
+    # Coach classes (1A, 2A, 3A, GS, SL, etc.)
+
+    # Check coach patterns
+    for rx, klass in _class_pass_candidates(
+        _CLASS_COACH_PATTERNS, _CLASS_COACH_CORES, _CLASS_COACH_GATE, name_lower, class_hits
+    ):
+        if rx.search(name_lower):
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Matched coach pattern {rx.pattern} -> {klass}")
+            return klass
+
+    # Relaxed coach pattern matching (token probes where possible, as above)
+    for rx, klass, token_literal in _class_pass_candidates(
+        _CLASS_COACH_RELAXED, _CLASS_COACH_CORES, _CLASS_COACH_RELAXED_GATE, norm, class_hits
+    ):
+        matched = (token_literal in norm_token_set) if token_literal else rx.search(norm)
+        if matched:
+            if debug_enabled:
+                logging.debug(f"CLASS_DETECTION: Matched relaxed coach pattern {rx.pattern} -> {klass}")
+            return klass
+
+    if debug_enabled:
+        logging.debug(f"CLASS_DETECTION: No class detected for '{name_lower}'")
+    return ""
+
+
+# PERFORMANCE OPTIMIZATION: fallback-classification vocabularies for
+# resolve_asset, built once - the THIRD-CHANCE and no-attribute branches
+# previously rebuilt these literals (re-hashing every member) on each call
+_FREIGHT_WAGON_CLASSES = frozenset({
+    # BCNA family
+    'BCNA', 'BCNE', 'BCNH', 'BCNL', 'BCCNR', 'BCCW', 'BCN', 'BCCN', 'BCBFG', 'BCFC',
+    # BOXN family
+    'BOXN', 'BOXNR', 'BOXNG', 'BOXNHL', 'BOXNM1', 'BOXNM2', 'BOSTH',
+    # Tank wagons
+    'BTPN', 'BTFLN', 'BTAP', 'BTCS', 'BTI', 'TANK', 'MILKTANKER', 'VVN',
+    # Flat/Container wagons
+    'FLAT', 'BLC', 'BLCA', 'BLCB', 'CONTAINER', 'CON', 'CONCOR', 'BCA', 'BCB',
+    # Brake vans
+    'BRD', 'BRN', 'BRNA', 'BRAKE', 'BOBYN', 'BVZI', 'BRW', 'BRS', 'BRU',
+    # Parcel/Mail
+    'HCPV', 'HPCV', 'PARCEL', 'MAIL',
+    # Specialized freight
+    'COIL', 'SLAB', 'AUTO', 'CEMENT', 'TIPPLER',
+    # Manufacturer series
+    'BSAM', 'ASMI', 'APL'
+})
+
+# Oil/Gas/ONGC related indicators
+_OIL_INDICATORS = (
+    'ongc', 'oil', 'gas', 'petrol', 'diesel', 'fuel', 'tanker', 'tank',
+    'crude', 'refinery', 'pipeline', 'petroleum', 'energy', 'hydrocarbon',
+)
+# The no-attribute fallback additionally accepts gas-carrier/chemical terms
+_OIL_INDICATORS_EXTENDED = _OIL_INDICATORS + ('lng', 'lpg', 'chemical', 'petrochem')
+
+_PASSENGER_INDICATORS = (
+    '1a', '2a', '3a', 'ac', 'sl', 'gs', 'cc', 'chair', 'sleeper',
+    'passenger', 'coach', 'pantry', 'eog', 'rajdhani', 'shatabdi',
+)
+
+
+# PERFORMANCE OPTIMIZATION: one cached entry point for the full locked
+# attribute set. The individual detectors are each lru_cached, but deriving
+# an entry still costs seven cache probes (subtype and family and class all
+# fall back from name to folder); consist files repeat the same wagon entry
+# many times, so a repeated entry now costs a single tuple lookup. A fused
+# single-regex pass over name+folder cannot replace the detectors - their
+# results depend on pass ordering and table priority, not on leftmost match
+# position - so the fusion happens at the memoization layer instead.
+@lru_cache(maxsize=65536)
+def derive_locked_attributes(
+    name: str, folder: str, wanted_role: str
+) -> Tuple[str, str, str, str]:
+    """Derive the (subtype, family, klass, build) lock for a consist entry."""
+    subtype = detect_subtype_from_name(name) or detect_subtype_from_name(folder)
+    family = detect_family_from_name(name, wanted_role, subtype) or detect_family_from_name(folder, wanted_role, subtype)
+    klass = detect_wagon_or_engine_class(name, wanted_role) or detect_wagon_or_engine_class(
+        folder, wanted_role
+    )
+    build = detect_build_from_name_or_folder(name, folder)
+    return subtype, family, klass, build
+
+
+class AssetResolver:
+    """Main asset resolution engine with STRICT ATTRIBUTE LOCKING - ENHANCED v2.3.0."""
+
+    def __init__(self, config: ScoreConfig, classifier: IndianRailwaysClassifier):
+        self.config = config
+        self.classifier = classifier
+        self.extractor = AssetMetadataExtractor(classifier)
+        self.index = AssetIndex()
+
+        # Statistics
+        # PERFORMANCE OPTIMIZATION: _stats holds the shared totals; each
+        # resolving thread accumulates deltas in a thread-local buffer (see
+        # _local_stats) and flushes here every 256 calls, so the hot path
+        # touches no shared counters. The stats property merges the reading
+        # thread's pending deltas back in, so direct reads stay exact.
+        self._stats = {
+            "total_processed": 0,
+            "resolved": 0,
+            "changed": 0,
+            "unresolved": 0,
+            # PERFORMANCE OPTIMIZATION: pre-seeded plain dict - the per-entry
+            # increments skip Counter's __missing__ handling entirely
+            "by_phase": {phase: 0 for phase in MatchPhase},
+        }
+        self._tls = threading.local()
+
+        # PERFORMANCE OPTIMIZATION: stats bumps get their own plain Lock -
+        # an uncontended Lock skips RLock's owner bookkeeping, and splitting
+        # it from _lock means counter updates never wait behind the
+        # once-only log bookkeeping (or vice versa)
+        self._stats_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._logged_matches = set()  # Track logged matches to prevent duplicates
+
+        # PERFORMANCE OPTIMIZATION: the strict filter's wildcard semantics
+        # (empty attributes match anything) and the wagon class-compatibility
+        # fallback rule out a composite-key index, but against the frozen
+        # index its result depends only on the lock tuple - and consist
+        # files repeat the same entries - so the filtered pools are memoized
+        # per (kind, family, subtype, klass, build). Treated as read-only
+        # downstream; cleared on every index rebuild.
+        self._locked_pool_cache: Dict[
+            Tuple[AssetKind, str, str, str, str], List[AssetRecord]
+        ] = {}
+
+        # Logging configuration
+        self._verbose_logging = os.getenv('CONSIST_RESOLVER_VERBOSE', 'false').lower() == 'true'
+
+    def __getstate__(self):
+        """Support for pickling - exclude non-picklable objects."""
+        state = self.__dict__.copy()
+        # Remove threading objects that can't be pickled
+        state['_lock'] = None
+        state['_stats_lock'] = None
+        state['_tls'] = None
+        state['_logged_matches'] = None  # Mark for recreation
+        return state
+
+    def __setstate__(self, state):
+        """Support for unpickling - restore state."""
+        self.__dict__.update(state)
+        # Recreate threading objects in worker processes
+        if self._lock is None:
+            self._lock = threading.RLock()
+        if self._stats_lock is None:
+            self._stats_lock = threading.Lock()
+        if self._tls is None:
+            self._tls = threading.local()
+        if self._logged_matches is None:
+            self._logged_matches = set()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Statistics snapshot: shared totals merged with the calling
+        thread's pending thread-local deltas."""
+        with self._stats_lock:
+            merged = dict(self._stats)
+            merged["by_phase"] = dict(self._stats["by_phase"])
+        local = getattr(self._tls, "counters", None)
+        if local is not None:
+            for key, delta in local.items():
+                if key == "by_phase":
+                    by_phase = merged["by_phase"]
+                    for phase, count in delta.items():
+                        if count:
+                            by_phase[phase] += count
+                elif delta:
+                    merged[key] += delta
+        return merged
+
+    def _local_stats(self) -> Dict[str, Any]:
+        """This thread's stats delta buffer, created on first use."""
+        local = getattr(self._tls, "counters", None)
+        if local is None:
+            local = {
+                "total_processed": 0,
+                "resolved": 0,
+                "changed": 0,
+                "unresolved": 0,
+                "by_phase": dict.fromkeys(MatchPhase, 0),
+            }
+            self._tls.counters = local
+            self._tls.calls = 0
+        return local
+
+    def _flush_local_stats(self) -> None:
+        """Merge this thread's delta buffer into the shared totals and reset
+        it in place (callers may hold a reference to the buffer)."""
+        local = getattr(self._tls, "counters", None)
+        if local is None:
+            return
+        with self._stats_lock:
+            totals = self._stats
+            for key, delta in local.items():
+                if key == "by_phase":
+                    phase_totals = totals["by_phase"]
+                    for phase, count in delta.items():
+                        if count:
+                            phase_totals[phase] += count
+                elif delta:
+                    totals[key] += delta
+        local["total_processed"] = 0
+        local["resolved"] = 0
+        local["changed"] = 0
+        local["unresolved"] = 0
+        by_phase = local["by_phase"]
+        for phase in by_phase:
+            by_phase[phase] = 0
+
+    def build_asset_index(
+        self, trainset_dir: Path, required_folders: Optional[Set[str]] = None
+    ) -> int:
+        """Build comprehensive asset index from trainset directory."""
+        logging.info(f"Building asset index from {trainset_dir}")
+        if not trainset_dir.exists() or not trainset_dir.is_dir():
+            raise ValueError(f"Trainset directory not found: {trainset_dir}")
+
+        folders_to_scan = [d for d in trainset_dir.iterdir() if d.is_dir()]
+        assets_found = 0
+
+        # Collect ingest entries with progress reporting
+        # PERFORMANCE OPTIMIZATION: the per-folder directory scans are pure
+        # I/O and run concurrently on a thread pool; worker processes would
+        # pay pickling overhead for what is a single scandir each (the
+        # CPU-bound metadata extraction below already has its own process
+        # pool). executor.map yields in submission order, so the ingest
+        # sequence is identical to the old serial loop.
+        total_folders = len(folders_to_scan)
+        pending: List[Tuple[AssetKind, str, str, str]] = []
+        with ThreadPoolExecutor() as scan_executor:
+            for i, entries in enumerate(
+                scan_executor.map(self._scan_folder, folders_to_scan)
+            ):
+                if i % 50 == 0:  # Progress every 50 folders
+                    logging.info(
+                        f"Scanning folder {i+1}/{total_folders}: {folders_to_scan[i].name}"
+                    )
+                pending.extend(entries)
+
+        # PERFORMANCE OPTIMIZATION: Metadata extraction is CPU-bound
+        # regex/string work, so large ingests are dispatched to worker
+        # processes in batches; per-file tasks would drown in IPC overhead.
+        if len(pending) > _INGEST_BATCH_SIZE:
+            batches = list(_chunked(pending, _INGEST_BATCH_SIZE))
+            logging.info(
+                f"Ingesting {len(pending)} assets in {len(batches)} parallel batches"
+            )
+            with ProcessPoolExecutor() as executor:
+                for records in executor.map(_ingest_batch, batches, chunksize=1):
+                    assets_found += self.index.add_assets(records)
+        else:
+            assets_found += self.index.add_assets(_ingest_batch(pending))
+
+        # Build phase is over; query phase reads the index lock-free
+        self.index.freeze()
+        # Memoized locked pools refer to the previous index contents
+        self._locked_pool_cache.clear()
+
+        logging.info(
+            f"Asset index built: {assets_found} assets in {total_folders} folders"
+        )
+
+        # Log detailed statistics
+        stats = self.index.get_statistics()
+        logging.info(f"Index statistics: {stats}")
+
+        return assets_found
+
+    def _scan_folder(
+        self, folder_path: Path
+    ) -> List[Tuple[AssetKind, str, str, str]]:
+        """Collect ingest entries (kind, name, folder, path) from a folder."""
+        # PERFORMANCE OPTIMIZATION: interned so every entry of a folder (and
+        # every record built from it) shares one folder string
+        folder_name = sys.intern(folder_path.name)
+
+        # PERFORMANCE OPTIMIZATION: one os.scandir sweep replaces the two
+        # Path.glob directory scans, and the stem/path come straight off the
+        # raw entry name instead of going through Path construction. Dotfiles
+        # stay excluded to match glob's "*" semantics, and engines still
+        # precede wagons in the ingest order.
+        engines: List[Tuple[AssetKind, str, str, str]] = []
+        wagons: List[Tuple[AssetKind, str, str, str]] = []
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                entry_name = entry.name
+                if entry_name.startswith("."):
+                    continue
+                if entry_name.endswith(".eng"):
+                    engines.append(
+                        (AssetKind.ENGINE, entry_name[:-4], folder_name, entry.path)
+                    )
+                elif entry_name.endswith(".wag"):
+                    wagons.append(
+                        (AssetKind.WAGON, entry_name[:-4], folder_name, entry.path)
+                    )
+
+        return engines + wagons
+
+    def _log_match_once(self, match_key: str, message: str) -> None:
+        """Log a match message only once to prevent duplicates."""
+        if not self._verbose_logging:
+            return  # Skip logging if verbose mode is disabled
+
+        with self._lock:
+            if match_key not in self._logged_matches:
+                self._logged_matches.add(match_key)
+                logging.info(message)
+
+    def resolve_asset(self, kind: AssetKind, folder: str, name: str) -> MatchResult:
+        """
+        NEW STRICT ATTRIBUTE LOCKING RESOLVER v2.3.0:
+        1. DERIVE AND LOCK - extract Family, Subtype, Class, Build from consist entry
+        2. STRICT FILTERING - only consider trainset assets with EXACT matches for all four attributes
+        3. NAME-FIRST - exact name match within locked attributes (first preference)
+        4. TOKEN MATCHING - apply name/token ranking within locked attributes
+        5. DEFAULT STRICT - require at least Subtype match for defaults
+        6. UNRESOLVED - if no attributes detected or no matches found, mark as UNRESOLVED
+        """
+        # PERFORMANCE OPTIMIZATION: all counter bumps below go to this
+        # thread's delta buffer - no shared state, no lock - and the buffer
+        # is folded into the shared totals every 256 calls
+        local_stats = self._local_stats()
+        local_stats["total_processed"] += 1
+        self._tls.calls += 1
+        if self._tls.calls & 255 == 0:
+            self._flush_local_stats()
+
+        # Convert kind to role string
+        wanted_role = "Engine" if kind == AssetKind.ENGINE else "Wagon"
+
+        # PERFORMANCE OPTIMIZATION: the wanted name/folder are lowercased
+        # once here - the per-step recomputations (and the per-phase
+        # chosen-vs-wanted comparisons) all reuse these and the records'
+        # cached lowered fields
+        name_lower = name.lower()
+        folder_lower = folder.lower()
+
+        # --- STEP 1: DERIVE AND LOCK ATTRIBUTES FROM CONSIST ENTRY ---
+        # Subtype is determined first to inform family detection; the whole
+        # lock is memoized as one tuple (see derive_locked_attributes)
+        subtype, family, klass, build = derive_locked_attributes(
+            name, folder, wanted_role
+        )
+
+        # --- STEP 1.1: SPECIAL AI HORN MATCHING ---
+        # If this is an AI horn equipped asset, match it to any AI horn wagon
+        if build == "AI":
+            self._log_match_once(
+                f"ai_horn_detect_{name}",
+                f"[AI_HORN] MATCH: '{name}' -> detected AI horn asset, searching for wagons"
+            )
+            # Look for any wagon asset containing both "ai" and "horn" in the name
+            # PERFORMANCE OPTIMIZATION: prebuilt at ingestion (same insertion
+            # order as the old full-index scan) instead of O(total assets)
+            ai_horn_matches = self.index.ai_horn_wagons
+            if ai_horn_matches:
+                chosen = ai_horn_matches[0]  # Take the first match
+                self._log_match_once(
+                    f"ai_horn_found_{name}_{chosen.folder}_{chosen.name}",
+                    f"[AI_HORN] MATCH: '{name}' -> {len(ai_horn_matches)} AI horn wagons found, selected: {chosen.folder}/{chosen.name}"
+                )
+                local_stats["resolved"] += 1
+                if (
+                    chosen.folder_lower != folder_lower
+                    or chosen.name_lower != name_lower
+                ):
+                    local_stats["changed"] += 1
+                local_stats["by_phase"][MatchPhase.EXACT_NAME] += 1
+
+                return MatchResult(
+                    chosen=chosen,
+                    phase=MatchPhase.EXACT_NAME,
+                    score=1000.0,
+                    target=self.extractor.extract_metadata(kind, name, folder),
+                    candidates_evaluated=1,
+                    match_details={
+                        "reason": "ai-horn-special-match",
+                        "family": family,
+                        "subtype": subtype,
+                        "class": klass,
+                        "build": build,
+                        "matched_to": f"{chosen.folder}/{chosen.name}"
+                    },
+                )
+            else:
+                logging.warning(f"AI HORN MATCH: No AI horn wagons found in trainset for '{name}' (looked for files containing 'ai' and 'horn')")
+        # SECOND-CHANCE: if class is still empty but subtype suggests freight,
+        # try combined detection over 'folder' and 'name' with generic token fallback.
+        if not klass and _ci_eq(subtype, 'freight'):
+            combined = f"{folder}_{name}"
+            alt = detect_wagon_or_engine_class(combined, wanted_role)
+            if alt:
+                logging.debug(f"CLASS_DETECTION: Second-chance (combined) -> {alt}")
+                klass = alt
+
+        # THIRD-CHANCE: if we have a freight wagon class but no subtype, set subtype to Freight
+        if not subtype and klass:
+            if klass.upper() in _FREIGHT_WAGON_CLASSES:
+                subtype = 'Freight'
+                logging.debug(f"SUBTYPE_DETECTION: Fallback - detected freight wagon class {klass}, setting subtype to Freight")
+
+
+        # --- STEP 1.5: DEFAULT CLASS FALLBACK FOR FREIGHT WAGONS ---
+        # If we have a freight wagon but no class detected, default to oil tanker
+        if not klass and subtype and _ci_eq(subtype, 'freight') and wanted_role == 'Wagon':
+            # Check name and folder for oil-related terms
+            has_oil_indicator = any(
+                indicator in name_lower or indicator in folder_lower
+                for indicator in _OIL_INDICATORS
+            )
+            
+            if has_oil_indicator:
+                klass = 'TANK'  # Default to oil tanker
+                logging.info(f"DEFAULT CLASS: Wagon {folder}/{name} has no class but appears oil-related, defaulting to TANK")
+            else:
+                # Generic freight wagon fallback - could be any type
+                klass = 'FREIGHT'  # Generic freight wagon
+                logging.info(f"DEFAULT CLASS: Wagon {folder}/{name} has no class, defaulting to FREIGHT")
+
+        # --- STEP 2: CHECK FOR UNRESOLVED CONDITIONS ---
+        # If ALL attributes are missing (empty), try fallback classification before marking as UNRESOLVED
+        if not any([family, subtype, klass, build]):
+            # ENHANCED v2.2.7: Fallback classification for wagons with no attributes
+            if wanted_role == 'Wagon':
+                combined_text = folder_lower + " " + name_lower
+
+                # Check if it's NOT passenger (passenger wagons should remain unresolved if no attributes)
+                is_passenger = any(indicator in combined_text for indicator in _PASSENGER_INDICATORS)
+
+                if not is_passenger:
+                    # Oil/Gas/ONGC related indicators - set to tanker
+                    has_oil_indicator = any(
+                        indicator in combined_text for indicator in _OIL_INDICATORS_EXTENDED
+                    )
+
+                    if has_oil_indicator:
+                        # Set fallback attributes for oil/gas wagons
+                        subtype = 'Freight'
+                        klass = 'TANK'
+                        logging.info(f"FALLBACK CLASSIFICATION: Wagon {folder}/{name} has no attributes but appears oil/gas related, defaulting to Freight/TANK")
+                    else:
+                        # Generic freight wagon fallback
+                        subtype = 'Freight'
+                        klass = 'FREIGHT'
+                        logging.info(f"FALLBACK CLASSIFICATION: Wagon {folder}/{name} has no attributes, defaulting to Freight/FREIGHT")
+
+                    # Continue with normal resolution using fallback attributes
+                    # Don't return unresolved - let the normal flow handle it
+                else:
+                    # It's a passenger wagon with no attributes - leave as unresolved
+                    logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=passenger-no-attributes")
+                    local_stats["unresolved"] += 1
+                    local_stats["by_phase"][MatchPhase.UNRESOLVED] += 1
+                    return MatchResult(
+                        chosen=None,
+                        phase=MatchPhase.UNRESOLVED,
+                        score=0.0,
+                        target=self.extractor.extract_metadata(kind, name, folder),
+                        candidates_evaluated=0,
+                        match_details={
+                            "reason": "no-attributes-passenger",
+                            "family": family,
+                            "subtype": subtype,
+                            "class": klass,
+                            "build": build,
+                        },
+                    )
+            else:
+                # ENGINE FALLBACK: For engines with no attributes, try nearest engine match
+                if wanted_role == "Engine" and kind == AssetKind.ENGINE:
+                    all_engines = [asset for asset in self.index.by_kind.get(AssetKind.ENGINE, [])]
+                    if all_engines:
+                        # Find the best engine match using name similarity
+                        engine_match = rank_by_name_then_tokens(all_engines, name, folder, klass, build)
+                        if engine_match:
+                            logging.info(
+                                f"ENGINE NEAREST MATCH (NO ATTRIBUTES): Found nearest engine match for '{name}': {engine_match.folder}/{engine_match.name}"
+                            )
+                            local_stats["resolved"] += 1
+                            if (
+                                engine_match.folder_lower != folder_lower
+                                or engine_match.name_lower != name_lower
+                            ):
+                                local_stats["changed"] += 1
+                            local_stats["by_phase"][MatchPhase.GLOBAL_SCORE] += 1
+
+                            return MatchResult(
+                                chosen=engine_match,
+                                phase=MatchPhase.GLOBAL_SCORE,
+                                score=550.0,
+                                target=self.extractor.extract_metadata(kind, name, folder),
+                                candidates_evaluated=len(all_engines),
+                                match_details={
+                                    "reason": "engine-nearest-match-no-attributes",
+                                    "family": family,
+                                    "subtype": subtype,
+                                    "class": klass,
+                                    "build": build,
+                                },
+                            )
+
+                # Not a wagon or engine fallback didn't apply - mark as unresolved
+                logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=no-attributes-detected")
+                local_stats["unresolved"] += 1
+                local_stats["by_phase"][MatchPhase.UNRESOLVED] += 1
+                return MatchResult(
+                    chosen=None,
+                    phase=MatchPhase.UNRESOLVED,
+                    score=0.0,
+                    target=self.extractor.extract_metadata(kind, name, folder),
+                    candidates_evaluated=0,
+                    match_details={
+                        "reason": "no-attributes",
+                        "family": family,
+                        "subtype": subtype,
+                        "class": klass,
+                        "build": build,
+                    },
+                )
+
+        # --- STEP 3: STRICT FILTERING - GET ONLY ATTRIBUTE-LOCKED CANDIDATES ---
+        # Get all assets of the same kind
+        all_assets = list(self.index.by_kind.get(kind, []))
+
+        # --- STEP 3.5: EXACT NAME MATCH PRIORITY (BEFORE ATTRIBUTE FILTERING) ---
+        # Check for exact name matches first (highest priority)
+        # PERFORMANCE OPTIMIZATION: O(1) reverse-index lookup instead of a
+        # name_equal scan over every asset of the kind
+        exact_pool = self.index.by_name.get(name_lower.strip(), [])
+        all_exact_name_matches = [c for c in exact_pool if c.kind == kind]
+        if all_exact_name_matches:
+            # Choose the best exact match, even if attributes don't match perfectly
+            chosen = choose_best(all_exact_name_matches, name, folder, klass, build)
+            if chosen:
+                logging.debug(f"FINAL MATCH: Wagon {name} -> {chosen.folder}/{chosen.name} Phase=EXACT_NAME Score=1000 Reason=exact-name-any-attributes")
+                local_stats["resolved"] += 1
+                if (
+                    chosen.folder_lower != folder_lower
+                    or chosen.name_lower != name_lower
+                ):
+                    local_stats["changed"] += 1
+                local_stats["by_phase"][MatchPhase.EXACT_NAME] += 1
+
+                return MatchResult(
+                    chosen=chosen,
+                    phase=MatchPhase.EXACT_NAME,
+                    score=1000.0,
+                    target=self.extractor.extract_metadata(kind, name, folder),
+                    candidates_evaluated=len(all_exact_name_matches),
+                    match_details={
+                        "reason": "exact-name-any-attributes",
+                        "family": family,
+                        "subtype": subtype,
+                        "class": klass,
+                        "build": build,
+                    },
+                )
+
+        # Apply strict attribute filtering - only exact matches (for non-exact matches)
+        lock_key = (kind, family, subtype, klass, build)
+        locked_pool = self._locked_pool_cache.get(lock_key)
+        if locked_pool is None:
+            locked_pool = apply_strict_attribute_filter(
+                all_assets, family, subtype, klass, build
+            )
+            self._locked_pool_cache[lock_key] = locked_pool
+
+        # Debug logging for filtering results
+        logging.debug(
+            f"STRICT FILTER for {folder}/{name}: total_assets={len(all_assets)}, locked_pool={len(locked_pool)}"
+        )
+
+        if not locked_pool:
+            # PERFORMANCE OPTIMIZATION: Try lenient fallback before giving up
+            logging.debug(
+                f"STRICT FILTER returned no matches for {folder}/{name}, trying lenient fallback..."
+            )
+            
+            # Try more lenient filtering - focus on class match primarily
+            lenient_pool = []
+            for asset in all_assets:
+                asset_class = asset.cached_class
+                # Lenient matching: require class match if class is detected, otherwise accept any
+                if not klass or _ci_eq(asset_class, klass):
+                    lenient_pool.append(asset)
+            
+            if lenient_pool:
+                logging.info(
+                    f"LENIENT FALLBACK: Found {len(lenient_pool)} assets with class match for {folder}/{name}"
+                )
+                # Continue with normal matching using the lenient pool
+                locked_pool = lenient_pool
+            else:
+                logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=no-matching-attributes-even-lenient")
+                local_stats["unresolved"] += 1
+                local_stats["by_phase"][MatchPhase.UNRESOLVED] += 1
+                return MatchResult(
+                    chosen=None,
+                    phase=MatchPhase.UNRESOLVED,
+                    score=0.0,
+                    target=self.extractor.extract_metadata(kind, name, folder),
+                    candidates_evaluated=len(all_assets),
+                    match_details={
+                        "reason": "no-matching-attributes-even-lenient",
+                        "family": family,
+                        "subtype": subtype,
+                        "class": klass,
+                        "build": build,
+                    },
+                )
+
+        # --- STEP 4: NAME-FIRST WITHIN LOCKED POOL ---
+        # This is now secondary - only reached if no exact matches found in entire pool
+        # PERFORMANCE OPTIMIZATION: restrict the STEP 3.5 reverse-index
+        # bucket to the locked pool instead of running name_equal over every
+        # locked asset. STEP 3.5 returns on any same-kind hit, so by the time
+        # this runs the bucket is empty and the whole step is O(1).
+        if all_exact_name_matches:
+            locked_set = set(locked_pool)
+            exact_name_matches = [
+                c for c in all_exact_name_matches if c in locked_set
+            ]
+        else:
+            exact_name_matches = []
+        if exact_name_matches:
+            chosen = choose_best(exact_name_matches, name, folder, klass, build)
+            if chosen:
+                logging.debug(f"FINAL MATCH: Wagon {name} -> {chosen.folder}/{chosen.name} Phase=EXACT_NAME Score=1000 Reason=exact-name-locked")
+                local_stats["resolved"] += 1
+                if (
+                    chosen.folder_lower != folder_lower
+                    or chosen.name_lower != name_lower
+                ):
+                    local_stats["changed"] += 1
+                local_stats["by_phase"][MatchPhase.EXACT_NAME] += 1
+
+                return MatchResult(
+                    chosen=chosen,
+                    phase=MatchPhase.EXACT_NAME,
+                    score=1000.0,
+                    target=self.extractor.extract_metadata(kind, name, folder),
+                    candidates_evaluated=len(exact_name_matches),
+                    match_details={
+                        "reason": "exact-name-locked",
+                        "family": family,
+                        "subtype": subtype,
+                        "class": klass,
+                        "build": build,
+                    },
+                )
+
+        # --- STEP 5: TOKEN MATCHING WITHIN LOCKED POOL ---
+        token_match = rank_by_name_then_tokens(locked_pool, name, folder, klass, build)
+        if token_match:
+            logging.debug(f"FINAL MATCH: Wagon {name} -> {token_match.folder}/{token_match.name} Phase=KEY_TOKEN_ALL Score=900 Reason=token-match-locked")
+            local_stats["resolved"] += 1
+            if (
+                token_match.folder_lower != folder_lower
+                or token_match.name_lower != name_lower
+            ):
+                local_stats["changed"] += 1
+            local_stats["by_phase"][MatchPhase.KEY_TOKEN_ALL] += 1
+
+            return MatchResult(
+                chosen=token_match,
+                phase=MatchPhase.KEY_TOKEN_ALL,
+                score=900.0,
+                target=self.extractor.extract_metadata(kind, name, folder),
+                candidates_evaluated=len(locked_pool),
+                match_details={
+                    "reason": "token-match-locked",
+                    "family": family,
+                    "subtype": subtype,
+                    "class": klass,
+                    "build": build,
+                },
+            )
+
+        # --- STEP 5.5: LOCAL FOLDER MATCHING ---
+        # Try to find matches in the same folder first (for variety)
+        # Initialize the phase results so the fallback guards below are safe
+        # even when an earlier finder produced no candidates
+        local_match = digit_match = wildcard_match = semantic_match = None
+        # PERFORMANCE OPTIMIZATION: local-folder, digit-near, wildcard and
+        # partial-token candidates all come from one fused pool traversal;
+        # semantic matching stays lazy below
+        (
+            local_folder_matches,
+            digit_near_matches,
+            wildcard_matches,
+            partial_token_matches,
+        ) = _collect_fallback_matches(locked_pool, name, folder_lower)
+        if local_folder_matches and not token_match:
+            local_match = rank_by_name_then_tokens(local_folder_matches, name, folder, klass, build)
+            if local_match:
+                logging.debug(f"FINAL MATCH: Wagon {name} -> {local_match.folder}/{local_match.name} Phase=LOCAL_FOLDER Score=850 Reason=local-folder-match")
+                local_stats["resolved"] += 1
+                if (
+                    local_match.folder_lower != folder_lower
+                    or local_match.name_lower != name_lower
+                ):
+                    local_stats["changed"] += 1
+                local_stats["by_phase"][MatchPhase.LOCAL_FOLDER] += 1
+
+                return MatchResult(
+                    chosen=local_match,
+                    phase=MatchPhase.LOCAL_FOLDER,
+                    score=850.0,
+                    target=self.extractor.extract_metadata(kind, name, folder),
+                    candidates_evaluated=len(local_folder_matches),
+                    match_details={
+                        "reason": "local-folder-match",
+                        "family": family,
+                        "subtype": subtype,
+                        "class": klass,
+                        "build": build,
+                    },
+                )
+
+        # --- STEP 5.6: DIGIT NEAR MATCHING ---
+        # Try to find matches with similar digit patterns
+        if not token_match and not local_match:
+            if digit_near_matches:
+                digit_match = rank_by_name_then_tokens(digit_near_matches, name, folder, klass, build)
+                if digit_match:
+                    logging.debug(f"FINAL MATCH: Wagon {name} -> {digit_match.folder}/{digit_match.name} Phase=DIGIT_NEAR Score=800 Reason=digit-near-match")
+                    local_stats["resolved"] += 1
+                    if (
+                        digit_match.folder_lower != folder_lower
+                        or digit_match.name_lower != name_lower
+                    ):
+                        local_stats["changed"] += 1
+                    local_stats["by_phase"][MatchPhase.DIGIT_NEAR] += 1
+
+                    return MatchResult(
+                        chosen=digit_match,
+                        phase=MatchPhase.DIGIT_NEAR,
+                        score=800.0,
+                        target=self.extractor.extract_metadata(kind, name, folder),
+                        candidates_evaluated=len(digit_near_matches),
+                        match_details={
+                            "reason": "digit-near-match",
+                            "family": family,
+                            "subtype": subtype,
+                            "class": klass,
+                            "build": build,
+                        },
+                    )
+
+        # --- STEP 5.7: WILDCARD MATCHING ---
+        # Try wildcard matching for flexible patterns
+        if not token_match and not local_match and not digit_match:
+            if wildcard_matches:
+                wildcard_match = rank_by_name_then_tokens(wildcard_matches, name, folder, klass, build)
+                if wildcard_match:
+                    logging.debug(f"FINAL MATCH: Wagon {name} -> {wildcard_match.folder}/{wildcard_match.name} Phase=WILDCARD_MATCH Score=750 Reason=wildcard-match")
+                    local_stats["resolved"] += 1
+                    if (
+                        wildcard_match.folder_lower != folder_lower
+                        or wildcard_match.name_lower != name_lower
+                    ):
+                        local_stats["changed"] += 1
+                    local_stats["by_phase"][MatchPhase.WILDCARD_MATCH] += 1
+
+                    return MatchResult(
+                        chosen=wildcard_match,
+                        phase=MatchPhase.WILDCARD_MATCH,
+                        score=750.0,
+                        target=self.extractor.extract_metadata(kind, name, folder),
+                        candidates_evaluated=len(wildcard_matches),
+                        match_details={
+                            "reason": "wildcard-match",
+                            "family": family,
+                            "subtype": subtype,
+                            "class": klass,
+                            "build": build,
+                        },
+                    )
+
+        # --- STEP 5.8: SEMANTIC MATCHING ---
+        # Try semantic similarity matching as a last resort before defaults
+        if not token_match and not local_match and not digit_match and not wildcard_match:
+            semantic_matches = find_semantic_matches(locked_pool, name)
+            if semantic_matches:
+                semantic_match = rank_by_name_then_tokens(semantic_matches, name, folder, klass, build)
+                if semantic_match:
+                    logging.debug(f"FINAL MATCH: Wagon {name} -> {semantic_match.folder}/{semantic_match.name} Phase=SEMANTIC_MATCH Score=700 Reason=semantic-match")
+                    local_stats["resolved"] += 1
+                    if (
+                        semantic_match.folder_lower != folder_lower
+                        or semantic_match.name_lower != name_lower
+                    ):
+                        local_stats["changed"] += 1
+                    local_stats["by_phase"][MatchPhase.SEMANTIC_MATCH] += 1
+
+                    return MatchResult(
+                        chosen=semantic_match,
+                        phase=MatchPhase.SEMANTIC_MATCH,
+                        score=700.0,
+                        target=self.extractor.extract_metadata(kind, name, folder),
+                        candidates_evaluated=len(semantic_matches),
+                        match_details={
+                            "reason": "semantic-match",
+                            "family": family,
+                            "subtype": subtype,
+                            "class": klass,
+                            "build": build,
+                        },
+                    )
+
+        # --- STEP 5.9: PARTIAL TOKEN MATCHING ---
+        # Try partial token matching for more flexible matching
+        if not token_match and not local_match and not digit_match and not wildcard_match and not semantic_match:
+            if partial_token_matches:
+                partial_match = rank_by_name_then_tokens(partial_token_matches, name, folder, klass, build)
+                if partial_match:
+                    logging.debug(f"FINAL MATCH: Wagon {name} -> {partial_match.folder}/{partial_match.name} Phase=KEY_TOKEN_PARTIAL Score=650 Reason=partial-token-match")
+                    local_stats["resolved"] += 1
+                    if (
+                        partial_match.folder_lower != folder_lower
+                        or partial_match.name_lower != name_lower
+                    ):
+                        local_stats["changed"] += 1
+                    local_stats["by_phase"][MatchPhase.KEY_TOKEN_PARTIAL] += 1
+
+                    return MatchResult(
+                        chosen=partial_match,
+                        phase=MatchPhase.KEY_TOKEN_PARTIAL,
+                        score=650.0,
+                        target=self.extractor.extract_metadata(kind, name, folder),
+                        candidates_evaluated=len(partial_token_matches),
+                        match_details={
+                            "reason": "partial-token-match",
+                            "family": family,
+                            "subtype": subtype,
+                            "class": klass,
+                            "build": build,
+                        },
+                    )
+
+        # --- STEP 6: STRICT DEFAULT FALLBACK ---
+        # For defaults, require at least Subtype to match
+        defaults_index = [
+            a for a in self.index.assets if a.folder_lower.startswith("_defaults")
+        ]
+        default_match = pick_strict_default(
+            defaults_index, wanted_role, family, subtype, klass, build
+        )
+        if default_match:
+            logging.debug(f"FINAL MATCH: Wagon {name} -> {default_match.folder}/{default_match.name} Phase={phase} Score=600 Reason=strict-default")
+            local_stats["resolved"] += 1
+            if (
+                default_match.folder_lower != folder_lower
+                or default_match.name_lower != name_lower
+            ):
+                local_stats["changed"] += 1
+            phase = (
+                MatchPhase.DEFAULT_ENGINE
+                if wanted_role == "Engine"
+                else MatchPhase.DEFAULT_WAGON
+            )
+            local_stats["by_phase"][phase] += 1
+
+            return MatchResult(
+                chosen=default_match,
+                phase=phase,
+                score=600.0,
+                target=self.extractor.extract_metadata(kind, name, folder),
+                candidates_evaluated=len(defaults_index),
+                match_details={
+                    "reason": "strict-default",
+                    "family": family,
+                    "subtype": subtype,
+                    "class": klass,
+                    "build": build,
+                },
+            )
+
+        # --- STEP 6.5: ENGINE NEAREST MATCH FALLBACK ---
+        # For engines, if no matches found in locked pool, find nearest engine match
+        if not default_match and wanted_role == "Engine" and kind == AssetKind.ENGINE:
+            all_engines = [asset for asset in self.index.by_kind.get(AssetKind.ENGINE, [])]
+            if all_engines:
+                # Find the best engine match using name similarity
+                engine_match = rank_by_name_then_tokens(all_engines, name, folder, klass, build)
+                if engine_match:
+                    logging.debug(f"FINAL MATCH: Wagon {name} -> {engine_match.folder}/{engine_match.name} Phase=GLOBAL_SCORE Score=550 Reason=engine-nearest-match")
+                    local_stats["resolved"] += 1
+                    if (
+                        engine_match.folder_lower != folder_lower
+                        or engine_match.name_lower != name_lower
+                    ):
+                        local_stats["changed"] += 1
+                    local_stats["by_phase"][MatchPhase.GLOBAL_SCORE] += 1
+
+                    return MatchResult(
+                        chosen=engine_match,
+                        phase=MatchPhase.GLOBAL_SCORE,
+                        score=550.0,
+                        target=self.extractor.extract_metadata(kind, name, folder),
+                        candidates_evaluated=len(all_engines),
+                        match_details={
+                            "reason": "engine-nearest-match",
+                            "family": family,
+                            "subtype": subtype,
+                            "class": klass,
+                            "build": build,
+                        },
+                    )
+
+        # --- STEP 7: FINAL UNRESOLVED ---
+        # Last chance: For engines, try nearest match even if we get to final unresolved
+        if wanted_role == "Engine" and kind == AssetKind.ENGINE:
+            all_engines = [asset for asset in self.index.by_kind.get(AssetKind.ENGINE, [])]
+            if all_engines:
+                # Find the best engine match using name similarity
+                engine_match = rank_by_name_then_tokens(all_engines, name, folder, klass, build)
+                if engine_match:
+                    logging.debug(f"FINAL MATCH: Wagon {name} -> {engine_match.folder}/{engine_match.name} Phase=GLOBAL_SCORE Score=500 Reason=engine-nearest-match-final")
+                    local_stats["resolved"] += 1
+                    if (
+                        engine_match.folder_lower != folder_lower
+                        or engine_match.name_lower != name_lower
+                    ):
+                        local_stats["changed"] += 1
+                    local_stats["by_phase"][MatchPhase.GLOBAL_SCORE] += 1
+
+                    return MatchResult(
+                        chosen=engine_match,
+                        phase=MatchPhase.GLOBAL_SCORE,
+                        score=500.0,  # Slightly lower score for final fallback
+                        target=self.extractor.extract_metadata(kind, name, folder),
+                        candidates_evaluated=len(all_engines),
+                        match_details={
+                            "reason": "engine-nearest-match-final",
+                            "family": family,
+                            "subtype": subtype,
+                            "class": klass,
+                            "build": build,
+                        },
+                    )
+
+        logging.debug(f"FINAL MATCH: Wagon {name} -> UNRESOLVED Phase=UNRESOLVED Score=0 Reason=no-final-match")
+        local_stats["unresolved"] += 1
+        local_stats["by_phase"][MatchPhase.UNRESOLVED] += 1
+
+        return MatchResult(
+            chosen=None,
+            phase=MatchPhase.UNRESOLVED,
+            score=0.0,
+            target=self.extractor.extract_metadata(kind, name, folder),
+            candidates_evaluated=len(locked_pool) if 'locked_pool' in locals() else 0,
+            match_details={
+                "reason": "no-final-match",
+                "family": family if 'family' in locals() else "",
+                "subtype": subtype if 'subtype' in locals() else "",
+                "class": klass if 'klass' in locals() else "",
+                "build": build if 'build' in locals() else "",
+            },
+        )
+
+class ConsistParser:
+    """Parser for MSTS consist (.con) files."""
+
+    def _read_lines_with_encoding(self, path):
+        data = path.read_bytes()
+        # BOM / NUL detection → UTF-16
+        if (
+            data.startswith(b"\xff\xfe")
+            or data.startswith(b"\xfe\xff")
+            or b"\x00" in data[:128]
+        ):
+            try:
+                return data.decode("utf-16").splitlines()
+            except UnicodeError:
+                return data.decode("utf-16le", errors="ignore").splitlines()
+        # fallbacks
+        for enc in ("utf-8-sig", "cp1252", "latin-1"):
+            try:
+                return data.decode(enc).splitlines()
+            except UnicodeError:
+                pass
+        return data.decode("utf-8", errors="ignore").splitlines()
+
+    @dataclass(slots=True)
+    class ConsistEntry:
+        """Represent a single asset reference in consist file."""
+
+        index: int
+        kind: AssetKind
+        folder: str
+        name: str
+        kind_token: str
+        line_content: str
+
+    @dataclass(slots=True)
+    class ParsedConsist:
+        """Represent a parsed consist file."""
+
+        path: Path
+        filename: str
+        entries: List["ConsistParser.ConsistEntry"]
+        lines: List[str]
+
+        def get_required_folders(self) -> Set[str]:
+            """Get set of all folders referenced in this consist."""
+            return {entry.folder for entry in self.entries if entry.folder}
+
+    def parse_consist_file(self, consist_path: Path) -> ParsedConsist:
+        try:
+            lines = self._read_lines_with_encoding(consist_path)
+        except Exception as e:
+            logging.warning(f"Failed to read consist file {consist_path}: {e}")
+            return self.ParsedConsist(consist_path, consist_path.name, [], [])
+
+        entries = []
+
+        block_type = None
+        block_lines = []
+        for i, line in enumerate(lines):
+            # Detect block start
+            if re.match(r"\s*Wagon\s*\(", line, re.IGNORECASE):
+                block_type = "Wagon"
+                block_lines = [line]
+                continue
+            elif re.match(r"\s*Engine\s*\(", line, re.IGNORECASE):
+                block_type = "Engine"
+                block_lines = [line]
+                continue
+            # If inside block, collect lines
+            if block_type:
+                block_lines.append(line)
+                # Detect block end
+                if line.strip() == ")":
+                    # Search for asset data inside block
+                    for j, block_line in enumerate(block_lines):
+                        match = re.search(
+                            r"(EngineData|WagonData)\s*\(([^)]*)\)",
+                            block_line,
+                            re.IGNORECASE,
+                        )
+                        if match:
+                            kind_token = match.group(1)
+                            inside = match.group(2).strip()
+                            try:
+                                tokens = shlex.split(inside)
+                            except Exception:
+                                tokens = inside.split()
+                            raw_name = tokens[0] if len(tokens) > 0 else ""
+                            raw_folder = tokens[1] if len(tokens) > 1 else ""
+                            kind = (
+                                AssetKind.ENGINE
+                                if kind_token.lower().startswith("engine")
+                                else AssetKind.WAGON
+                            )
+                            entry = self.ConsistEntry(
+                                index=i - len(block_lines) + j + 1,
+                                kind=kind,
+                                folder=raw_folder,
+                                name=raw_name,
+                                kind_token=kind_token,
+                                line_content=block_line.strip(),
+                            )
+                            entries.append(entry)
+                    block_type = None
+                    block_lines = []
+
+        return self.ParsedConsist(
+            consist_path, consist_path.name, entries, [line.rstrip() for line in lines]
+        )
+
+    def parse_multiple_consists(self, consist_paths: List[Path]) -> List[ParsedConsist]:
+        """Parse multiple consist files with parallel processing."""
+        results = []
+
+        if len(consist_paths) == 1:
+            # Single file - no need for threading
+            return [self.parse_consist_file(consist_paths[0])]
+
+        # Parallel processing for multiple files
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            future_to_path = {
+                executor.submit(self.parse_consist_file, path): path
+                for path in consist_paths
+            }
+
+            for future in as_completed(future_to_path):
+                try:
+                    result = future.result(timeout=30)
+                    results.append(result)
+                except Exception as e:
+                    path = future_to_path[future]
+                    logging.error(f"Failed to parse {path}: {e}")
+
+        return results
+
+
+class MSSTResolver:
+    """CLI wrapper for AssetResolver, handling config and consist resolution."""
+
+    def __init__(self, config_path=None):
+        # Load config if provided, else use defaults
+        if config_path and hasattr(config_path, "exists") and config_path.exists():
+            with open(config_path, "r", encoding="utf-8") as f:
+                config_dict = json.load(f)
+            self.config = ScoreConfig(**config_dict)
+        else:
+            self.config = ScoreConfig()
+
+        self.classifier = IndianRailwaysClassifier()
+        self.resolver = AssetResolver(self.config, self.classifier)
+        self.parser = ConsistParser()
+
+    def _resolve_asset_worker(self, entry_data):
+        """Worker function for parallel asset resolution."""
+        kind, folder, name = entry_data
+        return self.resolver.resolve_asset(kind, folder, name)
+
+    def resolve_consists(
+        self, consists_path, trainset_dir, dry_run=False, explain=False
+    ):
+        start_time = time.time()
+        consists_path = Path(consists_path)
+        trainset_dir = Path(trainset_dir)
+
+        # Find all .con files
+        consist_files = list(consists_path.glob("*.con"))
+        if not consist_files:
+            logging.error(f"No consist files found in {consists_path}")
+            return {"unresolved": 0}
+
+        logging.info(f"Found {len(consist_files)} consist files to process")
+
+        # Parse consists
+        consists = self.parser.parse_multiple_consists(consist_files)
+
+        # Log parsing results
+        total_entries = sum(len(c.entries) for c in consists)
+        logging.info(
+            f"Parsed {len(consists)} consists with {total_entries} asset references"
+        )
+
+        # Build asset index
+        assets_indexed = self.resolver.build_asset_index(trainset_dir)
+
+        # Prepare all entries for parallel processing
+        all_entries = []
+        entry_info = []  # Keep track of which result belongs to which entry (filename, entry, original_index)
+
+        for consist in consists:
+            for entry in consist.entries:
+                idx = len(all_entries)
+                all_entries.append((entry.kind, entry.folder, entry.name))
+                entry_info.append((consist.filename, entry, idx))
+
+        # Resolve all entries using parallel processing
+        logging.info("Starting STRICT ATTRIBUTE LOCKING resolution process with optimized parallel processing...")
+        
+        # Use ProcessPoolExecutor for CPU-bound asset resolution with dynamic worker scaling
+        cpu_count = multiprocessing.cpu_count()
+        max_workers = min(cpu_count * 2, 16)  # Cap at 16 to avoid excessive overhead
+        logging.info(f"Using ProcessPoolExecutor with {max_workers} workers (CPU cores: {cpu_count})")
+        
+        results = []
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Submit all entries for parallel processing and track original index
+            future_to_entry = {
+                executor.submit(self._resolve_asset_worker, entry_data): (entry_data, info)
+                for entry_data, info in zip(all_entries, entry_info)
+            }
+
+            # Collect results as they complete
+            raw_results = []
+            for future in as_completed(future_to_entry):
+                entry_data, (consist_filename, entry, orig_idx) = future_to_entry[future]
+                try:
+                    result = future.result(timeout=30)  # 30 second timeout per asset
+                    raw_results.append((orig_idx, entry_data, result, consist_filename, entry))
+                except Exception as e:
+                    logging.error(f"Error processing asset {entry.folder}/{entry.name}: {str(e)}")
+                    failed_result = MatchResult(
+                        chosen=None,
+                        phase=MatchPhase.UNRESOLVED,
+                        score=0.0,
+                        target=self.resolver.extractor.extract_metadata(entry.kind, entry.name, entry.folder),
+                        candidates_evaluated=0,
+                        match_details={"reason": f"parallel_processing_error: {str(e)}"}
+                    )
+                    raw_results.append((orig_idx, entry_data, failed_result, consist_filename, entry))
+
+            # Sort results by original order to ensure consistency
+            raw_results.sort(key=lambda x: x[0])
+            
+            # Process results in deterministic order
+            seen_explains = set()
+            # Buckets for explain messages - we will print/log changed first, unresolved next, unchanged last
+            changed_explains: List[Tuple[int, str]] = []
+            unresolved_explains: List[Tuple[int, str, str]] = []  # (orig_idx, explain_msg, diff_text)
+            unchanged_explains: List[Tuple[int, str]] = []
+            for orig_idx, entry_data, result, consist_filename, entry in raw_results:
+                try:
+                    results.append(result)
+                    
+                    if explain:
+                        details = result.match_details
+                        resolved_info = (
+                            f"{result.chosen.folder}/{result.chosen.name}"
+                            if result.chosen
+                            else "UNRESOLVED"
+                        )
+
+                        # Prefer locked class from attribute detection; fallback to chosen asset metadata
+                        resolved_class = ""
+                        locked_class = details.get("class", "") if details else ""
+                        if locked_class:
+                            resolved_class = locked_class
+                        elif result.chosen:
+                            meta = result.chosen.metadata
+                            if getattr(meta, "freight_type", ""):
+                                resolved_class = meta.freight_type
+                            elif getattr(meta, "coach_type", ""):
+                                resolved_class = meta.coach_type
+                            elif getattr(meta, "engine_class", ""):
+                                resolved_class = meta.engine_class
+                            else:
+                                resolved_class = ""
+                        else:
+                            resolved_class = ""
+
+                        # Show both detected (locked) attributes and chosen asset attributes
+                        chosen_meta = {
+                            "family": "",
+                            "subtype": "",
+                            "class": "",
+                            "build": "",
+                        }
+                        if result.chosen and getattr(result.chosen, "metadata", None):
+                            meta = result.chosen.metadata
+                            # First try to detect attributes from asset name/folder
+                            detected_class = ""
+                            detected_subtype = ""
+                            detected_family = ""
+                            detected_build = ""
+                            if result.chosen:
+                                asset_role = "Engine" if result.chosen.kind == AssetKind.ENGINE else "Wagon"
+                                detected_class = detect_wagon_or_engine_class(
+                                    result.chosen.name, asset_role
+                                ) or detect_wagon_or_engine_class(result.chosen.folder, asset_role) or ""
+                                detected_subtype = detect_subtype_from_name(
+                                    result.chosen.name
+                                ) or detect_subtype_from_name(result.chosen.folder) or ""
+                                detected_family = detect_family_from_name(
+                                    result.chosen.name, asset_role, detected_subtype
+                                ) or detect_family_from_name(result.chosen.folder, asset_role, detected_subtype) or ""
+                                detected_build = detect_build_from_name_or_folder(
+                                    result.chosen.name, result.chosen.folder
+                                ) or ""
+                            
+                            # Use detected values first, then metadata, then locked attributes
+                            chosen_meta["family"] = detected_family or getattr(meta, "family", "") or ""
+                            chosen_meta["subtype"] = detected_subtype or getattr(meta, "subtype", "") or ""
+                            chosen_meta["class"] = (
+                                detected_class
+                                or getattr(meta, "freight_type", "")
+                                or getattr(meta, "coach_type", "")
+                                or getattr(meta, "engine_class", "")
+                                or ""
+                            )
+                            chosen_meta["build"] = detected_build or getattr(meta, "build", "") or ""
+
+                        locked_meta = {
+                            "family": details.get("family", "") if details else "",
+                            "subtype": details.get("subtype", "") if details else "",
+                            "class": details.get("class", "") if details else "",
+                            "build": details.get("build", "") if details else "",
+                        }
+
+                        # For exact matches, if chosen asset has no detectable attributes, use locked attributes
+                        if result.phase == MatchPhase.EXACT_NAME:
+                            if not chosen_meta["family"] and locked_meta["family"]:
+                                chosen_meta["family"] = locked_meta["family"]
+                            if not chosen_meta["subtype"] and locked_meta["subtype"]:
+                                chosen_meta["subtype"] = locked_meta["subtype"]
+                            if not chosen_meta["class"] and locked_meta["class"]:
+                                chosen_meta["class"] = locked_meta["class"]
+                            if not chosen_meta["build"] and locked_meta["build"]:
+                                chosen_meta["build"] = locked_meta["build"]
+
+                        # Build per-attribute display showing LOCKED -> CHOSEN
+                        attr_pairs = []
+                        for label, key in (
+                            ("Family", "family"),
+                            ("Subtype", "subtype"),
+                            ("Class", "class"),
+                            ("Build", "build"),
+                        ):
+                            lval = locked_meta.get(key, "") or "-"
+                            cval = chosen_meta.get(key, "") or "-"
+                            if lval != cval:
+                                attr_pairs.append(f"{label}: {lval} -> {cval}")
+                            else:
+                                attr_pairs.append(f"{label}: {lval}")
+
+                        # Compose a compact explain message that clearly shows changed attrs
+                        attrs_text = " | ".join(attr_pairs)
+
+                        # Build a stable key from the original entry data including the original index
+                        entry_key = (
+                            entry_data[0].value if hasattr(entry_data[0], 'value') else str(entry_data[0]),
+                            entry_data[1],
+                            entry_data[2],
+                            orig_idx,
+                        )
+
+                        explain_msg = (
+                            f"{entry_key[0]} {entry_key[1]}/{entry_key[2]} -> {resolved_info} "
+                            f"Phase={result.phase.name} Score={result.score:.0f} "
+                            f"Reason={details.get('reason', '')} | {attrs_text}"
+                        )
+
+                        # Collect explain messages into buckets so we can control display order
+                        if entry_key not in seen_explains:
+                            seen_explains.add(entry_key)
+                            # Determine category: changed (asset resolved to different target),
+                            # unresolved (no chosen), or unchanged (already matching)
+                            if result.chosen is None:
+                                # Build a small diff summary for unresolved (what was requested)
+                                # Show locked vs requested attributes
+                                diff_text = attrs_text
+                                unresolved_explains.append((orig_idx, explain_msg, diff_text))
+                            else:
+                                if result.is_changed:
+                                    changed_explains.append((orig_idx, explain_msg))
+                                else:
+                                    unchanged_explains.append((orig_idx, explain_msg))
+                except Exception as e:
+                    logging.error(f"Failed to resolve asset {entry_data}: {e}")
+                    # Create unresolved result for failed entries
+                    failed_result = MatchResult(
+                        chosen=None,
+                        phase=MatchPhase.UNRESOLVED,
+                        score=0.0,
+                        target=self.resolver.extractor.extract_metadata(entry.kind, entry.name, entry.folder),
+                        candidates_evaluated=0,
+                        match_details={"reason": f"parallel_processing_error: {str(e)}"}
+                    )
+                    results.append(failed_result)
+
+        # Emit explain messages in the requested order: changed, unresolved (with diffs), unchanged
+        if explain:
+            # Sort each bucket by original index to preserve file order
+            changed_explains.sort(key=lambda x: x[0])
+            unresolved_explains.sort(key=lambda x: x[0])
+            unchanged_explains.sort(key=lambda x: x[0])
+
+            # First print changed explains
+            if changed_explains:
+                logging.info("--- CHANGED ENTRIES ---")
+                print("--- CHANGED ENTRIES ---")
+            for _idx, msg in changed_explains:
+                print(msg)
+                logging.info(f"FINAL MATCH: {msg}")
+
+            # Then print unresolved explains including diffs
+            if unresolved_explains:
+                logging.info("--- UNRESOLVED ENTRIES ---")
+                print("--- UNRESOLVED ENTRIES ---")
+            for _idx, msg, diff in unresolved_explains:
+                # Show the explain msg and a compact diff line
+                print(msg)
+                logging.info(f"FINAL MATCH: {msg}")
+                if diff:
+                    print(f"  DIFF: {diff}")
+                    logging.info(f"FINAL DIFF: {diff}")
+
+            # Finally, print unchanged explains
+            if unchanged_explains:
+                logging.info("--- UNCHANGED (already matching) ---")
+                print("--- UNCHANGED (already matching) ---")
+            for _idx, msg in unchanged_explains:
+                print(msg)
+                logging.info(f"FINAL MATCH: {msg}")
+
+        logging.info(f"Asset resolution completed. Processed {len(results)} entries.")        # Write results if not dry_run
+        if not dry_run:
+            logging.info("Writing changes to consist files...")
+            self._write_results(consists, results)
+        else:
+            logging.info("DRY-RUN mode: No changes written to files")
+
+        # Final stats
+        duration = time.time() - start_time
+        stats = self._generate_final_statistics(results, duration, assets_indexed)
+        self._display_summary(stats, dry_run)
+
+        return stats
+
+    def _write_results(self, consists, results):
+        """Write resolution results back to consist files."""
+        result_iter = iter(results)
+        files_modified = 0
+
+        for consist in consists:
+            lines_modified = False
+            changes_made = 0
+            new_lines = consist.lines.copy()
+
+            for entry in consist.entries:
+                result = next(result_iter)
+
+                if result.is_resolved and result.is_changed:
+                    chosen = result.chosen
+                    # Modify the line
+                    old_line = new_lines[entry.index]
+                    new_line = (
+                        f'    {entry.kind_token} ( {chosen.name} "{chosen.folder}" )'
+                    )
+                    new_lines[entry.index] = new_line
+                    lines_modified = True
+                    changes_made += 1
+                    logging.info(
+                        f"CHANGE: {consist.filename} line {entry.index + 1}: {entry.folder}/{entry.name} -> {chosen.folder}/{chosen.name}"
+                    )
+
+            # Write file if modified
+            if lines_modified:
+                try:
+                    with open(consist.path, "w", encoding="utf-8") as f:
+                        f.write("\n".join(new_lines) + "\n")
+                    files_modified += 1
+                    logging.info(
+                        f"Updated consist file: {consist.path} ({changes_made} changes)"
+                    )
+                except Exception as e:
+                    logging.error(f"Failed to write {consist.path}: {e}")
+
+        logging.info(
+            f"File writing completed. Modified {files_modified} consist files."
+        )
+
+    def _generate_final_statistics(self, results, duration, assets_indexed):
+        """Generate comprehensive final statistics."""
+        total = len(results)
+        resolved = sum(1 for r in results if r.is_resolved)
+        changed = sum(1 for r in results if r.is_changed)
+        unresolved = total - resolved
+        already_matching = resolved - changed
+
+        phase_counts = Counter(r.phase for r in results)
+
+        return {
+            "total_processed": total,
+            "resolved": resolved,
+            "changed": changed,
+            "unresolved": unresolved,
+            "already_matching": already_matching,
+            "assets_indexed": assets_indexed,
+            "duration_seconds": duration,
+            "resolution_rate": resolved / total if total > 0 else 0,
+            "change_rate": changed / total if total > 0 else 0,
+            "phase_breakdown": dict(phase_counts),
+            "resolver_stats": self.resolver.index.get_statistics(),
+        }
+
+    def _display_summary(self, stats, dry_run):
+        """Display comprehensive summary with colors and log to file."""
+        summary_lines = []
+
+        header = "MSTS ASSET RESOLVER - STRICT ATTRIBUTE LOCKING v2.3.0 - FINAL SUMMARY"
+        separator = "=" * 80
+
+        # Build summary content
+        summary_lines.append("")
+        summary_lines.append(separator)
+        summary_lines.append(header)
+        summary_lines.append(separator)
+        summary_lines.append(
+            f"Files Processed: {stats['total_processed']} asset references"
+        )
+        summary_lines.append(
+            f"Assets Indexed: {stats['assets_indexed']} trainset assets"
+        )
+        summary_lines.append(
+            f"Processing Time: {stats['duration_seconds']:.1f} seconds"
+        )
+        summary_lines.append("")
+
+        # Resolution statistics
+        summary_lines.append(
+            f"RESOLVED: {stats['resolved']} ({stats['resolution_rate']*100:.1f}%)"
+        )
+        summary_lines.append(
+            f"CHANGED: {stats['changed']} ({stats['change_rate']*100:.1f}%)"
+        )
+        already_matching_rate = (
+            stats["already_matching"] / stats["total_processed"]
+            if stats["total_processed"] > 0
+            else 0
+        )
+        summary_lines.append(
+            f"ALREADY MATCHING: {stats['already_matching']} ({already_matching_rate*100:.1f}%)"
+        )
+        summary_lines.append(
+            f"UNRESOLVED: {stats['unresolved']} ({(1 - stats['resolution_rate'])*100:.1f}%)"
+        )
+        summary_lines.append("")
+
+        # Phase breakdown
+        summary_lines.append("Resolution Method Breakdown:")
+        for phase, count in stats["phase_breakdown"].items():
+            percentage = (count / stats["total_processed"]) * 100
+            summary_lines.append(f"  • {phase.name}: {count} ({percentage:.1f}%)")
+        summary_lines.append("")
+
+        # Recommendations
+        summary_lines.append("Recommendations:")
+        if stats["unresolved"] > 0:
+            summary_lines.append(
+                "  • Review UNRESOLVED items for missing trainset assets or incomplete attribute detection"
+            )
+        if stats["changed"] > 0 and dry_run:
+            summary_lines.append(
+                f"  • Run without --dry-run to apply {stats['changed']} changes"
+            )
+        if stats["resolution_rate"] > 0.8:
+            summary_lines.append(
+                f"  • Excellent! {stats['resolution_rate']*100:.1f}% resolution rate achieved with strict matching"
+            )
+
+        summary_lines.append("STRICT ATTRIBUTE LOCKING FEATURES:")
+        summary_lines.append(
+            "  • Family, Subtype, Class, Build derived and locked from consist entries"
+        )
+        summary_lines.append(
+            "  • Only trainset assets with EXACT attribute matches considered"
+        )
+        summary_lines.append("  • Default fallback requires at least Subtype match")
+        summary_lines.append(
+            "  • Entries with no detectable attributes marked UNRESOLVED"
+        )
+        summary_lines.append(separator)
+
+        # Display on terminal with colors
+        print("\n" + "=" * 80)
+        self._print_status(
+            "MSTS ASSET RESOLVER - STRICT ATTRIBUTE LOCKING v2.3.0 - FINAL SUMMARY",
+            Fore.YELLOW + Style.BRIGHT,
+        )
+        print("=" * 80)
+
+        # Basic statistics
+        print(f"Files Processed: {stats['total_processed']} asset references")
+        print(f"Assets Indexed: {stats['assets_indexed']} trainset assets")
+        print(f"Processing Time: {stats['duration_seconds']:.1f} seconds")
+        print()
+
+        # Resolution statistics
+        self._print_colored_stat(
+            "RESOLVED", stats["resolved"], stats["resolution_rate"], Fore.GREEN
+        )
+        self._print_colored_stat(
+            "CHANGED", stats["changed"], stats["change_rate"], Fore.BLUE
+        )
+        self._print_colored_stat(
+            "ALREADY MATCHING",
+            stats["already_matching"],
+            already_matching_rate,
+            Fore.YELLOW,
+        )
+        self._print_colored_stat(
+            "UNRESOLVED", stats["unresolved"], 1 - stats["resolution_rate"], Fore.RED
+        )
+        print()
+
+        # Phase breakdown
+        print("Resolution Method Breakdown:")
+        for phase, count in stats["phase_breakdown"].items():
+            percentage = (count / stats["total_processed"]) * 100
+            print(f"  • {phase.name}: {count} ({percentage:.1f}%)")
+        print()
+
+        # Recommendations
+        print("Recommendations:")
+        if stats["unresolved"] > 0:
+            self._print_status(
+                "  • Review UNRESOLVED items for missing trainset assets or incomplete attribute detection",
+                Fore.RED,
+            )
+        if stats["changed"] > 0 and dry_run:
+            self._print_status(
+                f"  • Run without --dry-run to apply {stats['changed']} changes",
+                Fore.GREEN,
+            )
+        if stats["resolution_rate"] > 0.8:
+            self._print_status(
+                f"  • Excellent! {stats['resolution_rate']*100:.1f}% resolution rate achieved with strict matching",
+                Fore.GREEN,
+            )
+
+        print()
+        print("STRICT ATTRIBUTE LOCKING FEATURES:")
+        self._print_status(
+            "  • Family, Subtype, Class, Build derived and locked from consist entries",
+            Fore.CYAN,
+        )
+        self._print_status(
+            "  • Only trainset assets with EXACT attribute matches considered",
+            Fore.CYAN,
+        )
+        self._print_status(
+            "  • Default fallback requires at least Subtype match", Fore.CYAN
+        )
+        self._print_status(
+            "  • Entries with no detectable attributes marked UNRESOLVED", Fore.CYAN
+        )
+
+        print("=" * 80)
+
+        # Log complete summary to file
+        for line in summary_lines:
+            logging.info(f"SUMMARY: {line}")
+
+    def _print_colored_stat(self, label: str, value: int, percentage: float, color):
+        """Print a colored statistic line."""
+        if COLORS_AVAILABLE:
+            print(f"{color}{label}: {value} ({percentage*100:.1f}%)")
+        else:
+            print(f"{label}: {value} ({percentage*100:.1f}%)")
+
+    def _print_status(self, message: str, color=None):
+        """Print a status message with optional color."""
+        if COLORS_AVAILABLE and color:
+            print(color + message)
+        else:
+            print(message)
+
+
+def main():
+    """Main application entry point."""
+    parser = argparse.ArgumentParser(
+        description="Advanced MSTS Asset Resolver with STRICT ATTRIBUTE LOCKING (v2.3.0)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python consistEditor.py consists/ trainsets/
+  python consistEditor.py consists/ trainsets/ --dry-run --explain
+  python consistEditor.py consists/ trainsets/ --config config.json
+
+NEW v2.3.0 STRICT ATTRIBUTE LOCKING:
+  - DERIVE AND LOCK: Extract Family, Subtype, Class, Build from consist entry
+  - STRICT FILTERING: Only consider trainset assets with EXACT matches for all four attributes
+  - NAME-FIRST: Exact name match within locked attributes (highest priority)
+  - TOKEN MATCHING: Apply name/token ranking within locked attributes
+  - DEFAULT STRICT: Require at least Subtype match for defaults
+  - UNRESOLVED: If no attributes detected or no matches found, mark as UNRESOLVED
+
+PREVIOUS ENHANCEMENTS (v2.2.5):
+  - ENHANCED: Comprehensive freight detection based on 533 real wagon files analysis
+  - NEW: Support for BSAM series (168 wagons), CON_ containers (42 wagons), ASMI series (37 wagons)
+  - NEW: Enhanced freight types: CEMENT, COIL, COAL, MILKTANKER, BCCN, BRNA, BRW, BCA, BCB, BTI
+        """,
+    )
+
+    parser.add_argument(
+        "consists_path",
+        type=Path,
+        help="Path to consists directory containing .con files",
+    )
+    parser.add_argument(
+        "trainset_dir",
+        type=Path,
+        help="Path to trainset directory containing asset folders",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Preview changes without modifying files"
+    )
+    parser.add_argument(
+        "--explain", action="store_true", help="Show detailed resolution information"
+    )
+    parser.add_argument("--config", type=Path, help="Path to configuration JSON file")
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible results (default: 42)")
+
+    args = parser.parse_args()
+
+    # Delete previous log file FIRST - with retry for Windows file locking
+    log_path = Path("msts_resolver.log")
+    if log_path.exists():
+        for attempt in range(3):
+            try:
+                log_path.unlink()
+                break
+            except (PermissionError, OSError) as e:
+                if attempt < 2:  # Try up to 3 times
+                    time.sleep(0.5)  # Short delay between retries
+                else:
+                    # If all retries fail, try to rename it instead
+                    try:
+                        backup_name = (
+                            f"msts_resolver_old_{random.randint(1000,9999)}.log"
+                        )
+                        log_path.rename(backup_name)
+                    except Exception:
+                        # If everything fails, just continue - logs will append
+                        pass
+            except Exception:
+                break
+
+    # Set up logging AFTER deleting old log
+    log_level = logging.DEBUG if args.debug else logging.INFO
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("msts_resolver.log"),
+            logging.StreamHandler(sys.stdout),
+        ],
+    )
+
+    try:
+        # Create resolver instance
+        resolver = MSSTResolver(args.config)
+
+        # Show startup message
+        # Use fixed seed for consistent results, or configurable seed
+        if hasattr(args, 'seed') and args.seed is not None:
+            random.seed(args.seed)
+            logging.info(f"Random seed set to: {args.seed}")
+        else:
+            # Use fixed seed for consistent results instead of time-based
+            random.seed(42)  # Fixed seed for reproducible results
+            logging.info(f"Random seed initialized: 42 (fixed for consistency)")
+
+        startup_msg = "MSTS Asset Resolver v2.3.0 - STRICT ATTRIBUTE LOCKING"
+        print(startup_msg)
+        print("=" * 80)
+        logging.info(startup_msg)
+        logging.info("=" * 80)
+        logging.info("NEW v2.3.0 STRICT ATTRIBUTE LOCKING:")
+        logging.info(
+            "- DERIVE AND LOCK: Extract Family, Subtype, Class, Build from consist entry"
+        )
+        logging.info(
+            "- STRICT FILTERING: Only consider trainset assets with EXACT matches for all four attributes"
+        )
+        logging.info(
+            "- NAME-FIRST: Exact name match within locked attributes (highest priority)"
+        )
+        logging.info(
+            "- TOKEN MATCHING: Apply name/token ranking within locked attributes"
+        )
+        logging.info("- DEFAULT STRICT: Require at least Subtype match for defaults")
+        logging.info(
+            "- UNRESOLVED: If no attributes detected or no matches found, mark as UNRESOLVED"
+        )
+        logging.info("PREVIOUS v2.2.5 ENHANCEMENTS:")
+        logging.info(
+            "- ENHANCED: Comprehensive freight detection based on 533 real wagon files analysis"
+        )
+        logging.info(
+            "- NEW: Support for BSAM series (168 wagons), CON_ containers (42 wagons), ASMI series (37 wagons)"
+        )
+        logging.info(
+            "- NEW: Enhanced freight types: CEMENT, COIL, COAL, MILKTANKER, BCCN, BRNA, BRW, BCA, BCB, BTI"
+        )
+        # Random seed already initialized above for consistency
+
+        # Run resolution
+        results = resolver.resolve_consists(
+            consists_path=args.consists_path,
+            trainset_dir=args.trainset_dir,
+            dry_run=args.dry_run,
+            explain=args.explain,
+        )
+
+        # Exit with appropriate code
+        if results["unresolved"] > 0:
+            sys.exit(1)  # Some assets unresolved
+        else:
+            sys.exit(0)  # All assets resolved
+
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user")
+        sys.exit(130)
+    except Exception as e:
+        logging.error(f"Fatal error: {e}")
+        if args.debug:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file